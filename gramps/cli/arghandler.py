@@ -48,7 +48,8 @@ import sys
 from gramps.gen.recentfiles import recent_files
 from gramps.gen.utils.file import (rm_tempdir, get_empty_tempdir, 
                                    get_unicode_path_from_env_var)
-from gramps.gen.db import DbBsddb
+from gramps.gen.db import create_database
+from gramps.gen.db.dictionary import load_in_memory
 from .clidbman import CLIDbManager, NAME_FILE, find_locker_name
 
 from gramps.gen.plug import BasePluginManager
@@ -171,6 +172,9 @@ class ArgHandler(object):
         self.imp_db_path = None
         self.dbman = CLIDbManager(self.dbstate)
         self.force_unlock = parser.force_unlock
+        self.stats = parser.stats
+        self.in_memory = parser.in_memory
+        self.memory_db = None
         self.cl = 0
         self.imports = []
         self.exports = []
@@ -454,6 +458,12 @@ class ArgHandler(object):
 
     def cleanup(self):
         print(_("Cleaning up."), file=sys.stderr)
+        statistics = self.__get_statistics()
+        if statistics is not None:
+            print(_("Database statistics:"), file=sys.stderr)
+            print(statistics.report(), file=sys.stderr)
+        if self.memory_db is not None:
+            self.memory_db.close()
         # remove files in import db subdir after use
         self.dbstate.db.close()
         if self.imp_db_path:
@@ -477,8 +487,7 @@ class ArgHandler(object):
                     self.imp_db_path, title = self.dbman.create_new_db_cli()
                 else:
                     self.imp_db_path = get_empty_tempdir("import_dbdir")
-                    newdb = DbBsddb()
-                    newdb.write_version(self.imp_db_path)
+                    create_database(self.imp_db_path)
                 
                 try:
                     self.sm.open_activate(self.imp_db_path)
@@ -489,12 +498,40 @@ class ArgHandler(object):
                     print(_("Exiting..."), file=sys.stderr)
                     sys.exit(0)
 
+            self.__enable_statistics()
             for imp in self.imports:
                 msg = _("Importing: file %(filename)s, format %(format)s.") % \
                         {'filename' : imp[0], 'format' : imp[1]}
                 print(msg, file=sys.stderr)
                 self.cl_import(imp[0], imp[1])
 
+    def __enable_statistics(self):
+        """
+        Count the database accesses if --stats was given.
+        """
+        if self.stats and hasattr(self.dbstate.db, 'enable_statistics'):
+            self.dbstate.db.enable_statistics()
+
+    def __get_read_db(self):
+        """
+        Return the database the reports, books and exports read: a copy of
+        the family tree in memory if --in-memory was given.
+        """
+        if not self.in_memory:
+            return self.dbstate.db
+        if self.memory_db is None:
+            print(_("Loading the Family Tree into memory."), file=sys.stderr)
+            self.memory_db = load_in_memory(self.dbstate.db)
+        return self.memory_db
+
+    def __get_statistics(self):
+        """
+        Return the statistics of the database accesses, or None.
+        """
+        if hasattr(self.dbstate.db, 'get_statistics'):
+            return self.dbstate.db.get_statistics()
+        return None
+
     def __open_action(self):
         """
         Take action on a family tree dir to open. It will be opened in the 
@@ -509,6 +546,7 @@ class ArgHandler(object):
             try:
                 self.sm.open_activate(self.open)
                 print(_("Opened successfully!"), file=sys.stderr)
+                self.__enable_statistics()
             except:
                 print(_("Error opening the file."), file=sys.stderr)
                 print(_("Exiting..."), file=sys.stderr)
@@ -566,7 +604,7 @@ class ArgHandler(object):
         for plugin in pmgr.get_export_plugins():
             if family_tree_format == plugin.get_extension():
                 export_function = plugin.get_export_function()
-                export_function(self.dbstate.db, filename, self.user)
+                export_function(self.__get_read_db(), filename, self.user)
 
     #-------------------------------------------------------------------------
     #
@@ -599,10 +637,10 @@ class ArgHandler(object):
                         report_class = eval('mod.' + pdata.reportclass)
                         options_class = eval('mod.' + pdata.optionclass)
                         if category in (CATEGORY_BOOK, CATEGORY_CODE):
-                            options_class(self.dbstate.db, name, category, 
-                                          options_str_dict)
+                            options_class(self.__get_read_db(), name,
+                                          category, options_str_dict)
                         else:
-                            cl_report(self.dbstate.db, name, category, 
+                            cl_report(self.__get_read_db(), name, category, 
                                       report_class, options_class,
                                       options_str_dict)
                         return
@@ -654,6 +692,10 @@ class ArgHandler(object):
                                 options_class=options_class, 
                                 options_str_dict=options_str_dict,
                                 user=self.user)
+                        # the tool may have changed the tree
+                        if self.memory_db is not None:
+                            self.memory_db.close()
+                            self.memory_db = None
                         return
                 msg = _("Unknown tool name.")
             else:
@@ -685,7 +727,8 @@ class ArgHandler(object):
             book_list = BookList('books.xml', self.dbstate.db)
             if name:
                 if name in book_list.get_book_names():
-                    cl_book(self.dbstate.db, name, book_list.get_book(name), 
+                    cl_book(self.__get_read_db(), name,
+                            book_list.get_book(name), 
                             options_str_dict)
                     return
                 msg = _("Unknown book name.")
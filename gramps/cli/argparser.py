@@ -78,6 +78,8 @@ Application options
   -c, --config=[config.setting[:value]]  Set config setting(s) and start Gramps
   -y, --yes                              Don't ask to confirm dangerous actions (non-GUI mode only)
   -q, --quiet                            Suppress progress indication output (non-GUI mode only)
+  --stats                                Count the database accesses of the opened Family Tree
+  --in-memory                            Run reports and exports on an in-memory copy of the Family Tree
   -v, --version                          Show versions
 """)
 
@@ -186,6 +188,8 @@ class ArgParser(object):
         self.runqml = False
         self.quiet = False
         self.auto_accept = False
+        self.stats = False
+        self.in_memory = False
 
         self.errors = []
         self.parse_args()
@@ -216,6 +220,9 @@ class ArgParser(object):
                  Gramps without :value, the actual config.setting is shown
         11/ -y --yes: assume user's acceptance of any CLI prompt (see cli.user.User.prompt)
         12/ -q --quiet: suppress extra noise on sys.stderr, such as progress indicators
+        13/ --stats: count the database accesses, reported on exit in CLI mode
+        14/ --in-memory: run the reports, books and exports on a copy of the
+                 family tree held in memory
                             
         """
         try:
@@ -356,6 +363,10 @@ class ArgParser(object):
                 self.auto_accept = True
             elif option in ['-q', '--quiet']:
                 self.quiet = True
+            elif option in ['--stats']:
+                self.stats = True
+            elif option in ['--in-memory']:
+                self.in_memory = True
         
         #clean options list
         cleandbg.reverse()
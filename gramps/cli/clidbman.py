@@ -61,7 +61,8 @@ _LOG = logging.getLogger(DBLOGNAME)
 #-------------------------------------------------------------------------
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
-from gramps.gen.db import DbBsddb
+from gramps.gen.db import get_backend, make_database, create_database
+from gramps.gen.db.sqlite import sqlite_summary
 from gramps.gen.plug import BasePluginManager
 from gramps.gen.config import config
 from gramps.gen.constfunc import win, conv_to_unicode
@@ -143,7 +144,12 @@ class CLIDbManager(object):
         Returns (people_count, bsddb_version, schema_version) of
         current DB.
         Returns ("Unknown", "Unknown", "Unknown") if invalid DB or other error.
+        For an SQLite family tree, the SQLite version is returned in place of
+        the bsddb version.
         """
+        if get_backend(dirpath) == 'sqlite':
+            return sqlite_summary(dirpath)
+
         if config.get('preferences.use-bsddb3') or sys.version_info[0] >= 3:
             from bsddb3 import dbshelve, db
         else:
@@ -287,9 +293,11 @@ class CLIDbManager(object):
         """
         print(_('Import finished...'))
 
-    def create_new_db_cli(self, title=None):
+    def create_new_db_cli(self, title=None, backend=None):
         """
-        Create a new database.
+        Create a new database, stored with the database backend named
+        backend, 'bsddb' or 'sqlite'. If backend is None, the
+        'database.backend' setting is used.
         """
         new_path = find_next_db_dir()
 
@@ -304,9 +312,8 @@ class CLIDbManager(object):
         name_file.write(title)
         name_file.close()
 
-        # write the version number into metadata
-        newdb = DbBsddb()
-        newdb.write_version(new_path)
+        # write the backend and the version number into metadata
+        create_database(new_path, backend)
 
         (tval, last) = time_val(new_path)
         
@@ -371,8 +378,7 @@ class CLIDbManager(object):
     
                 # Create a new database
                 self.__start_cursor(_("Importing data..."))
-                dbclass = DbBsddb
-                dbase = dbclass()
+                dbase = make_database(new_path)
                 dbase.load(new_path, user.callback)
     
                 import_function = plugin.get_import_function()
@@ -154,6 +154,17 @@ register('behavior.welcome', 100)
 register('behavior.web-search-url', 'http://google.com/#&q=%(text)s')
 register('behavior.addons-url', "http://svn.code.sf.net/p/gramps-addons/code/trunk/")
 
+register('database.backend', 'bsddb')
+register('database.backup-incremental', False)
+register('database.backup-max-deltas', 10)
+register('database.cache-size', 1000)
+register('database.codec', 'marshal2')
+register('database.rebuild-processes', 0)
+register('database.transaction-spill', 10000)
+register('database.undo-compress', True)
+register('database.undo-max-age', 0)
+register('database.undo-max-size', 100)
+
 register('export.proxy-order', [
         ["privacy", 0], 
         ["living", 0], 
@@ -285,6 +285,7 @@ LONGOPTS = [
     "g-fatal-warnings",
     "help",
     "import=", 
+    "in-memory",
     "load-modules=",
     "list" 
     "name=",
@@ -299,6 +300,7 @@ LONGOPTS = [
     "sm-client-id=", 
     "sm-config-prefix=", 
     "sm-disable",
+    "stats",
     "sync",
     "usage", 
     "version",
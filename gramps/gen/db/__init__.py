@@ -44,6 +44,9 @@
             - B{DbReadBase} - virtual and implementation-independent methods for reading data (U{gen/db/base.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/db/base.py?view=markup})
             - B{Callback} - callback and signal functions (U{gen/utils/callback.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/utils/callback.py?view=markup})
         - B{UpdateCallback} - callback functionality (U{gen/updatecallback.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/db/read.py?view=markup gen/updatecallback.py?view=markup>})
+    - B{DbSqlite} - read and write implementation to SQLite databases (gen/db/sqlite.py)
+        - B{DictionaryDb} - in-memory implementation of DbReadBase and DbWriteBase (gen/db/dictionary.py)
+        - B{Callback} - callback and signal functions (U{gen/utils/callback.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/utils/callback.py?view=markup})
     - B{DbDjango} - read and write implementation to Django-based databases (U{web/dbdjango.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/webapp/dbdjango.py?view=markup})
         - B{DbWriteBase} - virtual and implementation-independent methods for reading data (U{gen/db/base.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/db/base.py?view=markup})
         - B{DbReadBase} - virtual and implementation-independent methods for reading data (U{gen/db/base.py<http://svn.code.sf.net/p/gramps/code/trunk/gramps/gen/db/base.py?view=markup})
@@ -58,6 +61,15 @@
     defined in the Python classes above. The data is stored as pickled
     tuples and unserialized into the primary data types (below).
 
+    DbSqlite
+    ========
+
+    The DbSqlite interface stores the same serialized tuples in the tables of
+    an SQLite database, next to indexed columns for the GRAMPS IDs, the
+    change times, the sort names of people, the dates of events and the
+    references between objects. The backend of a family tree is chosen
+    when it is created, from the 'database.backend' setting.
+
     DbDjango
     ========
 
@@ -81,4 +93,6 @@ from .txn import *
 from .undoredo import *
 from .exceptions import *
 from .write import *
+from .sqlite import DbSqlite
+from .backends import get_backend, make_database, create_database
 from .backup import backup, restore
@@ -0,0 +1,93 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Selection of the database backend of a family tree.
+
+The name of the backend a family tree is stored with is written in a text
+file in its directory when the tree is created. Trees without that file
+were created with BSDDB.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import os
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..config import config
+from .dbconst import DBBACKEND
+from .write import DbBsddb
+from .sqlite import DbSqlite
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+BACKENDS = {
+    'bsddb':  DbBsddb,
+    'sqlite': DbSqlite,
+    }
+
+DEFAULT_BACKEND = 'bsddb'
+
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def get_backend(dirpath):
+    """
+    Return the name of the database backend of the family tree in dirpath.
+    """
+    path = os.path.join(dirpath, DBBACKEND)
+    if os.path.isfile(path):
+        with open(path, "r") as backend_file:
+            backend = backend_file.readline().strip()
+        if backend in BACKENDS:
+            return backend
+    return DEFAULT_BACKEND
+
+def make_database(dirpath):
+    """
+    Return a new, not yet loaded, database of the backend of the family tree
+    in dirpath.
+    """
+    return BACKENDS[get_backend(dirpath)]()
+
+def create_database(dirpath, backend=None):
+    """
+    Create an empty family tree in the existing directory dirpath, stored
+    with backend, or with the 'database.backend' setting if it is None.
+    """
+    if backend is None:
+        backend = config.get('database.backend')
+    if backend not in BACKENDS:
+        backend = DEFAULT_BACKEND
+    with open(os.path.join(dirpath, DBBACKEND), "w") as backend_file:
+        backend_file.write(backend)
+    BACKENDS[backend]().write_version(dirpath)
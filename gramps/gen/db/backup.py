@@ -47,6 +47,26 @@ Restoring the data is just as simple. The backup file is parsed an
 entry at a time, and inserted into the associated database table. The
 derived tables are built automatically as the items are entered into
 db.
+
+Incremental backups
+===================
+
+When 'database.backup-incremental' is set, a backup only writes, for each
+primary table, a delta file with the records changed since the previous
+backup, found with the change time indices of the database. A delta file
+starts with the list of all the keys of the table, so that the records
+removed since the previous backup are removed again on restore. The
+metadata table is small and is always written in full.
+
+The time of the last backup and the number of deltas written since the
+last full backup are kept in the deltas.gbkp file. After
+'database.backup-max-deltas' deltas the next backup is a full one, which
+removes the deltas. A full backup is also made after a batch transaction
+or an undo, since these can store records with a change time older than
+the last backup.
+
+Restoring loads the full backup of a table, then replays the deltas in
+order, skipping any delta older than the full backup.
 """
 
 #-------------------------------------------------------------------------
@@ -56,6 +76,7 @@ db.
 #-------------------------------------------------------------------------
 import os
 import sys
+import time
 if sys.version_info[0] < 3:
     import cPickle as pickle
 else:
@@ -66,6 +87,7 @@ else:
 # Gramps libs
 #
 #------------------------------------------------------------------------
+from ..config import config
 from .exceptions import DbException
 from .write import FAMILY_TBL, PLACES_TBL, SOURCES_TBL, MEDIA_TBL, \
     EVENTS_TBL, PERSON_TBL, REPO_TBL, NOTE_TBL, TAG_TBL, META, CITATIONS_TBL
@@ -78,6 +100,9 @@ from .write import FAMILY_TBL, PLACES_TBL, SOURCES_TBL, MEDIA_TBL, \
 import logging
 LOG = logging.getLogger(".Backup")
 
+# Base name of the file with the state of the incremental backups
+DELTA_STATE = "deltas"
+
 def backup(database):
     """
     Exports the database to a set of backup files. These files consist
@@ -86,11 +111,17 @@ def backup(database):
     The heavy lifting is done by the private __do__export function. The 
     purpose of this function is to catch any exceptions that occur.
 
+    A database with its own backup, such as DbSqlite, makes it with its
+    make_backup method instead.
+
     @param database: database instance to backup
     @type database: DbDir
     """
     try:
-        __do_export(database)
+        if hasattr(database, 'make_backup'):
+            database.make_backup()
+        else:
+            __do_export(database)
     except (OSError, IOError) as msg:
         raise DbException(str(msg))
 
@@ -116,16 +147,89 @@ def __mk_tmp_name(database, base):
     """
     return os.path.join(database.get_save_path(), base + ".gbkp.new")
 
+def __mk_delta_name(database, base, number):
+    """
+    Return the name of a delta backup of the database table
+
+    @param database: database instance 
+    @type database: DbDir
+    @param base: base name of the table
+    @type base: str
+    @param number: number of the delta since the last full backup
+    @type number: int
+    """
+    return __mk_backup_name(database, "%s-%d" % (base, number))
+
+def __read_state(database):
+    """
+    Return the time of the last backup and the number of deltas written
+    since the last full backup, or None if there is no usable full backup.
+
+    @param database: database instance 
+    @type database: DbDir
+    """
+    try:
+        with open(__mk_backup_name(database, DELTA_STATE), 'rb') as state:
+            return pickle.load(state)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+def __write_state(database, backup_time, count):
+    """
+    Record the time of the backup just made and the number of deltas
+    written since the last full backup.
+
+    @param database: database instance 
+    @type database: DbDir
+    @param backup_time: time at which the backup was started
+    @type backup_time: int
+    @param count: number of deltas since the last full backup
+    @type count: int
+    """
+    tmp_name = __mk_tmp_name(database, DELTA_STATE)
+    with open(tmp_name, 'wb') as state:
+        pickle.dump((backup_time, count), state, 2)
+    __replace(tmp_name, __mk_backup_name(database, DELTA_STATE))
+
+def __replace(old_name, new_name):
+    """
+    Move the file old_name to new_name, replacing it.
+    """
+    if os.path.isfile(new_name):
+        os.unlink(new_name)
+    os.rename(old_name, new_name)
+
 def __do_export(database):
+    """
+    Make a full or an incremental backup of the database.
+
+    @param database: database instance to backup
+    @type database: DbDir
+    """
+    backup_time = int(time.time())
+    state = __read_state(database)
+    if (state is None
+            or not config.get('database.backup-incremental')
+            or state[1] >= config.get('database.backup-max-deltas')
+            or database.metadata.get(b'backup_full', default=False)):
+        __do_full_export(database, state, backup_time)
+    else:
+        __do_delta_export(database, state, backup_time)
+
+def __do_full_export(database, state, backup_time):
     """
     Loop through each table of the database, saving the pickled data
     a file.
 
     @param database: database instance to backup
     @type database: DbDir
+    @param state: state of the incremental backups before this one
+    @type state: tuple
+    @param backup_time: time at which the backup was started
+    @type backup_time: int
     """
     try:
-        for (base, tbl) in __build_tbl_map(database):
+        for (base, tbl, table) in __build_tbl_map(database):
             backup_name = __mk_tmp_name(database, base)
             backup_table = open(backup_name, 'wb')
     
@@ -139,12 +243,69 @@ def __do_export(database):
     except (IOError,OSError):
         return
 
-    for (base, tbl) in __build_tbl_map(database):
+    for (base, tbl, table) in __build_tbl_map(database):
         new_name = __mk_backup_name(database, base)
         old_name = __mk_tmp_name(database, base)
-        if os.path.isfile(new_name):
-            os.unlink(new_name)
-        os.rename(old_name, new_name)
+        __replace(old_name, new_name)
+
+    # The deltas of the previous full backup are no longer needed; the
+    # state is written first, so that they are never replayed on top of
+    # the new full backup
+    __write_state(database, backup_time, 0)
+    if state is not None:
+        for number in range(1, state[1] + 1):
+            for (base, tbl, table) in __build_tbl_map(database):
+                delta_name = __mk_delta_name(database, base, number)
+                if os.path.isfile(delta_name):
+                    os.unlink(delta_name)
+    database.set_backup_full(False)
+
+def __do_delta_export(database, state, backup_time):
+    """
+    Save, for each primary table, the keys of the table and the pickled
+    data of the records changed since the last backup to a delta file. The
+    metadata table is saved in full.
+
+    @param database: database instance to backup
+    @type database: DbDir
+    @param state: state of the incremental backups before this one
+    @type state: tuple
+    @param backup_time: time at which the backup was started
+    @type backup_time: int
+    """
+    last_time, count = state
+    number = count + 1
+    try:
+        for (base, tbl, table) in __build_tbl_map(database):
+            backup_name = __mk_tmp_name(database, base)
+            backup_table = open(backup_name, 'wb')
+
+            if table is None:
+                cursor = tbl.cursor()
+                data = cursor.first()
+                while data:
+                    pickle.dump(data, backup_table, 2)
+                    data = cursor.next()
+                cursor.close()
+            else:
+                pickle.dump(tbl.keys(), backup_table, 2)
+                for handle in database.iter_changed_since(table, last_time):
+                    if not isinstance(handle, bytes):
+                        handle = handle.encode('utf-8')
+                    data = tbl.get(handle)
+                    if data is not None:
+                        pickle.dump((handle, data), backup_table, 2)
+            backup_table.close()
+    except (IOError,OSError):
+        return
+
+    for (base, tbl, table) in __build_tbl_map(database):
+        if table is None:
+            new_name = __mk_backup_name(database, base)
+        else:
+            new_name = __mk_delta_name(database, base, number)
+        __replace(__mk_tmp_name(database, base), new_name)
+    __write_state(database, backup_time, number)
 
 def restore(database):
     """
@@ -154,29 +315,75 @@ def restore(database):
     The heavy lifting is done by the private __do__restore function. The 
     purpose of this function is to catch any exceptions that occur.
 
+    A database with its own backup, such as DbSqlite, reads it with its
+    restore_backup method instead.
+
     @param database: database instance to restore
     @type database: DbDir
     """
     try:
-        __do_restore(database)
+        if hasattr(database, 'restore_backup'):
+            database.restore_backup()
+        else:
+            __do_restore(database)
     except (OSError, IOError) as msg:
         raise DbException(str(msg))
 
 def __do_restore(database):
     """
     Loop through each table of the database, restoring the pickled data
-    to the appropriate database file.
+    to the appropriate database file, then replay the deltas written since
+    the full backup.
 
     @param database: database instance to backup
     @type database: DbDir
     """
-    for (base, tbl) in __build_tbl_map(database):
+    for (base, tbl, table) in __build_tbl_map(database):
         backup_name = __mk_backup_name(database, base)
         backup_table = open(backup_name, 'rb')
         __load_tbl_txn(database, backup_table, tbl)
 
+    state = __read_state(database)
+    if state is not None:
+        for number in range(1, state[1] + 1):
+            for (base, tbl, table) in __build_tbl_map(database):
+                if table is None:
+                    continue
+                delta_name = __mk_delta_name(database, base, number)
+                # A delta older than the full backup was left by a full
+                # backup that did not complete
+                if (os.path.getmtime(delta_name) <
+                        os.path.getmtime(__mk_backup_name(database, base))):
+                    continue
+                backup_table = open(delta_name, 'rb')
+                __load_delta_txn(database, backup_table, tbl)
+
     database.rebuild_secondary()
 
+def __load_delta_txn(database, backup_table, tbl):
+    """
+    Apply a delta backup to a database table: remove the records whose key
+    is not in the delta any more, then store the changed records.
+
+    @param database: database instance 
+    @type database: DbDir
+    @param backup_table: file containing the delta backup
+    @type backup_table: file
+    @param tbl: Berkeley db database table
+    @type tbl: Berkeley db database table
+    """
+    try:
+        keys = set(pickle.load(backup_table))
+    except EOFError:
+        backup_table.close()
+        return
+    for key in tbl.keys():
+        if key not in keys:
+            txn = database.env.txn_begin()
+            tbl.delete(key, txn=txn)
+            txn.commit()
+    __load_tbl_txn(database, backup_table, tbl)
+
 def __load_tbl_txn(database, backup_table, tbl):
     """
     Return the temporary backup name of the database table
@@ -199,21 +406,22 @@ def __load_tbl_txn(database, backup_table, tbl):
 
 def __build_tbl_map(database):
     """
-    Builds a table map of names to database tables.
+    Builds a table map of names to database tables, with the name of the
+    primary table, or None for the metadata table.
 
     @param database: database instance to backup
     @type database: DbDir
     """
     return [
-        ( PERSON_TBL,  database.person_map.db),
-        ( FAMILY_TBL,  database.family_map.db),
-        ( PLACES_TBL,  database.place_map.db),
-        ( SOURCES_TBL, database.source_map.db),
-        ( CITATIONS_TBL, database.citation_map.db),
-        ( REPO_TBL,    database.repository_map.db),
-        ( NOTE_TBL,    database.note_map.db),
-        ( MEDIA_TBL,   database.media_map.db),
-        ( EVENTS_TBL,  database.event_map.db),
-        ( TAG_TBL,     database.tag_map.db),
-        ( META,        database.metadata.db),
+        ( PERSON_TBL,  database.person_map.db,     'Person'),
+        ( FAMILY_TBL,  database.family_map.db,     'Family'),
+        ( PLACES_TBL,  database.place_map.db,      'Place'),
+        ( SOURCES_TBL, database.source_map.db,     'Source'),
+        ( CITATIONS_TBL, database.citation_map.db, 'Citation'),
+        ( REPO_TBL,    database.repository_map.db, 'Repository'),
+        ( NOTE_TBL,    database.note_map.db,       'Note'),
+        ( MEDIA_TBL,   database.media_map.db,      'Media'),
+        ( EVENTS_TBL,  database.event_map.db,      'Event'),
+        ( TAG_TBL,     database.tag_map.db,        'Tag'),
+        ( META,        database.metadata.db,       None),
         ]
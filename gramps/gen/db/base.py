@@ -32,6 +32,8 @@ from this class.
 # Python libraries
 #
 #-------------------------------------------------------------------------
+import math
+
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -42,9 +44,36 @@ _ = glocale.translation.gettext
 #-------------------------------------------------------------------------
 from ..lib.childreftype import ChildRefType
 from ..lib.childref import ChildRef
+from ..lib.date import Date
+from ..display.name import displayer as name_displayer
+from ..utils.place import (conv_lat_lon_float, lat_lon_distance,
+                           EARTH_RADIUS)
 from .txn import DbTxn
 from .exceptions import DbTransactionCancel
 
+# Batch getter for each table name, used by get_raw_data_many
+_FROM_HANDLES = {
+    'Person':     'get_people_from_handles',
+    'Family':     'get_families_from_handles',
+    'Source':     'get_sources_from_handles',
+    'Citation':   'get_citations_from_handles',
+    'Event':      'get_events_from_handles',
+    'Media':      'get_media_objects_from_handles',
+    'Place':      'get_places_from_handles',
+    'Repository': 'get_repositories_from_handles',
+    'Note':       'get_notes_from_handles',
+    'Tag':        'get_tags_from_handles',
+    }
+
+def get_sort_value(date):
+    """
+    Return the sort value of a Date object, leaving sort values and None
+    unchanged.
+    """
+    if isinstance(date, Date):
+        return date.get_sort_value()
+    return date
+
 class DbReadBase(object):
     """
     GRAMPS database object. This object is a base class for all
@@ -185,12 +214,81 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def find_places_in_bbox(self, lat_min, lon_min, lat_max, lon_max):
+        """
+        Return an iterator over handles for Places whose coordinates lie in
+        the box between the given latitudes and longitudes, in degrees.
+
+        The bounds are inclusive. A box with lon_min greater than lon_max
+        crosses the 180th meridian. Places without valid coordinates are
+        never returned.
+        """
+        for place in self.iter_places():
+            lat, lon = conv_lat_lon_float(place.get_latitude(),
+                                          place.get_longitude())
+            if lat is None or not lat_min <= lat <= lat_max:
+                continue
+            if lon_min > lon_max:
+                if lon >= lon_min or lon <= lon_max:
+                    yield place.handle
+            elif lon_min <= lon <= lon_max:
+                yield place.handle
+
+    def find_places_near(self, latitude, longitude, distance):
+        """
+        Return a list of handles for Places within distance kilometres of
+        the given position in degrees, nearest first.
+        """
+        lat_delta = math.degrees(float(distance) / EARTH_RADIUS)
+        lat_min = latitude - lat_delta
+        lat_max = latitude + lat_delta
+        if lat_min <= -90. or lat_max >= 90.:
+            lon_delta = 180.
+        else:
+            lon_delta = lat_delta / math.cos(math.radians(
+                                        max(abs(lat_min), abs(lat_max))))
+        if lon_delta >= 180.:
+            lon_min, lon_max = -180., 180.
+        else:
+            lon_min = longitude - lon_delta
+            lon_max = longitude + lon_delta
+            if lon_min < -180.:
+                lon_min += 360.
+            if lon_max >= 180.:
+                lon_max -= 360.
+
+        found = []
+        for handle in self.find_places_in_bbox(lat_min, lon_min,
+                                               lat_max, lon_max):
+            place = self.get_place_from_handle(handle)
+            lat, lon = conv_lat_lon_float(place.get_latitude(),
+                                          place.get_longitude())
+            place_distance = lat_lon_distance(latitude, longitude, lat, lon)
+            if place_distance <= distance:
+                found.append((place_distance, handle))
+        found.sort()
+        return [handle for (place_distance, handle) in found]
+
     def get_bookmarks(self):
         """
         Return the list of Person handles in the bookmarks.
         """
         raise NotImplementedError
 
+    def get_check_time(self):
+        """
+        Return the time of the last run of Check and Repair that found no
+        problem, or None.
+        """
+        raise NotImplementedError
+
+    def get_commit_time(self):
+        """
+        Return the time of the last transaction committed to the database,
+        or None.
+        """
+        raise NotImplementedError
+
     def get_child_reference_types(self):
         """
         Return a list of all child reference types associated with Family
@@ -216,7 +314,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_event_cursor(self):
+    def get_event_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Family objects
         """
@@ -266,7 +364,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_family_cursor(self):
+    def get_family_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Family objects
         """
@@ -316,6 +414,83 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    # Batch access
+    #
+    # The get_<objects>_from_handles methods return a list with one object
+    # (or None if not found) for each handle in the passed list, in the same
+    # order. These default implementations fetch the objects one by one;
+    # backends override them to fetch all records in a single pass.
+
+    def get_people_from_handles(self, handles):
+        """
+        Return a list of Person objects for the passed list of handles.
+        """
+        return [self.get_person_from_handle(handle) for handle in handles]
+
+    def get_families_from_handles(self, handles):
+        """
+        Return a list of Family objects for the passed list of handles.
+        """
+        return [self.get_family_from_handle(handle) for handle in handles]
+
+    def get_events_from_handles(self, handles):
+        """
+        Return a list of Event objects for the passed list of handles.
+        """
+        return [self.get_event_from_handle(handle) for handle in handles]
+
+    def get_places_from_handles(self, handles):
+        """
+        Return a list of Place objects for the passed list of handles.
+        """
+        return [self.get_place_from_handle(handle) for handle in handles]
+
+    def get_sources_from_handles(self, handles):
+        """
+        Return a list of Source objects for the passed list of handles.
+        """
+        return [self.get_source_from_handle(handle) for handle in handles]
+
+    def get_citations_from_handles(self, handles):
+        """
+        Return a list of Citation objects for the passed list of handles.
+        """
+        return [self.get_citation_from_handle(handle) for handle in handles]
+
+    def get_media_objects_from_handles(self, handles):
+        """
+        Return a list of MediaObject objects for the passed list of handles.
+        """
+        return [self.get_object_from_handle(handle) for handle in handles]
+
+    def get_repositories_from_handles(self, handles):
+        """
+        Return a list of Repository objects for the passed list of handles.
+        """
+        return [self.get_repository_from_handle(handle) for handle in handles]
+
+    def get_notes_from_handles(self, handles):
+        """
+        Return a list of Note objects for the passed list of handles.
+        """
+        return [self.get_note_from_handle(handle) for handle in handles]
+
+    def get_tags_from_handles(self, handles):
+        """
+        Return a list of Tag objects for the passed list of handles.
+        """
+        return [self.get_tag_from_handle(handle) for handle in handles]
+
+    def get_raw_data_many(self, table_name, handles):
+        """
+        Return a list of raw (serialized) objects, one for each handle in the
+        passed list, from the table with the given name ("Person", "Family",
+        ...). None is returned in place of handles that are not found.
+        """
+        get_objects = getattr(self, _FROM_HANDLES[table_name])
+        return [obj.serialize() if obj is not None else None
+                for obj in get_objects(handles)]
+
     def get_gramps_ids(self, obj_key):
         """
         Returns all the keys from a table given a table name
@@ -335,7 +510,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_media_cursor(self):
+    def get_media_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Media objects
         """
@@ -388,7 +563,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_note_cursor(self):
+    def get_note_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Note objects
         """
@@ -503,7 +678,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_person_cursor(self):
+    def get_person_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Person objects
         """
@@ -555,7 +730,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_place_cursor(self):
+    def get_place_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Place objects
         """
@@ -647,6 +822,13 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def get_reference_count(self, handle):
+        """
+        Return the number of references to the object with the given handle,
+        that is, the number of items find_backlink_handles would return.
+        """
+        raise NotImplementedError
+
     def get_reference_map_cursor(self):
         """
         Returns a reference to a cursor over the reference map
@@ -671,7 +853,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_repository_cursor(self):
+    def get_repository_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Repository objects
         """
@@ -727,7 +909,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_source_cursor(self):
+    def get_source_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Source objects
         """
@@ -772,7 +954,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_citation_cursor(self):
+    def get_citation_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Citation objects
         """
@@ -810,7 +992,7 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
-    def get_tag_cursor(self):
+    def get_tag_cursor(self, *args, **kwargs):
         """
         Return a reference to a cursor over Tag objects
         """
@@ -929,6 +1111,29 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def iter_changed_since(self, table, timestamp):
+        """
+        Return an iterator over handles for the objects of the table, a
+        table name such as 'Person' or 'Media', that were last changed at or
+        after timestamp, in order of change time.
+        """
+        iter_funcs = {
+            'Person': self.iter_people,
+            'Family': self.iter_families,
+            'Source': self.iter_sources,
+            'Citation': self.iter_citations,
+            'Event': self.iter_events,
+            'Media': self.iter_media_objects,
+            'Place': self.iter_places,
+            'Repository': self.iter_repositories,
+            'Note': self.iter_notes,
+            'Tag': self.iter_tags,
+            }
+        keys = [(obj.change, obj.handle) for obj in iter_funcs[table]()
+                if obj.change >= timestamp]
+        keys.sort()
+        return iter([handle for (change, handle) in keys])
+
     def iter_event_handles(self):
         """
         Return an iterator over handles for Events in the database
@@ -989,6 +1194,41 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def iter_person_handles_sorted(self, start=None):
+        """
+        Return an iterator over handles for Persons in the database, ordered
+        by the sort name of their primary name.
+
+        If start is given, the iteration begins with the first person whose
+        sort name collates at or after start.
+        """
+        keys = sorted((glocale.sort_key(name_displayer.sorted(person)),
+                       person.handle) for person in self.iter_people())
+        if start is not None:
+            start_key = glocale.sort_key(start)
+            keys = [key for key in keys if key[0] >= start_key]
+        return iter([handle for (sort_key, handle) in keys])
+
+    def iter_event_handles_in_date_range(self, start, stop):
+        """
+        Return an iterator over handles for Events whose date sort value
+        lies in the half-open range from start to stop, in date order.
+
+        start and stop are Date objects or date sort values; None leaves
+        that end of the range open. Events without a date are never
+        returned.
+        """
+        start = get_sort_value(start)
+        stop = get_sort_value(stop)
+        keys = []
+        for event in self.iter_events():
+            sortval = event.get_date_object().get_sort_value()
+            if (sortval and (start is None or sortval >= start) and
+                    (stop is None or sortval < stop)):
+                keys.append((sortval, event.handle))
+        keys.sort()
+        return iter([handle for (sortval, handle) in keys])
+
     def iter_place_handles(self):
         """
         Return an iterator over handles for Places in the database
@@ -1044,6 +1284,13 @@ class DbReadBase(object):
         """
         raise NotImplementedError
 
+    def open_snapshot(self):
+        """
+        Return a DbSnapshot, a read-only copy of the database as it is now,
+        for use by a worker thread or process.
+        """
+        raise NotImplementedError
+
     def report_bm_change(self):
         """
         Add 1 to the number of bookmark changes during this session.
@@ -1408,6 +1655,18 @@ class DbWriteBase(DbReadBase):
         """
         raise NotImplementedError
 
+    def compact(self, callback=None):
+        """
+        Compact the tables of the database, giving their free space back to
+        the file system.
+
+        Return a list of (file name, fill before, fill after, size before,
+        size after) tuples, one for each database file. The fill is the
+        fraction of the pages that holds data, or None if it is not known.
+        The sizes are in bytes.
+        """
+        raise NotImplementedError
+
     def delete_primary_from_reference_map(self, handle, transaction):
         """
         Called each time an object is removed from the database. 
@@ -1538,6 +1797,13 @@ class DbWriteBase(DbReadBase):
         """
         raise NotImplementedError
 
+    def set_check_time(self, timestamp):
+        """
+        Set the time of the last run of Check and Repair that found no
+        problem.
+        """
+        raise NotImplementedError
+
     def set_default_person_handle(self, handle):
         """
         Set the default Person to the passed instance.
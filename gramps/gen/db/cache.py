@@ -0,0 +1,143 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+DbCache class: size bounded LRU cache of database records
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from collections import OrderedDict
+
+#-------------------------------------------------------------------------
+#
+# Helper functions
+#
+#-------------------------------------------------------------------------
+def _freeze(data):
+    """
+    Return a copy of data with every list turned into a tuple.
+    """
+    if isinstance(data, (list, tuple)):
+        return tuple(_freeze(item) for item in data)
+    return data
+
+#-------------------------------------------------------------------------
+#
+# DbCache
+#
+#-------------------------------------------------------------------------
+class DbCache(object):
+    """
+    Least recently used cache of the serialized data of primary objects,
+    keyed by (class name, handle).
+
+    The records are frozen when they are stored: every list is turned
+    into a tuple, so a hit can hand out the cached record itself without
+    decoding it again. The unserialize methods copy the lists they keep,
+    so a caller may modify its object without changing the cached record.
+
+    A capacity of 0 disables the cache.
+    """
+
+    __slots__ = ('__data', 'capacity', 'hits', 'misses')
+
+    def __init__(self, capacity=0):
+        """
+        Create a new cache holding at most capacity records.
+        """
+        self.__data = OrderedDict()
+        self.capacity = max(0, capacity)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key):
+        return key in self.__data
+
+    def get(self, key):
+        """
+        Return the frozen data stored under key, or None if it is not
+        cached.
+        """
+        if not self.capacity:
+            return None
+        try:
+            data = self.__data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self.__data[key] = data
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Store data under key, dropping the least recently used records when
+        the cache is full.
+        """
+        if not self.capacity:
+            return
+        self.__data.pop(key, None)
+        self.__data[key] = _freeze(data)
+        while len(self.__data) > self.capacity:
+            self.__data.popitem(last=False)
+
+    def remove(self, key):
+        """
+        Drop the record stored under key, if any.
+        """
+        self.__data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop all records. The hit and miss counters are kept.
+        """
+        self.__data.clear()
+
+    def set_capacity(self, capacity):
+        """
+        Change the maximum number of cached records.
+        """
+        self.capacity = max(0, capacity)
+        while len(self.__data) > self.capacity:
+            self.__data.popitem(last=False)
+
+    def reset_statistics(self):
+        """
+        Reset the hit and miss counters.
+        """
+        self.hits = 0
+        self.misses = 0
+
+    def get_statistics(self):
+        """
+        Return a dictionary with the capacity, the number of cached records
+        and the hit and miss counters of the cache.
+        """
+        return {'capacity': self.capacity,
+                'size': len(self.__data),
+                'hits': self.hits,
+                'misses': self.misses}
@@ -0,0 +1,267 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Record codecs for the BSDDB tables.
+
+The primary tables and the reference map store the serialized tuples of
+the objects. A codec turns such a tuple into the bytes that are written to
+the table and back. The name of the codec used by a family tree is kept in
+the metadata under 'codec'; trees without that entry use pickle.
+
+A codec name identifies a fixed byte format, so a codec whose format
+changes must be registered under a new name.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import sys
+import marshal
+if sys.version_info[0] < 3:
+    import cPickle as pickle
+else:
+    import pickle
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..config import config
+if config.get('preferences.use-bsddb3') or sys.version_info[0] >= 3:
+    from bsddb3 import db
+else:
+    from bsddb import db
+from .exceptions import DbException
+
+#-------------------------------------------------------------------------
+#
+# Codecs
+#
+#-------------------------------------------------------------------------
+class PickleCodec(object):
+    """
+    Store the records as pickles, the format of the DBShelf tables.
+    """
+    name = 'pickle'
+
+    def dumps(self, data):
+        """
+        Return the bytes of the serialized tuple data.
+        """
+        return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, raw):
+        """
+        Return the serialized tuple stored in raw.
+        """
+        try:
+            return pickle.loads(raw)
+        except UnicodeDecodeError:
+            #we need to assume we opened data in python3 saved in python2
+            return pickle.loads(raw, encoding='utf-8')
+
+class MarshalCodec(object):
+    """
+    Store the records with marshal, using version 2 of its format.
+
+    The records only hold tuples, lists, strings, numbers, booleans and
+    None, which marshal encodes and decodes several times faster than
+    pickle. Version 2 of the format can be read by all supported Python
+    versions.
+    """
+    name = 'marshal2'
+
+    def dumps(self, data):
+        """
+        Return the bytes of the serialized tuple data.
+        """
+        return marshal.dumps(data, 2)
+
+    def loads(self, raw):
+        """
+        Return the serialized tuple stored in raw.
+        """
+        return marshal.loads(raw)
+
+PICKLE_CODEC = PickleCodec()
+
+CODECS = {}
+
+def register_codec(codec):
+    """
+    Make codec available under its name.
+    """
+    CODECS[codec.name] = codec
+
+def get_codec(name):
+    """
+    Return the codec registered under name.
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise DbException("Unknown record codec '%s'" % name)
+
+register_codec(PICKLE_CODEC)
+register_codec(MarshalCodec())
+
+#-------------------------------------------------------------------------
+#
+# DbCodecShelf
+#
+#-------------------------------------------------------------------------
+class DbCodecShelf(object):
+    """
+    A BSDDB table storing its values with a record codec.
+
+    It offers the part of the DBShelf interface used by the database
+    classes; everything else is passed to the underlying DB object.
+    """
+
+    def __init__(self, env, codec):
+        self.db = db.DB(env)
+        self.codec = codec
+
+    def __getattr__(self, name):
+        """
+        Return an attribute of the underlying DB object.
+        """
+        return getattr(self.db, name)
+
+    def __len__(self):
+        return len(self.db)
+
+    def __contains__(self, key):
+        return self.db.has_key(key)
+
+    def __getitem__(self, key):
+        return self.codec.loads(self.db[key])
+
+    def __setitem__(self, key, value):
+        self.db[key] = self.codec.dumps(value)
+
+    def __delitem__(self, key):
+        del self.db[key]
+
+    def keys(self, txn=None):
+        if txn is not None:
+            return self.db.keys(txn)
+        return self.db.keys()
+
+    def items(self, txn=None):
+        if txn is not None:
+            items = self.db.items(txn)
+        else:
+            items = self.db.items()
+        loads = self.codec.loads
+        return [(key, loads(raw)) for (key, raw) in items]
+
+    def values(self, txn=None):
+        if txn is not None:
+            values = self.db.values(txn)
+        else:
+            values = self.db.values()
+        return [self.codec.loads(raw) for raw in values]
+
+    def get(self, key, default=None, txn=None, flags=0):
+        """
+        Return the record stored under key, or default.
+        """
+        raw = self.db.get(key, None, txn, flags)
+        if raw is None:
+            return default
+        return self.codec.loads(raw)
+
+    def put(self, key, value, txn=None, flags=0):
+        """
+        Store the record value under key.
+        """
+        return self.db.put(key, self.codec.dumps(value), txn, flags)
+
+    def associate(self, secondary, callback, flags=0):
+        """
+        Associate a secondary index, passing the decoded records to
+        callback.
+        """
+        def codec_callback(key, raw):
+            return callback(key, self.codec.loads(raw))
+        return self.db.associate(secondary, codec_callback, flags)
+
+    def cursor(self, txn=None, flags=0):
+        """
+        Return a cursor over the table returning decoded records.
+        """
+        return DbCodecCursor(self.db.cursor(txn, flags), self.codec)
+
+#-------------------------------------------------------------------------
+#
+# DbCodecCursor
+#
+#-------------------------------------------------------------------------
+class DbCodecCursor(object):
+    """
+    Cursor over a DbCodecShelf, returning (key, record) pairs.
+    """
+
+    def __init__(self, cursor, codec):
+        self.dbc = cursor
+        self.codec = codec
+
+    def __getattr__(self, name):
+        """
+        Return an attribute of the underlying DB cursor.
+        """
+        return getattr(self.dbc, name)
+
+    def _decode(self, data):
+        if data is None:
+            return None
+        return (data[0], self.codec.loads(data[1]))
+
+    def first(self, *args, **kwargs):
+        return self._decode(self.dbc.first(*args, **kwargs))
+
+    def last(self, *args, **kwargs):
+        return self._decode(self.dbc.last(*args, **kwargs))
+
+    def next(self, *args, **kwargs):
+        return self._decode(self.dbc.next(*args, **kwargs))
+
+    def prev(self, *args, **kwargs):
+        return self._decode(self.dbc.prev(*args, **kwargs))
+
+    def current(self, *args, **kwargs):
+        return self._decode(self.dbc.current(*args, **kwargs))
+
+    def set(self, key, *args, **kwargs):
+        return self._decode(self.dbc.set(key, *args, **kwargs))
+
+    def set_range(self, key, *args, **kwargs):
+        return self._decode(self.dbc.set_range(key, *args, **kwargs))
+
+    def next_dup(self, *args, **kwargs):
+        return self._decode(self.dbc.next_dup(*args, **kwargs))
+
+    def put(self, key, value, flags=0):
+        return self.dbc.put(key, self.codec.dumps(value), flags)
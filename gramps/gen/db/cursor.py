@@ -27,16 +27,16 @@
 #
 #-------------------------------------------------------------------------
 import sys
-if sys.version_info[0] < 3:
-    from cPickle import dumps, loads
-else:
-    from pickle import dumps, loads
 
 from ..config import config
 if config.get('preferences.use-bsddb3') or sys.version_info[0] >= 3:
     from bsddb3 import db
 else:
     from bsddb import db
+from .codec import PICKLE_CODEC
+
+# Number of records read ahead by a buffered cursor
+BUFFER_SIZE = 1000
 
 #-------------------------------------------------------------------------
 #
@@ -55,17 +55,27 @@ class BsddbBaseCursor(object):
     A cursor should only be used for a single pass through the
     database. If multiple passes are needed, multiple cursors
     should be used.
+
+    A buffered cursor reads the records BUFFER_SIZE at a time when iterated
+    over, and decodes each batch at once. It is meant for full scans that do
+    not change the table: records changed during the scan may be returned as
+    they were when their batch was read.
     """
     
-    def __init__(self, txn=None, update=False, commit=False):
+    def __init__(self, txn=None, update=False, commit=False, codec=None,
+                 buffered=False):
         """
         Instantiate the object. Note, this method should be overridden in
         derived classes that properly set self.cursor and self.source
+
+        codec is the record codec of the table, pickle if not given.
         """
         self.cursor = self.source = None
+        self.codec = codec or PICKLE_CODEC
         self.txn = txn
         self._update = update
         self.commit = commit
+        self.buffered = buffered
 
     def __getattr__(self, name):
         """
@@ -92,13 +102,40 @@ class BsddbBaseCursor(object):
         """
         Iterator
         """
-        
+        if self.buffered and not self._update:
+            return self.__iter_buffered()
+        return self.__iter_records()
+
+    def __iter_records(self):
+        """
+        Iterate over the records one at a time.
+        """
         data = self.first()
         _n = self.next      # Saved attribute lookup in the loop
         while data:
             yield data
             data = _n()
 
+    def __iter_buffered(self):
+        """
+        Iterate over the records, read from the table in batches.
+        """
+        loads = self.codec.loads
+        _n = self.cursor.next
+        data = self.cursor.first()
+        while data:
+            batch = [data]
+            append = batch.append
+            for dummy in range(BUFFER_SIZE - 1):
+                data = _n()
+                if not data:
+                    break
+                append(data)
+            else:
+                data = _n()
+            for record in [(key, loads(raw)) for (key, raw) in batch]:
+                yield record
+
     def _get(_flags=0):
         """ Closure that returns a cursor get function """
 
@@ -110,12 +147,7 @@ class BsddbBaseCursor(object):
             data = self.cursor.get(
                         _flags | flags | (db.DB_RMW if self._update else 0),
                         **kwargs)
-
-            try:
-                return (data[0], loads(data[1])) if data else None
-            except UnicodeDecodeError:
-                #we need to assume we opened data in python3 saved in python2
-                return (data[0], loads(data[1], encoding='utf-8')) if data else None
+            return (data[0], self.codec.loads(data[1])) if data else None
 
         return get
 
@@ -134,5 +166,5 @@ class BsddbBaseCursor(object):
         """
         Write the current key, data pair to the database.
         """
-        self.cursor.put(key, dumps(data), flags=flags | db.DB_CURRENT,
+        self.cursor.put(key, self.codec.dumps(data), flags=flags | db.DB_CURRENT,
                         **kwargs)
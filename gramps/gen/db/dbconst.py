@@ -38,9 +38,9 @@ import sys
 #
 #-------------------------------------------------------------------------
 __all__ = (
-            ('DBPAGE', 'DBMODE', 'DBCACHE', 'DBLOCKS', 'DBOBJECTS', 'DBUNDO',
+            ('DBPAGE', 'DBMODE', 'DBCACHE', 'DBCACHE_MAX', 'DBLOCKS', 'DBOBJECTS', 'DBUNDO',
              'DBEXT', 'DBMODE_R', 'DBMODE_W', 'DBUNDOFN', 'DBLOCKFN',
-             'DBRECOVFN','BDBVERSFN', 'DBLOGNAME', 'DBFLAGS_O',  'DBFLAGS_R',
+             'DBRECOVFN','BDBVERSFN', 'DBBACKEND', 'DBLOGNAME', 'DBFLAGS_O',  'DBFLAGS_R',
              'DBFLAGS_D',
             ) +
             
@@ -57,12 +57,14 @@ DBUNDOFN  = "undo.db"       # File name of 'undo' database
 DBLOCKFN  = "lock"          # File name of lock file
 DBRECOVFN = "need_recover"  # File name of recovery file
 BDBVERSFN = "bdbversion.txt"# File name of Berkeley DB version file
+DBBACKEND = "database.txt"  # File name of the name of the database backend
 DBLOGNAME = ".Db"           # Name of logger
 DBMODE_R  = "r"             # Read-only access
 DBMODE_W  = "w"             # Full Read/Write access
 DBPAGE    = 16384           # Size of the pages used to hold items in the database
 DBMODE    = 0o666            # Unix mode for database creation
 DBCACHE   = 0x4000000       # Size of the shared memory buffer pool
+DBCACHE_MAX = 0x40000000    # Largest buffer pool sized from the tables
 DBLOCKS   = 100000          # Maximum number of locks supported
 DBOBJECTS = 100000          # Maximum number of simultaneously locked objects
 DBUNDO    = 1000            # Maximum size of undo buffer
@@ -32,8 +32,10 @@ if sys.version_info[0] < 3:
 else:
     import pickle
 import base64
+import os
 import time
 import re
+import logging
 from . import DbReadBase, DbWriteBase, DbTxn
 from . import (PERSON_KEY,
                     FAMILY_KEY,
@@ -57,33 +59,130 @@ from ..lib.repo import Repository
 from ..lib.note import Note
 from ..lib.tag import Tag
 from ..constfunc import STRTYPE
+from ..const import GRAMPS_LOCALE as glocale
+from ..display.name import displayer as _nd
+from .dbconst import DBEXT, DBUNDOFN, DBLOGNAME
+
+_LOG = logging.getLogger(DBLOGNAME)
+
+# Maps of the records of the primary tables, keyed by table name
+MAP_NAMES = (
+    ('Person',     'person_map'),
+    ('Family',     'family_map'),
+    ('Source',     'source_map'),
+    ('Citation',   'citation_map'),
+    ('Event',      'event_map'),
+    ('Media',      'media_map'),
+    ('Place',      'place_map'),
+    ('Repository', 'repository_map'),
+    ('Note',       'note_map'),
+    ('Tag',        'tag_map'),
+    )
+
+KEY_TO_TABLE = {
+    PERSON_KEY:     'Person',
+    FAMILY_KEY:     'Family',
+    SOURCE_KEY:     'Source',
+    CITATION_KEY:   'Citation',
+    EVENT_KEY:      'Event',
+    MEDIA_KEY:      'Media',
+    PLACE_KEY:      'Place',
+    REPOSITORY_KEY: 'Repository',
+    NOTE_KEY:       'Note',
+    }
+
+# Settings of a database holding the custom types used in it
+_CUSTOM_TYPES = ('family_event_names', 'individual_event_names',
+                 'individual_attributes', 'family_attributes',
+                 'source_attributes', 'child_ref_types', 'family_rel_types',
+                 'event_role_names', 'name_types', 'origin_types',
+                 'repository_types', 'note_types', 'source_media_types',
+                 'url_types', 'media_attributes')
+
+_BOOKMARKS = ('bookmarks', 'family_bookmarks', 'event_bookmarks',
+              'place_bookmarks', 'citation_bookmarks', 'source_bookmarks',
+              'repo_bookmarks', 'media_bookmarks', 'note_bookmarks')
+
+# File, in the directory of a family tree, of the cached in-memory copy
+CACHE_FILE = "memory.gcache"
+_META_FILE = "meta_data" + DBEXT
+
+def _internal_handle(handle):
+    """
+    Return the handle as the text used as key of the maps.
+    """
+    if not isinstance(handle, str):
+        return handle.decode('utf-8')
+    return handle
+
+def tree_signature(path):
+    """
+    Return the names, sizes and modification times of the table files of
+    the family tree in directory path. They change when the tree is
+    written, but not when it is only read. The commits still held in the
+    cache of a BSDDB environment only reach the files at a checkpoint.
+    """
+    signature = []
+    for name in sorted(os.listdir(path)):
+        is_table = (name.endswith(DBEXT) and
+                    name not in (_META_FILE, DBUNDOFN) and
+                    not name.startswith("__db."))
+        # the write-ahead log of an SQLite tree holds its latest writes
+        if not (is_table or name.endswith(DBEXT + "-wal")):
+            continue
+        stat = os.stat(os.path.join(path, name))
+        signature.append((name, stat.st_size, stat.st_mtime))
+    return signature
+
+def load_in_memory(db, callback=None, cache=True):
+    """
+    Return a DictionaryDb holding a copy of the open database db.
+
+    If cache is True and db is a family tree on disk, the copied records
+    are also saved in the directory of the tree, and read back instead of
+    the tables of db the next time, if no transaction has been committed
+    and the tables have not been written since.
+    """
+    memory_db = DictionaryDb()
+    path = db.get_save_path() if cache else None
+    if path and os.path.isdir(path):
+        cache_path = os.path.join(path, CACHE_FILE)
+        if hasattr(db, 'checkpoint'):
+            db.checkpoint()
+        signature = (db.get_commit_time(), tree_signature(path))
+        if memory_db.load_records(cache_path, signature):
+            memory_db.copy_settings_from_db(db)
+            return memory_db
+        memory_db.copy_from_db(db, callback)
+        memory_db.save_records(cache_path, signature)
+    else:
+        memory_db.copy_from_db(db, callback)
+    return memory_db
 
 class Cursor(object):
     """
     Iterates through model returning (handle, raw_data)...
     """
-    def __init__(self, model, func):
+    def __init__(self, model):
         self.model = model
-        self.func = func
     def __enter__(self):
         return self
     def __iter__(self):
-        return self.__next__()
-    def __next__(self):
-        for handle in self.model.keys():
-            yield (handle, self.func(handle))
+        return iter(list(self.model.items()))
     def __exit__(self, *args, **kwargs):
         pass
-    def iter(self):
-        for handle in self.model.keys():
-            yield (handle, self.func(handle))
-        yield None
+    def close(self):
+        pass
 
-class Bookmarks:
+class Bookmarks(object):
+    def __init__(self):
+        self.bookmarks = []
+    def set(self, new_list):
+        self.bookmarks = list(new_list)
     def get(self):
-        return [] # handles
+        return self.bookmarks # handles
     def append(self, handle):
-        pass
+        self.bookmarks.append(handle)
 
 class DictionaryTxn(DbTxn):
     def __init__(self, message, db):
@@ -106,6 +205,11 @@ class DictionaryTxn(DbTxn):
 class DictionaryDb(DbWriteBase, DbReadBase):
     """
     A Gramps Database Backend. This replicates the grampsdb functions.
+
+    The records are kept in memory, in dictionaries holding the raw data of
+    the objects keyed by handle, as in the tables of a BSDDB family tree.
+    copy_from_db loads an open database in one sequential pass over each
+    table, which makes a fast read-only copy for reports and exports.
     """
 
     def __init__(self, *args, **kwargs):
@@ -198,6 +302,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         self.set_feature("skip-import-additions", True)
         self.readonly = False
         self.db_is_open = True
+        self.path = None
         self.name_formats = []
         self.bookmarks = Bookmarks()
         self.family_bookmarks = Bookmarks()
@@ -218,15 +323,6 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         self.set_repository_id_prefix('R%04d')
         self.set_note_id_prefix('N%04d')
         # ----------------------------------
-        self.id_trans  = DictionaryTxn("ID Transaction", self)
-        self.fid_trans = DictionaryTxn("FID Transaction", self)
-        self.pid_trans = DictionaryTxn("PID Transaction", self)
-        self.cid_trans = DictionaryTxn("CID Transaction", self)
-        self.sid_trans = DictionaryTxn("SID Transaction", self)
-        self.oid_trans = DictionaryTxn("OID Transaction", self)
-        self.rid_trans = DictionaryTxn("RID Transaction", self)
-        self.nid_trans = DictionaryTxn("NID Transaction", self)
-        self.eid_trans = DictionaryTxn("EID Transaction", self)
         self.cmap_index = 0
         self.smap_index = 0
         self.emap_index = 0
@@ -247,8 +343,19 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         self.media_map       = {}
         self.event_map       = {}
         self.tag_map         = {}
+        self.gramps_ids = dict((table, {}) for table in KEY_TO_TABLE.values())
+        self.backlinks = None
+        self.references = None
         self.metadata   = {}
         self.name_group = {}
+        self.surname_list = []
+        self.owner = Researcher()
+        self.default_handle = None
+        self.mediapath = None
+        self.check_time = None
+        self.commit_time = None
+        for name in _CUSTOM_TYPES:
+            setattr(self, name, set())
         self.undo_callback = None
         self.redo_callback = None
         self.undo_history_callback = None
@@ -427,12 +534,13 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         self.note_prefix = self._validated_id_prefix(val, "N")
         self.nid2user_format = self.__id2user_format(self.note_prefix)
 
-    def __find_next_gramps_id(self, prefix, map_index, trans):
+    def __find_next_gramps_id(self, prefix, map_index, table):
         """
         Helper function for find_next_<object>_gramps_id methods
         """
+        ids = self.gramps_ids[table]
         index = prefix % map_index
-        while trans.get(str(index), txn=self.txn) is not None:
+        while index in ids:
             map_index += 1
             index = prefix % map_index
         map_index += 1
@@ -444,7 +552,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         person ID prefix.
         """
         self.pmap_index, gid = self.__find_next_gramps_id(self.person_prefix,
-                                          self.pmap_index, self.id_trans)
+                                          self.pmap_index, 'Person')
         return gid
 
     def find_next_place_gramps_id(self):
@@ -453,7 +561,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         place ID prefix.
         """
         self.lmap_index, gid = self.__find_next_gramps_id(self.place_prefix,
-                                          self.lmap_index, self.pid_trans)
+                                          self.lmap_index, 'Place')
         return gid
 
     def find_next_event_gramps_id(self):
@@ -462,7 +570,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         event ID prefix.
         """
         self.emap_index, gid = self.__find_next_gramps_id(self.event_prefix,
-                                          self.emap_index, self.eid_trans)
+                                          self.emap_index, 'Event')
         return gid
 
     def find_next_object_gramps_id(self):
@@ -471,7 +579,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         off the media object ID prefix.
         """
         self.omap_index, gid = self.__find_next_gramps_id(self.mediaobject_prefix,
-                                          self.omap_index, self.oid_trans)
+                                          self.omap_index, 'Media')
         return gid
 
     def find_next_citation_gramps_id(self):
@@ -480,7 +588,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         citation ID prefix.
         """
         self.cmap_index, gid = self.__find_next_gramps_id(self.citation_prefix,
-                                          self.cmap_index, self.cid_trans)
+                                          self.cmap_index, 'Citation')
         return gid
 
     def find_next_source_gramps_id(self):
@@ -489,7 +597,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         source ID prefix.
         """
         self.smap_index, gid = self.__find_next_gramps_id(self.source_prefix,
-                                          self.smap_index, self.sid_trans)
+                                          self.smap_index, 'Source')
         return gid
 
     def find_next_family_gramps_id(self):
@@ -498,7 +606,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         family ID prefix.
         """
         self.fmap_index, gid = self.__find_next_gramps_id(self.family_prefix,
-                                          self.fmap_index, self.fid_trans)
+                                          self.fmap_index, 'Family')
         return gid
 
     def find_next_repository_gramps_id(self):
@@ -507,7 +615,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         off the repository ID prefix.
         """
         self.rmap_index, gid = self.__find_next_gramps_id(self.repository_prefix,
-                                          self.rmap_index, self.rid_trans)
+                                          self.rmap_index, 'Repository')
         return gid
 
     def find_next_note_gramps_id(self):
@@ -516,138 +624,334 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         note ID prefix.
         """
         self.nmap_index, gid = self.__find_next_gramps_id(self.note_prefix,
-                                          self.nmap_index, self.nid_trans)
+                                          self.nmap_index, 'Note')
         return gid
 
     def get_mediapath(self):
-        return None
+        return self.mediapath
+
+    def get_check_time(self):
+        return self.check_time
+
+    def get_commit_time(self):
+        return self.commit_time
 
     def get_name_group_keys(self):
-        return []
+        return list(self.name_group.keys())
 
     def get_name_group_mapping(self, key):
-        return None
+        return self.name_group.get(key, key)
+
+    def get_surname_list(self):
+        return self.surname_list
 
     def get_researcher(self):
-        obj = Researcher()
-        return obj
+        return self.owner
+
+    def get_bookmarks(self):
+        return self.bookmarks
+
+    def get_family_bookmarks(self):
+        return self.family_bookmarks
+
+    def get_event_bookmarks(self):
+        return self.event_bookmarks
+
+    def get_place_bookmarks(self):
+        return self.place_bookmarks
+
+    def get_citation_bookmarks(self):
+        return self.citation_bookmarks
+
+    def get_source_bookmarks(self):
+        return self.source_bookmarks
+
+    def get_repo_bookmarks(self):
+        return self.repo_bookmarks
+
+    def get_media_bookmarks(self):
+        return self.media_bookmarks
+
+    def get_note_bookmarks(self):
+        return self.note_bookmarks
+
+    def get_person_event_types(self):
+        return list(self.individual_event_names)
+
+    def get_person_attribute_types(self):
+        return list(self.individual_attributes)
+
+    def get_family_attribute_types(self):
+        return list(self.family_attributes)
+
+    def get_family_event_types(self):
+        return list(self.family_event_names)
+
+    def get_media_attribute_types(self):
+        return list(self.media_attributes)
+
+    def get_family_relation_types(self):
+        return list(self.family_rel_types)
+
+    def get_child_reference_types(self):
+        return list(self.child_ref_types)
+
+    def get_event_roles(self):
+        return list(self.event_role_names)
+
+    def get_name_types(self):
+        return list(self.name_types)
+
+    def get_origin_types(self):
+        return list(self.origin_types)
+
+    def get_repository_types(self):
+        return list(self.repository_types)
+
+    def get_note_types(self):
+        return list(self.note_types)
+
+    def get_source_attribute_types(self):
+        return list(self.source_attributes)
+
+    def get_source_media_types(self):
+        return list(self.source_media_types)
+
+    def get_url_types(self):
+        return list(self.url_types)
+
+    def get_save_path(self):
+        return self.path
+
+    def set_save_path(self, path):
+        self.path = path
+
+    def is_open(self):
+        return self.db_is_open
+
+    def close(self):
+        for (table, map_name) in MAP_NAMES:
+            getattr(self, map_name).clear()
+        for ids in self.gramps_ids.values():
+            ids.clear()
+        self.backlinks = self.references = None
+        self.db_is_open = False
+
+    def __sorted_handles(self, data_map, sort_key):
+        """
+        Return the handles of data_map, sorted by the locale collation of
+        the text returned by sort_key from the raw data.
+        """
+        return sorted(data_map.keys(),
+                      key=lambda handle: glocale.sort_key(
+                                                sort_key(data_map[handle])))
 
     def get_person_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.person_map,
+                                   lambda data: _nd.raw_sorted_name(data[3]))
         else:
-            return self.person_map.keys()
+            return list(self.person_map.keys())
 
     def get_family_handles(self):
-        return self.family_map.keys()
+        return list(self.family_map.keys())
 
     def get_event_handles(self):
-        return self.event_map.keys()
+        return list(self.event_map.keys())
 
     def get_citation_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.citation_map,
+                                         lambda data: data[3])
         else:
-            return self.citation_map.keys()
+            return list(self.citation_map.keys())
 
     def get_source_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.source_map,
+                                         lambda data: data[2])
         else:
-            return self.source_map.keys()
+            return list(self.source_map.keys())
 
     def get_place_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.place_map,
+                                         lambda data: data[2])
         else:
-            return self.place_map.keys()
+            return list(self.place_map.keys())
 
     def get_repository_handles(self):
-        return self.repository_map.keys()
+        return list(self.repository_map.keys())
 
     def get_media_object_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.media_map,
+                                         lambda data: data[4])
         else:
-            return self.media_map.keys()
+            return list(self.media_map.keys())
 
     def get_note_handles(self):
-        return self.note_map.keys()
+        return list(self.note_map.keys())
 
     def get_tag_handles(self, sort_handles=False):
         if sort_handles:
-            raise Exception("Implement!")
+            return self.__sorted_handles(self.tag_map,
+                                         lambda data: data[1])
         else:
-            return self.tag_map.keys()
+            return list(self.tag_map.keys())
+
+    def get_from_handle(self, handle, class_type, data_map):
+        """
+        Return a new object of class_type made from the raw data of handle
+        in data_map, or None if the handle is not in it.
+        """
+        if handle is None:
+            return None
+        data = data_map.get(_internal_handle(handle))
+        if data is None:
+            return None
+        return class_type.create(data)
 
     def get_event_from_handle(self, handle):
-        return self.event_map[handle]
+        return self.get_from_handle(handle, Event, self.event_map)
 
     def get_family_from_handle(self, handle): 
-        return self.family_map[handle]
+        return self.get_from_handle(handle, Family, self.family_map)
 
     def get_repository_from_handle(self, handle):
-        return self.repository_map[handle]
+        return self.get_from_handle(handle, Repository, self.repository_map)
 
     def get_person_from_handle(self, handle):
-        return self.person_map[handle]
+        return self.get_from_handle(handle, Person, self.person_map)
 
     def get_place_from_handle(self, handle):
-        place = self.place_map[handle]
-        return place
+        return self.get_from_handle(handle, Place, self.place_map)
 
     def get_citation_from_handle(self, handle):
-        citation = self.citation_map[handle]
-        return citation
+        return self.get_from_handle(handle, Citation, self.citation_map)
 
     def get_source_from_handle(self, handle):
-        source = self.source_map[handle]
-        return source
+        return self.get_from_handle(handle, Source, self.source_map)
 
     def get_note_from_handle(self, handle):
-        note = self.note_map[handle]
-        return note
+        return self.get_from_handle(handle, Note, self.note_map)
 
     def get_object_from_handle(self, handle):
-        media = self.media_map[handle]
-        return media
+        return self.get_from_handle(handle, MediaObject, self.media_map)
 
     def get_tag_from_handle(self, handle):
-        tag = self.tag_map[handle]
-        return tag
+        return self.get_from_handle(handle, Tag, self.tag_map)
+
+    def get_default_handle(self):
+        return self.default_handle
 
     def get_default_person(self):
-        return None
+        return self.get_person_from_handle(self.default_handle)
 
     def iter_people(self):
-        return (person for person in self.person_map.values())
+        return (Person.create(data) for data in self.person_map.values())
 
     def iter_person_handles(self):
         return (handle for handle in self.person_map.keys())
 
     def iter_families(self):
-        return (family for family in self.family_map.values())
+        return (Family.create(data) for data in self.family_map.values())
 
     def iter_family_handles(self):
         return (handle for handle in self.family_map.keys())
 
+    def iter_events(self):
+        return (Event.create(data) for data in self.event_map.values())
+
+    def iter_event_handles(self):
+        return (handle for handle in self.event_map.keys())
+
+    def iter_places(self):
+        return (Place.create(data) for data in self.place_map.values())
+
+    def iter_place_handles(self):
+        return (handle for handle in self.place_map.keys())
+
+    def iter_sources(self):
+        return (Source.create(data) for data in self.source_map.values())
+
+    def iter_source_handles(self):
+        return (handle for handle in self.source_map.keys())
+
+    def iter_citations(self):
+        return (Citation.create(data) for data in self.citation_map.values())
+
+    def iter_citation_handles(self):
+        return (handle for handle in self.citation_map.keys())
+
+    def iter_media_objects(self):
+        return (MediaObject.create(data) for data in self.media_map.values())
+
+    def iter_media_object_handles(self):
+        return (handle for handle in self.media_map.keys())
+
+    def iter_repositories(self):
+        return (Repository.create(data)
+                for data in self.repository_map.values())
+
+    def iter_repository_handles(self):
+        return (handle for handle in self.repository_map.keys())
+
+    def iter_notes(self):
+        return (Note.create(data) for data in self.note_map.values())
+
+    def iter_note_handles(self):
+        return (handle for handle in self.note_map.keys())
+
+    def iter_tags(self):
+        return (Tag.create(data) for data in self.tag_map.values())
+
+    def iter_tag_handles(self):
+        return (handle for handle in self.tag_map.keys())
+
     def get_tag_from_name(self, name):
-        for tag in self.tag_map.values():
-            if tag.name == name:
-                return tag
+        for data in self.tag_map.values():
+            if data[1] == name:
+                return Tag.create(data)
         return None
 
+    def __get_from_gramps_id(self, gramps_id, class_type, table):
+        """
+        Return a new object of class_type made from the record of the table
+        with the GRAMPS ID, or None if there is none.
+        """
+        handle = self.gramps_ids[table].get(gramps_id)
+        if handle is None:
+            return None
+        return self.get_from_handle(handle, class_type,
+                                    getattr(self, dict(MAP_NAMES)[table]))
+
     def get_family_from_gramps_id(self, gramps_id):
-        for family in self.family_map.values():
-            if family.gramps_id == gramps_id:
-                return family
-        return None
+        return self.__get_from_gramps_id(gramps_id, Family, 'Family')
 
     def get_person_from_gramps_id(self, gramps_id):
-        for person in self.person_map.values():
-            if person.gramps_id == gramps_id:
-                return person
-        return person
+        return self.__get_from_gramps_id(gramps_id, Person, 'Person')
+
+    def get_event_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Event, 'Event')
+
+    def get_place_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Place, 'Place')
+
+    def get_source_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Source, 'Source')
+
+    def get_citation_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Citation, 'Citation')
+
+    def get_object_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, MediaObject, 'Media')
+
+    def get_repository_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Repository, 'Repository')
+
+    def get_note_from_gramps_id(self, gramps_id):
+        return self.__get_from_gramps_id(gramps_id, Note, 'Note')
 
     def get_number_of_people(self):
         return len(self.person_map)
@@ -659,7 +963,7 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         return len(self.place_map)
 
     def get_number_of_tags(self):
-        return 0 # FIXME
+        return len(self.tag_map)
 
     def get_number_of_families(self):
         return len(self.family_map)
@@ -679,142 +983,157 @@ class DictionaryDb(DbWriteBase, DbReadBase):
     def get_number_of_repositories(self):
         return len(self.repository_map)
 
-    def get_place_cursor(self):
-        return Cursor(self.place_map, self.get_raw_place_data).iter()
+    def get_place_cursor(self, *args, **kwargs):
+        return Cursor(self.place_map)
 
-    def get_person_cursor(self):
-        return Cursor(self.person_map, self.get_raw_person_data).iter()
+    def get_person_cursor(self, *args, **kwargs):
+        return Cursor(self.person_map)
 
-    def get_family_cursor(self):
-        return Cursor(self.family_map, self.get_raw_family_data).iter()
+    def get_family_cursor(self, *args, **kwargs):
+        return Cursor(self.family_map)
 
-    def get_event_cursor(self):
-        return Cursor(self.event_map, self.get_raw_event_data).iter()
+    def get_event_cursor(self, *args, **kwargs):
+        return Cursor(self.event_map)
 
-    def get_note_cursor(self):
-        return Cursor(self.note_map, self.get_raw_note_data).iter()
+    def get_note_cursor(self, *args, **kwargs):
+        return Cursor(self.note_map)
 
-    def get_tag_cursor(self):
-        return Cursor(self.tag_map, self.get_raw_tag_data).iter()
+    def get_tag_cursor(self, *args, **kwargs):
+        return Cursor(self.tag_map)
 
-    def get_repository_cursor(self):
-        return Cursor(self.repository_map, self.get_raw_repository_data).iter()
+    def get_repository_cursor(self, *args, **kwargs):
+        return Cursor(self.repository_map)
 
-    def get_media_cursor(self):
-        return Cursor(self.media_map, self.get_raw_object_data).iter()
+    def get_media_cursor(self, *args, **kwargs):
+        return Cursor(self.media_map)
 
-    def get_citation_cursor(self):
-        return Cursor(self.citation_map, self.get_raw_citation_data).iter()
+    def get_citation_cursor(self, *args, **kwargs):
+        return Cursor(self.citation_map)
 
-    def get_source_cursor(self):
-        return Cursor(self.source_map, self.get_raw_source_data).iter()
+    def get_source_cursor(self, *args, **kwargs):
+        return Cursor(self.source_map)
 
     def has_gramps_id(self, obj_key, gramps_id):
-        key2table = {
-            PERSON_KEY:     self.person_map, 
-            FAMILY_KEY:     self.family_map, 
-            SOURCE_KEY:     self.source_map, 
-            CITATION_KEY:   self.citation_map, 
-            EVENT_KEY:      self.event_map, 
-            MEDIA_KEY:      self.media_map, 
-            PLACE_KEY:      self.place_map, 
-            REPOSITORY_KEY: self.repository_map, 
-            NOTE_KEY:       self.note_map, 
-            }
-        map = key2table[obj_key]
-        for item in map.values():
-            if item.gramps_id == gramps_id:
-                return True
-        return False
+        return gramps_id in self.gramps_ids[KEY_TO_TABLE[obj_key]]
 
     def has_person_handle(self, handle):
-        return handle in self.person_map
+        return _internal_handle(handle) in self.person_map
 
     def has_family_handle(self, handle):
-        return handle in self.family_map
+        return _internal_handle(handle) in self.family_map
 
     def has_citation_handle(self, handle):
-        return handle in self.citation_map
+        return _internal_handle(handle) in self.citation_map
 
     def has_source_handle(self, handle):
-        return handle in self.source_map
+        return _internal_handle(handle) in self.source_map
 
     def has_repository_handle(self, handle):
-        return handle in self.repository_map
+        return _internal_handle(handle) in self.repository_map
 
     def has_note_handle(self, handle):
-        return handle in self.note_map
+        return _internal_handle(handle) in self.note_map
 
     def has_place_handle(self, handle):
-        return handle in self.place_map
+        return _internal_handle(handle) in self.place_map
 
     def has_event_handle(self, handle):
-        return handle in self.event_map
+        return _internal_handle(handle) in self.event_map
 
     def has_tag_handle(self, handle):
-        return handle in self.tag_map
+        return _internal_handle(handle) in self.tag_map
 
     def has_object_handle(self, handle):
-        return handle in self.media_map
+        return _internal_handle(handle) in self.media_map
 
     def has_name_group_key(self, key):
-        # FIXME:
-        return False
+        return key in self.name_group
 
     def set_name_group_mapping(self, key, value):
-        # FIXME:
-        pass
+        if value is None:
+            self.name_group.pop(key, None)
+        else:
+            self.name_group[key] = value
 
     def set_default_person_handle(self, handle):
-        pass
+        self.default_handle = handle
 
     def set_mediapath(self, mediapath):
-        pass
+        self.mediapath = mediapath
+
+    def set_check_time(self, timestamp):
+        self.check_time = timestamp
 
     def get_raw_person_data(self, handle):
-        if handle in self.person_map:
-            return self.person_map[handle].serialize()
-        return None
+        return self.person_map.get(_internal_handle(handle))
 
     def get_raw_family_data(self, handle):
-        if handle in self.family_map:
-            return self.family_map[handle].serialize()
-        return None
+        return self.family_map.get(_internal_handle(handle))
 
     def get_raw_citation_data(self, handle):
-        if handle in self.citation_map:
-            return self.citation_map[handle].serialize()
-        return None
+        return self.citation_map.get(_internal_handle(handle))
 
     def get_raw_source_data(self, handle):
-        if handle in self.source_map:
-            return self.source_map[handle].serialize()
-        return None
+        return self.source_map.get(_internal_handle(handle))
 
     def get_raw_repository_data(self, handle):
-        if handle in self.repository_map:
-            return self.repository_map[handle].serialize()
-        return None
+        return self.repository_map.get(_internal_handle(handle))
 
     def get_raw_note_data(self, handle):
-        if handle in self.note_map:
-            return self.note_map[handle].serialize()
-        return None
+        return self.note_map.get(_internal_handle(handle))
 
     def get_raw_place_data(self, handle):
-        if handle in self.place_map:
-            return self.place_map[handle].serialize()
-        return None
+        return self.place_map.get(_internal_handle(handle))
 
     def get_raw_object_data(self, handle):
-        if handle in self.media_map:
-            return self.media_map[handle].serialize()
-        return None
+        return self.media_map.get(_internal_handle(handle))
 
     def get_raw_tag_data(self, handle):
-        if handle in self.tag_map:
-            return self.tag_map[handle].serialize()
-        return None
+        return self.tag_map.get(_internal_handle(handle))
+
+    def find_backlink_handles(self, handle, include_classes=None):
+        """
+        Find all objects that hold a reference to the object handle.
+
+        Returns an iterator over a list of (class_name, handle) tuples. The
+        references are found in one pass over all the records the first
+        time, and kept up to date by the commits afterwards.
+        """
+        if self.backlinks is None:
+            self.__build_references()
+        for (class_name, obj_handle) in sorted(
+                self.backlinks.get(_internal_handle(handle), ())):
+            if include_classes is None or class_name in include_classes:
+                yield (class_name, obj_handle)
+
+    def get_reference_count(self, handle):
+        if self.backlinks is None:
+            self.__build_references()
+        return len(self.backlinks.get(_internal_handle(handle), ()))
+
+    def __build_references(self):
+        """
+        Find the references held by all the records.
+        """
+        self.backlinks = {}
+        self.references = {}
+        for (table, map_name) in MAP_NAMES:
+            class_type = self._tables[table]["class_func"]
+            for data in getattr(self, map_name).values():
+                self.__update_references(class_type.create(data))
+
+    def __update_references(self, obj):
+        """
+        Replace the references held by obj in the reference maps.
+        """
+        class_name = obj.__class__.__name__
+        source = (class_name, obj.handle)
+        for (ref_class, ref_handle) in self.references.pop(obj.handle, ()):
+            self.backlinks[ref_handle].discard(source)
+        references = obj.get_referenced_handles_recursively()
+        self.references[obj.handle] = references
+        for (ref_class, ref_handle) in references:
+            self.backlinks.setdefault(ref_handle, set()).add(source)
 
     def add_person(self, person, trans, set_gid=True):
         if not person.handle:
@@ -900,50 +1219,63 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         self.commit_media_object(obj, transaction)
         return obj.handle
 
+    def commit_base(self, obj, data_map, key, transaction, change_time):
+        """
+        Store the raw data of obj in data_map, the map of the table key.
+        """
+        table = KEY_TO_TABLE.get(key)
+        obj.change = int(change_time or time.time())
+        data = obj.serialize()
+        if table is not None:
+            ids = self.gramps_ids[table]
+            old_data = data_map.get(obj.handle)
+            if old_data is not None:
+                ids.pop(old_data[1], None)
+            ids[data[1]] = obj.handle
+        data_map[obj.handle] = data
+        if self.backlinks is not None:
+            self.__update_references(obj)
+
     def commit_person(self, person, trans, change_time=None):
-        self.person_map[person.handle] = person
+        self.commit_base(person, self.person_map, PERSON_KEY, trans,
+                         change_time)
 
     def commit_family(self, family, trans, change_time=None):
-        self.family_map[family.handle] = family
+        self.commit_base(family, self.family_map, FAMILY_KEY, trans,
+                         change_time)
 
     def commit_citation(self, citation, trans, change_time=None):
-        self.citation_map[citation.handle] = citation
+        self.commit_base(citation, self.citation_map, CITATION_KEY, trans,
+                         change_time)
 
     def commit_source(self, source, trans, change_time=None):
-        self.source_map[source.handle] = source
+        self.commit_base(source, self.source_map, SOURCE_KEY, trans,
+                         change_time)
 
     def commit_repository(self, repository, trans, change_time=None):
-        self.repository_map[repository.handle] = repository
+        self.commit_base(repository, self.repository_map, REPOSITORY_KEY,
+                         trans, change_time)
 
     def commit_note(self, note, trans, change_time=None):
-        self.note_map[note.handle] = note
+        self.commit_base(note, self.note_map, NOTE_KEY, trans, change_time)
 
     def commit_place(self, place, trans, change_time=None):
-        self.place_map[place.handle] = place
+        self.commit_base(place, self.place_map, PLACE_KEY, trans,
+                         change_time)
 
     def commit_event(self, event, trans, change_time=None):
-        self.event_map[event.handle] = event
+        self.commit_base(event, self.event_map, EVENT_KEY, trans,
+                         change_time)
 
     def commit_tag(self, tag, trans, change_time=None):
-        self.tag_map[tag.handle] = tag
+        self.commit_base(tag, self.tag_map, None, trans, change_time)
 
     def commit_media_object(self, obj, transaction, change_time=None):
-        self.media_map[obj.handle] = obj
+        self.commit_base(obj, self.media_map, MEDIA_KEY, transaction,
+                         change_time)
 
     def get_gramps_ids(self, obj_key):
-        key2table = {
-            PERSON_KEY:     self.person_map, 
-            FAMILY_KEY:     self.family_map, 
-            CITATION_KEY:   self.citation_map, 
-            SOURCE_KEY:     self.source_map, 
-            EVENT_KEY:      self.event_map, 
-            MEDIA_KEY:      self.media_map, 
-            PLACE_KEY:      self.place_map, 
-            REPOSITORY_KEY: self.repository_map, 
-            NOTE_KEY:       self.note_map, 
-            }
-        table = key2table[obj_key]
-        return [item.gramps_id for item in table.values()]
+        return list(self.gramps_ids[KEY_TO_TABLE[obj_key]].keys())
 
     def transaction_begin(self, transaction):
         return 
@@ -952,19 +1284,101 @@ class DictionaryDb(DbWriteBase, DbReadBase):
         pass
 
     def set_researcher(self, owner):
-        pass
+        self.owner.set_from(owner)
 
     def request_rebuild(self):
         pass
 
-    def copy_from_db(self, db):
+    def copy_from_db(self, db, callback=None):
+        """
+        Load the records and the settings of the open database db into this
+        database.
+
+        The raw data of the records is copied in one sequential pass over
+        each table of db, without making the objects. callback, if given,
+        is called with the percentage of the tables copied.
+        """
+        for (count, (table, map_name)) in enumerate(MAP_NAMES):
+            data_map = getattr(self, map_name)
+            ids = self.gramps_ids.get(table)
+            with db._tables[table]["cursor_func"](buffered=True) as cursor:
+                for (handle, data) in cursor:
+                    handle = _internal_handle(handle)
+                    data_map[handle] = data
+                    if ids is not None:
+                        ids[data[1]] = handle
+            if callback:
+                callback(100 * (count + 1) // len(MAP_NAMES))
+        self.backlinks = self.references = None
+        self.copy_settings_from_db(db)
+
+    def copy_settings_from_db(self, db):
+        """
+        Copy the settings of the open database db, such as the ID prefixes,
+        the bookmarks and the researcher, into this database.
+        """
+        self.set_person_id_prefix(db.person_prefix)
+        self.set_object_id_prefix(db.mediaobject_prefix)
+        self.set_family_id_prefix(db.family_prefix)
+        self.set_citation_id_prefix(db.citation_prefix)
+        self.set_source_id_prefix(db.source_prefix)
+        self.set_place_id_prefix(db.place_prefix)
+        self.set_event_id_prefix(db.event_prefix)
+        self.set_repository_id_prefix(db.repository_prefix)
+        self.set_note_id_prefix(db.note_prefix)
+        self.set_researcher(db.get_researcher())
+        default_handle = db.get_default_handle()
+        if default_handle is not None:
+            default_handle = _internal_handle(default_handle)
+        self.default_handle = default_handle
+        self.mediapath = db.get_mediapath()
+        self.check_time = db.get_check_time()
+        self.commit_time = db.get_commit_time()
+        self.path = db.get_save_path()
+        self.name_formats = list(db.name_formats)
+        self.surname_list = list(db.get_surname_list())
+        self.name_group = dict((key, db.get_name_group_mapping(key))
+                               for key in db.get_name_group_keys())
+        for name in _BOOKMARKS:
+            getattr(self, name).set(getattr(db, name).get())
+        for name in _CUSTOM_TYPES:
+            setattr(self, name, set(getattr(db, name)))
+
+    def save_records(self, path, signature):
         """
-        A (possibily) implementation-specific method to get data from
-        db into this database.
+        Save the records in the file path, with the signature of the
+        family tree they were copied from.
         """
-        for key in db._tables.keys():
-            cursor = db._tables[key]["cursor_func"]
-            class_ = db._tables[key]["class_func"]
-            for (handle, data) in cursor():
-                map = getattr(self, "%s_map" % key.lower())
-                map[handle] = class_.create(data)
+        maps = dict((table, getattr(self, map_name))
+                    for (table, map_name) in MAP_NAMES)
+        try:
+            with open(path, "wb") as cache_file:
+                pickle.dump((signature, maps, self.gramps_ids), cache_file,
+                            pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError, pickle.PicklingError) as msg:
+            _LOG.warning("Could not save the in-memory copy in %s: %s",
+                         path, msg)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def load_records(self, path, signature):
+        """
+        Load the records saved in the file path by save_records, if they
+        were saved with signature. Return True if they were loaded.
+        """
+        if not os.path.isfile(path):
+            return False
+        try:
+            with open(path, "rb") as cache_file:
+                (saved_signature, maps, gramps_ids) = pickle.load(cache_file)
+        except Exception as msg:
+            _LOG.warning("Could not load the in-memory copy in %s: %s",
+                         path, msg)
+            return False
+        if saved_signature != signature:
+            return False
+        for (table, map_name) in MAP_NAMES:
+            setattr(self, map_name, maps[table])
+        self.gramps_ids = gramps_ids
+        self.backlinks = self.references = None
+        return True
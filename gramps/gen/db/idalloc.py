@@ -0,0 +1,128 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Allocation of GRAMPS IDs.
+
+An IdAllocator keeps, for the ID prefix of one type of object, a map of the
+numbers known to be in use. The next free number is found in the map
+instead of by looking up the candidate IDs one at a time in the ID index;
+the index is only checked for the number found, since IDs can also be set
+by the user or by an import.
+
+The map is saved in the metadata of the family tree, so that it does not
+need to be learned again in the next session.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import re
+import zlib
+
+# The number conversion of an ID prefix, such as the %04d of I%04d
+_NUMBER = re.compile(r'%[-+ #0]*\d*d')
+
+_FREE = b'\x00'
+
+#-------------------------------------------------------------------------
+#
+# IdAllocator
+#
+#-------------------------------------------------------------------------
+class IdAllocator(object):
+    """
+    Allocator of the GRAMPS IDs made from an ID prefix.
+    """
+
+    __slots__ = ('prefix', 'used', 'pattern')
+
+    def __init__(self, prefix, used=b''):
+        """
+        Create an allocator for the ID prefix, a format such as 'I%04d',
+        with the map of used numbers used, as returned by get_state.
+        """
+        self.prefix = prefix
+        self.used = bytearray(zlib.decompress(used) if used else b'')
+        match = _NUMBER.search(prefix)
+        if match:
+            self.pattern = re.compile(
+                re.escape(prefix[:match.start()].replace('%%', '%')) +
+                r'(\d+)' +
+                re.escape(prefix[match.end():].replace('%%', '%')) + '$')
+        else:
+            self.pattern = None
+
+    def allocate(self, start, is_used):
+        """
+        Return the lowest number, from start, that is not in use, and the ID
+        made from it. is_used is called with the ID to check that it is
+        really free.
+        """
+        number = start
+        while True:
+            number = self.used.find(_FREE, number)
+            if number == -1:
+                number = max(start, len(self.used))
+            gid = self.prefix % number
+            self.__mark(number)
+            if not is_used(gid):
+                return (number, gid)
+            number += 1
+
+    def release(self, gid):
+        """
+        Mark the number of the ID gid as free, if it was made from the
+        prefix.
+        """
+        number = self.__number(gid)
+        if number is not None and number < len(self.used):
+            self.used[number] = 0
+
+    def get_state(self):
+        """
+        Return the map of used numbers, to be saved.
+        """
+        return zlib.compress(bytes(self.used))
+
+    def __mark(self, number):
+        """
+        Mark the number as used.
+        """
+        if number >= len(self.used):
+            self.used.extend(_FREE * (number + 1 - len(self.used)))
+        self.used[number] = 1
+
+    def __number(self, gid):
+        """
+        Return the number the ID gid was made from, or None if it was not
+        made from the prefix.
+        """
+        if self.pattern is None or not gid:
+            return None
+        match = self.pattern.match(gid)
+        if match is None:
+            return None
+        number = int(match.group(1))
+        if self.prefix % number != gid:
+            return None
+        return number
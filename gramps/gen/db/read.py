@@ -34,13 +34,11 @@ Read classes for the GRAMPS databases.
 from __future__ import print_function, with_statement
 
 import sys
-if sys.version_info[0] < 3:
-    import cPickle as pickle
-else:
-    import pickle
 import time
 import random
 import os
+import struct
+import math
 from sys import maxsize
 
 from ..config import config
@@ -72,12 +70,18 @@ from ..lib.tag import Tag
 from ..lib.genderstats import GenderStats
 from ..lib.researcher import Researcher 
 from ..lib.nameorigintype import NameOriginType
+from ..lib.rawaccess import RAW_ACCESS
+from ..display.name import displayer as _nd
 
 from .dbconst import *
 from ..utils.callback import Callback
 from ..utils.cast import conv_dbstr_to_unicode
-from . import (BsddbBaseCursor, DbReadBase)
+from . import (BsddbBaseCursor, DbReadBase, get_sort_value)
+from .cache import DbCache
+from .idalloc import IdAllocator
+from .stats import DbStatistics
 from ..utils.id import create_id
+from ..utils.place import conv_lat_lon_float
 from ..errors import DbError
 from ..constfunc import UNITYPE, STRTYPE, cuni, handle2internal
 from ..const import GRAMPS_LOCALE as glocale
@@ -95,9 +99,44 @@ _SIGBASE = ('person', 'family', 'source', 'citation',
             'event',  'media', 'place', 'repository',
             'reference', 'note', 'tag')
 
+# Attribute names of the primary tables, keyed by table name
+TABLE_MAP_NAMES = {
+    'Person':     'person_map',
+    'Family':     'family_map',
+    'Source':     'source_map',
+    'Citation':   'citation_map',
+    'Event':      'event_map',
+    'Media':      'media_map',
+    'Place':      'place_map',
+    'Repository': 'repository_map',
+    'Note':       'note_map',
+    'Tag':        'tag_map',
+    }
+
 DBERRS      = (db.DBRunRecoveryError, db.DBAccessError, 
                db.DBPageNotFoundError, db.DBInvalidArgError)
 
+# Offset making date sort values non-negative, so that their big-endian
+# byte strings sort like the numbers
+_SORTVAL_OFFSET = 1 << 63
+
+# Resolution of the grid of the place coordinate index
+_GRID_CELLS_PER_DEGREE = 10
+
+# File names of the change time indices, keyed by table name
+CHANGE_INDEX_NAMES = {
+    'Person':     'person_change',
+    'Family':     'family_change',
+    'Source':     'source_change',
+    'Citation':   'citation_change',
+    'Event':      'event_change',
+    'Media':      'media_change',
+    'Place':      'place_change',
+    'Repository': 'repository_change',
+    'Note':       'note_change',
+    'Tag':        'tag_change',
+    }
+
 #-------------------------------------------------------------------------
 #
 # Helper functions
@@ -128,6 +167,90 @@ def find_surname_name(key, data):
     """
     return __index_surname(data[5])
 
+def find_byte_sortname(key, data):
+    """
+    Creating the locale collation key of the sort name of the primary name
+    from raw data of a person, to use for sort and index
+    returns a byte string
+    """
+    return _byte_sort_key(_nd.raw_sorted_name(data[3]))
+
+def find_event_date(key, data):
+    """
+    Creating the date sort value from raw data of an event, to use for
+    the date index. Events without a date or a sort value are not indexed.
+    returns a byte string
+    """
+    if data[3] is None:
+        return db.DB_DONOTINDEX
+    sortval = data[3][5]
+    if not sortval:
+        return db.DB_DONOTINDEX
+    return _date_index_key(sortval)
+
+def _date_index_key(sortval):
+    """
+    Return a date sort value as a byte string that sorts like the number
+    """
+    return struct.pack('>Q', sortval + _SORTVAL_OFFSET)
+
+def find_place_position(key, data):
+    """
+    Creating the grid cell and the coordinates as floats from raw data of a
+    place, to use for the place coordinate index. Places without valid
+    coordinates are not indexed.
+    returns a byte string
+    """
+    lat, lon = conv_lat_lon_float(data[4], data[3])
+    if lat is None:
+        return db.DB_DONOTINDEX
+    return (struct.pack('>HH', _grid_cell(lat, 90), _grid_cell(lon, 180)) +
+            struct.pack('>dd', lat, lon))
+
+def find_change(class_name):
+    """
+    Return the function creating the change time from raw data of a
+    primary object of class class_name, to use for the change time index.
+    The function returns a byte string
+    """
+    change = RAW_ACCESS[class_name].change
+    def find_change_time(key, data):
+        return _change_index_key(change(data))
+    return find_change_time
+
+def _change_index_key(change):
+    """
+    Return a change time as a byte string that sorts like the number
+    """
+    return struct.pack('>Q', max(int(change), 0))
+
+def _grid_cell(value, offset):
+    """
+    Return the number of the grid row or column of a latitude (offset 90)
+    or a longitude (offset 180)
+    """
+    cell = int((value + offset) * _GRID_CELLS_PER_DEGREE)
+    return min(max(cell, 0), 2 * offset * _GRID_CELLS_PER_DEGREE)
+
+def _byte_sort_key(text):
+    """
+    Return the locale collation key of text as a byte string
+    """
+    sort_key = glocale.sort_key(text)
+    if isinstance(sort_key, UNITYPE):
+        return sort_key.encode('utf-8')
+    return sort_key
+
+def sortname_fingerprint():
+    """
+    Return a string identifying the collation and the name formats used by
+    find_byte_sortname. The person sort name index is only valid for the
+    fingerprint it was built with.
+    """
+    return repr((glocale.collation, _nd.get_pat_as_surn(),
+                 _nd.get_default_format(),
+                 _nd.get_name_format(also_default=True, only_active=False)))
+
 def __index_surname(surn_list):
     """
     All non pa/matronymic surnames are used in indexing.
@@ -186,7 +309,7 @@ class DbBookmarks(object):
 class DbReadCursor(BsddbBaseCursor):
 
     def __init__(self, source, txn=None, **kwargs):
-        BsddbBaseCursor.__init__(self, txn=txn, **kwargs)
+        BsddbBaseCursor.__init__(self, txn=txn, codec=source.codec, **kwargs)
         self.cursor = source.db.cursor(txn)
         self.source = source
 
@@ -211,6 +334,13 @@ class DbBsddbRead(DbReadBase, Callback):
 
         returns an object given its gramps id
 
+    .. method:: get_<objects>_from_handles()
+
+        returns a list of objects given a list of handles, fetching the
+        records in a single pass. The objects available are: people,
+        families, events, places, sources, citations, media_objects,
+        repositories, notes and tags.
+
     .. method:: get_<object>_cursor()
 
         returns a cursor over an object.  Example use::
@@ -362,6 +492,11 @@ class DbBsddbRead(DbReadBase, Callback):
         self.omap_index = 0
         self.rmap_index = 0
         self.nmap_index = 0
+        # IdAllocator of each object key, and the saved state of the
+        # allocators, by object key, as (ID prefix, state) pairs
+        self.id_allocators = {}
+        self.id_allocator_states = {}
+        self.statistics = None
         self.db_is_open = False
 
         self.family_event_names = set()
@@ -394,6 +529,11 @@ class DbBsddbRead(DbReadBase, Callback):
         self.nid_trans = {}
         self.eid_trans = {}
         self.tag_trans = {}
+        self.sortnames = None
+        self.sortname_fingerprint = None
+        self.event_dates = None
+        self.place_grid = None
+        self.change_indices = {}
         self.env = None
         self.person_map = {}
         self.family_map = {}
@@ -432,6 +572,8 @@ class DbBsddbRead(DbReadBase, Callback):
         self.surname_list = []
         self.txn = None
         self.has_changed = False
+        self.cache = DbCache(config.get('database.cache-size'))
+        self.codec = None
 
     def set_prefixes(self, person, media, family, source, citation, place,
                      event, repository, note):
@@ -461,8 +603,11 @@ class DbBsddbRead(DbReadBase, Callback):
         return None
 
     def get_cursor(self, table, *args, **kwargs):
+        # buffered is keyword-only, so that no stray positional argument
+        # sets it
+        buffered = kwargs.pop('buffered', False)
         try:
-            return DbReadCursor(table, self.txn)
+            return DbReadCursor(table, self.txn, buffered=buffered)
         except DBERRS as msg:
             self.__log_error()
             raise DbError(msg)
@@ -546,26 +691,46 @@ class DbBsddbRead(DbReadBase, Callback):
         self.emit('note-rebuild')
         self.emit('tag-rebuild')
 
-    def __find_next_gramps_id(self, prefix, map_index, trans):
+    def __find_next_gramps_id(self, key, prefix, map_index, trans):
         """
         Helper function for find_next_<object>_gramps_id methods
         """
-        index = prefix % map_index
-        #in bytes
-        bindex = index.encode('utf-8')
-        while trans.get(bindex, txn=self.txn) is not None:
-            map_index += 1
-            index = prefix % map_index
+        def is_used(index):
+            #in bytes
             bindex = index.encode('utf-8')
+            return trans.get(bindex, txn=self.txn) is not None
+
+        map_index, index = self.get_id_allocator(key, prefix).allocate(
+            map_index, is_used)
         map_index += 1
         return (map_index, index)
+
+    def get_id_allocator(self, key, prefix):
+        """
+        Return the IdAllocator for the objects of the key, such as
+        PERSON_KEY, with the ID prefix.
+        """
+        allocator = self.id_allocators.get(key)
+        if allocator is None or allocator.prefix != prefix:
+            if allocator is not None:
+                # keep the numbers released under the previous prefix
+                self.id_allocator_states[key] = (allocator.prefix,
+                                                 allocator.get_state())
+            state = self.id_allocator_states.get(key)
+            if state is not None and state[0] == prefix:
+                allocator = IdAllocator(prefix, state[1])
+            else:
+                allocator = IdAllocator(prefix)
+            self.id_allocators[key] = allocator
+        return allocator
         
     def find_next_person_gramps_id(self):
         """
         Return the next available GRAMPS' ID for a Person object based off the 
         person ID prefix.
         """
-        self.pmap_index, gid = self.__find_next_gramps_id(self.person_prefix,
+        self.pmap_index, gid = self.__find_next_gramps_id(PERSON_KEY,
+                                          self.person_prefix,
                                           self.pmap_index, self.id_trans)
         return gid
 
@@ -574,7 +739,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Place object based off the 
         place ID prefix.
         """
-        self.lmap_index, gid = self.__find_next_gramps_id(self.place_prefix,
+        self.lmap_index, gid = self.__find_next_gramps_id(PLACE_KEY,
+                                          self.place_prefix,
                                           self.lmap_index, self.pid_trans)
         return gid
 
@@ -583,7 +749,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Event object based off the 
         event ID prefix.
         """
-        self.emap_index, gid = self.__find_next_gramps_id(self.event_prefix,
+        self.emap_index, gid = self.__find_next_gramps_id(EVENT_KEY,
+                                          self.event_prefix,
                                           self.emap_index, self.eid_trans)
         return gid
 
@@ -592,7 +759,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a MediaObject object based
         off the media object ID prefix.
         """
-        self.omap_index, gid = self.__find_next_gramps_id(self.mediaobject_prefix,
+        self.omap_index, gid = self.__find_next_gramps_id(MEDIA_KEY,
+                                          self.mediaobject_prefix,
                                           self.omap_index, self.oid_trans)
         return gid
 
@@ -601,7 +769,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Source object based off the 
         source ID prefix.
         """
-        self.smap_index, gid = self.__find_next_gramps_id(self.source_prefix,
+        self.smap_index, gid = self.__find_next_gramps_id(SOURCE_KEY,
+                                          self.source_prefix,
                                           self.smap_index, self.sid_trans)
         return gid
 
@@ -610,7 +779,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Source object based off the 
         source ID prefix.
         """
-        self.cmap_index, gid = self.__find_next_gramps_id(self.citation_prefix,
+        self.cmap_index, gid = self.__find_next_gramps_id(CITATION_KEY,
+                                          self.citation_prefix,
                                           self.cmap_index, self.cid_trans)
         return gid
 
@@ -619,7 +789,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Family object based off the 
         family ID prefix.
         """
-        self.fmap_index, gid = self.__find_next_gramps_id(self.family_prefix,
+        self.fmap_index, gid = self.__find_next_gramps_id(FAMILY_KEY,
+                                          self.family_prefix,
                                           self.fmap_index, self.fid_trans)
         return gid
 
@@ -628,7 +799,8 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Respository object based 
         off the repository ID prefix.
         """
-        self.rmap_index, gid = self.__find_next_gramps_id(self.repository_prefix,
+        self.rmap_index, gid = self.__find_next_gramps_id(REPOSITORY_KEY,
+                                          self.repository_prefix,
                                           self.rmap_index, self.rid_trans)
         return gid
 
@@ -637,14 +809,58 @@ class DbBsddbRead(DbReadBase, Callback):
         Return the next available GRAMPS' ID for a Note object based off the 
         note ID prefix.
         """
-        self.nmap_index, gid = self.__find_next_gramps_id(self.note_prefix,
+        self.nmap_index, gid = self.__find_next_gramps_id(NOTE_KEY,
+                                          self.note_prefix,
                                           self.nmap_index, self.nid_trans)
         return gid
 
+    def get_cache_statistics(self):
+        """
+        Return a dictionary with the capacity, size, hits and misses of the
+        cache of decoded primary records used by get_from_handle.
+        """
+        return self.cache.get_statistics()
+
+    def enable_statistics(self):
+        """
+        Start counting the calls, the time and the bytes read and written of
+        the database access methods, and return the DbStatistics holding
+        the counts. Proxies built on the database afterwards are counted
+        too.
+        """
+        if self.statistics is None:
+            self.statistics = DbStatistics()
+            self.statistics.instrument(self)
+            for table, map_name in TABLE_MAP_NAMES.items():
+                self.statistics.instrument_table(getattr(self, map_name),
+                                                 table)
+            self.statistics.instrument_table(self.reference_map, 'Reference')
+        return self.statistics
+
+    def disable_statistics(self):
+        """
+        Stop counting the use of the database.
+        """
+        if self.statistics is not None:
+            self.statistics.remove()
+            self.statistics = None
+
+    def get_statistics(self):
+        """
+        Return the DbStatistics of the database, or None if they are not
+        enabled.
+        """
+        return self.statistics
+
     def get_from_handle(self, handle, class_type, data_map):
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
-        data = data_map.get(handle)
+        key = (class_type.__name__, handle)
+        data = self.cache.get(key)
+        if data is None:
+            data = data_map.get(handle)
+            if data:
+                self.cache.put(key, data)
         if data:
             newobj = class_type()
             newobj.unserialize(data)
@@ -760,6 +976,70 @@ class DbBsddbRead(DbReadBase, Callback):
         """
         return self.get_from_handle(handle, Tag, self.tag_map)
 
+    def __get_raw_data_many(self, table, handles):
+        """
+        Helper method for get_raw_data_many and get_<objects>_from_handles.
+
+        Return a list with the raw data for each handle, in the order of the
+        passed handles. Handles that are not found give None. Each distinct
+        key is fetched only once.
+        """
+        if table is None or isinstance(table, dict):
+            return [None] * len(handles) ## trying to get objects too early
+        keys = [handle.encode('utf-8') if isinstance(handle, UNITYPE)
+                else handle for handle in handles]
+        found = {}
+        get = table.get
+        txn = self.txn
+        try:
+            for key in set(keys):
+                found[key] = get(key, txn=txn)
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        return [found[key] for key in keys]
+
+    def get_raw_data_many(self, table_name, handles):
+        """
+        Return a list of raw (serialized) objects, one for each handle in the
+        passed list, from the table with the given name ("Person", "Family",
+        ...). None is returned in place of handles that are not found.
+        """
+        return self.__get_raw_data_many(
+                    getattr(self, TABLE_MAP_NAMES[table_name]), handles)
+
+    def _f(map_name, obj_):
+        """
+        Closure that returns a method fetching a list of objects from a list
+        of handles.
+        """
+        def g(self, handles):
+            objects = []
+            for data in self.__get_raw_data_many(getattr(self, map_name),
+                                                 handles):
+                if data:
+                    obj = obj_()
+                    obj.unserialize(data)
+                    objects.append(obj)
+                else:
+                    objects.append(None)
+            return objects
+        return g
+
+    # Use closure to define batch getters for each primary object type
+
+    get_people_from_handles        = _f('person_map', Person)
+    get_families_from_handles      = _f('family_map', Family)
+    get_events_from_handles        = _f('event_map', Event)
+    get_places_from_handles        = _f('place_map', Place)
+    get_sources_from_handles       = _f('source_map', Source)
+    get_citations_from_handles     = _f('citation_map', Citation)
+    get_media_objects_from_handles = _f('media_map', MediaObject)
+    get_repositories_from_handles  = _f('repository_map', Repository)
+    get_notes_from_handles         = _f('note_map', Note)
+    get_tags_from_handles          = _f('tag_map', Tag)
+    del _f
+
     def __get_obj_from_gramps_id(self, val, tbl, class_, prim_tbl):
         if isinstance(tbl, dict): 
             return None ## trying to get object too early        
@@ -776,7 +1056,7 @@ class DbBsddbRead(DbReadBase, Callback):
                 if self.readonly:
                     tuple_data = prim_tbl.get(data, txn=self.txn)
                 else:
-                    tuple_data = pickle.loads(data)
+                    tuple_data = prim_tbl.codec.loads(data)
                 obj.unserialize(tuple_data)
                 return obj
             else:
@@ -981,19 +1261,239 @@ class DbBsddbRead(DbReadBase, Callback):
         Return a list of database handles, one handle for each Person in
         the database. 
         
-        If sort_handles is True, the list is sorted by surnames.
+        If sort_handles is True, the list is sorted by the sort name of the
+        primary name.
         
         CAREFUL: For speed the keys are directly returned, so on python3 
                  bytestrings are returned! Use constfunc.py handle2internal
                  on this result!
         """
         if self.db_is_open:
+            if sort_handles and self.__sortnames_current():
+                return list(self.__iter_sortnames())
             handle_list = self.all_handles(self.person_map)
             if sort_handles:
                 handle_list.sort(key=self.__sortbyperson_key)
             return handle_list
         return []
 
+    def iter_person_handles_sorted(self, start=None):
+        """
+        Return an iterator over handles for Persons in the database, ordered
+        by the sort name of their primary name.
+
+        If start is given, the iteration begins with the first person whose
+        sort name collates at or after start.
+
+        CAREFUL: For speed the keys are directly returned, so on python3 
+                 bytestrings are returned! Use constfunc.py handle2internal
+                 on this result!
+        """
+        if not self.db_is_open:
+            return iter([])
+        if self.__sortnames_current():
+            return self.__iter_sortnames(start)
+        handle_list = self.get_person_handles(sort_handles=True)
+        if start is not None:
+            start_key = _byte_sort_key(start)
+            handle_list = [handle for handle in handle_list
+                           if self.__sortbyperson_key(handle) >= start_key]
+        return iter(handle_list)
+
+    def rebuild_sortname_index(self):
+        """
+        Rebuild the person sort name index for the current collation and
+        name formats.
+
+        The method needs to be overridden in the derived class.
+        """
+        pass
+
+    def __sortnames_current(self):
+        """
+        Return True if the person sort name index can be used, rebuilding
+        it first if the collation or the name formats have changed.
+        """
+        if self.sortnames is None:
+            return False
+        fingerprint = sortname_fingerprint()
+        if self.sortname_fingerprint != fingerprint:
+            self.rebuild_sortname_index()
+        return self.sortname_fingerprint == fingerprint
+
+    def __iter_sortnames(self, start=None):
+        """
+        Iterate over the person handles in the sort name index, beginning
+        with the first key at or after the collation key of start.
+        """
+        cursor = self.sortnames.cursor(txn=self.txn)
+        try:
+            start_key = None if start is None else _byte_sort_key(start)
+            ret = self.__index_first(cursor, start_key)
+            while ret:
+                yield ret[1]
+                ret = self.__index_next(cursor)
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        finally:
+            cursor.close()
+
+    def __index_first(self, cursor, key=None):
+        """
+        Position a cursor on a secondary index at the first entry, or at the
+        first entry with a key at or after key, and return its
+        (index key, primary key) pair, or None.
+        """
+        ### For a readonly database the secondary index is not
+        ### associated, and the data is the primary table key.
+        ### Otherwise pget is needed to obtain the primary key.
+        if self.readonly:
+            if key is None:
+                ret = cursor.first()
+            else:
+                ret = cursor.set_range(key)
+        elif key is None:
+            ret = cursor.pget(db.DB_FIRST)
+        else:
+            ret = cursor.pget(key, db.DB_SET_RANGE)
+        return ret[:2] if ret else None
+
+    def __index_next(self, cursor):
+        """
+        Move a cursor on a secondary index to the next entry and return its
+        (index key, primary key) pair, or None.
+        """
+        if self.readonly:
+            ret = cursor.next()
+        else:
+            ret = cursor.pget(db.DB_NEXT)
+        return ret[:2] if ret else None
+
+    def iter_event_handles_in_date_range(self, start, stop):
+        """
+        Return an iterator over handles for Events whose date sort value
+        lies in the half-open range from start to stop, in date order.
+
+        start and stop are Date objects or date sort values; None leaves
+        that end of the range open. Events without a date are never
+        returned.
+
+        CAREFUL: For speed the keys are directly returned, so on python3 
+                 bytestrings are returned! Use constfunc.py handle2internal
+                 on this result!
+        """
+        if not self.db_is_open:
+            return iter([])
+        if self.event_dates is None:
+            return DbReadBase.iter_event_handles_in_date_range(self, start,
+                                                               stop)
+        return self.__iter_event_dates(start, stop)
+
+    def __iter_event_dates(self, start, stop):
+        """
+        Iterate over the event handles in the date index from the key of
+        start up to, but not including, the key of stop.
+        """
+        start = get_sort_value(start)
+        stop = get_sort_value(stop)
+        start_key = None if start is None else _date_index_key(start)
+        stop_key = None if stop is None else _date_index_key(stop)
+        cursor = self.event_dates.cursor(txn=self.txn)
+        try:
+            ret = self.__index_first(cursor, start_key)
+            while ret and (stop_key is None or ret[0] < stop_key):
+                yield ret[1]
+                ret = self.__index_next(cursor)
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        finally:
+            cursor.close()
+
+    def iter_changed_since(self, table, timestamp):
+        """
+        Return an iterator over handles for the objects of the table, a
+        table name such as 'Person' or 'Media', that were last changed at or
+        after timestamp, in order of change time.
+
+        CAREFUL: For speed the keys are directly returned, so on python3 
+                 bytestrings are returned! Use constfunc.py handle2internal
+                 on this result!
+        """
+        if not self.db_is_open:
+            return iter([])
+        index = self.change_indices.get(table)
+        if index is None:
+            return DbReadBase.iter_changed_since(self, table, timestamp)
+        return self.__iter_change_index(index, timestamp)
+
+    def __iter_change_index(self, index, timestamp):
+        """
+        Iterate over the handles in a change time index from the key of
+        timestamp to the end.
+        """
+        cursor = index.cursor(txn=self.txn)
+        try:
+            ret = self.__index_first(cursor,
+                                     _change_index_key(math.ceil(timestamp)))
+            while ret:
+                yield ret[1]
+                ret = self.__index_next(cursor)
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        finally:
+            cursor.close()
+
+    def find_places_in_bbox(self, lat_min, lon_min, lat_max, lon_max):
+        """
+        Return an iterator over handles for Places whose coordinates lie in
+        the box between the given latitudes and longitudes, in degrees.
+
+        The bounds are inclusive. A box with lon_min greater than lon_max
+        crosses the 180th meridian. Places without valid coordinates are
+        never returned.
+
+        CAREFUL: For speed the keys are directly returned, so on python3 
+                 bytestrings are returned! Use constfunc.py handle2internal
+                 on this result!
+        """
+        if not self.db_is_open:
+            return iter([])
+        if self.place_grid is None:
+            return DbReadBase.find_places_in_bbox(self, lat_min, lon_min,
+                                                  lat_max, lon_max)
+        return self.__iter_place_grid(lat_min, lon_min, lat_max, lon_max)
+
+    def __iter_place_grid(self, lat_min, lon_min, lat_max, lon_max):
+        """
+        Iterate over the place handles in the grid cells covering the box,
+        checking the exact coordinates stored in the index keys.
+        """
+        if lon_min > lon_max:
+            lon_ranges = [(lon_min, 180.), (-180., lon_max)]
+        else:
+            lon_ranges = [(lon_min, lon_max)]
+        cursor = self.place_grid.cursor(txn=self.txn)
+        try:
+            for lat_cell in range(_grid_cell(lat_min, 90),
+                                  _grid_cell(lat_max, 90) + 1):
+                for (west, east) in lon_ranges:
+                    last = struct.pack('>HH', lat_cell, _grid_cell(east, 180))
+                    ret = self.__index_first(cursor, struct.pack('>HH',
+                                             lat_cell, _grid_cell(west, 180)))
+                    while ret and ret[0][:4] <= last:
+                        lat, lon = struct.unpack('>dd', ret[0][4:])
+                        if lat_min <= lat <= lat_max and west <= lon <= east:
+                            yield ret[1]
+                        ret = self.__index_next(cursor)
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        finally:
+            cursor.close()
+
     def get_place_handles(self, sort_handles=False):
         """
         Return a list of database handles, one handle for each Place in
@@ -1589,10 +2089,6 @@ class DbBsddbRead(DbReadBase, Callback):
             handle = handle.encode('utf-8')
         try:
             return table.get(handle, txn=self.txn)
-        except UnicodeDecodeError:
-            #we need to assume we opened data in python3 saved in python2
-            raw = table.db.get(handle, txn=self.txn)
-            return pickle.loads(raw, encoding='utf-8')
         except DBERRS as msg:
             self.__log_error()
             raise DbError(msg)
@@ -1702,8 +2198,7 @@ class DbBsddbRead(DbReadBase, Callback):
     def __sortbyperson_key(self, handle):
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
-        return glocale.sort_key(find_surname(handle, 
-                                           self.person_map.get(handle)))
+        return find_byte_sortname(handle, self.person_map.get(handle))
 
     def __sortbyplace(self, first, second):
         if isinstance(first, UNITYPE):
@@ -1789,6 +2284,24 @@ class DbBsddbRead(DbReadBase, Callback):
             return self.metadata.get(b'mediapath', None)
         return None
 
+    def get_check_time(self):
+        """
+        Return the time of the last run of Check and Repair that found no
+        problem, or None.
+        """
+        if self.metadata is not None:
+            return self.metadata.get(b'check_time', None)
+        return None
+
+    def get_commit_time(self):
+        """
+        Return the time of the last transaction committed to the database,
+        or None.
+        """
+        if self.metadata is not None:
+            return self.metadata.get(b'commit_time', None)
+        return None
+
     def find_backlink_handles(self, handle, include_classes=None):
         """
         Find all objects that hold a reference to the object handle.
@@ -1882,6 +2395,12 @@ class DbBsddbRead(DbReadBase, Callback):
                             yield (primary_table_name, found_handle)
         return
 
+    def get_reference_count(self, handle):
+        """
+        Return the number of references to the object with the given handle.
+        """
+        return sum(1 for dummy in self.find_backlink_handles(handle))
+
     def report_bm_change(self):
         """
         Add 1 to the number of bookmark changes during this session.
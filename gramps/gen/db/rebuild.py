@@ -0,0 +1,193 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Computation of the reference map and of the secondary index keys for the
+rebuild of a BSDDB family tree.
+
+The records of a primary table are read by the database in chunks, as
+stored. The chunks are decoded and turned into the sorted rows to write by
+a pool of worker processes, while the database writes the rows of the
+chunks already done. The workers never use the database environment.
+
+The number of processes is set by 'database.rebuild-processes'; 0 means
+one per processor, and 1 does all the work in the calling process.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import sys
+import logging
+import multiprocessing
+from collections import deque
+from operator import itemgetter
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..config import config
+if config.get('preferences.use-bsddb3') or sys.version_info[0] >= 3:
+    from bsddb3 import db
+else:
+    from bsddb import db
+from ..lib import (Person, Family, Event, Place, Source, Citation,
+                   MediaObject, Repository, Note, Tag)
+from .codec import get_codec
+from .write import CLASS_TO_KEY_MAP
+from .dbconst import DBLOGNAME
+
+_LOG = logging.getLogger(DBLOGNAME)
+
+# Number of records in a chunk handed to a worker
+CHUNK_SIZE = 2000
+
+_CLASSES = dict((cls.__name__, cls) for cls in
+                (Person, Family, Event, Place, Source, Citation, MediaObject,
+                 Repository, Note, Tag))
+
+#-------------------------------------------------------------------------
+#
+# Row computation
+#
+#-------------------------------------------------------------------------
+def object_references(obj):
+    """
+    Return the (key, data) rows of the reference map for the references
+    held by the primary object obj, sorted by key.
+    """
+    primary = (CLASS_TO_KEY_MAP[obj.__class__.__name__], obj.handle)
+    rows = [(str((obj.handle, ref_handle)).encode('utf-8'),
+             (primary, (CLASS_TO_KEY_MAP[ref_class_name], ref_handle)))
+            for (ref_class_name, ref_handle) in
+            set(obj.get_referenced_handles_recursively())]
+    rows.sort(key=itemgetter(0))
+    return rows
+
+def reference_rows(task):
+    """
+    Return the reference map rows, sorted by key, of a chunk of records.
+
+    task is a tuple of the codec name, the class name of the records and
+    the list of (handle, raw record) pairs.
+    """
+    codec_name, class_name, records = task
+    loads = get_codec(codec_name).loads
+    class_func = _CLASSES[class_name]
+    rows = []
+    for handle, raw in records:
+        obj = class_func()
+        obj.unserialize(loads(raw))
+        rows.extend(object_references(obj))
+    rows.sort(key=itemgetter(0))
+    return rows
+
+def index_rows(task):
+    """
+    Return the sorted (index key, handle) rows of a secondary index for a
+    chunk of records. A record whose key cannot be computed is left out of
+    the index, as BSDDB does when the callback of an association fails.
+
+    task is a tuple of the codec name, the key function used to associate
+    the index and the list of (handle, raw record) pairs.
+    """
+    codec_name, key_func, records = task
+    loads = get_codec(codec_name).loads
+    rows = []
+    for handle, raw in records:
+        try:
+            key = key_func(handle, loads(raw))
+        except Exception:
+            _LOG.warning("Record %s not indexed by %s", handle,
+                         key_func.__name__, exc_info=True)
+            continue
+        if key != db.DB_DONOTINDEX:
+            rows.append((key, handle))
+    rows.sort()
+    return rows
+
+#-------------------------------------------------------------------------
+#
+# Work distribution
+#
+#-------------------------------------------------------------------------
+def iter_chunks(table):
+    """
+    Iterate over the records of the DbCodecShelf table, still encoded, in
+    lists of at most CHUNK_SIZE (handle, raw record) pairs.
+    """
+    cursor = table.db.cursor()
+    try:
+        chunk = []
+        data = cursor.first()
+        while data:
+            chunk.append(data)
+            if len(chunk) == CHUNK_SIZE:
+                yield chunk
+                chunk = []
+            data = cursor.next()
+        if chunk:
+            yield chunk
+    finally:
+        cursor.close()
+
+def rebuild_processes():
+    """
+    Return the number of processes to use for a rebuild.
+    """
+    processes = config.get('database.rebuild-processes')
+    if processes <= 0:
+        try:
+            processes = multiprocessing.cpu_count()
+        except NotImplementedError:
+            processes = 1
+    return processes
+
+def map_tasks(func, tasks):
+    """
+    Iterate over the results of func for each of the tasks, in order.
+
+    The tasks are handed to a pool of worker processes as they are taken
+    from the iterator, with at most two tasks per process waiting, so that
+    the tasks are produced in the calling thread and only a few of them are
+    in memory at once.
+    """
+    processes = rebuild_processes()
+    if processes == 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(func, (task,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,121 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Read-only snapshots of a family tree for background work.
+
+A snapshot is a copy of the database files, taken between transactions, in
+a directory of its own. It is opened read-only in its own database
+environment, so a worker thread or process can run a long report or export
+on it while the original tree is being edited.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import logging
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .dbconst import DBLOCKFN, DBUNDOFN, DBRECOVFN, DBMODE_R, DBLOGNAME
+
+_LOG = logging.getLogger(DBLOGNAME)
+
+# Files of the tree that are not part of a snapshot: the environment
+# regions, the lock, the undo history and the recovery marker
+_SKIP_FILES = (DBLOCKFN, DBUNDOFN, DBRECOVFN)
+_REGION_PREFIX = "__db."
+
+def copy_tree_files(source, target):
+    """
+    Copy the database and log files of the family tree in directory source
+    to directory target.
+    """
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if (name in _SKIP_FILES or name.startswith(_REGION_PREFIX)
+                or not os.path.isfile(path)):
+            continue
+        shutil.copyfile(path, os.path.join(target, name))
+
+#-------------------------------------------------------------------------
+#
+# DbSnapshot
+#
+#-------------------------------------------------------------------------
+class DbSnapshot(object):
+    """
+    A read-only copy of a family tree.
+
+    The snapshot is taken in the thread that owns the database, with
+    DbBsddb.open_snapshot. The copy is opened with open, which must be
+    called in the thread or process that will use it, and the files are
+    removed with close:
+
+        >>> snapshot = dbstate.open_snapshot()
+        >>> # in the worker thread:
+        >>> with snapshot as database:
+        ...     export(database)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+
+    def open(self, callback=None):
+        """
+        Open the copy read-only and return the database.
+        """
+        from .write import DbBsddb
+        self.db = DbBsddb()
+        self.db.load(self.path, callback, DBMODE_R)
+        return self.db
+
+    def close(self):
+        """
+        Close the copy and remove its files.
+        """
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+def make_snapshot_dir():
+    """
+    Create and return a new directory for a snapshot.
+    """
+    path = tempfile.mkdtemp(prefix="gramps-snapshot-")
+    _LOG.debug("Snapshot directory %s" % path)
+    return path
@@ -0,0 +1,1158 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Implements a Db interface on an SQLite database.
+
+A family tree is kept in one SQLite file in the directory of the tree. Each
+primary table stores the handle, the GRAMPS ID, the change time and the
+encoded serialized data of its objects, plus the columns the lookups need
+indexed: the surname and the sort name of people, the date sort value of
+events and the name of tags. A separate table holds the references between
+the objects. The file is opened in WAL mode, so other processes can read
+the tree while it is written.
+"""
+
+#------------------------------------------------------------------------
+#
+# Python modules
+#
+#------------------------------------------------------------------------
+import sys
+import os
+import time
+import shutil
+import sqlite3
+import logging
+from collections import deque
+
+#------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#------------------------------------------------------------------------
+from ..config import config
+from ..const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+from ..constfunc import UNITYPE
+from ..errors import DbError
+from ..lib.person import Person
+from ..lib.genderstats import GenderStats
+from ..lib.rawaccess import RAW_ACCESS, EVENT
+from ..utils.callback import Callback
+from .base import get_sort_value
+from .codec import get_codec, PICKLE_CODEC
+from .dbconst import (DBLOGNAME, DBMODE_R, DBMODE_W, PERSON_KEY, FAMILY_KEY,
+                      SOURCE_KEY, CITATION_KEY, EVENT_KEY, MEDIA_KEY,
+                      PLACE_KEY, REPOSITORY_KEY, NOTE_KEY)
+from .exceptions import DbException, DbVersionError
+from .read import find_surname, find_byte_sortname, sortname_fingerprint
+from .write import write_lock_file, clear_lock_file
+from .dictionary import (DictionaryDb, MAP_NAMES, _CUSTOM_TYPES, _BOOKMARKS,
+                         _internal_handle)
+
+_LOG = logging.getLogger(DBLOGNAME)
+
+#------------------------------------------------------------------------
+#
+# Constants
+#
+#------------------------------------------------------------------------
+# Files, in the directory of a family tree, of the database and its backup
+SQLITE_FILE = "sqlite.db"
+SQLITE_BACKUP = "sqlite.gbkp"
+
+# Version of the layout of the SQLite tables
+SQLITE_VERSION = 1
+
+# Number of rows fetched at a time when iterating over a table
+_FETCH_SIZE = 1000
+
+# Class names of the objects of the primary tables
+_CLASS_NAMES = {
+    'Person':     'Person',
+    'Family':     'Family',
+    'Source':     'Source',
+    'Citation':   'Citation',
+    'Event':      'Event',
+    'Media':      'MediaObject',
+    'Place':      'Place',
+    'Repository': 'Repository',
+    'Note':       'Note',
+    'Tag':        'Tag',
+    }
+
+_ID_PREFIXES = (('person_prefix', 'set_person_id_prefix'),
+                ('mediaobject_prefix', 'set_object_id_prefix'),
+                ('family_prefix', 'set_family_id_prefix'),
+                ('citation_prefix', 'set_citation_id_prefix'),
+                ('source_prefix', 'set_source_id_prefix'),
+                ('place_prefix', 'set_place_id_prefix'),
+                ('event_prefix', 'set_event_id_prefix'),
+                ('repository_prefix', 'set_repository_id_prefix'),
+                ('note_prefix', 'set_note_id_prefix'))
+
+#------------------------------------------------------------------------
+#
+# Helper functions
+#
+#------------------------------------------------------------------------
+def _text(value):
+    """
+    Return value, a text or a byte string, as text.
+    """
+    if isinstance(value, bytes) and not isinstance(value, UNITYPE):
+        return value.decode('utf-8')
+    return value
+
+def _blob(value):
+    """
+    Return the byte string value as an SQLite BLOB parameter.
+    """
+    return sqlite3.Binary(value)
+
+def _sort_key(text):
+    """
+    Return the locale collation key of text, as stored in the sort_name
+    column of the person table.
+    """
+    sort_key = glocale.sort_key(text)
+    if isinstance(sort_key, UNITYPE):
+        sort_key = sort_key.encode('utf-8')
+    return _blob(sort_key)
+
+def _person_surname(data):
+    return _text(find_surname(None, data))
+
+def _person_sort_name(data):
+    return _blob(find_byte_sortname(None, data))
+
+_EVENT_SORTVAL = EVENT.getter('date.sortval')
+
+def _event_sortval(data):
+    # an empty date is serialized as None
+    if data[3] is None:
+        return None
+    return _EVENT_SORTVAL(data) or None
+
+def _tag_name(data):
+    return data[1]
+
+# Indexed columns computed from the serialized data, besides the GRAMPS ID
+# and the change time that every table has
+_INDEXED_COLUMNS = {
+    'Person': (('surname', 'TEXT', _person_surname),
+               ('sort_name', 'BLOB', _person_sort_name)),
+    'Event': (('sortval', 'INTEGER', _event_sortval),),
+    'Tag': (('name', 'TEXT', _tag_name),),
+    }
+
+def _sql_table(table):
+    """
+    Return the name of the SQL table holding the records of table.
+    """
+    return table.lower()
+
+def _create_schema(connection):
+    """
+    Create the tables and the indexes of a family tree, if they do not exist.
+    """
+    for (table, map_name) in MAP_NAMES:
+        name = _sql_table(table)
+        columns = _INDEXED_COLUMNS.get(table, ())
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS %s (handle TEXT PRIMARY KEY, "
+            "gramps_id TEXT, change INTEGER, blob BLOB%s)" %
+            (name, "".join(", %s %s" % (column, sql_type)
+                           for (column, sql_type, func) in columns)))
+        for column in ['gramps_id', 'change'] + [column[0]
+                                                 for column in columns]:
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" %
+                (name, column, name, column))
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS reference (obj_handle TEXT, "
+        "obj_class TEXT, ref_handle TEXT, ref_class TEXT, "
+        "PRIMARY KEY (obj_handle, ref_handle))")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS reference_ref_handle "
+        "ON reference (ref_handle)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS name_group (name TEXT PRIMARY KEY, "
+        "grouping TEXT)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS metadata (setting TEXT PRIMARY KEY, "
+        "value BLOB)")
+
+def _connect(path, readonly=False):
+    """
+    Return a connection to the SQLite database in path, in autocommit mode,
+    so that the transactions are started and ended explicitly.
+    """
+    if readonly and sys.version_info >= (3, 4):
+        from urllib.request import pathname2url
+        return sqlite3.connect("file:%s?mode=ro" % pathname2url(path),
+                               uri=True, isolation_level=None)
+    return sqlite3.connect(path, isolation_level=None)
+
+def _copy_database(source, target):
+    """
+    Copy the SQLite database of the connection source into the connection
+    target, with the backup API when the sqlite3 module has it.
+    """
+    if hasattr(source, 'backup'):
+        source.backup(target)
+        return
+    tables = [row[0] for row in source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")]
+    target.execute("BEGIN")
+    for table in tables:
+        target.execute("DELETE FROM %s" % table)
+        columns = len(source.execute(
+                        "SELECT * FROM %s LIMIT 1" % table).description)
+        target.executemany(
+            "INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * columns)),
+            source.execute("SELECT * FROM %s" % table))
+    target.execute("COMMIT")
+
+def sqlite_summary(dirpath):
+    """
+    Return (people_count, sqlite_version, schema_version) of the SQLite
+    family tree in dirpath, or ("Unknown", "Unknown", "Unknown") if it
+    cannot be read.
+    """
+    path = os.path.join(dirpath, SQLITE_FILE)
+    if not os.path.isfile(path):
+        return "Unknown", "Unknown", "Unknown"
+    version = "SQLite %s" % sqlite3.sqlite_version
+    try:
+        connection = _connect(path, readonly=True)
+        try:
+            count = connection.execute(
+                "SELECT COUNT(*) FROM person").fetchone()[0]
+            row = connection.execute(
+                "SELECT value FROM metadata WHERE setting = 'version'"
+                ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error as msg:
+        _LOG.warning("Error reading the SQLite database %s: %s", path, msg)
+        return "Unknown", version, "Unknown"
+    if row is None:
+        return count, version, "Unknown"
+    return count, version, PICKLE_CODEC.loads(bytes(row[0]))
+
+#------------------------------------------------------------------------
+#
+# SqlTable
+#
+#------------------------------------------------------------------------
+class SqlTable(object):
+    """
+    The records of a primary table, as a mapping of the handles to the
+    serialized data of the objects, like the maps of DictionaryDb.
+    """
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.name = _sql_table(table)
+        self.columns = _INDEXED_COLUMNS.get(table, ())
+        self.change = RAW_ACCESS[_CLASS_NAMES[table]].change
+        self.has_gramps_id = table != 'Tag'
+
+    def __len__(self):
+        return self.db.query_one("SELECT COUNT(*) FROM %s" % self.name)[0]
+
+    def __contains__(self, handle):
+        return self.db.query_one(
+            "SELECT 1 FROM %s WHERE handle = ?" % self.name,
+            (handle, )) is not None
+
+    def __getitem__(self, handle):
+        data = self.get(handle)
+        if data is None:
+            raise KeyError(handle)
+        return data
+
+    def __setitem__(self, handle, data):
+        values = [handle, data[1] if self.has_gramps_id else None,
+                  self.change(data), _blob(self.db.codec.dumps(data))]
+        values.extend(func(data) for (column, sql_type, func) in self.columns)
+        self.db.dbapi.execute(
+            "INSERT OR REPLACE INTO %s (handle, gramps_id, change, blob%s) "
+            "VALUES (%s)" %
+            (self.name, "".join(", %s" % column[0] for column in self.columns),
+             ", ".join("?" * len(values))), values)
+
+    def __delitem__(self, handle):
+        self.db.dbapi.execute("DELETE FROM %s WHERE handle = ?" % self.name,
+                              (handle, ))
+
+    def get(self, handle, default=None):
+        row = self.db.query_one(
+            "SELECT blob FROM %s WHERE handle = ?" % self.name, (handle, ))
+        if row is None:
+            return default
+        return self.db.codec.loads(bytes(row[0]))
+
+    def keys(self):
+        return [row[0] for row in self.db.query(
+                    "SELECT handle FROM %s" % self.name)]
+
+    def values(self):
+        loads = self.db.codec.loads
+        return (loads(bytes(row[0])) for row in self.db.query(
+                    "SELECT blob FROM %s" % self.name))
+
+    def items(self):
+        loads = self.db.codec.loads
+        return ((row[0], loads(bytes(row[1]))) for row in self.db.query(
+                    "SELECT handle, blob FROM %s" % self.name))
+
+    def clear(self):
+        self.db.dbapi.execute("DELETE FROM %s" % self.name)
+
+    def update_columns(self, columns):
+        """
+        Compute again the indexed columns, a list of column names, of all
+        the records.
+        """
+        selected = [(column, func) for (column, sql_type, func)
+                    in self.columns if column in columns]
+        if not selected:
+            return
+        self.db.dbapi.executemany(
+            "UPDATE %s SET %s WHERE handle = ?" %
+            (self.name, ", ".join("%s = ?" % column
+                                  for (column, func) in selected)),
+            [[func(data) for (column, func) in selected] + [handle]
+             for (handle, data) in list(self.items())])
+
+class SqlIds(object):
+    """
+    The GRAMPS IDs of a primary table, as a mapping of the IDs to the
+    handles, read from the index of the gramps_id column.
+    """
+    def __init__(self, db, table):
+        self.db = db
+        self.name = _sql_table(table)
+
+    def __contains__(self, gramps_id):
+        return self.get(gramps_id) is not None
+
+    def get(self, gramps_id, default=None):
+        row = self.db.query_one(
+            "SELECT handle FROM %s WHERE gramps_id = ?" % self.name,
+            (gramps_id, ))
+        if row is None:
+            return default
+        return row[0]
+
+    def keys(self):
+        return [row[0] for row in self.db.query(
+                    "SELECT gramps_id FROM %s" % self.name)]
+
+    def clear(self):
+        pass
+
+class SqlCursor(object):
+    """
+    Iterates through the records of an SqlTable, returning (handle, raw_data)
+    without reading the whole table in memory.
+    """
+    def __init__(self, data_map):
+        self.data_map = data_map
+    def __enter__(self):
+        return self
+    def __iter__(self):
+        return self.data_map.items()
+    def __exit__(self, *args, **kwargs):
+        pass
+    def close(self):
+        pass
+
+class SqlUndo(object):
+    """
+    The undo history of a DbSqlite database, with the attributes of DbUndo
+    the Undo History window reads. Changes cannot be undone, so it stays
+    empty.
+    """
+    undo_count = 0
+    redo_count = 0
+
+    def __init__(self):
+        self.undoq = deque()
+        self.redoq = deque()
+        self.undo_history_timestamp = time.time()
+
+    def clear(self):
+        self.undo_history_timestamp = time.time()
+
+    def undo(self, update_history=True):
+        return False
+
+    def redo(self, update_history=True):
+        return False
+
+#------------------------------------------------------------------------
+#
+# DbSqlite
+#
+#------------------------------------------------------------------------
+class DbSqlite(DictionaryDb, Callback):
+    """
+    A Gramps Database Backend storing a family tree in an SQLite database.
+
+    The lookups by GRAMPS ID, surname, sort name, change time, event date
+    and reference use the indexes of the SQLite tables. Each DbTxn is one
+    SQLite transaction, and the signals of the changed objects are emitted
+    when it is committed. Changes cannot be undone.
+    """
+
+    __signals__ = dict((obj+'-'+op, signal)
+            for obj in
+                ['person', 'family', 'event', 'place',
+                 'source', 'citation', 'media', 'note', 'repository', 'tag']
+            for op, signal in zip(
+                ['add',   'update', 'delete', 'rebuild'],
+                [(list,), (list,),  (list,),   None]
+                )
+            )
+    __signals__.update(('long-op-'+op, signal) for op, signal in zip(
+        ['start',  'heartbeat', 'end'],
+        [(object,), None,       None]
+        ))
+    __signals__['home-person-changed'] = None
+    if sys.version_info[0] < 3:
+        __signals__['person-groupname-rebuild'] = (unicode, unicode)
+    else:
+        __signals__['person-groupname-rebuild'] = (str, str)
+
+    def __init__(self):
+        DictionaryDb.__init__(self)
+        Callback.__init__(self)
+        self.set_feature("skip-check-xref", False)
+        self.set_feature("skip-import-additions", False)
+        self.set_feature("skip-undo-history", True)
+        self.db_is_open = False
+        self.dbapi = None
+        self.codec = None
+        self.full_name = None
+        self.brief_name = None
+        self.genderStats = GenderStats()
+        self.sortname_fingerprint = None
+        self.undodb = SqlUndo()
+        self.abort_possible = False
+        self.has_changed = False
+        self.changes = None
+
+    def query(self, sql, params=()):
+        """
+        Iterate over the rows returned by the SQL statement, fetching a
+        batch of them at a time.
+        """
+        cursor = self.dbapi.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            cursor.close()
+
+    def query_one(self, sql, params=()):
+        """
+        Return the first row returned by the SQL statement, or None.
+        """
+        return self.dbapi.execute(sql, params).fetchone()
+
+    def write_version(self, name):
+        """
+        Create the SQLite database of a new family tree in directory name.
+        """
+        connection = _connect(os.path.join(name, SQLITE_FILE))
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            _create_schema(connection)
+            connection.executemany(
+                "INSERT OR REPLACE INTO metadata (setting, value) "
+                "VALUES (?, ?)",
+                [(key, _blob(PICKLE_CODEC.dumps(value))) for (key, value) in
+                 (('version', SQLITE_VERSION),
+                  ('codec', config.get('database.codec')))])
+        finally:
+            connection.close()
+
+    def load(self, name, callback, mode=DBMODE_W, *args, **kwargs):
+        """
+        Open the family tree in directory name. The upgrade flags of
+        DbBsddb.load are accepted and ignored.
+        """
+        if self.db_is_open:
+            self.close()
+        path = os.path.join(name, SQLITE_FILE)
+        if (not os.access(name, os.W_OK) or
+                (os.path.isfile(path) and not os.access(path, os.W_OK))):
+            mode = DBMODE_R
+        self.readonly = mode == DBMODE_R
+        if not self.readonly:
+            write_lock_file(name)
+        self.full_name = os.path.abspath(name)
+        self.path = self.full_name
+        self.brief_name = os.path.basename(name)
+        try:
+            self.dbapi = _connect(path, self.readonly)
+            if not self.readonly:
+                self.dbapi.execute("PRAGMA journal_mode=WAL")
+                _create_schema(self.dbapi)
+            self.__load_metadata()
+        except sqlite3.Error as msg:
+            self.__close_connection()
+            raise DbError(str(msg))
+        if callback:
+            callback(50)
+        for (table, map_name) in MAP_NAMES:
+            setattr(self, map_name, SqlTable(self, table))
+        self.gramps_ids = dict((table, SqlIds(self, table))
+                               for (table, map_name) in MAP_NAMES
+                               if table != 'Tag')
+        self.name_group = dict(self.query(
+                            "SELECT name, grouping FROM name_group"))
+        self.db_is_open = True
+        self.has_changed = False
+        self.__check_sort_names()
+        if callback:
+            callback(100)
+
+    def __load_metadata(self):
+        """
+        Read the settings of the family tree from the metadata table.
+        """
+        metadata = dict((key, PICKLE_CODEC.loads(bytes(value)))
+                        for (key, value) in self.query(
+                            "SELECT setting, value FROM metadata"))
+        version = metadata.get('version', SQLITE_VERSION)
+        if version > SQLITE_VERSION:
+            raise DbVersionError(version, 1, SQLITE_VERSION)
+        self.codec = get_codec(metadata.get('codec',
+                                            config.get('database.codec')))
+        for (attr, setter) in _ID_PREFIXES:
+            if attr in metadata:
+                getattr(self, setter)(metadata[attr])
+        if 'researcher' in metadata:
+            self.owner.unserialize(metadata['researcher'])
+        self.name_formats = metadata.get('name_formats', [])
+        self.default_handle = metadata.get('default')
+        self.mediapath = metadata.get('mediapath')
+        self.check_time = metadata.get('check_time')
+        self.commit_time = metadata.get('commit_time')
+        for name in _BOOKMARKS:
+            getattr(self, name).set(metadata.get(name, []))
+        for name in _CUSTOM_TYPES:
+            setattr(self, name, set(metadata.get(name, [])))
+        self.genderStats = GenderStats(metadata.get('gender_stats', {}))
+        self.sortname_fingerprint = metadata.get('sortname_fingerprint')
+
+    def __save_metadata(self):
+        """
+        Write the settings of the family tree to the metadata table.
+        """
+        metadata = [(attr, getattr(self, attr))
+                    for (attr, setter) in _ID_PREFIXES]
+        metadata.extend((name, getattr(self, name).get())
+                        for name in _BOOKMARKS)
+        metadata.extend((name, list(getattr(self, name)))
+                        for name in _CUSTOM_TYPES)
+        metadata.extend([
+            ('version', SQLITE_VERSION),
+            ('codec', self.codec.name),
+            ('researcher', self.owner.serialize()),
+            ('name_formats', self.name_formats),
+            ('default', self.default_handle),
+            ('mediapath', self.mediapath),
+            ('check_time', self.check_time),
+            ('commit_time', self.commit_time),
+            ('gender_stats', self.genderStats.save_stats()),
+            ('sortname_fingerprint', self.sortname_fingerprint),
+            ])
+        self.dbapi.executemany(
+            "INSERT OR REPLACE INTO metadata (setting, value) VALUES (?, ?)",
+            [(key, _blob(PICKLE_CODEC.dumps(value)))
+             for (key, value) in metadata])
+
+    def __check_sort_names(self):
+        """
+        Return True if the sort names of the person table were made with the
+        current collation and name formats, computing them again if needed
+        and possible.
+        """
+        fingerprint = sortname_fingerprint()
+        if self.sortname_fingerprint == fingerprint:
+            return True
+        if self.readonly or self.transaction is not None:
+            return False
+        self.dbapi.execute("BEGIN IMMEDIATE")
+        self.person_map.update_columns(['sort_name'])
+        self.dbapi.execute("COMMIT")
+        self.sortname_fingerprint = fingerprint
+        return True
+
+    def __close_connection(self):
+        if self.dbapi is not None:
+            self.dbapi.close()
+            self.dbapi = None
+
+    def close(self):
+        if not self.db_is_open:
+            return
+        if self.transaction is not None:
+            self.transaction_abort(self.transaction)
+        if not self.readonly:
+            self.__save_metadata()
+            self.dbapi.execute("PRAGMA optimize")
+        self.__close_connection()
+        for (table, map_name) in MAP_NAMES:
+            setattr(self, map_name, {})
+        self.gramps_ids = dict((table, {}) for table in self.gramps_ids)
+        self.name_group = {}
+        self.db_is_open = False
+        if not self.readonly:
+            clear_lock_file(self.get_save_path())
+
+    def get_dbid(self):
+        return self.brief_name
+
+    def get_dbname(self):
+        """
+        Return the name of the family tree, kept in a text file in its
+        directory.
+        """
+        try:
+            with open(os.path.join(self.path, "name.txt"), "r") as name_file:
+                return name_file.readline().strip()
+        except (OSError, IOError):
+            return None
+
+    def make_backup(self):
+        """
+        Copy the SQLite database to the backup file in the directory of the
+        family tree, while it stays open.
+        """
+        backup_path = os.path.join(self.path, SQLITE_BACKUP)
+        new_path = backup_path + ".new"
+        if os.path.isfile(new_path):
+            os.remove(new_path)
+        target = sqlite3.connect(new_path, isolation_level=None)
+        try:
+            _copy_database(self.dbapi, target)
+        except sqlite3.Error as msg:
+            raise DbException(str(msg))
+        finally:
+            target.close()
+        if os.path.isfile(backup_path):
+            os.remove(backup_path)
+        shutil.move(new_path, backup_path)
+
+    def restore_backup(self):
+        """
+        Replace the records and the settings of the family tree with the
+        ones of its backup file.
+        """
+        try:
+            source = _connect(os.path.join(self.path, SQLITE_BACKUP), True)
+            try:
+                _copy_database(source, self.dbapi)
+            finally:
+                source.close()
+        except sqlite3.Error as msg:
+            raise DbException(str(msg))
+        self.__load_metadata()
+        self.name_group = dict(self.query(
+                            "SELECT name, grouping FROM name_group"))
+        self.__check_sort_names()
+        self.has_changed = True
+
+    def compact(self, callback=None):
+        """
+        Rebuild the SQLite database without its free pages.
+
+        Return a list with one (file name, fill before, fill after, size
+        before, size after) tuple, see DbWriteBase.compact; the fill is the
+        fraction of the pages that are in use.
+        """
+        if self.readonly:
+            return []
+        path = os.path.join(self.path, SQLITE_FILE)
+        size = os.path.getsize(path)
+        fill = self.__page_fill()
+        try:
+            self.dbapi.execute("VACUUM")
+            self.dbapi.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as msg:
+            raise DbException(str(msg))
+        if callback:
+            callback(100)
+        return [(SQLITE_FILE, fill, self.__page_fill(), size,
+                 os.path.getsize(path))]
+
+    def __page_fill(self):
+        pages = self.query_one("PRAGMA page_count")[0]
+        if not pages:
+            return None
+        free = self.query_one("PRAGMA freelist_count")[0]
+        return 1.0 - float(free) / pages
+
+    def undo(self, update_history=True):
+        return self.undodb.undo(update_history)
+
+    def redo(self, update_history=True):
+        return self.undodb.redo(update_history)
+
+    def find_initial_person(self):
+        person = self.get_default_person()
+        if not person:
+            row = self.query_one("SELECT MIN(gramps_id) FROM person")
+            if row[0] is not None:
+                person = self.get_person_from_gramps_id(row[0])
+        return person
+
+    def set_default_person_handle(self, handle):
+        self.default_handle = handle
+        self.emit('home-person-changed')
+
+    def get_name_group_mapping(self, surname):
+        return self.name_group.get(_text(surname), _text(surname))
+
+    def get_name_group_keys(self):
+        return list(self.name_group.keys())
+
+    def has_name_group_key(self, name):
+        return _text(name) in self.name_group
+
+    def set_name_group_mapping(self, name, group):
+        if self.readonly:
+            return
+        name = _text(name)
+        if group is None:
+            self.dbapi.execute("DELETE FROM name_group WHERE name = ?",
+                               (name, ))
+            self.name_group.pop(name, None)
+        else:
+            self.dbapi.execute("INSERT OR REPLACE INTO name_group "
+                               "(name, grouping) VALUES (?, ?)",
+                               (name, group))
+            self.name_group[name] = group
+        self.emit('person-groupname-rebuild', (name, group or ''))
+
+    def get_surname_list(self):
+        return sorted((row[0] for row in self.query(
+                        "SELECT DISTINCT surname FROM person")),
+                      key=glocale.sort_key)
+
+    def get_person_handles(self, sort_handles=False):
+        if sort_handles and self.__check_sort_names():
+            return [row[0] for row in self.query(
+                        "SELECT handle FROM person "
+                        "ORDER BY sort_name, handle")]
+        return DictionaryDb.get_person_handles(self, sort_handles)
+
+    def iter_person_handles_sorted(self, start=None):
+        if not self.__check_sort_names():
+            return DictionaryDb.iter_person_handles_sorted(self, start)
+        if start is None:
+            return (row[0] for row in self.query(
+                        "SELECT handle FROM person "
+                        "ORDER BY sort_name, handle"))
+        return (row[0] for row in self.query(
+                    "SELECT handle FROM person WHERE sort_name >= ? "
+                    "ORDER BY sort_name, handle", (_sort_key(start), )))
+
+    def iter_event_handles_in_date_range(self, start, stop):
+        start = get_sort_value(start)
+        stop = get_sort_value(stop)
+        conditions = ["sortval IS NOT NULL"]
+        params = []
+        if start is not None:
+            conditions.append("sortval >= ?")
+            params.append(start)
+        if stop is not None:
+            conditions.append("sortval < ?")
+            params.append(stop)
+        return (row[0] for row in self.query(
+                    "SELECT handle FROM event WHERE %s "
+                    "ORDER BY sortval, handle" % " AND ".join(conditions),
+                    params))
+
+    def iter_changed_since(self, table, timestamp):
+        return (row[0] for row in self.query(
+                    "SELECT handle FROM %s WHERE change >= ? "
+                    "ORDER BY change, handle" % _sql_table(table),
+                    (timestamp, )))
+
+    def get_tag_from_name(self, name):
+        row = self.query_one("SELECT handle FROM tag WHERE name = ?",
+                             (name, ))
+        if row is None:
+            return None
+        return self.get_tag_from_handle(row[0])
+
+    def get_place_cursor(self, *args, **kwargs):
+        return SqlCursor(self.place_map)
+
+    def get_person_cursor(self, *args, **kwargs):
+        return SqlCursor(self.person_map)
+
+    def get_family_cursor(self, *args, **kwargs):
+        return SqlCursor(self.family_map)
+
+    def get_event_cursor(self, *args, **kwargs):
+        return SqlCursor(self.event_map)
+
+    def get_note_cursor(self, *args, **kwargs):
+        return SqlCursor(self.note_map)
+
+    def get_tag_cursor(self, *args, **kwargs):
+        return SqlCursor(self.tag_map)
+
+    def get_repository_cursor(self, *args, **kwargs):
+        return SqlCursor(self.repository_map)
+
+    def get_media_cursor(self, *args, **kwargs):
+        return SqlCursor(self.media_map)
+
+    def get_citation_cursor(self, *args, **kwargs):
+        return SqlCursor(self.citation_map)
+
+    def get_source_cursor(self, *args, **kwargs):
+        return SqlCursor(self.source_map)
+
+    def find_backlink_handles(self, handle, include_classes=None):
+        """
+        Find all objects that hold a reference to the object handle.
+
+        Returns an iterator over a list of (class_name, handle) tuples, read
+        from the index of the referenced handles.
+        """
+        for (class_name, obj_handle) in self.query(
+                "SELECT obj_class, obj_handle FROM reference "
+                "WHERE ref_handle = ? ORDER BY obj_class, obj_handle",
+                (_internal_handle(handle), )):
+            if include_classes is None or class_name in include_classes:
+                yield (class_name, obj_handle)
+
+    def get_reference_count(self, handle):
+        return self.query_one(
+            "SELECT COUNT(*) FROM reference WHERE ref_handle = ?",
+            (_internal_handle(handle), ))[0]
+
+    def __update_references(self, obj):
+        """
+        Replace the references held by obj in the reference table.
+        """
+        self.delete_primary_from_reference_map(obj.handle, None)
+        class_name = obj.__class__.__name__
+        self.dbapi.executemany(
+            "INSERT OR REPLACE INTO reference "
+            "(obj_handle, obj_class, ref_handle, ref_class) "
+            "VALUES (?, ?, ?, ?)",
+            [(obj.handle, class_name, ref_handle, ref_class)
+             for (ref_class, ref_handle) in
+             obj.get_referenced_handles_recursively()])
+
+    def delete_primary_from_reference_map(self, handle, transaction):
+        self.dbapi.execute("DELETE FROM reference WHERE obj_handle = ?",
+                           (_internal_handle(handle), ))
+
+    def reindex_reference_map(self, callback):
+        """
+        Build the reference table again from the references held by all the
+        records.
+        """
+        if self.readonly:
+            return
+        self.dbapi.execute("BEGIN IMMEDIATE")
+        self.dbapi.execute("DELETE FROM reference")
+        for (count, (table, map_name)) in enumerate(MAP_NAMES):
+            class_type = self._tables[table]["class_func"]
+            for (handle, data) in list(getattr(self, map_name).items()):
+                self.__update_references(class_type.create(data))
+            if callback:
+                callback(100 * (count + 1) // len(MAP_NAMES))
+        self.dbapi.execute("COMMIT")
+
+    def rebuild_secondary(self, callback=None):
+        """
+        Compute again the indexed columns of all the records.
+        """
+        if self.readonly:
+            return
+        self.dbapi.execute("BEGIN IMMEDIATE")
+        for (table, map_name) in MAP_NAMES:
+            data_map = getattr(self, map_name)
+            data_map.update_columns([column[0] for column in
+                                     _INDEXED_COLUMNS.get(table, ())])
+        self.dbapi.execute("COMMIT")
+        self.sortname_fingerprint = sortname_fingerprint()
+
+    def transaction_begin(self, transaction):
+        """
+        Start the SQLite transaction of the DbTxn transaction.
+        """
+        if self.transaction is not None:
+            msg = self.transaction.get_description()
+            self.transaction_abort(self.transaction)
+            raise DbError(_('A second transaction is started while there'
+                ' is still a transaction, "%s", active in the database.') % msg)
+        self.transaction = transaction
+        self.changes = {}
+        if not self.readonly:
+            self.dbapi.execute("BEGIN IMMEDIATE")
+        return transaction
+
+    def transaction_commit(self, transaction):
+        """
+        Make the changes of the transaction final, and emit the signals of
+        the changed objects.
+        """
+        changes = self.changes
+        self.transaction = None
+        self.changes = None
+        if self.readonly:
+            return
+        # the copies of the tree are checked against the time of the last
+        # commit, see load_in_memory
+        self.commit_time = time.time()
+        self.dbapi.execute(
+            "INSERT OR REPLACE INTO metadata (setting, value) VALUES (?, ?)",
+            ('commit_time', _blob(PICKLE_CODEC.dumps(self.commit_time))))
+        self.dbapi.execute("COMMIT")
+        self.has_changed = True
+        if transaction.batch:
+            # Imports keep the change times of the records they load, so
+            # the next Check and Repair must look at every object
+            self.check_time = None
+            return
+        for (table, map_name) in MAP_NAMES:
+            deleted = changes.get((table, 'delete'), [])
+            removed = set(deleted)
+            for operation in ('add', 'update'):
+                handles = [handle for handle in
+                           changes.get((table, operation), [])
+                           if handle not in removed]
+                if handles:
+                    self.emit('%s-%s' % (table.lower(), operation),
+                              (handles, ))
+            if deleted:
+                self.emit('%s-delete' % table.lower(), (deleted, ))
+
+    def transaction_abort(self, transaction):
+        """
+        Revert the changes made to the database during the transaction.
+        """
+        changes = self.changes
+        self.transaction = None
+        self.changes = None
+        if self.readonly:
+            return
+        self.dbapi.execute("ROLLBACK")
+        if not transaction.batch:
+            for table in set(table for (table, operation) in changes):
+                self.emit('%s-rebuild' % table.lower())
+
+    def __record_change(self, data_map, operation, handle):
+        """
+        Keep the handle of an object changed by the transaction, to emit the
+        signals of the table of data_map when it is committed.
+        """
+        if self.changes is not None:
+            self.changes.setdefault((data_map.table, operation),
+                                    []).append(handle)
+
+    def commit_base(self, obj, data_map, key, transaction, change_time):
+        """
+        Store obj in the table of data_map, with its references. Return the
+        raw data the object had before, or None if it is new.
+        """
+        if self.readonly:
+            return None
+        obj.change = int(change_time or time.time())
+        handle = _internal_handle(obj.handle)
+        old_data = data_map.get(handle)
+        data_map[handle] = obj.serialize()
+        self.__update_references(obj)
+        self.__record_change(data_map, 'add' if old_data is None
+                                       else 'update', handle)
+        return old_data
+
+    def __do_remove(self, handle, transaction, data_map):
+        """
+        Remove the object handle from the table of data_map, with its
+        references.
+        """
+        if self.readonly or not handle:
+            return
+        handle = _internal_handle(handle)
+        self.delete_primary_from_reference_map(handle, transaction)
+        del data_map[handle]
+        self.__record_change(data_map, 'delete', handle)
+
+    def remove_person(self, handle, transaction):
+        person = self.get_person_from_handle(handle)
+        if person is not None and not self.readonly:
+            self.genderStats.uncount_person(person)
+        self.__do_remove(handle, transaction, self.person_map)
+
+    def remove_source(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.source_map)
+
+    def remove_citation(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.citation_map)
+
+    def remove_event(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.event_map)
+
+    def remove_object(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.media_map)
+
+    def remove_place(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.place_map)
+
+    def remove_family(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.family_map)
+
+    def remove_repository(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.repository_map)
+
+    def remove_note(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.note_map)
+
+    def remove_tag(self, handle, transaction):
+        self.__do_remove(handle, transaction, self.tag_map)
+
+    def commit_person(self, person, trans, change_time=None):
+        old_data = self.commit_base(person, self.person_map, PERSON_KEY,
+                                    trans, change_time)
+        if self.readonly:
+            return
+        if old_data:
+            self.genderStats.uncount_person(Person.create(old_data))
+        self.genderStats.count_person(person)
+        names = [person.primary_name] + person.alternate_names
+        self.individual_attributes.update(
+            _custom_types(attr.type for attr in person.attribute_list))
+        self.event_role_names.update(
+            _custom_types(eref.role for eref in person.event_ref_list))
+        self.name_types.update(_custom_types(name.type for name in names))
+        self.origin_types.update(
+            _custom_types(surname.origintype for name in names
+                          for surname in name.get_surname_list()))
+        self.url_types.update(_custom_types(url.type for url in person.urls))
+        self.media_attributes.update(_media_attribute_types(person))
+
+    def commit_family(self, family, trans, change_time=None):
+        self.commit_base(family, self.family_map, FAMILY_KEY, trans,
+                         change_time)
+        self.family_attributes.update(
+            _custom_types(attr.type for attr in family.attribute_list))
+        self.child_ref_types.update(
+            _custom_types(rel for ref in family.child_ref_list
+                          for rel in (ref.frel, ref.mrel)))
+        self.event_role_names.update(
+            _custom_types(eref.role for eref in family.event_ref_list))
+        self.family_rel_types.update(_custom_types([family.type]))
+        self.media_attributes.update(_media_attribute_types(family))
+
+    def commit_citation(self, citation, trans, change_time=None):
+        self.commit_base(citation, self.citation_map, CITATION_KEY, trans,
+                         change_time)
+        self.media_attributes.update(_media_attribute_types(citation))
+        self.source_attributes.update(
+            _custom_types(attr.type for attr in citation.attribute_list))
+
+    def commit_source(self, source, trans, change_time=None):
+        self.commit_base(source, self.source_map, SOURCE_KEY, trans,
+                         change_time)
+        self.source_media_types.update(
+            _custom_types(ref.media_type for ref in source.reporef_list))
+        self.media_attributes.update(_media_attribute_types(source))
+        self.source_attributes.update(
+            _custom_types(attr.type for attr in source.attribute_list))
+
+    def commit_repository(self, repository, trans, change_time=None):
+        self.commit_base(repository, self.repository_map, REPOSITORY_KEY,
+                         trans, change_time)
+        self.repository_types.update(_custom_types([repository.type]))
+        self.url_types.update(
+            _custom_types(url.type for url in repository.urls))
+
+    def commit_note(self, note, trans, change_time=None):
+        self.commit_base(note, self.note_map, NOTE_KEY, trans, change_time)
+        self.note_types.update(_custom_types([note.type]))
+
+    def commit_place(self, place, trans, change_time=None):
+        self.commit_base(place, self.place_map, PLACE_KEY, trans,
+                         change_time)
+        self.url_types.update(_custom_types(url.type for url in place.urls))
+        self.media_attributes.update(_media_attribute_types(place))
+
+    def commit_personal_event(self, event, trans, change_time=None):
+        self.individual_event_names.update(_custom_types([event.type]))
+        self.commit_event(event, trans, change_time)
+
+    def commit_family_event(self, event, trans, change_time=None):
+        self.family_event_names.update(_custom_types([event.type]))
+        self.commit_event(event, trans, change_time)
+
+    def commit_event(self, event, trans, change_time=None):
+        self.commit_base(event, self.event_map, EVENT_KEY, trans,
+                         change_time)
+        self.media_attributes.update(_media_attribute_types(event))
+
+    def commit_media_object(self, obj, transaction, change_time=None):
+        self.commit_base(obj, self.media_map, MEDIA_KEY, transaction,
+                         change_time)
+        self.media_attributes.update(
+            _custom_types(attr.type for attr in obj.attribute_list))
+
+    def disable_signals(self):
+        Callback.disable_signals(self)
+
+    def enable_signals(self):
+        Callback.enable_signals(self)
+
+    def request_rebuild(self):
+        for (table, map_name) in MAP_NAMES:
+            self.emit('%s-rebuild' % table.lower())
+
+def _custom_types(types):
+    """
+    Return the strings of the custom values among the GrampsType values
+    types.
+    """
+    return [str(value) for value in types if value.is_custom() and str(value)]
+
+def _media_attribute_types(obj):
+    """
+    Return the custom attribute types of the media references of obj.
+    """
+    return _custom_types(attr.type for mref in obj.media_list
+                         for attr in mref.attribute_list)
@@ -0,0 +1,259 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Statistics of the use of a database.
+
+When the statistics of a database are enabled, the public access methods
+of the database, and of the proxies built on it, are replaced on the
+instance by wrappers that count the calls, the time spent in the method
+and the module that called it. The record codecs of the tables are
+replaced by ones that count the bytes read and written.
+
+The times include the time spent in the database methods called by the
+method. For the methods returning an iterator, only the creation of the
+iterator is timed.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import sys
+import time
+from collections import defaultdict
+
+# Packages whose modules are not reported as callers
+_DB_PACKAGE = __name__.rsplit('.', 1)[0]
+_INTERNAL = (_DB_PACKAGE + '.', _DB_PACKAGE.rsplit('.', 1)[0] + '.proxy.')
+
+# Prefixes of the names of the methods that are counted
+_PREFIXES = ('get_', 'iter_', 'find_', 'has_', 'add_', 'commit_',
+             'remove_')
+_EXCLUDED = ('get_statistics', )
+
+_TABLE_NAMES = (
+    ('person', 'Person'), ('people', 'Person'),
+    ('famil', 'Family'), ('event', 'Event'), ('place', 'Place'),
+    ('citation', 'Citation'), ('source', 'Source'),
+    ('media', 'Media'), ('object', 'Media'),
+    ('repositor', 'Repository'), ('note', 'Note'), ('tag', 'Tag'),
+    ('reference', 'Reference'), ('backlink', 'Reference'),
+    )
+
+def _table_of(name):
+    """
+    Return the table the method name refers to, or an empty string.
+    """
+    for (word, table) in _TABLE_NAMES:
+        if word in name:
+            return table
+    return ''
+
+def _caller():
+    """
+    Return the name of the module that called the database, the first one
+    on the stack outside the database and proxy packages.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(_INTERNAL):
+            return module
+        frame = frame.f_back
+    return ''
+
+#-------------------------------------------------------------------------
+#
+# DbStatistics
+#
+#-------------------------------------------------------------------------
+class DbStatistics(object):
+    """
+    Counters of the use of a database.
+
+    methods maps the method names to lists of the number of calls, the
+    bytes read and written by them and the seconds spent in them. tables
+    maps the table names to lists of the bytes read and written. callers
+    maps (module, method name) pairs to the number of calls.
+    """
+
+    def __init__(self):
+        self.methods = {}
+        self.tables = {}
+        self.callers = defaultdict(int)
+        self.__active = []
+        self.__wrapped = []
+
+    def clear(self):
+        """
+        Reset the counters.
+        """
+        self.methods.clear()
+        self.tables.clear()
+        self.callers.clear()
+
+    def instrument(self, database, prefix='', removable=True):
+        """
+        Replace the access methods of the database instance by counting
+        wrappers. The method names are reported with prefix before them.
+
+        Unless removable is False, the wrappers are remembered so that
+        remove can restore the methods; short-lived proxies are not
+        remembered, to let them be freed.
+        """
+        for name in dir(type(database)):
+            if (not name.startswith(_PREFIXES) or name in _EXCLUDED or
+                    name in database.__dict__):
+                continue
+            method = getattr(database, name, None)
+            if callable(method):
+                setattr(database, name, self.__wrap(prefix + name, method))
+                if removable:
+                    self.__wrapped.append((database, name))
+
+    def instrument_table(self, table, name):
+        """
+        Replace the codec of the DbCodecShelf table by one counting the
+        bytes read and written.
+        """
+        if not isinstance(table.codec, _CountingCodec):
+            table.codec = _CountingCodec(table.codec, self, name)
+            self.__wrapped.append((table, None))
+
+    def remove(self):
+        """
+        Restore the methods and codecs replaced by instrument and
+        instrument_table.
+        """
+        for (obj, name) in self.__wrapped:
+            if name is None:
+                obj.codec = obj.codec.codec
+            else:
+                obj.__dict__.pop(name, None)
+        self.__wrapped = []
+
+    def add_bytes(self, table, read, written):
+        """
+        Count bytes read and written in the table, for the table and for
+        the method being run.
+        """
+        counts = self.tables.get(table)
+        if counts is None:
+            counts = self.tables[table] = [0, 0]
+        counts[0] += read
+        counts[1] += written
+        if self.__active:
+            entry = self.__active[-1]
+            entry[1] += read
+            entry[2] += written
+
+    def __wrap(self, name, method):
+        """
+        Return a wrapper of method counting its calls under name.
+        """
+        methods = self.methods
+        callers = self.callers
+        active = self.__active
+
+        def wrapper(*args, **kwargs):
+            entry = methods.get(name)
+            if entry is None:
+                entry = methods[name] = [0, 0, 0, 0.0]
+            entry[0] += 1
+            callers[(_caller(), name)] += 1
+            active.append(entry)
+            start = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                entry[3] += time.time() - start
+                active.pop()
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    def get_method_rows(self):
+        """
+        Return (method, table, calls, bytes read, bytes written, seconds)
+        rows, the slowest methods first.
+        """
+        rows = [(name, _table_of(name), calls, read, written, seconds)
+                for (name, (calls, read, written, seconds))
+                in self.methods.items()]
+        rows.sort(key=lambda row: (-row[5], row[0]))
+        return rows
+
+    def get_caller_rows(self):
+        """
+        Return (module, method, calls) rows, the most frequent first.
+        """
+        rows = [(module, name, calls)
+                for ((module, name), calls) in self.callers.items()]
+        rows.sort(key=lambda row: (-row[2], row[0], row[1]))
+        return rows
+
+    def report(self, limit=30):
+        """
+        Return a text report of the statistics, with at most limit lines in
+        each part.
+        """
+        lines = ["%-40s %-10s %9s %12s %12s %9s" % ("Method", "Table",
+                    "Calls", "Read", "Written", "Seconds")]
+        for row in self.get_method_rows()[:limit]:
+            lines.append("%-40s %-10s %9d %12d %12d %9.3f" % row)
+        lines.append("")
+        lines.append("%-10s %12s %12s" % ("Table", "Read", "Written"))
+        for table in sorted(self.tables):
+            lines.append("%-10s %12d %12d" % ((table, ) +
+                                               tuple(self.tables[table])))
+        lines.append("")
+        lines.append("%-40s %-40s %9s" % ("Caller", "Method", "Calls"))
+        for row in self.get_caller_rows()[:limit]:
+            lines.append("%-40s %-40s %9d" % row)
+        return "\n".join(lines)
+
+#-------------------------------------------------------------------------
+#
+# _CountingCodec
+#
+#-------------------------------------------------------------------------
+class _CountingCodec(object):
+    """
+    A record codec counting the bytes it decodes and encodes.
+    """
+
+    def __init__(self, codec, statistics, table):
+        self.codec = codec
+        self.statistics = statistics
+        self.table = table
+
+    def __getattr__(self, name):
+        return getattr(self.codec, name)
+
+    def dumps(self, data):
+        raw = self.codec.dumps(data)
+        self.statistics.add_bytes(self.table, 0, len(raw))
+        return raw
+
+    def loads(self, raw):
+        self.statistics.add_bytes(self.table, len(raw), 0)
+        return self.codec.loads(raw)
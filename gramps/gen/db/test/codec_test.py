@@ -0,0 +1,165 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+import unittest
+import logging
+import time
+
+from ....cli.clidbman import CLIDbManager
+from ...config import config
+from ...lib import (Person, Name, Surname, Event, EventRef, Date, Attribute,
+                    Place)
+from ..codec import CODECS, get_codec
+from .. import DbTxn, DbBsddb
+from ..bsddbtxn import BSDDBTxn
+
+from .grampsdbtestbase import GrampsDbBaseTest
+
+logger = logging.getLogger('Gramps.Codec_Test')
+
+def _sample_records():
+    person = Person()
+    person.set_handle("P0001")
+    person.set_gramps_id("I0001")
+    name = Name()
+    name.set_first_name("José")
+    surname = Surname()
+    surname.set_surname("García")
+    name.set_surname_list([surname])
+    person.set_primary_name(name)
+    person.add_event_ref(EventRef())
+    attribute = Attribute()
+    attribute.set_value("value")
+    person.add_attribute(attribute)
+
+    event = Event()
+    event.set_handle("E0001")
+    event.set_date_object(Date(1900, 5, 1))
+
+    place = Place()
+    place.set_handle("L0001")
+    place.set_latitude("48.8567")
+    place.set_longitude("2.3508")
+
+    reference = (("Person", "P0001"), ("Event", "E0001"))
+
+    return [person.serialize(), event.serialize(), place.serialize(),
+            reference]
+
+class CodecTest(unittest.TestCase):
+    """Test the record codecs."""
+
+    def test_round_trip(self):
+        """check that every codec returns the records it encoded."""
+
+        records = _sample_records()
+        for codec in CODECS.values():
+            for data in records:
+                self.assertEqual(codec.loads(codec.dumps(data)), data,
+                                 "codec %s" % codec.name)
+
+    def perf_codec_speed(self):
+        """compare the encoding and decoding speed of the codecs."""
+
+        records = _sample_records() * 2000
+        for codec in CODECS.values():
+            start = time.time()
+            encoded = [codec.dumps(data) for data in records]
+            encoding = time.time() - start
+
+            start = time.time()
+            for raw in encoded:
+                codec.loads(raw)
+            decoding = time.time() - start
+
+            logger.info("codec %s: encode %s, decode %s, %d bytes\n",
+                        codec.name, str(encoding), str(decoding),
+                        sum(len(raw) for raw in encoded))
+
+class CodecDbTest(GrampsDbBaseTest):
+    """Test the use of the record codec by the BSDDB database."""
+
+    def test_table_codec(self):
+        """check that the tables store their records with the codec of
+        the database."""
+
+        person = Person()
+        with DbTxn("Add Person", self._db) as trans:
+            self._db.add_person(person, trans)
+        handle = person.get_handle().encode('utf-8')
+
+        self.assertIs(self._db.person_map.codec, self._db.codec)
+        self.assertEqual(
+            self._db.codec.loads(self._db.person_map.db.get(handle)),
+            person.serialize())
+        self.assertEqual(get_codec(self._db.metadata.get(b'codec')),
+                         self._db.codec)
+
+        cursor = self._db.get_person_cursor()
+        self.assertEqual(cursor.first(), (handle, person.serialize()))
+        cursor.close()
+
+    def test_upgrade(self):
+        """check that the upgrade of a pickled tree from before version 17
+        re-encodes the records and keeps the secondary indices usable."""
+
+        self._db.close()
+        codec_name = config.get('database.codec')
+        config.set('database.codec', 'pickle')
+        try:
+            self._filename = CLIDbManager(None).create_new_db_cli(
+                title="Old")[0]
+            self._db = DbBsddb()
+            self._db.load(self._filename, None, "w")
+        finally:
+            config.set('database.codec', codec_name)
+        person = Person()
+        person.set_gramps_id("I0001")
+        surname = Surname()
+        surname.set_surname("García")
+        person.get_primary_name().set_surname_list([surname])
+        with DbTxn("Add Person", self._db) as trans:
+            self._db.add_person(person, trans)
+        with BSDDBTxn(self._db.env, self._db.metadata) as txn:
+            txn.put(b'version', 16)
+            txn.delete(b'codec')
+        self._db.close()
+
+        self._db = DbBsddb()
+        self._db.load(self._filename, None, "w", force_schema_upgrade=True)
+
+        self.assertEqual(self._db.codec.name, codec_name)
+        self.assertIs(self._db.person_map.codec, self._db.codec)
+        self.assertEqual(self._db.metadata.get(b'version'), 18)
+        self.assertEqual(
+            self._db.get_person_from_gramps_id("I0001").get_handle(),
+            person.get_handle())
+        self.assertEqual(self._db.get_surname_list(), ["García"])
+
+def testSuite():
+    suite = unittest.makeSuite(CodecTest, 'test')
+    suite.addTests(unittest.makeSuite(CodecDbTest, 'test'))
+    return suite
+
+def perfSuite():
+    return unittest.makeSuite(CodecTest, 'perf')
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(testSuite())
@@ -42,18 +42,22 @@ class DbTest(unittest.TestCase):
         "find_next_place_gramps_id",
         "find_next_repository_gramps_id",
         "find_next_source_gramps_id",
+        "find_places_in_bbox",
+        "find_places_near",
         "get_bookmarks",
         "get_child_reference_types",
         "get_default_handle",
         "get_default_person",
         "get_event_bookmarks",
         "get_event_cursor",
+        "get_events_from_handles",
         "get_event_from_gramps_id",
         "get_event_from_handle",
         "get_event_handles",
         "get_event_roles",
         "get_family_attribute_types",
         "get_family_bookmarks",
+        "get_families_from_handles",
         "get_family_cursor",
         "get_family_event_types",
         "get_family_from_gramps_id",
@@ -61,11 +65,13 @@ class DbTest(unittest.TestCase):
         "get_family_handles",
         "get_family_relation_types",
         "get_from_handle",
+        "get_citations_from_handles",
         "get_gramps_ids",
         "get_media_attribute_types",
         "get_media_bookmarks",
         "get_media_cursor",
         "get_media_object_handles",
+        "get_media_objects_from_handles",
         "get_mediapath",
         "get_name_group_keys",
         "get_name_group_mapping",
@@ -76,6 +82,7 @@ class DbTest(unittest.TestCase):
         "get_note_from_handle",
         "get_note_handles",
         "get_note_types",
+        "get_notes_from_handles",
         "get_number_of_events",
         "get_number_of_families",
         "get_number_of_media_objects",
@@ -93,11 +100,14 @@ class DbTest(unittest.TestCase):
         "get_person_from_gramps_id",
         "get_person_from_handle",
         "get_person_handles",
+        "get_people_from_handles",
         "get_place_bookmarks",
         "get_place_cursor",
         "get_place_from_gramps_id",
         "get_place_from_handle",
         "get_place_handles",
+        "get_places_from_handles",
+        "get_raw_data_many",
         "get_raw_event_data",
         "get_raw_family_data",
         "get_raw_note_data",
@@ -107,6 +117,7 @@ class DbTest(unittest.TestCase):
         "get_raw_repository_data",
         "get_raw_source_data",
         "get_raw_tag_data",
+        "get_reference_count",
         "get_reference_map_cursor",
         "get_reference_map_primary_cursor",
         "get_reference_map_referenced_cursor",
@@ -116,6 +127,7 @@ class DbTest(unittest.TestCase):
         "get_repository_from_handle",
         "get_repository_handles",
         "get_repository_types",
+        "get_repositories_from_handles",
         "get_researcher",
         "get_save_path",
         "get_source_bookmarks",
@@ -124,10 +136,12 @@ class DbTest(unittest.TestCase):
         "get_source_from_handle",
         "get_source_handles",
         "get_source_media_types",
+        "get_sources_from_handles",
         "get_tag_cursor",
         "get_tag_from_name",
         "get_tag_from_handle",
         "get_tag_handles",
+        "get_tags_from_handles",
         "get_surname_list",
         "get_url_types",
         "gramps_upgrade",
@@ -143,7 +157,9 @@ class DbTest(unittest.TestCase):
         "has_source_handle",
         "has_tag_handle",
         "is_open",
+        "iter_changed_since",
         "iter_event_handles",
+        "iter_event_handles_in_date_range",
         "iter_events",
         "iter_families",
         "iter_family_handles",
@@ -153,6 +169,7 @@ class DbTest(unittest.TestCase):
         "iter_notes",
         "iter_people",
         "iter_person_handles",
+        "iter_person_handles_sorted",
         "iter_place_handles",
         "iter_places",
         "iter_repositories",
@@ -162,6 +179,7 @@ class DbTest(unittest.TestCase):
         "iter_tag_handles",
         "iter_tags",
         "load",
+        "open_snapshot",
         "report_bm_change",
         "request_rebuild",
         # Prefix:
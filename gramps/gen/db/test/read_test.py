@@ -0,0 +1,587 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+import unittest
+import os
+import sys
+
+from ...config import config
+if config.get('preferences.use-bsddb3') or sys.version_info[0] >= 3:
+    from bsddb3 import db
+else:
+    from bsddb import db
+from ...lib import Person, Source, Name, Surname, Event, Date, Place, Note
+from ...proxy import LivingProxyDb
+from .. import DbTxn, PERSON_KEY, TXNADD
+from .. import cursor as db_cursor
+from ..dictionary import DictionaryDb, load_in_memory
+from ..read import find_event_date
+
+from .grampsdbtestbase import GrampsDbBaseTest
+
+class DbReadTest(GrampsDbBaseTest):
+    """Test the read methods of the BSDDB database."""
+
+    def test_batch_fetch(self):
+        """check that a batch fetch returns the objects in the order of
+        the passed handles, with None for missing handles."""
+
+        citation = self._add_source()
+        people = [self._add_person_with_sources([citation]) for i in range(3)]
+        handles = [person.get_handle() for person in reversed(people)]
+        handles.insert(1, "missing")
+        handles.append(handles[0])
+
+        result = self._db.get_people_from_handles(handles)
+
+        self.assertEqual(len(result), 5)
+        self.assertIsNone(result[1])
+        self.assertEqual([person.get_handle() for person in result
+                          if person is not None],
+                         [handle for handle in handles if handle != "missing"])
+        self.assertTrue(all(isinstance(person, Person) for person in result
+                            if person is not None))
+
+    def test_batch_raw_data(self):
+        """check that get_raw_data_many agrees with get_raw_<object>_data."""
+
+        citation = self._add_source()
+        source_handle = citation.get_reference_handle()
+
+        result = self._db.get_raw_data_many("Source", [source_handle])
+
+        self.assertEqual(result,
+                         [self._db.get_raw_source_data(source_handle)])
+        self.assertIsInstance(
+            self._db.get_sources_from_handles([source_handle])[0], Source)
+
+    def test_batch_fetch_proxy(self):
+        """check that proxies pass the batch call through."""
+
+        citation = self._add_source()
+        person = self._add_person_with_sources([citation])
+        proxy = LivingProxyDb(self._db, LivingProxyDb.MODE_INCLUDE_FULL_NAME_ONLY)
+
+        result = proxy.get_people_from_handles([person.get_handle()])
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].get_handle(), person.get_handle())
+
+    def test_cache_hits(self):
+        """check that repeated reads are served from the cache and still
+        return distinct objects."""
+
+        citation = self._add_source()
+        handle = self._add_person_with_sources([citation]).get_handle()
+        self._db.cache.set_capacity(10)
+        self._db.cache.reset_statistics()
+
+        first = self._db.get_person_from_handle(handle)
+        second = self._db.get_person_from_handle(handle)
+
+        stats = self._db.get_cache_statistics()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.serialize(), second.serialize())
+
+    def test_cache_copies(self):
+        """check that modifying a fetched object does not change the
+        cached record."""
+
+        citation = self._add_source()
+        handle = self._add_person_with_sources([citation]).get_handle()
+        self._db.cache.set_capacity(10)
+
+        person = self._db.get_person_from_handle(handle)
+        person.add_family_handle("F1")
+        person.add_parent_family_handle("F2")
+        person.add_tag("T1")
+        person.get_citation_list().append("C1")
+
+        person = self._db.get_person_from_handle(handle)
+        self.assertEqual(person.get_family_handle_list(), [])
+        self.assertEqual(person.get_parent_family_handle_list(), [])
+        self.assertEqual(person.get_tag_list(), [])
+        self.assertNotIn("C1", person.get_citation_list())
+
+    def test_cache_invalidation(self):
+        """check that commits, aborts and undo do not leave stale
+        records in the cache."""
+
+        citation = self._add_source()
+        handle = self._add_person_with_sources([citation]).get_handle()
+        self._db.cache.set_capacity(10)
+
+        person = self._db.get_person_from_handle(handle)
+        person.set_gramps_id("I9999")
+        with DbTxn("Edit Person", self._db) as trans:
+            self._db.commit_person(person, trans)
+        self.assertEqual(
+            self._db.get_person_from_handle(handle).get_gramps_id(), "I9999")
+
+        self._db.undo()
+        self.assertNotEqual(
+            self._db.get_person_from_handle(handle).get_gramps_id(), "I9999")
+
+        trans = DbTxn("Remove Person", self._db)
+        self._db.transaction_begin(trans)
+        self._db.remove_person(handle, trans)
+        self.assertIsNone(self._db.get_person_from_handle(handle))
+        self._db.transaction_abort(trans)
+        self.assertIsNotNone(self._db.get_person_from_handle(handle))
+
+    def test_undo_redo(self):
+        """check that undo and redo restore the records stored as deltas
+        in the undo database."""
+
+        citation = self._add_source()
+        handle = self._add_person_with_sources([citation]).get_handle()
+        old_id = self._db.get_person_from_handle(handle).get_gramps_id()
+
+        person = self._db.get_person_from_handle(handle)
+        person.set_gramps_id("I9999")
+        with DbTxn("Edit Person", self._db) as trans:
+            self._db.commit_person(person, trans)
+
+        self._db.undo()
+        self.assertEqual(
+            self._db.get_person_from_handle(handle).get_gramps_id(), old_id)
+        self._db.redo()
+        self.assertEqual(
+            self._db.get_person_from_handle(handle).get_gramps_id(), "I9999")
+
+    def test_undo_check_time(self):
+        """check that undo clears the time of the last check, since the
+        reverted records keep their old change times."""
+
+        citation = self._add_source()
+        self._add_person_with_sources([citation])
+        self._db.set_check_time(1)
+
+        self._db.undo()
+        self.assertIsNone(self._db.get_check_time())
+
+    def test_undo_eviction(self):
+        """check that the oldest transactions are dropped from the undo
+        history when it is older than the configured age."""
+
+        max_age = config.get('database.undo-max-age')
+        config.set('database.undo-max-age', 1)
+        try:
+            citation = self._add_source()
+            self._add_person_with_sources([citation])
+            for txn in self._db.undodb.undoq:
+                txn.timestamp -= 3600
+            self._add_person_with_sources([citation])
+        finally:
+            config.set('database.undo-max-age', max_age)
+
+        self.assertEqual(self._db.undodb.undo_count, 1)
+        self.assertFalse(self._db.abort_possible)
+
+    def test_transaction_spill(self):
+        """check that a spilled transaction still gives back its records
+        and emits the signals of all its commits."""
+
+        added = []
+        self._db.connect('person-add', added.extend)
+        spill = config.get('database.transaction-spill')
+        config.set('database.transaction-spill', 1)
+        try:
+            with DbTxn("Add People", self._db) as trans:
+                people = []
+                for index in range(3):
+                    person = Person()
+                    self._db.add_person(person, trans)
+                    people.append(person)
+                self.assertTrue(trans.spilled)
+                self.assertEqual(
+                    [handle for handle, data in trans[(PERSON_KEY, TXNADD)]],
+                    [person.get_handle().encode('utf-8')
+                     for person in people])
+        finally:
+            config.set('database.transaction-spill', spill)
+
+        self.assertEqual(sorted(added),
+                         sorted(person.get_handle() for person in people))
+
+    def test_next_gramps_id(self):
+        """check that the next person IDs skip the IDs in use."""
+
+        self._db.set_person_id_prefix("I%04d")
+        with DbTxn("Add People", self._db) as trans:
+            for gramps_id in ("I0000", "I0001", "I0003"):
+                person = Person()
+                person.set_gramps_id(gramps_id)
+                self._db.add_person(person, trans)
+
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0002")
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0004")
+
+    def test_next_gramps_id_reopen(self):
+        """check that the number of a removed person is used again after
+        the tree is reopened."""
+
+        self._db.set_person_id_prefix("I%04d")
+        people = self._add_people(3)
+        with DbTxn("Remove Person", self._db) as trans:
+            self._db.remove_person(people[2].get_handle(), trans)
+        self._reopen()
+
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0002")
+
+    def test_next_gramps_id_changed(self):
+        """check that the number of a changed GRAMPS ID is used again."""
+
+        self._db.set_person_id_prefix("I%04d")
+        people = self._add_people(3)
+        people[2].set_gramps_id("X0002")
+        with DbTxn("Edit Person", self._db) as trans:
+            self._db.commit_person(people[2], trans)
+            self._db.remove_person(people[0].get_handle(), trans)
+        self._reopen()
+
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0002")
+
+    def test_next_gramps_id_undo(self):
+        """check that the number of a person whose addition is undone is
+        used again."""
+
+        self._db.set_person_id_prefix("I%04d")
+        self._add_people(3)
+        self._add_people(1)
+        self._db.undo()
+        self._reopen()
+
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0003")
+
+    def test_next_gramps_id_prefix(self):
+        """check that the IDs made with a new prefix are numbered on their
+        own, and that the numbers of the old prefix are not lost."""
+
+        self._db.set_person_id_prefix("I%04d")
+        people = self._add_people(3)
+        self._db.set_person_id_prefix("P%03d")
+        self.assertEqual(self._db.find_next_person_gramps_id(), "P003")
+        with DbTxn("Remove Person", self._db) as trans:
+            self._db.remove_person(people[2].get_handle(), trans)
+        self._db.set_person_id_prefix("I%04d")
+        self._reopen()
+
+        self.assertEqual(self._db.find_next_person_gramps_id(), "I0002")
+
+    def test_buffered_cursor(self):
+        """check that a buffered cursor returns the same records as a
+        plain one."""
+
+        citation = self._add_source()
+        for index in range(5):
+            self._add_person_with_sources([citation])
+
+        with self._db.get_person_cursor() as cursor:
+            records = list(cursor)
+        buffer_size = db_cursor.BUFFER_SIZE
+        db_cursor.BUFFER_SIZE = 2
+        try:
+            with self._db.get_person_cursor(buffered=True) as cursor:
+                buffered_records = list(cursor)
+        finally:
+            db_cursor.BUFFER_SIZE = buffer_size
+
+        self.assertEqual(len(records), 5)
+        self.assertEqual(buffered_records, records)
+
+    def test_statistics(self):
+        """check that the calls and bytes of the access methods are counted
+        while the statistics are enabled."""
+
+        self.assertIsNone(self._db.get_statistics())
+        statistics = self._db.enable_statistics()
+        try:
+            citation = self._add_source()
+            person = self._add_person_with_sources([citation])
+            self._db.get_person_from_handle(person.get_handle())
+
+            self.assertGreaterEqual(
+                statistics.methods['get_person_from_handle'][0], 1)
+            self.assertGreater(statistics.tables['Person'][1], 0)
+            self.assertIn((__name__, 'get_person_from_handle'),
+                          statistics.callers)
+        finally:
+            self._db.disable_statistics()
+
+        self.assertIsNone(self._db.get_statistics())
+        self.assertNotIn('get_person_from_handle', self._db.__dict__)
+
+    def test_in_memory_cache(self):
+        """check that the saved in-memory copy is not used once the tree
+        has been written."""
+
+        citation = self._add_source()
+        person = self._add_person_with_sources([citation])
+        load_in_memory(self._db)
+
+        person.set_gramps_id("I9999")
+        with DbTxn("Edit Person", self._db) as trans:
+            self._db.commit_person(person, trans)
+        memory_db = load_in_memory(self._db)
+
+        self.assertEqual(
+            memory_db.get_person_from_handle(
+                person.get_handle()).get_gramps_id(), "I9999")
+
+    def test_in_memory_copy(self):
+        """check that a DictionaryDb loaded from the database holds the
+        same records and references."""
+
+        citation = self._add_source()
+        person = self._add_person_with_sources([citation])
+        memory_db = DictionaryDb()
+        memory_db.copy_from_db(self._db)
+
+        self.assertEqual(memory_db.get_number_of_people(), 1)
+        self.assertEqual(
+            memory_db.get_person_from_handle(person.get_handle()).serialize(),
+            self._db.get_person_from_handle(person.get_handle()).serialize())
+        self.assertEqual(
+            memory_db.get_person_from_gramps_id(
+                person.get_gramps_id()).get_handle(),
+            person.get_handle())
+        self.assertEqual(
+            list(memory_db.find_backlink_handles(citation.get_handle())),
+            [(Person.__name__, person.get_handle())])
+        self.assertEqual(memory_db.find_next_person_gramps_id(),
+                         self._db.find_next_person_gramps_id())
+
+    def _add_people(self, count):
+        people = [Person() for index in range(count)]
+        with DbTxn("Add People", self._db) as trans:
+            for person in people:
+                self._db.add_person(person, trans)
+        return people
+
+    def _reopen(self):
+        prefix = self._db.person_prefix
+        self._db.close()
+        self._db.load(self._filename, None, "w")
+        self._db.set_person_id_prefix(prefix)
+
+    def _add_person_named(self, surname, first_name):
+        person = Person()
+        name = Name()
+        name.set_first_name(first_name)
+        name_surname = Surname()
+        name_surname.set_surname(surname)
+        name.set_surname_list([name_surname])
+        person.set_primary_name(name)
+        with DbTxn("Add Person", self._db) as trans:
+            self._db.add_person(person, trans)
+        return person.get_handle().encode('utf-8')
+
+    def test_sorted_person_handles(self):
+        """check that the sort name index orders people by sort name and
+        supports starting at a given name."""
+
+        smith_john = self._add_person_named("Smith", "John")
+        adams_jane = self._add_person_named("Adams", "Jane")
+        smith_ann = self._add_person_named("Smith", "Ann")
+        expected = [adams_jane, smith_ann, smith_john]
+
+        self.assertEqual(self._db.get_person_handles(sort_handles=True),
+                         expected)
+        self.assertEqual(list(self._db.iter_person_handles_sorted()),
+                         expected)
+        self.assertEqual(list(self._db.iter_person_handles_sorted("Smith")),
+                         [smith_ann, smith_john])
+
+        with DbTxn("Remove Person", self._db) as trans:
+            self._db.remove_person(smith_ann, trans)
+        self.assertEqual(list(self._db.iter_person_handles_sorted()),
+                         [adams_jane, smith_john])
+
+    def test_sorted_person_handles_stale(self):
+        """check that a stale sort name index is rebuilt before use."""
+
+        bell = self._add_person_named("Bell", "Alan")
+        abel = self._add_person_named("Abel", "Zoe")
+        self._db.sortname_fingerprint = ""
+
+        self.assertEqual(list(self._db.iter_person_handles_sorted()),
+                         [abel, bell])
+        self.assertNotEqual(self._db.sortname_fingerprint, "")
+
+    def _add_event_dated(self, *date):
+        event = Event()
+        if date:
+            event.set_date_object(Date(*date))
+        with DbTxn("Add Event", self._db) as trans:
+            self._db.add_event(event, trans)
+        return event.get_handle().encode('utf-8')
+
+    def test_event_date_range(self):
+        """check that the date index returns the events in a date range
+        in date order."""
+
+        event_1900 = self._add_event_dated(1900, 5, 1)
+        event_1850 = self._add_event_dated(1850, 1, 1)
+        event_1800 = self._add_event_dated(1800, 12, 31)
+        self._add_event_dated()
+
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(
+                Date(1800, 1, 1), Date(1900, 1, 1))),
+            [event_1800, event_1850])
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(
+                Date(1850, 1, 1), None)),
+            [event_1850, event_1900])
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(None, None)),
+            [event_1800, event_1850, event_1900])
+
+    def test_event_date_key_without_date(self):
+        """check that an event without a date is left out of the date
+        index."""
+
+        self.assertIsNone(Event().serialize()[3])
+        self.assertEqual(find_event_date(None, Event().serialize()),
+                         db.DB_DONOTINDEX)
+
+    def _add_place_at(self, latitude, longitude):
+        place = Place()
+        place.set_latitude(latitude)
+        place.set_longitude(longitude)
+        with DbTxn("Add Place", self._db) as trans:
+            self._db.add_place(place, trans)
+        return place.get_handle().encode('utf-8')
+
+    def test_places_in_bbox(self):
+        """check that the place coordinate index finds the places in a
+        box, also across the 180th meridian."""
+
+        paris = self._add_place_at("48.8567", "2.3508")
+        london = self._add_place_at("N51°30'26\"", "W0°7'39\"")
+        fiji = self._add_place_at("-17.7134", "178.0650")
+        samoa = self._add_place_at("-13.7590", "-172.1046")
+        self._add_place_at("", "")
+
+        self.assertEqual(
+            set(self._db.find_places_in_bbox(45., -5., 55., 5.)),
+            set([paris, london]))
+        self.assertEqual(
+            set(self._db.find_places_in_bbox(49., -5., 55., 5.)),
+            set([london]))
+        self.assertEqual(
+            set(self._db.find_places_in_bbox(-20., 170., -10., -170.)),
+            set([fiji, samoa]))
+
+    def test_places_near(self):
+        """check that find_places_near returns the places within a
+        distance, nearest first."""
+
+        paris = self._add_place_at("48.8567", "2.3508")
+        london = self._add_place_at("51.5072", "-0.1275")
+        self._add_place_at("40.7127", "-74.0059")
+
+        self.assertEqual(self._db.find_places_near(49.0, 2.0, 500.),
+                         [paris, london])
+        self.assertEqual(self._db.find_places_near(49.0, 2.0, 100.),
+                         [paris])
+
+    def _add_note_changed(self, change_time):
+        note = Note()
+        with DbTxn("Add Note", self._db) as trans:
+            self._db.add_note(note, trans)
+            self._db.commit_note(note, trans, change_time)
+        return note.get_handle().encode('utf-8')
+
+    def test_changed_since(self):
+        """check that the change time index returns the objects changed
+        since a time in change order."""
+
+        note_3000 = self._add_note_changed(3000)
+        note_1000 = self._add_note_changed(1000)
+        note_2000 = self._add_note_changed(2000)
+
+        self.assertEqual(list(self._db.iter_changed_since('Note', 2000)),
+                         [note_2000, note_3000])
+        self.assertEqual(list(self._db.iter_changed_since('Note', 1500.5)),
+                         [note_2000, note_3000])
+        self.assertEqual(list(self._db.iter_changed_since('Note', 0)),
+                         [note_1000, note_2000, note_3000])
+        self.assertEqual(list(self._db.iter_changed_since('Person', 0)), [])
+
+    def test_snapshot(self):
+        """check that a snapshot holds the data at the time it was taken
+        and stays unchanged by later edits."""
+
+        smith = self._add_person_named("Smith", "John")
+        snapshot = self._db.open_snapshot()
+        adams = self._add_person_named("Adams", "Jane")
+
+        with snapshot as database:
+            self.assertTrue(database.readonly)
+            self.assertTrue(database.has_person_handle(smith))
+            self.assertFalse(database.has_person_handle(adams))
+        self.assertFalse(os.path.exists(snapshot.path))
+        self.assertTrue(self._db.has_person_handle(adams))
+
+    def test_lazy_tables(self):
+        """check that the secondary indices and the surname list are set up
+        on first access after the tree is loaded."""
+
+        smith = self._add_person_named("Smith", "John")
+        gramps_id = self._db.get_raw_person_data(smith)[1]
+        self._db.close()
+        self._db.load(self._filename, None, "w")
+
+        self.assertNotIn('id_trans', vars(self._db))
+        self.assertNotIn('surname_list', vars(self._db))
+        self.assertEqual(self._db.get_surname_list(), ["Smith"])
+        person = self._db.get_person_from_gramps_id(gramps_id)
+        self.assertEqual(person.get_handle().encode('utf-8'), smith)
+        self.assertIn('id_trans', vars(self._db))
+        self.assertNotIn('eid_trans', vars(self._db))
+
+        # a write connects the indices of all tables
+        event = self._add_event_dated(1900)
+        self.assertIn('eid_trans', vars(self._db))
+        self.assertEqual(list(self._db.iter_event_handles_in_date_range(
+            Date(1850), None)), [event])
+
+    def test_compact(self):
+        """check that compacting keeps the records and reports every
+        table."""
+
+        smith = self._add_person_named("Smith", "John")
+        results = dict((name, (new_fill, new_size)) for (name, fill, new_fill,
+                       size, new_size) in self._db.compact())
+
+        self.assertIn("person.db", results)
+        self.assertIn("reference_map.db", results)
+        self.assertGreater(results["person.db"][1], 0)
+        self.assertTrue(self._db.has_person_handle(smith))
+
+def testSuite():
+    return unittest.makeSuite(DbReadTest, 'test')
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(testSuite())
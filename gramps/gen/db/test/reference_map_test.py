@@ -25,7 +25,7 @@ import logging
 import time
 
 from .. import DbTxn
-from ...lib import Person, Event, Source, Citation
+from ...lib import Person, Event, Source, Citation, Date
 
 logger = logging.getLogger('Gramps.GrampsDbBase_Test')
 
@@ -118,6 +118,51 @@ class ReferenceMapTest(GrampsDbBaseTest):
         self.assertEqual(len(references), 0, 
                          "len(references) == %s " % str(len(references)))
 
+    def test_reference_count(self):
+        """check that the reference count follows the references added
+        and removed."""
+
+        citation = self._add_source()
+        self.assertEqual(self._db.get_reference_count(citation.get_handle()),
+                         0)
+
+        person = self._add_person_with_sources([citation])
+        self._add_event_with_sources([citation])
+        self.assertEqual(self._db.get_reference_count(citation.get_handle()),
+                         2)
+
+        with DbTxn("Del Person", self._db) as tran:
+            self._db.remove_person(person.get_handle(), tran)
+        self.assertEqual(self._db.get_reference_count(citation.get_handle()),
+                         1)
+
+    def test_bulk_load(self):
+        """check that the references written and removed during a bulk
+        load are in the reference_map after it."""
+
+        citation = self._add_source()
+        old_person = self._add_person_with_sources([citation])
+
+        with DbTxn("Bulk load", self._db, batch=True,
+                   bulk_load=True) as tran:
+            person = Person()
+            person.add_citation(citation.get_handle())
+            self._db.add_person(person, tran)
+            event = Event()
+            event.add_citation(citation.get_handle())
+            event.set_date_object(Date(1900, 5, 1))
+            self._db.add_event(event, tran)
+            self._db.remove_person(old_person.get_handle(), tran)
+
+        references = list(self._db.find_backlink_handles(citation.get_handle()))
+        self.assertEqual(sorted(references),
+                         sorted([(Person.__name__, person.get_handle()),
+                                 (Event.__name__, event.get_handle())]))
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(None, None)),
+            [event.get_handle().encode('utf-8')])
+        self.assertFalse(self._db.metadata.get(b'bulk_load'))
+
     def test_reindex_reference_map(self):
         """Test that the reindex function works."""
 
@@ -149,6 +194,34 @@ class ReferenceMapTest(GrampsDbBaseTest):
         self.assertEqual(len(references), 1, 
                          "len(references) == %s " % str(len(references)))
 
+    def test_rebuild_secondary(self):
+        """check that the indices filled by the rebuild workers are used
+        by the database."""
+
+        citation = self._add_source()
+        person = self._add_person_with_sources([citation])
+        event = self._add_event_with_sources([citation])
+        with DbTxn("Set Date", self._db) as tran:
+            event.set_date_object(Date(1900, 5, 1))
+            self._db.commit_event(event, tran)
+        undated = self._add_event_with_sources([citation])
+
+        self._db.rebuild_secondary()
+
+        self.assertEqual(
+            self._db.get_person_from_gramps_id(
+                person.get_gramps_id()).get_handle(),
+            person.get_handle())
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(None, None)),
+            [event.get_handle().encode('utf-8')])
+        self.assertEqual(
+            self._db.get_event_from_gramps_id(
+                undated.get_gramps_id()).get_handle(),
+            undated.get_handle())
+        self.assertEqual(self._db.get_reference_count(citation.get_handle()),
+                         3)
+
     def perf_simple_search_speed(self):
 
         num_sources = 100
@@ -0,0 +1,232 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+import unittest
+import tempfile
+import shutil
+
+from ...lib import (Person, Name, Surname, Event, Date, Source, Citation,
+                    Tag)
+from .. import DbTxn, PERSON_KEY
+from .. import dictionary
+from ..sqlite import DbSqlite
+from ..backends import get_backend, make_database, create_database
+
+class DbSqliteTest(unittest.TestCase):
+    """Test the SQLite database backend."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp()
+        create_database(self._tmpdir, 'sqlite')
+        self._db = make_database(self._tmpdir)
+        self._db.load(self._tmpdir, None, "w")
+
+    def tearDown(self):
+        self._db.close()
+        shutil.rmtree(self._tmpdir)
+
+    def _add_person(self, first_name, surname):
+        person = Person()
+        name = Name()
+        name.set_first_name(first_name)
+        name_surname = Surname()
+        name_surname.set_surname(surname)
+        name.set_surname_list([name_surname])
+        person.set_primary_name(name)
+        with DbTxn("Add Person", self._db) as trans:
+            self._db.add_person(person, trans)
+        return person
+
+    def _add_event(self, year=None):
+        event = Event()
+        if year is not None:
+            event.set_date_object(Date(year, 1, 1))
+        with DbTxn("Add Event", self._db) as trans:
+            self._db.add_event(event, trans)
+        return event
+
+    def test_backend(self):
+        """check that the tree is created with the SQLite backend."""
+        self.assertEqual(get_backend(self._tmpdir), 'sqlite')
+        self.assertIsInstance(self._db, DbSqlite)
+
+    def test_indexed_lookups(self):
+        """check the lookups by GRAMPS ID, sort name, date and change time."""
+        smith = self._add_person("John", "Smith")
+        adams = self._add_person("Mary", "Adams")
+        self.assertEqual(
+            self._db.get_person_from_gramps_id(smith.gramps_id).handle,
+            smith.handle)
+        self.assertTrue(self._db.has_gramps_id(PERSON_KEY, adams.gramps_id))
+        self.assertNotEqual(smith.gramps_id, adams.gramps_id)
+        self.assertEqual(self._db.get_person_handles(sort_handles=True),
+                         [adams.handle, smith.handle])
+        self.assertEqual(list(self._db.iter_person_handles_sorted()),
+                         [adams.handle, smith.handle])
+        self.assertEqual(self._db.get_surname_list(), ["Adams", "Smith"])
+
+        old = self._add_event(1800)
+        new = self._add_event(1900)
+        undated = self._add_event()
+        self.assertEqual(
+            self._db.get_event_from_gramps_id(undated.gramps_id).handle,
+            undated.handle)
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(None, None)),
+            [old.handle, new.handle])
+        self.assertEqual(
+            list(self._db.iter_event_handles_in_date_range(Date(1850), None)),
+            [new.handle])
+
+        with DbTxn("Edit Person", self._db) as trans:
+            self._db.commit_person(smith, trans, smith.change + 10)
+        self.assertEqual(
+            list(self._db.iter_changed_since('Person', smith.change)),
+            [smith.handle])
+
+    def test_references(self):
+        """check the reference table and the signals of a transaction."""
+        added = []
+        def citations_added(handles):
+            added.extend(handles)
+        self._db.connect('citation-add', citations_added)
+        source = Source()
+        citation = Citation()
+        tag = Tag()
+        tag.set_name("ToDo")
+        with DbTxn("Add Citation", self._db) as trans:
+            self._db.add_source(source, trans)
+            citation.set_reference_handle(source.handle)
+            self._db.add_citation(citation, trans)
+            self._db.add_tag(tag, trans)
+        self.assertEqual(added, [citation.handle])
+        self.assertEqual(list(self._db.find_backlink_handles(source.handle)),
+                         [('Citation', citation.handle)])
+        self.assertEqual(self._db.get_reference_count(source.handle), 1)
+        self.assertEqual(self._db.get_tag_from_name("ToDo").handle,
+                         tag.handle)
+
+        with DbTxn("Remove Citation", self._db) as trans:
+            self._db.remove_citation(citation.handle, trans)
+        self.assertEqual(self._db.get_reference_count(source.handle), 0)
+        self.assertFalse(self._db.has_citation_handle(citation.handle))
+
+    def test_abort_and_reopen(self):
+        """check that an aborted transaction is rolled back, and that the
+        records and settings are kept when the tree is closed."""
+        person = self._add_person("John", "Smith")
+        try:
+            with DbTxn("Add Person", self._db) as trans:
+                self._db.add_person(Person(), trans)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self._db.get_number_of_people(), 1)
+
+        self._db.set_default_person_handle(person.handle)
+        self._db.set_check_time(person.change)
+        self._db.close()
+        self._db = make_database(self._tmpdir)
+        self._db.load(self._tmpdir, None, "w")
+        self.assertEqual(self._db.get_default_handle(), person.handle)
+        self.assertEqual(self._db.get_check_time(), person.change)
+        self.assertEqual(self._db.get_person_from_handle(person.handle)
+                         .get_primary_name().get_surname(), "Smith")
+
+    def test_batch_check_time(self):
+        """check that a batch transaction clears the time of the last
+        check, since it can keep old change times."""
+        self._db.set_check_time(1)
+        with DbTxn("Import", self._db, batch=True) as trans:
+            self._db.add_person(Person(), trans)
+        self.assertIsNone(self._db.get_check_time())
+
+    def test_in_memory_cache(self):
+        """check that the saved in-memory copy is not used once a
+        transaction has been committed, even if the table files look
+        unchanged, and that the time of the last commit is kept."""
+        person = self._add_person("John", "Smith")
+        commit_time = self._db.get_commit_time()
+        self.assertIsNotNone(commit_time)
+
+        tree_signature = dictionary.tree_signature
+        dictionary.tree_signature = lambda path: []
+        try:
+            dictionary.load_in_memory(self._db)
+            person.set_gramps_id("I9999")
+            with DbTxn("Edit Person", self._db) as trans:
+                self._db.commit_person(person, trans)
+            memory_db = dictionary.load_in_memory(self._db)
+        finally:
+            dictionary.tree_signature = tree_signature
+        self.assertEqual(memory_db.get_person_from_handle(
+            person.handle).get_gramps_id(), "I9999")
+        self.assertNotEqual(self._db.get_commit_time(), commit_time)
+
+        commit_time = self._db.get_commit_time()
+        self._db.close()
+        self._db = make_database(self._tmpdir)
+        self._db.load(self._tmpdir, None, "w")
+        self.assertEqual(self._db.get_commit_time(), commit_time)
+
+    def test_undo_history(self):
+        """check that the empty undo history can be shown, and that
+        nothing is undone."""
+        person = self._add_person("John", "Smith")
+        self.assertTrue(self._db.get_feature("skip-undo-history"))
+        self.assertEqual(self._db.undodb.undo_count, 0)
+        self.assertEqual(list(self._db.undodb.undoq), [])
+        self.assertFalse(self._db.undo())
+        self.assertFalse(self._db.redo())
+        self.assertTrue(self._db.has_person_handle(person.handle))
+
+    def test_backup(self):
+        """check that a tree is restored from its backup."""
+        person = self._add_person("John", "Smith")
+        self._db.make_backup()
+        with DbTxn("Remove Person", self._db) as trans:
+            self._db.remove_person(person.handle, trans)
+        self._db.restore_backup()
+        self.assertTrue(self._db.has_person_handle(person.handle))
+
+    def test_compact(self):
+        """check that compacting gives the pages of removed records back."""
+        note = "x" * 100000
+        with DbTxn("Add People", self._db) as trans:
+            people = []
+            for index in range(20):
+                person = Person()
+                person.set_gramps_id(note + str(index))
+                self._db.add_person(person, trans)
+                people.append(person)
+        with DbTxn("Remove People", self._db) as trans:
+            for person in people:
+                self._db.remove_person(person.handle, trans)
+
+        [(name, fill, new_fill, size, new_size)] = self._db.compact()
+        self.assertLess(fill, new_fill)
+        self.assertLess(new_size, size)
+        self.assertEqual(self._db.get_number_of_people(), 0)
+
+def testSuite():
+    return unittest.makeSuite(DbSqliteTest, 'test')
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(testSuite())
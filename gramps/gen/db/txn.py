@@ -38,7 +38,9 @@ if sys.version_info[0] < 3:
 else:
     import pickle
 import logging
+import zlib
 
+from array import array
 from collections import defaultdict
 
 #-------------------------------------------------------------------------
@@ -46,10 +48,90 @@ from collections import defaultdict
 # Gramps modules
 #
 #-------------------------------------------------------------------------
+from ..config import config
 from .dbconst import (DBLOGNAME, TXNADD, TXNUPD, TXNDEL)
 
 _LOG = logging.getLogger(DBLOGNAME)
 
+# First byte of the stored undo records
+_PLAIN = b'p'
+_COMPRESSED = b'z'
+
+#-------------------------------------------------------------------------
+#
+# Undo records
+#
+#-------------------------------------------------------------------------
+def pack_record(obj_type, trans_type, handle, old_data, new_data,
+                compress=False):
+    """
+    Return the undo record of a commit as a byte string.
+
+    When a record is updated, only the fields of new_data that differ from
+    old_data are stored, as (index, value) pairs. With compress the record
+    is compressed with zlib.
+    """
+    delta = None
+    if (isinstance(old_data, (tuple, list)) and
+            isinstance(new_data, (tuple, list)) and
+            len(old_data) == len(new_data)):
+        delta = [(index, value) for index, (old_value, value)
+                 in enumerate(zip(old_data, new_data)) if old_value != value]
+        new_data = None
+    record = pickle.dumps((obj_type, trans_type, handle, old_data, new_data,
+                           delta), 1)
+    if compress:
+        return _COMPRESSED + zlib.compress(record, 1)
+    return _PLAIN + record
+
+def unpack_record(record):
+    """
+    Return the (object type, transaction type, handle, old data, new data)
+    tuple of an undo record made by pack_record.
+    """
+    if record[:1] == _COMPRESSED:
+        record = zlib.decompress(record[1:])
+    else:
+        record = record[1:]
+    (obj_type, trans_type, handle, old_data, new_data,
+     delta) = pickle.loads(record)
+    if delta is not None:
+        new_data = list(old_data)
+        for index, value in delta:
+            new_data[index] = value
+        new_data = tuple(new_data)
+    return (obj_type, trans_type, handle, old_data, new_data)
+
+class SpilledRecords(object):
+    """
+    The (handle, data) pairs of a transaction for one (object type,
+    transaction type) key, once the transaction is spilled.
+
+    The pairs added before the spill stay in memory. For the later ones only
+    the record number in the undo database is kept, and the pair is read
+    back from the undo record when iterating.
+    """
+
+    __slots__ = ('commitdb', 'pairs', 'recnos')
+
+    def __init__(self, commitdb, pairs):
+        self.commitdb = commitdb
+        self.pairs = pairs
+        self.recnos = array('l')
+
+    def __iter__(self):
+        for pair in self.pairs:
+            yield pair
+        for recno in self.recnos:
+            record = unpack_record(self.commitdb[recno])
+            yield (record[2], record[4])
+
+    def __contains__(self, pair):
+        return any(item == pair for item in self)
+
+    def __len__(self):
+        return len(self.pairs) + len(self.recnos)
+
 
 #-------------------------------------------------------------------------
 #
@@ -62,7 +144,8 @@ class DbTxn(defaultdict):
     """
 
     __slots__ = ('msg', 'commitdb', 'db', 'batch', 'first',
-                 'last', 'timestamp', '__dict__')
+                 'last', 'timestamp', 'size', 'compress', 'spill', 'spilled',
+                 '__dict__')
 
     def __enter__(self):
         """
@@ -112,6 +195,11 @@ class DbTxn(defaultdict):
             list element = (handle, data) where:
                 handle = handle (database key) of the object in the transaction
                 data   = pickled representation of the object        
+
+        Once the transaction holds more than 'database.transaction-spill'
+        commits, the lists are replaced by SpilledRecords, which read the
+        data of the later commits back from the undo database instead of
+        keeping it in memory.
         """
 
         defaultdict.__init__(self, list, {})
@@ -125,6 +213,11 @@ class DbTxn(defaultdict):
         self.first = None
         self.last = None
         self.timestamp = 0
+        # Number of bytes of the records in the undo database
+        self.size = 0
+        self.compress = config.get('database.undo-compress')
+        self.spill = config.get('database.transaction-spill')
+        self.spilled = False
 
     def get_description(self):
         """
@@ -148,16 +241,36 @@ class DbTxn(defaultdict):
         is being added. The handle is the object's database handle, and the 
         data is the tuple returned by the object's serialize method.
         """
-        self.last = self.commitdb.append(
-            pickle.dumps((obj_type, trans_type, handle, old_data, new_data), 1))
+        record = pack_record(obj_type, trans_type, handle, old_data, new_data,
+                             self.compress)
+        self.size += len(record)
+        self.last = self.commitdb.append(record)
         if self.last is None:
             self.last = len(self.commitdb) -1
         if self.first is None:
             self.first = self.last
         _LOG.debug('added to trans: %d %d %s' % (obj_type, trans_type, handle))
-        self[(obj_type, trans_type)] += [(handle, new_data)]
+        if self.spilled:
+            records = self.get((obj_type, trans_type))
+            if not isinstance(records, SpilledRecords):
+                records = SpilledRecords(self.commitdb, records or [])
+                self[(obj_type, trans_type)] = records
+            records.recnos.append(self.last)
+        else:
+            self[(obj_type, trans_type)] += [(handle, new_data)]
+            if self.spill and len(self) > self.spill:
+                self.__spill()
         return
 
+    def __spill(self):
+        """
+        Stop keeping the data of the commits in memory.
+        """
+        _LOG.debug('spilling transaction %s' % self.msg)
+        for key, pairs in list(self.items()):
+            self[key] = SpilledRecords(self.commitdb, pairs)
+        self.spilled = True
+
     def get_recnos(self, reverse=False):
         """
         Return a list of record numbers associated with the transaction.
@@ -179,7 +292,7 @@ class DbTxn(defaultdict):
         for the PrimaryObject, and a tuple representing the data created by
         the object's serialize method.
         """
-        return pickle.loads(self.commitdb[recno])
+        return unpack_record(self.commitdb[recno])
 
     def __len__(self):
         """
@@ -57,6 +57,7 @@ _ = glocale.translation.gettext
 from ..constfunc import conv_to_unicode, handle2internal
 from .dbconst import *
 from . import BSDDBTxn
+from .txn import unpack_record
 from ..errors import DbError
 
 #-------------------------------------------------------------------------
@@ -167,6 +168,13 @@ class DbUndo(object):
         """           
         raise NotImplementedError
 
+    def __delitem__(self, index):
+        """
+        Remove an entry, without renumbering the others.  Needs to be
+        overridden in the derived class.
+        """
+        raise NotImplementedError
+
     def __len__(self):
         """
         Returns the number of entries.  Needs to be overridden in the derived
@@ -182,6 +190,34 @@ class DbUndo(object):
         txn.set_description(msg)
         txn.timestamp = time.time()
         self.undoq.append(txn)
+        self.__evict()
+
+    def __evict(self):
+        """
+        Remove the oldest transactions from the undo history, and their
+        records from the undo database, while the records take more than
+        'database.undo-max-size' megabytes or the transactions are older than
+        'database.undo-max-age' minutes. The last transaction is always kept.
+        """
+        max_size = config.get('database.undo-max-size') * 1024 * 1024
+        max_age = config.get('database.undo-max-age') * 60
+        if not max_size and not max_age:
+            return
+        size = sum(txn.size for txn in self.undoq)
+        size += sum(txn.size for txn in self.redoq)
+        oldest = time.time() - max_age
+        while len(self.undoq) > 1:
+            txn = self.undoq[0]
+            if not ((max_size and size > max_size) or
+                    (max_age and txn.timestamp < oldest)):
+                break
+            self.undoq.popleft()
+            size -= txn.size
+            for record_id in txn.get_recnos():
+                del self[record_id]
+            self.undo_history_timestamp = txn.timestamp
+            # The changes of the session can no longer all be undone
+            self.db.abort_possible = False
 
     def undo(self, update_history=True):
         """
@@ -210,9 +246,17 @@ class DbUndo(object):
                 with BSDDBTxn(self.db.env) as txn:
                     self.txn = self.db.txn = txn.txn
                     status = func(self, *args, **kwargs)
-                    if not status:
+                    if status:
+                        # The reverted records keep their old change times
+                        self.db.metadata.put(b'backup_full', True, txn=txn.txn)
+                        self.db.metadata.put(b'check_time', None, txn=txn.txn)
+                        self.db.metadata.put(b'commit_time', time.time(),
+                                             txn=txn.txn)
+                    else:
                         txn.abort()
                     self.db.txn = None
+                    # Drop the cached records of the reverted objects
+                    self.db.cache.clear()
                     return status
 
             except DBERRS as msg:
@@ -236,13 +280,14 @@ class DbUndo(object):
         # Process all records in the transaction
         for record_id in subitems:
             (key, trans_type, handle, old_data, new_data) = \
-                    pickle.loads(self.undodb[record_id])
+                    unpack_record(self.undodb[record_id])
 
             if key == REFERENCE_KEY:
                 self.undo_reference(old_data, handle, self.mapbase[key])
             else:
                 self.undo_data(old_data, handle, self.mapbase[key],
                                 db.emit, _SIGBASE[key])
+                self.release_gramps_id(key, new_data, old_data)
         # Notify listeners
         if db.undo_callback:
             if self.undo_count > 0:
@@ -274,13 +319,14 @@ class DbUndo(object):
         # Process all records in the transaction
         for record_id in subitems:
             (key, trans_type, handle, old_data, new_data) = \
-                pickle.loads(self.undodb[record_id])
+                unpack_record(self.undodb[record_id])
 
             if key == REFERENCE_KEY:
                 self.undo_reference(new_data, handle, self.mapbase[key])
             else:
                 self.undo_data(new_data, handle, self.mapbase[key],
                                     db.emit, _SIGBASE[key])
+                self.release_gramps_id(key, old_data, new_data)
         # Notify listeners
         if db.undo_callback:
             db.undo_callback(_("_Undo %s")
@@ -333,6 +379,15 @@ class DbUndo(object):
             self.db._log_error()
             raise DbError(msg)
 
+    def release_gramps_id(self, key, data, new_data):
+        """
+        Make the number of the GRAMPS ID of the record data, replaced by
+        new_data or removed, available again if new_data does not keep it.
+        """
+        if key != TAG_KEY and data and (not new_data or
+                                        new_data[1] != data[1]):
+            self.db._release_gramps_id(key, data[1])
+
     undo_count = property(lambda self:len(self.undoq))
     redo_count = property(lambda self:len(self.redoq))
 
@@ -379,6 +434,12 @@ class DbUndoList(DbUndo):
         """
         self.undodb[index] = value
 
+    def __delitem__(self, index):
+        """
+        Drop the item at the specified index, keeping the other indices
+        """
+        self.undodb[index] = None
+
     def __iter__(self):
         """
         Iterator
@@ -454,6 +515,13 @@ class DbUndoBSDDB(DbUndo):
         """
         self.undodb.put(index, value)
 
+    def __delitem__(self, index):
+        """
+        Removes the entry stored at the specified index. The database does
+        not renumber the entries that follow it.
+        """
+        self.undodb.delete(index)
+
     def __iter__(self):
         """
         Iterator
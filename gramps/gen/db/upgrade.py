@@ -47,10 +47,42 @@ else:
 from . import BSDDBTxn
 from ..lib.nameorigintype import NameOriginType
 from .write import _mkname, SURNAMES
+from .codec import get_codec
 from .dbconst import (PERSON_KEY, FAMILY_KEY, EVENT_KEY, 
                             MEDIA_KEY, PLACE_KEY, REPOSITORY_KEY)
 from gramps.gui.dialog import (InfoDialog)
 
+def gramps_upgrade_18(self):
+    """Upgrade database from version 17 to 18.
+       1. The records of the primary tables and of the reference map are
+          re-encoded with the record codec set in the preferences, and the
+          name of the codec is stored in the metadata.
+    """
+    codec = get_codec(config.get('database.codec'))
+    tables = [self.person_map, self.family_map, self.event_map,
+              self.place_map, self.source_map, self.citation_map,
+              self.media_map, self.repository_map, self.note_map,
+              self.tag_map, self.reference_map]
+    self.set_total(sum(len(table) for table in tables))
+
+    for table in tables:
+        if table.codec is codec:
+            for index in range(len(table)):
+                self.update()
+            continue
+        for key in table.keys():
+            data = table[key]
+            with BSDDBTxn(self.env, table.db) as txn:
+                txn.put(key, codec.dumps(data))
+            self.update()
+        table.codec = codec
+    self.codec = codec
+
+    # Bump up database version. Separate transaction to save metadata.
+    with BSDDBTxn(self.env, self.metadata) as txn:
+        txn.put(b'codec', codec.name)
+        txn.put(b'version', 18)
+
 def gramps_upgrade_17(self):
     """Upgrade database from version 16 to 17. 
        1. This upgrade adds tags to event, place, repository, source and 
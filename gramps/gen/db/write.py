@@ -39,9 +39,11 @@ if sys.version_info[0] < 3:
 else:
     import pickle
 import os
+import shutil
 import time
 import bisect
 from functools import wraps
+from collections import defaultdict
 import logging
 from sys import maxsize, getfilesystemencoding, version_info
 
@@ -73,8 +75,13 @@ from . import (DbBsddbRead, DbWriteBase, BSDDBTxn,
                     DbTxn, BsddbBaseCursor, BsddbDowngradeError, DbVersionError,
                     DbEnvironmentError, DbUpgradeRequiredError, find_surname,
                     find_byte_surname, find_surname_name, DbUndoBSDDB as DbUndo,
-                    exceptions)
+                    find_byte_sortname, sortname_fingerprint, find_event_date,
+                    find_place_position, find_change, CHANGE_INDEX_NAMES,
+                    TABLE_MAP_NAMES, exceptions)
 from .dbconst import *
+from .codec import DbCodecShelf, get_codec
+from .idalloc import IdAllocator
+from .snapshot import DbSnapshot, copy_tree_files, make_snapshot_dir
 from ..utils.callback import Callback
 from ..utils.cast import conv_dbstr_to_unicode
 from ..updatecallback import UpdateCallback
@@ -86,7 +93,7 @@ _ = glocale.translation.gettext
 _LOG = logging.getLogger(DBLOGNAME)
 LOG = logging.getLogger(".citation")
 _MINVERSION = 9
-_DBVERSION = 17
+_DBVERSION = 18
 
 IDTRANS     = "person_id"
 FIDTRANS    = "family_id"
@@ -99,6 +106,9 @@ SIDTRANS    = "source_id"
 CIDTRANS    = "citation_id"
 TAGTRANS    = "tag_name"
 SURNAMES    = "surnames"
+SORTNAMES   = "sortnames"
+EVENTDATES  = "event_dates"
+PLACEGRID   = "place_grid"
 NAME_GROUP  = "name_group"
 META        = "meta_data"
 
@@ -120,6 +130,10 @@ REF_REF     = "referenced_map"
 DBERRS      = (db.DBRunRecoveryError, db.DBAccessError, 
                db.DBPageNotFoundError, db.DBInvalidArgError)
 
+# Number of reference map changes written per BSDDB transaction at the end
+# of a bulk load
+_BULK_CHUNK = 10000
+
 # The following two dictionaries provide fast translation
 # between the primary class names and the keys used to reference
 # these classes in the database tables. Beware that changing
@@ -197,6 +211,168 @@ def find_referenced_handle(key, data):
         val = val.encode('utf-8')
     return val
 
+def page_fill(table):
+    """
+    Return the fraction of the space of the pages of a table that holds
+    data, or None if the table has no pages.
+    """
+    stat = table.stat()
+    pages = sum(stat.get(count, 0) for (count, free) in _PAGE_STATS)
+    if not pages:
+        return None
+    free = sum(stat.get(free, 0) for (count, free) in _PAGE_STATS)
+    return 1.0 - float(free) / (pages * stat['pagesize'])
+
+def tuned_cache_size(dirpath):
+    """
+    Return the size of the environment cache for the family tree in
+    dirpath: the size of its tables, within DBCACHE and DBCACHE_MAX.
+    """
+    size = 0
+    for name in os.listdir(dirpath):
+        if name.endswith(DBEXT) and name != DBUNDOFN:
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return min(max(size, DBCACHE), DBCACHE_MAX)
+
+#-------------------------------------------------------------------------
+#
+# Attributes set up on first access
+#
+#-------------------------------------------------------------------------
+
+# Main tables of the database, as (attribute, table name, type) tuples
+_PRIMARY_MAPS = [
+    ("family_map",     FAMILY_TBL,  db.DB_HASH),
+    ("place_map",      PLACES_TBL,  db.DB_HASH),
+    ("source_map",     SOURCES_TBL, db.DB_HASH),
+    ("citation_map",   CITATIONS_TBL, db.DB_HASH),
+    ("media_map",      MEDIA_TBL,   db.DB_HASH),
+    ("event_map",      EVENTS_TBL,  db.DB_HASH),
+    ("person_map",     PERSON_TBL,  db.DB_HASH),
+    ("repository_map", REPO_TBL,    db.DB_HASH),
+    ("note_map",       NOTE_TBL,    db.DB_HASH),
+    ("tag_map",        TAG_TBL,     db.DB_HASH),
+    ("reference_map",  REF_MAP,     db.DB_BTREE),
+    ]
+
+# Page counts and free bytes of the table statistics of BSDDB, for the
+# B-tree and the hash access methods
+_PAGE_STATS = [
+    ('leaf_pg', 'leaf_pgfree'),
+    ('int_pg', 'int_pgfree'),
+    ('over_pg', 'over_pgfree'),
+    ('dup_pg', 'dup_pgfree'),
+    ('buckets', 'bfree'),
+    ('bigpages', 'big_bfree'),
+    ('overflows', 'ovfl_free'),
+    ('dup', 'dup_free'),
+    ]
+
+# Secondary index tables, keyed by the name of their primary table, as
+# (attribute, table name, type, flags, key function, optional) tuples.
+# Optional indices may be missing from read-only trees created before they
+# were introduced. 'Reference' stands for the reference map.
+_SECONDARY_INDICES = {
+    'Person': [
+        ("id_trans", IDTRANS, db.DB_HASH, 0, find_idmap, False),
+        ("surnames", SURNAMES, db.DB_BTREE, db.DB_DUPSORT,
+            find_byte_surname, False),
+        ("sortnames", SORTNAMES, db.DB_BTREE, db.DB_DUPSORT,
+            find_byte_sortname, True),
+        ],
+    'Family': [("fid_trans", FIDTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Source': [("sid_trans", SIDTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Citation': [("cid_trans", CIDTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Event': [
+        ("eid_trans", EIDTRANS, db.DB_HASH, 0, find_idmap, False),
+        ("event_dates", EVENTDATES, db.DB_BTREE, db.DB_DUPSORT,
+            find_event_date, True),
+        ],
+    'Media': [("oid_trans", OIDTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Place': [
+        ("pid_trans", PIDTRANS, db.DB_HASH, 0, find_idmap, False),
+        ("place_grid", PLACEGRID, db.DB_BTREE, db.DB_DUPSORT,
+            find_place_position, True),
+        ],
+    'Repository': [("rid_trans", RIDTRANS, db.DB_HASH, 0, find_idmap,
+                    False)],
+    'Note': [("nid_trans", NIDTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Tag': [("tag_trans", TAGTRANS, db.DB_HASH, 0, find_idmap, False)],
+    'Reference': [
+        ("reference_map_primary_map", REF_PRI, db.DB_BTREE, 0,
+            find_primary_handle, False),
+        ("reference_map_referenced_map", REF_REF, db.DB_BTREE,
+            db.DB_DUPSORT, find_referenced_handle, False),
+        ],
+    }
+
+# Attributes holding the number of records of the primary tables, the
+# starting point of the search for a free GRAMPS ID
+_MAP_INDEX_NAMES = {
+    'Person':     'pmap_index',
+    'Family':     'fmap_index',
+    'Source':     'smap_index',
+    'Citation':   'cmap_index',
+    'Event':      'emap_index',
+    'Media':      'omap_index',
+    'Place':      'lmap_index',
+    'Repository': 'rmap_index',
+    'Note':       'nmap_index',
+    }
+
+# Attributes holding the custom type values, with their metadata keys
+_CUSTOM_TYPE_KEYS = [
+    ('family_event_names',    b'fevent_names'),
+    ('individual_event_names', b'pevent_names'),
+    ('family_attributes',     b'fattr_names'),
+    ('individual_attributes', b'pattr_names'),
+    ('source_attributes',     b'sattr_names'),
+    ('marker_names',          b'marker_names'),
+    ('child_ref_types',       b'child_refs'),
+    ('family_rel_types',      b'family_rels'),
+    ('event_role_names',      b'event_roles'),
+    ('name_types',            b'name_types'),
+    ('origin_types',          b'origin_types'),
+    ('repository_types',      b'repo_types'),
+    ('note_types',            b'note_types'),
+    ('source_media_types',    b'sm_types'),
+    ('url_types',             b'url_types'),
+    ('media_attributes',      b'mattr_names'),
+    ]
+
+# Attributes of DbBsddb that are set up on first access, by group: the
+# secondary indices and record count of each table, the undo database and
+# the metadata that is not needed to show the first view
+_LAZY_ATTRIBUTES = dict((table, [index[0] for index in indices])
+                        for table, indices in _SECONDARY_INDICES.items())
+for _table, _name in _MAP_INDEX_NAMES.items():
+    _LAZY_ATTRIBUTES[_table].append(_name)
+_LAZY_ATTRIBUTES['Undo'] = ['undodb']
+_LAZY_ATTRIBUTES['Metadata'] = (['surname_list'] +
+                                [name for (name, key) in _CUSTOM_TYPE_KEYS])
+
+class LazyAttribute(object):
+    """
+    Attribute of DbBsddb whose group is opened or loaded by the database on
+    the first access after a tree is loaded. Assigned values are kept like
+    those of a plain attribute.
+    """
+    def __init__(self, name, group):
+        self.name = name
+        self.group = group
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            obj._open_lazy(self.group)
+            return obj.__dict__[self.name]
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
 #-------------------------------------------------------------------------
 #
 # BsddbWriteCursor
@@ -205,7 +381,7 @@ def find_referenced_handle(key, data):
 class BsddbWriteCursor(BsddbBaseCursor):
 
     def __init__(self, source, txn=None, **kwargs):
-        BsddbBaseCursor.__init__(self, txn=txn, **kwargs)
+        BsddbBaseCursor.__init__(self, txn=txn, codec=source.codec, **kwargs)
         self.cursor = source.db.cursor(txn)
         self.source = source
 
@@ -263,12 +439,18 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         """Create a new GrampsDB."""
         
         self.txn = None
+        self.transaction = None
         DbBsddbRead.__init__(self)
         DbWriteBase.__init__(self)
         #UpdateCallback.__init__(self)
         self.secondary_connected = False
+        # groups of attributes set up on first access, see LazyAttribute
+        self.__lazy_groups = set()
         self.has_changed = False
         self.brief_name = None
+        # handles written and removed during a bulk load, None otherwise
+        self.__bulk_commits = None
+        self.__bulk_removes = None
         self.update_env_version = False
         self.update_python_version = False
 
@@ -299,8 +481,12 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             dbmap.open(fname, table_name, dbtype, DBFLAGS_O, DBMODE)
         return dbmap
 
-    def __open_shelf(self, file_name, table_name, dbtype=db.DB_HASH):
-        dbmap = dbshelve.DBShelf(self.env)
+    def __open_shelf(self, file_name, table_name, dbtype=db.DB_HASH,
+                     codec=None):
+        if codec is None:
+            dbmap = dbshelve.DBShelf(self.env)
+        else:
+            dbmap = DbCodecShelf(self.env, codec)
 
         fname = os.path.join(file_name, table_name + DBEXT)
 
@@ -328,12 +514,14 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
     # capability
 
     @catch_db_error
-    def get_cursor(self, table, txn=None, update=False, commit=False):
+    def get_cursor(self, table, txn=None, update=False, commit=False,
+                   buffered=False):
         """ Helper function to return a cursor over a table """
         if update and not txn:
             txn = self.env.txn_begin(self.txn)
         return BsddbWriteCursor(table, txn=txn or self.txn,
-                                    update=update, commit=commit)
+                                    update=update, commit=commit,
+                                    buffered=buffered)
 
     # cursors for lookups in the reference_map for back reference
     # lookups. The reference_map has three indexes:
@@ -347,7 +535,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         """
         Returns a reference to a cursor over the reference map
         """
-        return DbBsddbAssocCursor(self.reference_map, self.txn)
+        return DbBsddbAssocCursor(self.reference_map.db, self.txn,
+                                  codec=self.reference_map.codec)
 
     @catch_db_error
     def get_reference_map_primary_cursor(self):
@@ -355,7 +544,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         Returns a reference to a cursor over the reference map primary map
         """
         return DbBsddbAssocCursor(self.reference_map_primary_map, 
-                                        self.txn)
+                                        self.txn,
+                                        codec=self.reference_map.codec)
 
     @catch_db_error
     def get_reference_map_referenced_cursor(self):
@@ -363,7 +553,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         Returns a reference to a cursor over the reference map referenced map
         """
         return DbBsddbAssocCursor(self.reference_map_referenced_map, 
-                                        self.txn)
+                                        self.txn,
+                                        codec=self.reference_map.codec)
 
     # These are overriding the DbBsddbRead's methods of saving metadata
     # because we now have txn-capable metadata table
@@ -399,6 +590,15 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             with BSDDBTxn(self.env, self.metadata) as txn:
                 txn.put(b'mediapath', path)            
 
+    def set_check_time(self, timestamp):
+        """
+        Set the time of the last run of Check and Repair that found no
+        problem.
+        """
+        if self.metadata and not self.readonly:
+            with BSDDBTxn(self.env, self.metadata) as txn:
+                txn.put(b'check_time', timestamp)
+
     def __make_zip_backup(self, dirname):
         import zipfile
         title = self.get_dbname()
@@ -577,6 +777,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             self.close()
 
         self.readonly = mode == DBMODE_R
+        self.cache.clear()
+        self.cache.set_capacity(config.get('database.cache-size'))
         #super(DbBsddbRead, self).load(name, callback, mode)
         if callback:
             callback(12)
@@ -595,9 +797,9 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         
         self.__check_python_version(name, force_python_upgrade)
 
-        # Set up database environment
+        # Set up database environment, with a cache that holds the tables
         self.env = db.DBEnv()
-        self.env.set_cachesize(0, DBCACHE)
+        self.env.set_cachesize(0, tuned_cache_size(name))
 
         # These env settings are only needed for Txn environment
         self.env.set_lk_max_locks(DBLOCKS)
@@ -660,6 +862,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                     # New database. Set up the current version.
                     #self.metadata.put(b'version', _DBVERSION, txn=the_txn)
                     txn.put(b'version', _DBVERSION)
+                    txn.put(b'codec', config.get('database.codec'))
                 elif b'version' not in self.metadata:
                     # Not new database, but the version is missing.
                     # Use 0, but it is likely to fail anyway.
@@ -667,24 +870,19 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             
         self.genderStats = GenderStats(gstats)
 
-        # Open main tables in gramps database
-        db_maps = [
-                    ("family_map",     FAMILY_TBL,  db.DB_HASH),
-                    ("place_map",      PLACES_TBL,  db.DB_HASH),
-                    ("source_map",     SOURCES_TBL, db.DB_HASH),
-                    ("citation_map",   CITATIONS_TBL, db.DB_HASH),
-                    ("media_map",      MEDIA_TBL,   db.DB_HASH),
-                    ("event_map",      EVENTS_TBL,  db.DB_HASH),
-                    ("person_map",     PERSON_TBL,  db.DB_HASH),
-                    ("repository_map", REPO_TBL,    db.DB_HASH),
-                    ("note_map",       NOTE_TBL,    db.DB_HASH),
-                    ("tag_map",        TAG_TBL,     db.DB_HASH),
-                    ("reference_map",  REF_MAP,     db.DB_BTREE),
-                  ]
+        # Trees written before the record codecs were introduced are pickled
+        try:
+            self.codec = get_codec(self.metadata.get(b'codec',
+                                                     default='pickle'))
+        except exceptions.DbException:
+            self.__close_early()
+            raise
 
+        # Open main tables in gramps database
         dbflags = DBFLAGS_R if self.readonly else DBFLAGS_O
-        for (dbmap, dbname, dbtype) in db_maps:
-            _db = self.__open_shelf(self.full_name, dbname, dbtype)
+        for (dbmap, dbname, dbtype) in _PRIMARY_MAPS:
+            _db = self.__open_shelf(self.full_name, dbname, dbtype,
+                                    self.codec)
             setattr(self, dbmap, _db)
 
         if callback:
@@ -736,23 +934,77 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if callback:
             callback(50)
 
-        # Connect secondary indices
+        # Connect the secondary indices of each table on its first access
         if not self.secondary_connected:
-            self.__connect_secondary()
+            self.change_indices = {}
+            for table in _SECONDARY_INDICES:
+                self.__defer(table)
+            self.secondary_connected = True
 
         if callback:
             callback(75)
 
-        # Open undo database
-        self.__open_undodb()
+        # Open undo database on the first access
+        if not self.readonly:
+            self.__defer('Undo')
         self.db_is_open = True
 
+        if not self.readonly and self.metadata.get(b'bulk_load', default=False):
+            # An import stopped before it could complete the reference map
+            _LOG.warning("Rebuilding the reference map after an interrupted "
+                         "bulk load")
+            self.reindex_reference_map(lambda percent: None)
+
         if callback:
             callback(87)
         
         self.abort_possible = True
         return 1
 
+    def __defer(self, group):
+        """
+        Have the attributes of group, see _LAZY_ATTRIBUTES, set up on their
+        first access instead of now.
+        """
+        for name in _LAZY_ATTRIBUTES[group]:
+            self.__dict__.pop(name, None)
+        self.__lazy_groups.add(group)
+
+    def _open_lazy(self, group):
+        """
+        Set up the attributes of group, which were deferred when the tree
+        was loaded: connect the secondary indices of a table, open the undo
+        database or load the custom types and the surname list.
+        """
+        if group not in self.__lazy_groups:
+            raise AttributeError(group)
+        self.__lazy_groups.discard(group)
+        if group == 'Undo':
+            self.__open_undodb()
+        elif group == 'Metadata':
+            self.__load_deferred_metadata()
+        else:
+            self.__connect_table(group)
+
+    def __connect_pending(self):
+        """
+        Connect the secondary indices that have not been accessed yet, so
+        that they follow the writes to their primary tables.
+        """
+        for table in _SECONDARY_INDICES:
+            if table in self.__lazy_groups:
+                self._open_lazy(table)
+
+    def __forget_lazy(self):
+        """
+        Drop the groups of attributes that were never set up, when the tree
+        is closed.
+        """
+        for group in self.__lazy_groups:
+            for name in _LAZY_ATTRIBUTES[group]:
+                setattr(self, name, set() if group == 'Metadata' else None)
+        self.__lazy_groups = set()
+
     def __open_undodb(self):
         """
         Open the undo database
@@ -763,7 +1015,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             self.undodb.open()
 
     def __close_undodb(self):
-        if not self.readonly:
+        if not self.readonly and 'Undo' not in self.__lazy_groups:
             try:
                 self.undodb.close()
             except db.DBNoSuchFileError:
@@ -796,14 +1048,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             pass
         
         # bookmarks
-        def meta(key):
-            try:
-                return self.metadata.get(key, default=[])
-            except UnicodeDecodeError:
-                #we need to assume we opened data in python3 saved in python2
-                raw = self.metadata.db.get(key, default=[])
-                return pickle.loads(raw, encoding='utf-8') if raw else raw
-        
+        meta = self.__get_list_metadata
         self.bookmarks.set(meta(b'bookmarks'))
         self.family_bookmarks.set(meta(b'family_bookmarks'))
         self.event_bookmarks.set(meta(b'event_bookmarks'))
@@ -814,30 +1059,37 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.place_bookmarks.set(meta(b'place_bookmarks'))
         self.note_bookmarks.set(meta(b'note_bookmarks'))
 
+        # custom type values and surname list, loaded on first access
+        self.__defer('Metadata')
+
+        # locale and name formats the person sort name index was built with
+        self.sortname_fingerprint = self.metadata.get(b'sortname_fingerprint',
+                                                      default=None)
+
+        # maps of the used GRAMPS ID numbers
+        self.id_allocator_states = self.metadata.get(b'id_allocators',
+                                                     default={})
+        self.id_allocators = {}
+
+    def __get_list_metadata(self, key):
+        try:
+            return self.metadata.get(key, default=[])
+        except UnicodeDecodeError:
+            #we need to assume we opened data in python3 saved in python2
+            raw = self.metadata.db.get(key, default=[])
+            return pickle.loads(raw, encoding='utf-8') if raw else raw
+
+    def __load_deferred_metadata(self):
         # Custom type values
-        self.family_event_names = set(meta(b'fevent_names'))
-        self.individual_event_names = set(meta(b'pevent_names'))
-        self.family_attributes = set(meta(b'fattr_names'))
-        self.individual_attributes = set(meta(b'pattr_names'))
-        self.source_attributes = set(meta(b'sattr_names'))
-        self.marker_names = set(meta(b'marker_names'))
-        self.child_ref_types = set(meta(b'child_refs'))
-        self.family_rel_types = set(meta(b'family_rels'))
-        self.event_role_names = set(meta(b'event_roles'))
-        self.name_types = set(meta(b'name_types'))
-        self.origin_types = set(meta(b'origin_types'))
-        self.repository_types = set(meta(b'repo_types'))
-        self.note_types = set(meta(b'note_types'))
-        self.source_media_types = set(meta(b'sm_types'))
-        self.url_types = set(meta(b'url_types'))
-        self.media_attributes = set(meta(b'mattr_names'))
+        for (name, key) in _CUSTOM_TYPE_KEYS:
+            setattr(self, name, set(self.__get_list_metadata(key)))
 
         # surname list
-        self.surname_list = meta(b'surname_list')
+        self.surname_list = self.__get_list_metadata(b'surname_list')
 
     def __connect_secondary(self):
         """
-        Connect or creates secondary index tables.
+        Connect or creates the secondary index tables of all tables.
         
         It assumes that the tables either exist and are in the right
         format or do not exist (in which case they get created).
@@ -845,65 +1097,69 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         It is the responsibility of upgrade code to either create
         or remove invalid secondary index tables.
         """
-        
-        # index tables used just for speeding up searches
-        self.surnames = self.__open_db(self.full_name, SURNAMES, db.DB_BTREE,
-                            db.DB_DUP | db.DB_DUPSORT)
+        self.change_indices = {}
+        for table in _SECONDARY_INDICES:
+            self.__lazy_groups.discard(table)
+            self.__connect_table(table)
+        self.secondary_connected = True
 
-        db_maps = [
-            ("id_trans",  IDTRANS,  db.DB_HASH, 0),
-            ("fid_trans", FIDTRANS, db.DB_HASH, 0),
-            ("eid_trans", EIDTRANS, db.DB_HASH, 0),
-            ("pid_trans", PIDTRANS, db.DB_HASH, 0),
-            ("sid_trans", SIDTRANS, db.DB_HASH, 0),
-            ("cid_trans", CIDTRANS, db.DB_HASH, 0),
-            ("oid_trans", OIDTRANS, db.DB_HASH, 0),
-            ("rid_trans", RIDTRANS, db.DB_HASH, 0),
-            ("nid_trans", NIDTRANS, db.DB_HASH, 0),
-            ("tag_trans", TAGTRANS, db.DB_HASH, 0),
-            ("reference_map_primary_map",    REF_PRI, db.DB_BTREE, 0),
-            ("reference_map_referenced_map", REF_REF, db.DB_BTREE, db.DB_DUPSORT),            
-            ]
+    def __connect_table(self, table):
+        """
+        Connect or create the secondary index tables of table, a primary
+        table name or 'Reference' for the reference map, and count its
+        records.
+        """
+        if table == 'Reference':
+            primary = self.reference_map
+        else:
+            primary = getattr(self, TABLE_MAP_NAMES[table])
+        flags = DBFLAGS_R if self.readonly else DBFLAGS_O
 
-        for (dbmap, dbname, dbtype, dbflags) in db_maps:
-            _db = self.__open_db(self.full_name, dbname, dbtype,
-                db.DB_DUP | dbflags)
+        # index tables used just for speeding up searches
+        for (dbmap, dbname, dbtype, dbflags, a_find,
+                optional) in _SECONDARY_INDICES[table]:
+            try:
+                _db = self.__open_db(self.full_name, dbname, dbtype,
+                                     db.DB_DUP | dbflags)
+            except db.DBNoSuchFileError:
+                if not optional:
+                    raise
+                # a readonly database created before the index existed
+                _db = None
+            if _db is not None and not self.readonly:
+                primary.associate(_db, a_find, flags=flags)
             setattr(self, dbmap, _db)
 
-        if not self.readonly:
+        if table in CHANGE_INDEX_NAMES:
+            try:
+                _db = self.__open_db(self.full_name,
+                    CHANGE_INDEX_NAMES[table], db.DB_BTREE,
+                    db.DB_DUP | db.DB_DUPSORT)
+            except db.DBNoSuchFileError:
+                _db = None
+            if _db is not None and not self.readonly:
+                class_name = self._tables[table]["class_func"].__name__
+                primary.associate(_db, find_change(class_name), flags=flags)
+            self.change_indices[table] = _db
 
-            assoc = [
-                (self.person_map, self.surnames,  find_byte_surname),
-                (self.person_map, self.id_trans,  find_idmap),
-                (self.family_map, self.fid_trans, find_idmap),
-                (self.event_map,  self.eid_trans, find_idmap),
-                (self.place_map,  self.pid_trans, find_idmap),
-                (self.source_map, self.sid_trans, find_idmap),
-                (self.citation_map, self.cid_trans, find_idmap),
-                (self.media_map,  self.oid_trans, find_idmap),
-                (self.repository_map, self.rid_trans, find_idmap),
-                (self.note_map,   self.nid_trans, find_idmap),
-                (self.tag_map,    self.tag_trans, find_idmap),
-                (self.reference_map, self.reference_map_primary_map,
-                    find_primary_handle),
-                (self.reference_map, self.reference_map_referenced_map,
-                    find_referenced_handle),
-                ]
-
-            flags = DBFLAGS_R if self.readonly else DBFLAGS_O
-            for (dbmap, a_map, a_find) in assoc:
-                dbmap.associate(a_map, a_find, flags=flags)
+        if table == 'Person' and not self.readonly:
+            # A new sort name index was filled by the association above
+            if self.sortname_fingerprint is None:
+                self.sortname_fingerprint = sortname_fingerprint()
 
-        self.secondary_connected = True
-        self.smap_index = len(self.source_map)
-        self.cmap_index = len(self.citation_map)
-        self.emap_index = len(self.event_map)
-        self.pmap_index = len(self.person_map)
-        self.fmap_index = len(self.family_map)
-        self.lmap_index = len(self.place_map)
-        self.omap_index = len(self.media_map)
-        self.rmap_index = len(self.repository_map)
-        self.nmap_index = len(self.note_map)
+        if table in _MAP_INDEX_NAMES:
+            setattr(self, _MAP_INDEX_NAMES[table], len(primary))
+
+    def __connected_indices(self):
+        """
+        Return the secondary index tables that are open.
+        """
+        indices = [getattr(self, index[0])
+                   for (table, table_indices) in _SECONDARY_INDICES.items()
+                   if table not in self.__lazy_groups
+                   for index in table_indices]
+        indices.extend(self.change_indices.values())
+        return [a_map for a_map in indices if a_map is not None]
 
     @catch_db_error
     def rebuild_secondary(self, callback=None):
@@ -913,25 +1169,15 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         table_flags = DBFLAGS_O
 
         # remove existing secondary indices
+        for database in self.__connected_indices():
+            database.close()
 
-        items = [
-            ( self.id_trans,  IDTRANS ),
-            ( self.surnames,  SURNAMES ),
-            ( self.fid_trans, FIDTRANS ),
-            ( self.pid_trans, PIDTRANS ),
-            ( self.oid_trans, OIDTRANS ),
-            ( self.eid_trans, EIDTRANS ),
-            ( self.rid_trans, RIDTRANS ),
-            ( self.nid_trans, NIDTRANS ),
-            ( self.cid_trans, CIDTRANS ),
-            ( self.tag_trans, TAGTRANS ),
-            ( self.reference_map_primary_map, REF_PRI),
-            ( self.reference_map_referenced_map, REF_REF),
-            ]
+        names = [index[1] for indices in _SECONDARY_INDICES.values()
+                 for index in indices]
+        names.extend(CHANGE_INDEX_NAMES.values())
 
         index = 1
-        for (database, name) in items:
-            database.close()
+        for name in names:
             _db = db.DB(self.env)
             try:
                 _db.remove(_mkname(self.full_name, name), name)
@@ -944,13 +1190,133 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if callback:
             callback(11)
 
+        # Fill the indices whose keys only depend on the records; the
+        # association done by the creating routine keeps filled indices
+        # and only fills the empty ones
+        self.__fill_secondary()
+
         # Set flag saying that we have removed secondary indices
         # and then call the creating routine
         self.secondary_connected = False
+        self.sortname_fingerprint = None
         self.__connect_secondary()
         if callback:
             callback(12)
 
+    @catch_db_error
+    def compact(self, callback=None):
+        """
+        Compact the tables, the secondary indices and the reference map,
+        giving their free pages back to the file system.
+
+        Return a list of (file name, fill before, fill after, size before,
+        size after) tuples, see DbWriteBase.compact. The environment cache
+        is sized from the compacted tables when the tree is loaded again,
+        see tuned_cache_size.
+        """
+        if self.readonly:
+            return []
+
+        self.__connect_pending()
+        tables = [(dbname, getattr(self, dbmap))
+                  for (dbmap, dbname, dbtype) in _PRIMARY_MAPS]
+        tables.extend((index[1], getattr(self, index[0]))
+                      for indices in _SECONDARY_INDICES.values()
+                      for index in indices)
+        tables.extend((CHANGE_INDEX_NAMES[table], a_map)
+                      for (table, a_map) in self.change_indices.items())
+        tables.append((NAME_GROUP, self.name_group))
+        tables = [(dbname, table) for (dbname, table) in tables
+                  if table is not None]
+
+        results = []
+        for index, (dbname, table) in enumerate(tables):
+            path = _mkname(self.full_name, dbname)
+            size = os.path.getsize(path)
+            fill = page_fill(table)
+            try:
+                # without a transaction, BSDDB compacts in many small ones
+                table.compact(flags=db.DB_FREE_SPACE)
+            except db.DBInvalidArgError:
+                # the access method cannot be compacted by this BSDDB version
+                _LOG.debug("Table %s not compacted" % dbname)
+            table.sync()
+            results.append((dbname + DBEXT, fill, page_fill(table), size,
+                            os.path.getsize(path)))
+            if callback:
+                callback(100 * (index + 1) // len(tables))
+        self.env.txn_checkpoint()
+        return results
+
+    @catch_db_error
+    def rebuild_sortname_index(self):
+        """
+        Rebuild the person sort name index for the current collation and
+        name formats.
+
+        This is done automatically by the sorted person accessors when the
+        locale or the name formats have changed since the index was built.
+        """
+        if (self.readonly or self.sortnames is None or
+                self.transaction is not None):
+            return
+
+        self.sortnames.close()
+        _db = db.DB(self.env)
+        try:
+            _db.remove(_mkname(self.full_name, SORTNAMES), SORTNAMES)
+        except db.DBNoSuchFileError:
+            pass
+
+        self.sortnames = self.__open_db(self.full_name, SORTNAMES,
+                                        db.DB_BTREE, db.DB_DUP | db.DB_DUPSORT)
+        self.person_map.associate(self.sortnames, find_byte_sortname,
+                                  DBFLAGS_O)
+        self.sortname_fingerprint = sortname_fingerprint()
+
+    def __fill_secondary(self):
+        """
+        Fill the empty gramps ID, surname, event date and place position
+        indices, computing their keys in worker processes.
+        """
+        from .rebuild import index_rows, iter_chunks, map_tasks
+        indices = [
+            (self.person_map, IDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.family_map, FIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.event_map, EIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.place_map, PIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.source_map, SIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.citation_map, CIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.media_map, OIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.repository_map, RIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.note_map, NIDTRANS, db.DB_HASH, 0, find_idmap),
+            (self.tag_map, TAGTRANS, db.DB_HASH, 0, find_idmap),
+            (self.person_map, SURNAMES, db.DB_BTREE, db.DB_DUPSORT,
+                find_byte_surname),
+            (self.event_map, EVENTDATES, db.DB_BTREE, db.DB_DUPSORT,
+                find_event_date),
+            (self.place_map, PLACEGRID, db.DB_BTREE, db.DB_DUPSORT,
+                find_place_position),
+            ]
+
+        for (data_map, dbname, dbtype, dbflags, key_func) in indices:
+            _db = self.__open_db(self.full_name, dbname, dbtype,
+                                 db.DB_DUP | dbflags)
+            tasks = ((self.codec.name, key_func, records)
+                     for records in iter_chunks(data_map))
+            for rows in map_tasks(index_rows, tasks):
+                if rows:
+                    with BSDDBTxn(self.env, _db) as txn:
+                        for key, handle in rows:
+                            txn.put(key, handle)
+            _db.close()
+
+    def iter_changed_since(self, table, timestamp):
+        # the change time index is connected with the rest of the table
+        if table in self.__lazy_groups:
+            self._open_lazy(table)
+        return DbBsddbRead.iter_changed_since(self, table, timestamp)
+
     @catch_db_error
     def find_backlink_handles(self, handle, include_classes=None):
         """
@@ -995,7 +1361,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             if self.readonly:
                 data = self.reference_map.get(data)
             else:
-                data = pickle.loads(data)
+                data = self.reference_map.codec.loads(data)
 
             key, handle = data[0][:2]
             name = KEY_TO_CLASS_MAP[key]
@@ -1009,11 +1375,36 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
 
         referenced_cur.close()
 
+    @catch_db_error
+    def get_reference_count(self, handle):
+        """
+        Return the number of references to the object with the given handle.
+
+        The referenced map holds one duplicate entry for every object
+        referring to handle, so the count is read from the index without
+        fetching or decoding the references.
+        """
+        if isinstance(handle, UNITYPE):
+            handle = handle.encode('utf-8')
+        cursor = self.reference_map_referenced_map.cursor(self.txn)
+        try:
+            if cursor.set(handle) is None:
+                return 0
+            return cursor.count()
+        except db.DBNotFoundError:
+            return 0
+        finally:
+            cursor.close()
+
     def delete_primary_from_reference_map(self, handle, transaction, txn=None):
         """
         Remove all references to the primary object from the reference_map.
         handle should be utf-8
         """
+        if self.__bulk_removes is not None:
+            self.__bulk_removes.add(handle)
+            return
+
         primary_cur = self.get_reference_map_primary_cursor()
 
         try:
@@ -1033,10 +1424,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             # combine with the primary_handle to get the main key.
             if sys.version_info[0] < 3:
                 #handle should be in python 2 str
-                main_key = (handle, pickle.loads(data)[1][1])
+                main_key = (handle, self.reference_map.codec.loads(data)[1][1])
             else:
                 #python 3 work internally with unicode
-                main_key = (handle.decode('utf-8'), pickle.loads(data)[1][1])
+                main_key = (handle.decode('utf-8'),
+                            self.reference_map.codec.loads(data)[1][1])
             
             # The trick is not to remove while inside the cursor,
             # but collect them all and remove after the cursor is closed
@@ -1054,7 +1446,13 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         """
         If txn is given, then changes are written right away using txn.
         """
-        
+        if self.__bulk_commits is not None:
+            handle = obj.handle
+            if isinstance(handle, UNITYPE):
+                handle = handle.encode('utf-8')
+            self.__bulk_commits[obj.__class__.__name__].add(handle)
+            return
+
         # Add references to the reference_map for all primary object referenced
         # from the primary object 'obj' or any of its secondary objects.
         handle = obj.handle
@@ -1074,9 +1472,9 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 # compare with what is returned from
                 # get_referenced_handles_recursively
 
-                # secondary DBs are not DBShelf's, so we need to do pickling
-                # and unpickling ourselves here
-            existing_reference = pickle.loads(data)[1]
+                # secondary DBs are not DBShelf's, so we need to do the
+                # decoding ourselves here
+            existing_reference = self.reference_map.codec.loads(data)[1]
             existing_references.add((KEY_TO_CLASS_MAP[existing_reference[0]],
                                      existing_reference[1]))
             ret = primary_cur.next_dup()
@@ -1171,7 +1569,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
 
         # Open reference_map and primary map
         self.reference_map  = self.__open_shelf(self.full_name, REF_MAP, 
-                                  dbtype=db.DB_BTREE)
+                                  dbtype=db.DB_BTREE, codec=self.codec)
         
         self.reference_map_primary_map = self.__open_db(self.full_name,
                                             REF_PRI, db.DB_BTREE, db.DB_DUP)
@@ -1179,38 +1577,34 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.reference_map.associate(self.reference_map_primary_map,
                                      find_primary_handle, DBFLAGS_O)
 
-        # Make a tuple of the functions and classes that we need for
-        # each of the primary object tables.
+        # The references are computed in worker processes and written in
+        # chunks sorted by key.
+        from .rebuild import reference_rows, iter_chunks, map_tasks
 
         with DbTxn(_("Rebuild reference map"), self, batch=True,
                                     no_magic=True) as transaction:
             callback(4)
 
             primary_table = (
-                            (self.get_person_cursor, Person),
-                            (self.get_family_cursor, Family),
-                            (self.get_event_cursor, Event),
-                            (self.get_place_cursor, Place),
-                            (self.get_source_cursor, Source),
-                            (self.get_citation_cursor, Citation),
-                            (self.get_media_cursor, MediaObject),
-                            (self.get_repository_cursor, Repository),
-                            (self.get_note_cursor, Note),
-                            (self.get_tag_cursor, Tag),
+                            (self.person_map, Person),
+                            (self.family_map, Family),
+                            (self.event_map, Event),
+                            (self.place_map, Place),
+                            (self.source_map, Source),
+                            (self.citation_map, Citation),
+                            (self.media_map, MediaObject),
+                            (self.repository_map, Repository),
+                            (self.note_map, Note),
+                            (self.tag_map, Tag),
                             )
-                         
-            # Now we use the functions and classes defined above
-            # to loop through each of the primary object tables.
-        
-            for cursor_func, class_func in primary_table:
+
+            for data_map, class_func in primary_table:
                 logging.info("Rebuilding %s reference map" %
                                 class_func.__name__)
-                with cursor_func() as cursor:
-                    for found_handle, val in cursor:
-                        obj = class_func()
-                        obj.unserialize(val)
-                        with BSDDBTxn(self.env) as txn:
-                            self.update_reference_map(obj, transaction, txn.txn)
+                tasks = ((self.codec.name, class_func.__name__, records)
+                         for records in iter_chunks(data_map))
+                for rows in map_tasks(reference_rows, tasks):
+                    self.__put_references(rows)
 
             callback(5)
 
@@ -1220,9 +1614,118 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         flags = DBFLAGS_R if self.readonly else DBFLAGS_O
         self.reference_map.associate(self.reference_map_referenced_map,
                                      find_referenced_handle, flags=flags)
+        self.__set_bulk_load_flag(False)
         callback(6)
 
+    def __set_bulk_load_flag(self, value):
+        """
+        Record in the metadata whether a bulk load is under way, so that an
+        interrupted one can be repaired when the database is opened again.
+        """
+        with BSDDBTxn(self.env, self.metadata) as txn:
+            txn.put(b'bulk_load', value)
+
+    def set_backup_full(self, value):
+        """
+        Record in the metadata whether the next backup must be a full one,
+        because records may have been stored with a change time older than
+        the last backup.
+        """
+        with BSDDBTxn(self.env, self.metadata) as txn:
+            txn.put(b'backup_full', value)
+
+    def __begin_bulk_load(self):
+        """
+        Start a bulk load: detach the indices that an import does not need
+        and defer the reference map maintenance to the end of the load.
+        """
+        self.__set_bulk_load_flag(True)
+        for dbmap, dbname in (("event_dates", EVENTDATES),
+                              ("place_grid", PLACEGRID)):
+            if getattr(self, dbmap) is not None:
+                getattr(self, dbmap).close()
+                setattr(self, dbmap, None)
+            _db = db.DB(self.env)
+            try:
+                _db.remove(_mkname(self.full_name, dbname), dbname)
+            except db.DBNoSuchFileError:
+                pass
+        self.__bulk_commits = defaultdict(set)
+        self.__bulk_removes = set()
+
+    def __end_bulk_load(self, transaction):
+        """
+        Complete a bulk load: bring the references of all objects written
+        or removed during the load up to date and create the detached
+        indices again, each in a single pass.
+        """
+        from .rebuild import object_references
+        commits, removes = self.__bulk_commits, self.__bulk_removes
+        self.__bulk_commits = self.__bulk_removes = None
+
+        # Drop the old references of the objects, which may have changed
+        handles = sorted(removes.union(*commits.values()))
+        for start in range(0, len(handles), _BULK_CHUNK):
+            with BSDDBTxn(self.env) as txn:
+                for handle in handles[start:start+_BULK_CHUNK]:
+                    self.delete_primary_from_reference_map(handle,
+                                                           transaction,
+                                                           txn=txn.txn)
+
+        # Write the current references, ordered by key
+        primary_tables = {
+            'Person': (self.person_map, Person),
+            'Family': (self.family_map, Family),
+            'Event': (self.event_map, Event),
+            'Place': (self.place_map, Place),
+            'Source': (self.source_map, Source),
+            'Citation': (self.citation_map, Citation),
+            'MediaObject': (self.media_map, MediaObject),
+            'Repository': (self.repository_map, Repository),
+            'Note': (self.note_map, Note),
+            'Tag': (self.tag_map, Tag),
+            }
+        references = []
+        for class_name in sorted(commits):
+            data_map, class_func = primary_tables[class_name]
+            for handle in sorted(commits[class_name]):
+                data = data_map.get(handle)
+                if data is None:
+                    # removed later in the load
+                    continue
+                obj = class_func()
+                obj.unserialize(data)
+                references.extend(object_references(obj))
+                if len(references) >= _BULK_CHUNK:
+                    self.__put_references(references)
+                    references = []
+        self.__put_references(references)
+
+        for dbmap, dbname, a_map, a_find in (
+                ("event_dates", EVENTDATES, self.event_map, find_event_date),
+                ("place_grid", PLACEGRID, self.place_map,
+                 find_place_position)):
+            _db = self.__open_db(self.full_name, dbname, db.DB_BTREE,
+                                 db.DB_DUP | db.DB_DUPSORT)
+            a_map.associate(_db, a_find, DBFLAGS_O)
+            setattr(self, dbmap, _db)
+        self.__set_bulk_load_flag(False)
+
+    def __put_references(self, references):
+        """
+        Write the (key, data) pairs of references to the reference map in a
+        single transaction.
+        """
+        if references:
+            with BSDDBTxn(self.env, self.reference_map) as txn:
+                for key, data in references:
+                    txn.put(key, data)
+
     def __close_metadata(self):
+        self.__save_metadata()
+        self.metadata.close()
+
+    def __save_metadata(self):
         if not self.readonly:
             # Start transaction
             with BSDDBTxn(self.env, self.metadata) as txn:
@@ -1248,28 +1751,21 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 # gender stats
                 txn.put(b'gender_stats', self.genderStats.save_stats())
 
-                # Custom type values
-                txn.put(b'fevent_names', list(self.family_event_names))
-                txn.put(b'pevent_names', list(self.individual_event_names))
-                txn.put(b'fattr_names', list(self.family_attributes))
-                txn.put(b'pattr_names', list(self.individual_attributes))
-                txn.put(b'sattr_names', list(self.source_attributes))
-                txn.put(b'marker_names', list(self.marker_names))
-                txn.put(b'child_refs', list(self.child_ref_types))
-                txn.put(b'family_rels', list(self.family_rel_types))
-                txn.put(b'event_roles', list(self.event_role_names))
-                txn.put(b'name_types', list(self.name_types))
-                txn.put(b'origin_types', list(self.origin_types))
-                txn.put(b'repo_types', list(self.repository_types))
-                txn.put(b'note_types', list(self.note_types))
-                txn.put(b'sm_types', list(self.source_media_types))
-                txn.put(b'url_types', list(self.url_types))
-                txn.put(b'mattr_names', list(self.media_attributes))
-
-                # name display formats
-                txn.put(b'surname_list', self.surname_list)
-
-        self.metadata.close()
+                # person sort name index, an empty value marks it as stale
+                txn.put(b'sortname_fingerprint', self.sortname_fingerprint or '')
+
+                # Custom type values and surname list, unchanged if they
+                # were never loaded
+                if 'Metadata' not in self.__lazy_groups:
+                    for (name, key) in _CUSTOM_TYPE_KEYS:
+                        txn.put(key, list(getattr(self, name)))
+                    txn.put(b'surname_list', self.surname_list)
+
+                # maps of the used GRAMPS ID numbers
+                states = dict(self.id_allocator_states)
+                for key, allocator in self.id_allocators.items():
+                    states[key] = (allocator.prefix, allocator.get_state())
+                txn.put(b'id_allocators', states)
     
     def __close_early(self):
         """
@@ -1283,29 +1779,51 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.env        = None
         self.db_is_open = False
     
+    @catch_db_error
+    def checkpoint(self):
+        """
+        Write the changes still held in the cache of the environment to the
+        table files, so that the files show every committed change.
+        """
+        if self.db_is_open and not self.readonly:
+            self.env.txn_checkpoint(0, 0, db.DB_FORCE)
+
+    @catch_db_error
+    def open_snapshot(self):
+        """
+        Return a DbSnapshot, a read-only copy of the database as it is now,
+        for use by a worker thread or process.
+
+        The database files are copied after a checkpoint, so this must not
+        be called while a transaction is in progress.
+        """
+        if self.transaction is not None:
+            raise exceptions.DbException(
+                    _("A snapshot cannot be taken during a transaction"))
+        self.__save_metadata()
+        self.env.txn_checkpoint(0, 0, db.DB_FORCE)
+        self.env.log_flush()
+        path = make_snapshot_dir()
+        try:
+            copy_tree_files(self.full_name, path)
+        except (IOError, OSError):
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        return DbSnapshot(path)
+
     @catch_db_error
     def close(self):
         if not self.db_is_open:
             return
         if self.txn:
             self.transaction_abort(self.transaction)
+        self.disable_statistics()
         self.env.txn_checkpoint()
 
         self.__close_metadata()
         self.name_group.close()
-        self.surnames.close()
-        self.id_trans.close()
-        self.fid_trans.close()
-        self.eid_trans.close()
-        self.rid_trans.close()
-        self.nid_trans.close()
-        self.oid_trans.close()
-        self.sid_trans.close()
-        self.cid_trans.close()
-        self.pid_trans.close()
-        self.tag_trans.close()
-        self.reference_map_primary_map.close()
-        self.reference_map_referenced_map.close()
+        for a_map in self.__connected_indices():
+            a_map.close()
         self.reference_map.close()
         self.secondary_connected = False
 
@@ -1323,6 +1841,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.tag_map.close()
         self.env.close()
         self.__close_undodb()
+        self.__forget_lazy()
 
         self.person_map     = None
         self.family_map     = None
@@ -1339,9 +1858,14 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.metadata       = None
         self.db_is_open     = False
         self.surname_list = None
+        self.cache.clear()
         
         DbBsddbRead.close(self)
         
+        self.sortnames = None
+        self.event_dates = None
+        self.place_grid = None
+        self.change_indices = {}
         self.person_map = None
         self.family_map = None
         self.repository_map = None
@@ -1509,6 +2033,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
 
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
+        self.cache.remove((KEY_TO_CLASS_MAP[key], handle))
         if transaction.batch:
             with BSDDBTxn(self.env, data_map) as txn:
                 self.delete_primary_from_reference_map(handle, transaction,
@@ -1520,6 +2045,22 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             old_data = data_map.get(handle, txn=self.txn)
             data_map.delete(handle, txn=self.txn)
             transaction.add(key, TXNDEL, handle, old_data, None)
+            if old_data and key != TAG_KEY:
+                self._release_gramps_id(key, old_data[1])
+
+    def _release_gramps_id(self, key, gramps_id):
+        """
+        Make the number of the GRAMPS ID of a removed object available again
+        to the find_next_<object>_gramps_id methods.
+        """
+        allocator = self.id_allocators.get(key)
+        if allocator is None:
+            state = self.id_allocator_states.get(key)
+            if state is None:
+                return
+            allocator = IdAllocator(*state)
+            self.id_allocators[key] = allocator
+        allocator.release(gramps_id)
 
     def remove_person(self, handle, transaction):
         """
@@ -1534,6 +2075,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         self.remove_from_surname_list(person)
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
+        self.cache.remove((Person.__name__, handle))
         if transaction.batch:
             with BSDDBTxn(self.env, self.person_map) as txn:            
                 self.delete_primary_from_reference_map(handle, transaction,
@@ -1716,6 +2258,7 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         handle = obj.handle
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
+        self.cache.remove((obj.__class__.__name__, handle))
 
         self.update_reference_map(obj, transaction, self.txn)
 
@@ -1725,6 +2268,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             old_data = data_map.get(handle, txn=self.txn)
             op = TXNUPD if old_data else TXNADD
             transaction.add(key, op, handle, old_data, new_data)
+            if old_data and key != TAG_KEY and old_data[1] != new_data[1]:
+                self._release_gramps_id(key, old_data[1])
         data_map.put(handle, new_data, txn=self.txn)
         return old_data
         
@@ -1736,6 +2281,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         old_data = self.commit_base(
             person, self.person_map, PERSON_KEY, transaction, change_time)
 
+        if (self.sortname_fingerprint is not None and
+                self.sortname_fingerprint != sortname_fingerprint()):
+            # The sort name index now mixes keys of different name formats
+            self.sortname_fingerprint = None
+
         if old_data:
             old_person = Person(old_data)
 
@@ -1948,18 +2498,19 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
     def get_from_handle(self, handle, class_type, data_map):
         if isinstance(handle, UNITYPE):
             handle = handle.encode('utf-8')
-        try:
-            data = data_map.get(handle, txn=self.txn)
-        except UnicodeDecodeError:
-            #we need to assume we opened data in python3 saved in python2
-            raw = data_map.db.get(handle, txn=self.txn)
-            data = pickle.loads(raw, encoding='utf-8')
-        except:
-            data = None
-            # under certain circumstances during a database reload,
-            # data_map can be none. If so, then don't report an error
-            if data_map:
-                _LOG.error("Failed to get from handle", exc_info=True)
+        key = (class_type.__name__, handle)
+        data = self.cache.get(key)
+        if data is None:
+            try:
+                data = data_map.get(handle, txn=self.txn)
+            except:
+                data = None
+                # under certain circumstances during a database reload,
+                # data_map can be none. If so, then don't report an error
+                if data_map:
+                    _LOG.error("Failed to get from handle", exc_info=True)
+            if data:
+                self.cache.put(key, data)
         if data:
             newobj = class_type()
             newobj.unserialize(data)
@@ -1974,6 +2525,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         Supported transaction parameters:
         no_magic: Boolean, defaults to False, indicating if secondary indices
                   should be disconnected.
+        bulk_load: Boolean, defaults to False, indicating if the reference
+                   map and the date and place indices should be brought up
+                   to date at the end of a batch transaction instead of at
+                   every commit. Meant for importers, which do not look up
+                   references while loading.
         """
         if self.txn is not None:
             msg = self.transaction.get_description()
@@ -1986,6 +2542,9 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                     "instance of DbTxn which typically happens by using the "
                     "DbTxn instance as a context manager.")
 
+        # The writes must reach the secondary indices of every table
+        self.__connect_pending()
+
         self.transaction = transaction
         if transaction.batch:
             # A batch transaction does not store the commits
@@ -2005,12 +2564,23 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 except db.DBNoSuchFileError:
                     pass
 
+                self.sortnames.close()
+                self.sortname_fingerprint = None
+                _db = db.DB(self.env)
+                try:
+                    _db.remove(_mkname(self.full_name, SORTNAMES), SORTNAMES)
+                except db.DBNoSuchFileError:
+                    pass
+
                 self.reference_map_referenced_map.close()
                 _db = db.DB(self.env)
                 try:
                     _db.remove(_mkname(self.full_name, REF_REF), REF_REF)
                 except db.DBNoSuchFileError:
                     pass
+
+            if getattr(transaction, 'bulk_load', False):
+                self.__begin_bulk_load()
         else:
             self.bsddbtxn = BSDDBTxn(self.env)
             self.txn = self.bsddbtxn.begin()
@@ -2030,11 +2600,17 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         if self.readonly:
             return
 
+        # the copies of the tree are checked against the time of the last
+        # commit, see load_in_memory
         if self.txn is not None:
             assert msg != ''
+            self.metadata.put(b'commit_time', time.time(), txn=self.txn)
             self.bsddbtxn.commit()
             self.bsddbtxn = None
             self.txn = None
+        else:
+            with BSDDBTxn(self.env, self.metadata) as txn:
+                txn.put(b'commit_time', time.time())
         self.env.log_flush()
         if not transaction.batch:
             emit = self.__emit
@@ -2057,10 +2633,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 handles = [handle2internal(handle) for handle, data in
                             transaction[(obj_type, trans_type)]]
             else:
+                deleted = set(handle for handle, data in
+                              transaction[(obj_type, TXNDEL)])
                 handles = [handle2internal(handle) for handle, data in
                             transaction[(obj_type, trans_type)]
-                            if (handle, None) not in transaction[(obj_type,
-                                                                  TXNDEL)]]
+                            if handle not in deleted]
             if handles:
                 self.emit(obj + suffix, (handles, ))
 
@@ -2079,6 +2656,8 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             self.bsddbtxn.abort()
             self.bsddbtxn = None
             self.txn = None
+        # Records read inside the transaction may no longer exist
+        self.cache.clear()
         if not transaction.batch:
             # It can occur that the listview is already updated because of
             # the "model-treeview automatic update" combined with a
@@ -2101,7 +2680,17 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         Post-transaction commit processing
         """
         if transaction.batch:
+            if self.__bulk_commits is not None:
+                self.__end_bulk_load(transaction)
+            # Imports keep the change times of the records they load
+            self.set_backup_full(True)
+            self.set_check_time(None)
             self.env.txn_checkpoint()
+            self.cache.clear()
+            # Batch transactions do not release the GRAMPS IDs they remove
+            # or change, so the maps of used numbers are learned again
+            self.id_allocators = {}
+            self.id_allocator_states = {}
 
             if not getattr(transaction, 'no_magic', False):
                 # create new secondary indices to replace the ones removed
@@ -2112,6 +2701,13 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
                 self.person_map.associate(self.surnames, find_byte_surname,
                                           DBFLAGS_O)
 
+                self.sortnames = self.__open_db(self.full_name, SORTNAMES,
+                                    db.DB_BTREE, db.DB_DUP | db.DB_DUPSORT)
+
+                self.person_map.associate(self.sortnames, find_byte_sortname,
+                                          DBFLAGS_O)
+                self.sortname_fingerprint = sortname_fingerprint()
+
                 self.reference_map_referenced_map = self.__open_db(self.full_name,
                     REF_REF, db.DB_BTREE, db.DB_DUP|db.DB_DUPSORT)
 
@@ -2146,6 +2742,15 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
 
         t = time.time()
 
+        # The person sort name index is filled again when the secondary
+        # indices are connected after the upgrade
+        _db = db.DB(self.env)
+        try:
+            _db.remove(_mkname(self.full_name, SORTNAMES), SORTNAMES)
+        except db.DBNoSuchFileError:
+            pass
+        self.sortname_fingerprint = None
+
         from . import upgrade
         if version < 14:
             upgrade.gramps_upgrade_14(self)
@@ -2155,7 +2760,11 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             upgrade.gramps_upgrade_16(self)
         if version < 17:
             upgrade.gramps_upgrade_17(self)
-            
+        if version < 18:
+            # Re-encode the records before the secondary indices are
+            # attached, since their callbacks decode with the table codec
+            upgrade.gramps_upgrade_18(self)
+        if version < 17:
             self.reset()
             self.set_total(6)
             self.__connect_secondary()
@@ -2168,7 +2777,6 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
             self.__close_undodb()
             self.db_is_open = False
 
-
         _LOG.debug("Upgrade time: %d seconds" % int(time.time()-t))
 
     def set_auto_remove(self):
@@ -2252,6 +2860,9 @@ class DbBsddb(DbBsddbRead, DbWriteBase, UpdateCallback):
         """
         return self.brief_name
 
+for _group, _names in _LAZY_ATTRIBUTES.items():
+    for _name in _names:
+        setattr(DbBsddb, _name, LazyAttribute(_name, _group))
 
 def _mkname(path, name):
     return os.path.join(path, name + DBEXT)
@@ -100,6 +100,21 @@ class DbState(Callback):
         """
         return self.db
 
+    def open_snapshot(self):
+        """
+        Return a DbSnapshot, a read-only copy of the current database, for
+        running a long job in a worker thread or process while the database
+        stays editable. Proxies added with apply_proxy are not part of the
+        snapshot and must be applied again to the opened copy.
+
+        >>> snapshot = dbstate.open_snapshot()
+        >>> # in the worker:
+        >>> with snapshot as database:
+        ...     database = gen.proxy.PrivateProxyDb(database)
+        """
+        database = self.stack[0] if self.stack else self.db
+        return database.open_snapshot()
+
     def apply_proxy(self, proxy, *args, **kwargs):
         """
         Add a proxy to the current database. Use pop_proxy() to
@@ -42,6 +42,15 @@ from ..lib.repo import Repository
 from ..lib.mediaobj import MediaObject
 from ..lib.note import Note
 from ..lib.tag import Tag
+from ..lib.rawaccess import RAW_ACCESS
+from ..constfunc import handle2internal
+
+# Fetching the candidates of the rules one by one, rather than reading all
+# the objects with a cursor, pays when they are at most this part of them
+CANDIDATES_FRACTION = 0.2
+
+# The type of the handles given by the cursors, for each database class
+_HANDLE_TYPES = {}
 
 #-------------------------------------------------------------------------
 #
@@ -123,7 +132,7 @@ class GenericFilter(object):
         return self.flist
 
     def get_cursor(self, db):
-        return db.get_person_cursor()
+        return db.get_person_cursor(buffered=True)
 
     def make_obj(self):
         return Person()
@@ -131,17 +140,90 @@ class GenericFilter(object):
     def find_from_handle(self, db, handle):
         return db.get_person_from_handle(handle)
 
-    def check_func(self, db, id_list, task, cb_progress=None, tupleind=None):
+    def get_raw_access(self):
+        return RAW_ACCESS[self.make_obj().__class__.__name__]
+
+    def get_number(self, db):
+        return db.get_number_of_people()
+
+    def get_rules_by_cost(self):
+        """
+        Return the rules in the order to apply them to an object: the
+        cheapest first, so that the costly rules only run when the cheap ones
+        did not decide the match.
+        """
+        return sorted(self.flist, key=lambda rule: rule.cost)
+
+    def find_candidates(self, db, union=False):
+        """
+        Return the set of handles of the only objects that can match the
+        filter, as given by the rules that know the objects they can match,
+        or None.
+
+        With union False, as for 'and', the rules that know their objects
+        are enough. Otherwise all the rules must know them, since an object
+        matching none of the rules cannot match the filter.
+        """
+        candidates = None
+        for rule in self.flist:
+            handles = rule.candidates(db)
+            if handles is None:
+                if union:
+                    return None
+                continue
+            handles = set(handle2internal(handle) for handle in handles)
+            if candidates is None:
+                candidates = handles
+            elif union:
+                candidates |= handles
+            else:
+                candidates &= handles
+        return candidates
+
+    def use_candidates(self, db, candidates):
+        """
+        Return True if fetching the candidates one by one is cheaper than
+        a cursor over all the objects.
+        """
+        return (candidates is not None and
+                len(candidates) <= CANDIDATES_FRACTION * self.get_number(db))
+
+    def get_handle_type(self, db):
+        """
+        Return the type of the handles given by the cursors of db, or None if
+        the table is empty. It is found once for each database class.
+        """
+        db_class = (getattr(db, 'basedb', None) or db).__class__
+        if db_class not in _HANDLE_TYPES:
+            with self.get_cursor(db) as cursor:
+                for handle, data in cursor:
+                    _HANDLE_TYPES[db_class] = type(handle)
+                    break
+        return _HANDLE_TYPES.get(db_class)
+
+    def check_func(self, db, id_list, task, cb_progress=None, tupleind=None,
+                   candidates=None):
         final_list = []
-        
+        rules = self.get_rules_by_cost()
+        from_candidates = False
+
+        if id_list is None and self.use_candidates(db, candidates):
+            # Only look at the few objects some rules can match
+            id_list = sorted(candidates)
+            tupleind = None
+            from_candidates = True
+
         if id_list is None:
             with self.get_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
-                    person.unserialize(data)
                     if cb_progress:
                         cb_progress()
-                    if task(db, person) != self.invert:
+                    if (candidates is not None and
+                            handle2internal(handle) not in candidates):
+                        continue
+                    person = self.make_obj()
+                    person.unserialize(data)
+                    if task(db, person, rules) != self.invert:
                         final_list.append(handle)
         else:
             for data in id_list:
@@ -149,70 +231,83 @@ class GenericFilter(object):
                     handle = data
                 else:
                     handle = data[tupleind]
-                person = self.find_from_handle(db, handle)
                 if cb_progress:
                     cb_progress()
-                if task(db, person) != self.invert:
+                if (candidates is not None and
+                        handle2internal(handle) not in candidates):
+                    continue
+                person = self.find_from_handle(db, handle)
+                if person is None and from_candidates:
+                    continue
+                if task(db, person, rules) != self.invert:
                     final_list.append(data)
+            if final_list and from_candidates:
+                # Return the handles as the cursor gives them
+                if self.get_handle_type(db) is bytes:
+                    final_list = [handle.encode('utf-8')
+                                  for handle in final_list]
         return final_list
 
-    def check_and(self, db, id_list, cb_progress=None, tupleind=None):
+    def check_and(self, db, id_list, cb_progress=None, tupleind=None,
+                  candidates=None):
         final_list = []
-        flist = self.flist
+        rules = self.get_rules_by_cost()
 
-        if id_list is None:
+        if (id_list is None and not self.use_candidates(db, candidates) and
+                all(rule.allow_raw for rule in rules)):
+            # All rules can work on the serialized data, so there is no
+            # need to build the objects
+            access = self.get_raw_access()
             with self.get_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
-                    person.unserialize(data)
                     if cb_progress:
                         cb_progress()
-                    val = all(rule.apply(db, person) for rule in flist)
+                    if (candidates is not None and
+                            handle2internal(handle) not in candidates):
+                        continue
+                    val = all(rule.apply_raw(db, access, data)
+                              for rule in rules)
                     if val != self.invert:
                         final_list.append(handle)
-        else:
-            for data in id_list:
-                if tupleind is None:
-                    handle = data
-                else:
-                    handle = data[tupleind]
-                person = self.find_from_handle(db, handle)
-                if cb_progress:
-                    cb_progress()
-                val = all(rule.apply(db, person) for rule in flist if person)
-                if val != self.invert:
-                    final_list.append(data)
-        return final_list
+            return final_list
+        return self.check_func(db, id_list, self.and_test, cb_progress,
+                               tupleind, candidates)
 
-    def check_or(self, db, id_list, cb_progress=None, tupleind=None):
+    def check_or(self, db, id_list, cb_progress=None, tupleind=None,
+                 candidates=None):
         return self.check_func(db, id_list, self.or_test, cb_progress,
-                                tupleind)
+                                tupleind, candidates)
 
-    def check_one(self, db, id_list, cb_progress=None, tupleind=None):
+    def check_one(self, db, id_list, cb_progress=None, tupleind=None,
+                  candidates=None):
         return self.check_func(db, id_list, self.one_test, cb_progress,
-                                tupleind)
+                                tupleind, candidates)
 
-    def check_xor(self, db, id_list, cb_progress=None, tupleind=None):
+    def check_xor(self, db, id_list, cb_progress=None, tupleind=None,
+                  candidates=None):
         return self.check_func(db, id_list, self.xor_test, cb_progress,
-                                tupleind)
+                                tupleind, candidates)
+
+    def and_test(self, db, person, rules):
+        return all(rule.apply(db, person) for rule in rules if person)
 
-    def xor_test(self, db, person):
+    def xor_test(self, db, person, rules):
         test = False
-        for rule in self.flist:
+        for rule in rules:
             test = test ^ rule.apply(db, person)
         return test
 
-    def one_test(self, db, person):
+    def one_test(self, db, person, rules):
         found_one = False
-        for rule in self.flist:
+        for rule in rules:
             if rule.apply(db, person):
                 if found_one:
                     return False    # There can be only one!
                 found_one = True
         return found_one
 
-    def or_test(self, db, person):
-        return any(rule.apply(db, person) for rule in self.flist) 
+    def or_test(self, db, person, rules):
+        return any(rule.apply(db, person) for rule in rules)
 
     def get_check_func(self):
         try:
@@ -237,6 +332,11 @@ class GenericFilter(object):
         If tupleind is given, id_list is supposed to consist of a list of 
         tuples, with the handle being index tupleind. So 
         handle_0 = id_list[0][tupleind]
+
+        The rules that know the objects they can match, from an index or a
+        set computed by their prepare method, restrict the objects the other
+        rules are applied to. If they leave few objects, these are fetched
+        one by one instead of using a cursor.
         
         :Returns: if id_list given, it is returned with the items that 
                 do not match the filter, filtered out.
@@ -246,7 +346,13 @@ class GenericFilter(object):
         m = self.get_check_func()
         for rule in self.flist:
             rule.requestprepare(db)
-        res = m(db, id_list, cb_progress, tupleind)
+        # The candidates are only worth finding for a pass over the table,
+        # not for the few handles of id_list, as when matching one object
+        candidates = None
+        if id_list is None and not self.invert:
+            candidates = self.find_candidates(db,
+                                              union=m != self.check_and)
+        res = m(db, id_list, cb_progress, tupleind, candidates)
         for rule in self.flist:
             rule.requestreset()
         return res
@@ -256,8 +362,11 @@ class GenericFamilyFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_families()
+
     def get_cursor(self, db):
-        return db.get_family_cursor()
+        return db.get_family_cursor(buffered=True)
 
     def make_obj(self):
         return Family()
@@ -270,8 +379,11 @@ class GenericEventFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_events()
+
     def get_cursor(self, db):
-        return db.get_event_cursor()
+        return db.get_event_cursor(buffered=True)
 
     def make_obj(self):
         return Event()
@@ -284,8 +396,11 @@ class GenericSourceFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_sources()
+
     def get_cursor(self, db):
-        return db.get_source_cursor()
+        return db.get_source_cursor(buffered=True)
 
     def make_obj(self):
         return Source()
@@ -298,8 +413,11 @@ class GenericCitationFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_citations()
+
     def get_cursor(self, db):
-        return db.get_citation_cursor()
+        return db.get_citation_cursor(buffered=True)
 
     def make_obj(self):
         return Citation()
@@ -312,8 +430,11 @@ class GenericPlaceFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_places()
+
     def get_cursor(self, db):
-        return db.get_place_cursor()
+        return db.get_place_cursor(buffered=True)
 
     def make_obj(self):
         return Place()
@@ -326,8 +447,11 @@ class GenericMediaFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_media_objects()
+
     def get_cursor(self, db):
-        return db.get_media_cursor()
+        return db.get_media_cursor(buffered=True)
 
     def make_obj(self):
         return MediaObject()
@@ -340,8 +464,11 @@ class GenericRepoFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_repositories()
+
     def get_cursor(self, db):
-        return db.get_repository_cursor()
+        return db.get_repository_cursor(buffered=True)
 
     def make_obj(self):
         return Repository()
@@ -354,8 +481,11 @@ class GenericNoteFilter(GenericFilter):
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
+    def get_number(self, db):
+        return db.get_number_of_notes()
+
     def get_cursor(self, db):
-        return db.get_note_cursor()
+        return db.get_note_cursor(buffered=True)
 
     def make_obj(self):
         return Note()
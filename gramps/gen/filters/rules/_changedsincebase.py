@@ -54,6 +54,9 @@ class ChangedSinceBase(Rule):
                     "date/time (yyyy-mm-dd hh:mm:ss) or in range, if a second " \
                     "date/time is given."
     category    = _('General filters')
+    allow_raw   = True
+    # name of the table of the objects, for the change time index
+    table       = None
 
     def add_time(self, date):
         if re.search("\d.*\s+\d{1,2}:\d{2}:\d{2}", date):
@@ -93,8 +96,18 @@ class ChangedSinceBase(Rule):
         if self.list[1]:
             self.before = self.time_str_to_sec(self.list[1])
 
+    def candidates(self, db):
+        if self.table is None or not self.since:
+            return None
+        return set(db.iter_changed_since(self.table, self.since))
+
     def apply(self, db, obj):
-        obj_time = obj.get_change_time()
+        return self.match_time(obj.get_change_time())
+
+    def apply_raw(self, db, access, data):
+        return self.match_time(access.change(data))
+
+    def match_time(self, obj_time):
         if self.since:
             if obj_time < self.since:
                 return False
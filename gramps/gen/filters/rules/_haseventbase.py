@@ -56,6 +56,7 @@ class HasEventBase(Rule):
     description =  "Matches events with particular parameters"
     category    = _('Event filters')
     allow_regex = True
+    cost        = 10
     
     def prepare(self, db):
         self.date = None
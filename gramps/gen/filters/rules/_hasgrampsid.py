@@ -36,6 +36,19 @@ _ = glocale.translation.gettext
 #-------------------------------------------------------------------------
 from . import Rule
 
+# the method looking up an object of each table by its GRAMPS ID
+_FROM_GRAMPS_ID = {
+    'Person':     'get_person_from_gramps_id',
+    'Family':     'get_family_from_gramps_id',
+    'Event':      'get_event_from_gramps_id',
+    'Place':      'get_place_from_gramps_id',
+    'Source':     'get_source_from_gramps_id',
+    'Citation':   'get_citation_from_gramps_id',
+    'Media':      'get_object_from_gramps_id',
+    'Repository': 'get_repository_from_gramps_id',
+    'Note':       'get_note_from_gramps_id',
+    }
+
 #-------------------------------------------------------------------------
 #
 # HasIdOf
@@ -48,6 +61,19 @@ class HasGrampsId(Rule):
     name        = 'Object with <Id>'
     description = "Matches objects with a specified Gramps ID"
     category    = _('General filters')
+    allow_raw   = True
+    table       = None
+
+    def candidates(self, db):
+        """
+        Look the object up in the GRAMPS ID index.
+        """
+        if self.table is None:
+            return None
+        obj = getattr(db, _FROM_GRAMPS_ID[self.table])(self.list[0])
+        if obj is None:
+            return set()
+        return set([obj.handle])
 
     def apply(self, db, obj):
         """
@@ -55,3 +81,6 @@ class HasGrampsId(Rule):
         return true if the rule passes, false otherwise.
         """
         return obj.gramps_id == self.list[0]
+
+    def apply_raw(self, db, access, data):
+        return access.gramps_id(data) == self.list[0]
@@ -48,6 +48,7 @@ class HasNoteRegexBase(Rule):
                    "or match a regular expression")
     category    = _('General filters')
     allow_regex = True
+    cost        = 10
 
     def apply(self, db, person):
         for handle in person.get_note_list():
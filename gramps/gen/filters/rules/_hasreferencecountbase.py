@@ -45,6 +45,8 @@ class HasReferenceCountBase(Rule):
     name        = 'Objects with a reference count of <count>'
     description = "Matches objects with a certain reference count"
     category    = _('General filters')
+    allow_raw   = True
+    cost        = 10
 
 
     def prepare(self, db):
@@ -60,15 +62,15 @@ class HasReferenceCountBase(Rule):
 
 
     def apply(self, db, obj):
-        handle = obj.get_handle()
-        count = 0
-        for item in db.find_backlink_handles(handle):
-            count += 1
+        return self.match_count(db.get_reference_count(obj.get_handle()))
 
+    def apply_raw(self, db, access, data):
+        return self.match_count(db.get_reference_count(access.handle(data)))
+
+    def match_count(self, count):
         if self.count_type == 0:     # "lesser than"
             return count < self.userSelectedCount
         elif self.count_type == 2:   # "greater than"
             return count > self.userSelectedCount
         # "equal to"
         return count == self.userSelectedCount
-
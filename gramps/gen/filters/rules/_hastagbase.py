@@ -51,6 +51,8 @@ class HasTagBase(Rule):
     name        = 'Objects with the <tag>'
     description = "Matches objects with the given tag"
     category    = _('General filters')
+    allow_raw   = True
+    table       = None
 
     def prepare(self, db):
         """
@@ -61,6 +63,21 @@ class HasTagBase(Rule):
         if tag is not None:
             self.tag_handle = tag.get_handle()
 
+    def candidates(self, db):
+        """
+        Return the tagged objects, from the references of the tag.
+        """
+        if self.table is None:
+            return None
+        if self.tag_handle is None:
+            return set()
+        if self.table == 'Media':
+            class_name = 'MediaObject'
+        else:
+            class_name = self.table
+        return set(handle for (dummy_class, handle) in
+                   db.find_backlink_handles(self.tag_handle, [class_name]))
+
     def apply(self, db, obj):
         """
         Apply the rule.  Return True for a match.
@@ -68,3 +85,11 @@ class HasTagBase(Rule):
         if self.tag_handle is None:
             return False
         return self.tag_handle in obj.get_tag_list()
+
+    def apply_raw(self, db, access, data):
+        """
+        Apply the rule to serialized data.  Return True for a match.
+        """
+        if self.tag_handle is None:
+            return False
+        return self.tag_handle in access.tag_list(data)
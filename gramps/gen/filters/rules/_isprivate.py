@@ -42,6 +42,10 @@ class IsPrivate(Rule):
     name        = 'Objects marked private'
     description = "Matches objects that are indicated as private"
     category    = _('General filters')
+    allow_raw   = True
 
     def apply(self, db, obj):
         return obj.get_privacy()
+
+    def apply_raw(self, db, access, data):
+        return access.private(data)
@@ -39,6 +39,10 @@ class IsPublic(Rule):
     name        = 'Objects not marked private'
     description = "Matches objects that are not indicated as private"
     category    = _('General filters')
+    allow_raw   = True
 
     def apply(self, db, obj):
         return not obj.get_privacy()
+
+    def apply_raw(self, db, access, data):
+        return not access.private(data)
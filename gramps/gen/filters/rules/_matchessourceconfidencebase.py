@@ -50,6 +50,7 @@ class MatchesSourceConfidenceBase(Rule):
     name        = 'Object with at least one direct source >= <confidence level>'
     description = "Matches objects with at least one direct source with confidence level(s)"
     category    = _('Citation/source filters')
+    cost        = 10
     
     def apply(self, db, obj):
         required_conf = int(self.list[0])
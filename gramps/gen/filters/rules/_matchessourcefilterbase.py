@@ -54,6 +54,7 @@ class MatchesSourceFilterBase(MatchesFilterBase):
 
     # we want to have this filter show source filters
     namespace   = 'Source'
+    cost        = 10
 
     def prepare(self, db):
         MatchesFilterBase.prepare(self, db)
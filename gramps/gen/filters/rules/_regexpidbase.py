@@ -35,6 +35,9 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from . import Rule
+from ._hasgrampsid import _FROM_GRAMPS_ID
+from .._genericfilter import CANDIDATES_FRACTION
+from ...constfunc import conv_to_unicode
 
 #-------------------------------------------------------------------------
 #
@@ -53,6 +56,34 @@ class RegExpIdBase(Rule):
                    "or matches a regular expression"
     category    = _('General filters')
     allow_regex = True
+    allow_raw   = True
+    table       = None
+
+    def candidates(self, db):
+        """
+        Match the keys of the GRAMPS ID index, and look up the objects when
+        only a few of them match.
+        """
+        if self.table is None:
+            return None
+        from ...db import dbconst
+        gramps_ids = db.get_gramps_ids(getattr(dbconst,
+                                               self.table.upper() + '_KEY'))
+        matches = [gramps_id for gramps_id in
+                   (conv_to_unicode(key, 'utf-8') for key in gramps_ids)
+                   if self.match_substring(0, gramps_id)]
+        if len(matches) > CANDIDATES_FRACTION * len(gramps_ids):
+            return None
+        get_object = getattr(db, _FROM_GRAMPS_ID[self.table])
+        handles = set()
+        for gramps_id in matches:
+            obj = get_object(gramps_id)
+            if obj is not None:
+                handles.add(obj.handle)
+        return handles
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gramps_id)
+
+    def apply_raw(self, db, access, data):
+        return self.match_substring(0, access.gramps_id(data))
@@ -57,6 +57,10 @@ class Rule(object):
     category    = _('Miscellaneous filters')
     description = _('No description')
     allow_regex = False
+    allow_raw   = False
+    # estimated cost of applying the rule to one object, the filters apply
+    # the cheapest rules first
+    cost        = 1
 
     def __init__(self, arg, use_regex=False):
         self.list = []
@@ -139,6 +143,22 @@ class Rule(object):
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def apply_raw(self, dummy_db, dummy_access, dummy_data):
+        """
+        Apply the rule to the serialized data of some database entry, using
+        the RawAccess getters of its class; must be overwritten by rules
+        that set allow_raw.
+        """
+        return True
+
+    def candidates(self, dummy_db):
+        """
+        Return the set of handles of the only objects the rule can match,
+        when the database can give them without applying the rule to every
+        object, or None. Called after prepare.
+        """
+        return None
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = ( '%s="%s"' % (_(self.labels[ix]), self.list[ix])
@@ -46,3 +46,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Citation with <Id>')
     description = _("Matches a citation with a specified Gramps ID")
+    table       = 'Citation'
@@ -53,6 +53,7 @@ class MatchesRepositoryFilter(MatchesFilterBase):
     
     # we want to have this filter show repository filters
     namespace = 'Repository'
+    cost        = 10
     
     
     def prepare(self, db):
@@ -50,3 +50,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Citations with Id containing <text>')
     description = _("Matches citations whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Citation'
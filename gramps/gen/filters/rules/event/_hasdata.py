@@ -51,6 +51,7 @@ class HasData(Rule):
     description = _("Matches events with data of a particular value")
     category    = _('General filters')
     allow_regex = True
+    cost        = 10
     
     def prepare(self, dbase):
         self.event_type = self.list[0]
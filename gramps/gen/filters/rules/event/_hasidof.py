@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Event with <Id>')
     description = _("Matches an event with a specified Gramps ID")
+    table       = 'Event'
@@ -48,11 +48,28 @@ class HasType(Rule):
     name        = _('Events with the particular type')
     description = _("Matches events with the particular type ")
     category    = _('General filters')
+    allow_raw   = True
+
+    def prepare(self, db):
+        if self.list[0]:
+            self.etype = EventType()
+            self.etype.set_from_xml_str(self.list[0])
+        else:
+            self.etype = None
+
+    def reset(self):
+        self.etype = None
 
     def apply(self, db, event):
-        if not self.list[0]:
+        if self.etype is None:
             return False
         else:
-            specified_type = EventType()
-            specified_type.set_from_xml_str(self.list[0])
-            return event.get_type() == specified_type
+            return event.get_type() == self.etype
+
+    def apply_raw(self, db, access, data):
+        if self.etype is None:
+            return False
+        (value, string) = access.type(data)
+        if self.etype.is_custom():
+            return string == self.etype.string
+        return value == self.etype.value
@@ -57,6 +57,7 @@ class MatchesPersonFilter(MatchesFilterBase):
     
     # we want to have this filter show person filters
     namespace   = 'Person'
+    cost        = 10
     
     def prepare(self, db):
         MatchesFilterBase.prepare(self, db)
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Events with Id containing <text>')
     description = _("Matches events whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Event'
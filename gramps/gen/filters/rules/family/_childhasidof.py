@@ -49,5 +49,6 @@ class ChildHasIdOf(RegExpIdBase):
     description = _("Matches families where child has a specified "
                     "Gramps ID")
     category    = _('Child filters')
+    allow_raw   = False
     base_class = RegExpIdBase
     apply = child_base
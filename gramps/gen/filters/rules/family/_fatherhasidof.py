@@ -49,5 +49,6 @@ class FatherHasIdOf(RegExpIdBase):
     description = _("Matches families whose father has a specified "
                     "Gramps ID")
     category    = _('Father filters')
+    allow_raw   = False
     base_class = RegExpIdBase
     apply = father_base
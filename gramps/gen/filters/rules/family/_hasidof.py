@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Family with <Id>')
     description = _("Matches a family with a specified Gramps ID")
+    table       = 'Family'
@@ -47,6 +47,7 @@ class HasTwins(Rule):
     name        = _('Families with twins')
     description = _("Matches families with twins")
     category    = _('Child filters')
+    cost        = 10
 
     def apply(self, db, family):
         date_list = []
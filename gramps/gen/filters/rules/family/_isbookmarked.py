@@ -50,5 +50,8 @@ class IsBookmarked(Rule):
     def prepare(self, db):
         self.bookmarks = db.get_family_bookmarks().get()
 
+    def candidates(self, db):
+        return set(self.bookmarks)
+
     def apply(self, db, family):
         return family.get_handle() in self.bookmarks
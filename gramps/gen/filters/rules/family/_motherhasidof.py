@@ -49,5 +49,6 @@ class MotherHasIdOf(RegExpIdBase):
     description = _("Matches families whose mother has a specified "
                     "Gramps ID")
     category    = _('Mother filters')
+    allow_raw   = False
     base_class = RegExpIdBase
     apply = mother_base
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Families with Id containing <text>')
     description = _("Matches families whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Family'
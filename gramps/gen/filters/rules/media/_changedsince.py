@@ -48,3 +48,4 @@ class ChangedSince(ChangedSinceBase):
     description = _("Matches media objects changed after a specified "
                     "date:time (yyyy-mm-dd hh:mm:ss) or in the range, if a second "
                     "date:time is given.")
+    table       = 'Media'
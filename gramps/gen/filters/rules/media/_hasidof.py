@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Media object with <Id>')
     description = _("Matches a media object with a specified Gramps ID")
+    table       = 'Media'
@@ -49,3 +49,4 @@ class HasTag(HasTagBase):
     labels      = [ _('Tag:') ]
     name        = _('Media objects with the <tag>')
     description = _("Matches media objects with the particular tag")
+    table       = 'Media'
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Media objects with Id containing <text>')
     description = _("Matches media objects whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Media'
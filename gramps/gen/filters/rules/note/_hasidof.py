@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Note with <Id>')
     description = _("Matches a note with a specified Gramps ID")
+    table       = 'Note'
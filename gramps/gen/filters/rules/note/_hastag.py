@@ -49,3 +49,4 @@ class HasTag(HasTagBase):
     labels      = [ _('Tag:') ]
     name        = _('Notes with the <tag>')
     description = _("Matches notes with the particular tag")
+    table       = 'Note'
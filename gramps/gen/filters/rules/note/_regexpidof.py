@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Notes with Id containing <text>')
     description = _("Matches notes whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Note'
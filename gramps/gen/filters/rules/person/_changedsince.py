@@ -49,3 +49,4 @@ class ChangedSince(ChangedSinceBase):
     description = _("Matches person records changed after a specified "
                     "date-time (yyyy-mm-dd hh:mm:ss) or in the range, if a second "
                     "date-time is given.")
+    table       = 'Person'
@@ -37,6 +37,7 @@ _ = glocale.translation.gettext
 from gramps.gui.utils import ProgressMeter
 from .. import Rule
 from . import MatchesFilter
+from ....utils.graph import get_kinship
 
 #-------------------------------------------------------------------------
 #
@@ -64,44 +65,54 @@ def filter_database(db, progress, filter_name):
     return matches
 
 
-def get_family_handle_people(db, exclude_handle, family_handle):
+def get_family_handle_people(kinship, exclude_handle, family_handle):
     people = set()
-    
-    family = db.get_family_from_handle(family_handle)
 
     def possibly_add_handle(h):
         if h != None and h != exclude_handle:
-            people.add(db.get_person_from_handle(h))
-            
-    possibly_add_handle(family.get_father_handle())
-    possibly_add_handle(family.get_mother_handle())
-
-    for child_ref in family.get_child_ref_list():
-        if child_ref:
-            possibly_add_handle(child_ref.get_reference_handle())
-    
+            people.add(h)
+
+    for parent_handle in kinship.get_parent_handles(family_handle):
+        possibly_add_handle(parent_handle)
+
+    for child_link in kinship.get_child_links(family_handle):
+        possibly_add_handle(child_link[0])
+
     return people
 
-def get_person_family_people(db, person, person_handle):
+def get_person_family_people(kinship, person_handle):
     people = set()
 
     def add_family_handle_list(list):
         for family_handle in list:
-            people.update(get_family_handle_people(db, person_handle, family_handle))
-    
-    add_family_handle_list(person.get_family_handle_list())
-    add_family_handle_list(person.get_parent_family_handle_list())
-    
+            people.update(get_family_handle_people(kinship, person_handle,
+                                                   family_handle))
+
+    add_family_handle_list(kinship.get_family_handles(person_handle))
+    add_family_handle_list(kinship.get_parent_family_handles(person_handle))
+
     return people
 
 def find_deep_relations(db, progress, person, path, seen, target_people):
+    """
+    Return the paths, lists of person handles, from person to the people
+    of target_people. The links between people are read from the kinship
+    links of the database.
+    """
+    if person is None:
+        return []
+    return _find_deep_relations(get_kinship(db), progress,
+                                person.get_handle(), path, set(seen),
+                                set(target_people))
+
+def _find_deep_relations(kinship, progress, handle, path, seen,
+                         target_people):
     if len(target_people) < 1:
         return []
-    
-    handle = person.get_handle()
+
     if handle in seen:
         return []
-    seen.append(handle)
+    seen.add(handle)
 
     return_paths = []
     person_path = path + [handle]
@@ -110,9 +121,10 @@ def find_deep_relations(db, progress, person, path, seen, target_people):
         return_paths += [person_path]
         target_people.remove(handle)
 
-    family_people = get_person_family_people(db, person, handle)
-    for family_person in family_people:
-        return_paths += find_deep_relations(db, progress, family_person, person_path, seen, target_people)
+    family_people = get_person_family_people(kinship, handle)
+    for family_handle in family_people:
+        return_paths += _find_deep_relations(kinship, progress, family_handle,
+                                             person_path, seen, target_people)
         if progress: progress.step()
 
     return return_paths
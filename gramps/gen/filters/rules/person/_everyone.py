@@ -46,9 +46,13 @@ class Everyone(Rule):
     name        = _('Everyone')
     category    = _('General filters')
     description = _('Matches everyone in the database')
+    allow_raw   = True
 
     def is_empty(self):
         return True
 
     def apply(self,db,person):
         return True
+
+    def apply_raw(self, db, access, data):
+        return True
@@ -45,6 +45,7 @@ class FamilyWithIncompleteEvent(Rule):
     description = _("Matches people with missing date or "
                     "place in an event of the family")
     category    = _('Event filters')
+    cost        = 10
 
     def apply(self,db,person):
         for family_handle in person.get_family_handle_list():
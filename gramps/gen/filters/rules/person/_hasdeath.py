@@ -51,6 +51,7 @@ class HasDeath(Rule):
     description = _("Matches people with death data of a particular value")
     category    = _('Event filters')
     allow_regex = True
+    cost        = 10
     
     def prepare(self, db):
         if self.list[0]:
@@ -49,6 +49,7 @@ class HasFamilyAttribute(Rule):
                     "of a particular value")
     category    = _('General filters')
     allow_regex = True
+    cost        = 10
     
     def apply(self,db,person):
         if not self.list[0]:
@@ -54,6 +54,7 @@ class HasFamilyEvent(Rule):
     description = _("Matches people with a family event of a particular value")
     category    = _('Event filters')
     allow_regex = True
+    cost        = 10
     
     def prepare(self,db):
         self.date = None
@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Person with <Id>')
     description = _("Matches person with a specified Gramps ID")
+    table       = 'Person'
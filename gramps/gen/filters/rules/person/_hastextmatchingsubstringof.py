@@ -52,6 +52,7 @@ class HasTextMatchingSubstringOf(Rule):
                     "matching a substring")
     category    = _('General filters')
     allow_regex = True
+    cost        = 10
 
     def prepare(self,db):
         self.db = db
@@ -47,6 +47,10 @@ class HasUnknownGender(Rule):
     name        = _('People with unknown gender')
     category    = _('General filters')
     description = _('Matches all people with unknown gender')
+    allow_raw   = True
 
     def apply(self,db,person):
         return person.gender == Person.UNKNOWN
+
+    def apply_raw(self, db, access, data):
+        return access.gender(data) == Person.UNKNOWN
@@ -34,6 +34,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.graph import get_kinship
 
 #-------------------------------------------------------------------------
 #
@@ -65,6 +66,9 @@ class IsAncestorOf(Rule):
     def reset(self):
         self.map.clear()
 
+    def candidates(self, db):
+        return set(self.map)
+
     def apply(self, db, person):
         return person.handle in self.map
 
@@ -73,14 +77,5 @@ class IsAncestorOf(Rule):
             return
         if not first:
             self.map.add(person.handle)
-        
-        fam_id = person.get_main_parents_family_handle()
-        fam = db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-        
-            if f_id:
-                self.init_ancestor_list(db,db.get_person_from_handle(f_id),0)
-            if m_id:
-                self.init_ancestor_list(db,db.get_person_from_handle(m_id),0)
+        self.map.update(get_kinship(db).get_ancestors(person.handle,
+                                                      main_family=True))
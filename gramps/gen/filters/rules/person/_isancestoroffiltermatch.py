@@ -72,5 +72,8 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
     def reset(self):
         self.map.clear()
 
+    def candidates(self,db):
+        return set(self.map)
+
     def apply(self,db,person):
         return person.handle in self.map
@@ -51,5 +51,8 @@ class IsBookmarked(Rule):
     def prepare(self,db):
         self.bookmarks = db.get_bookmarks().get()
 
+    def candidates(self,db):
+        return set(self.bookmarks)
+
     def apply(self,db,person):
         return person.handle in self.bookmarks
@@ -34,6 +34,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.graph import get_kinship
 
 #-------------------------------------------------------------------------
 #
@@ -65,6 +66,9 @@ class IsDescendantOf(Rule):
     def reset(self):
         self.map.clear()
 
+    def candidates(self, db):
+        return set(self.map)
+
     def apply(self, db, person):
         return person.handle in self.map
 
@@ -73,10 +77,4 @@ class IsDescendantOf(Rule):
             return
         if not first:
             self.map.add(person.handle)
-        
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), 0)
+        self.map.update(get_kinship(self.db).get_descendants(person.handle))
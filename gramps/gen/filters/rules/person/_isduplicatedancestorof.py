@@ -63,6 +63,9 @@ class IsDuplicatedAncestorOf(Rule):
         self.map.clear()
         self.map2.clear()
 
+    def candidates(self, db):
+        return set(self.map2)
+
     def apply(self, db, person):
         return person.handle in self.map2
 
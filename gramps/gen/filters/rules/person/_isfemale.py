@@ -47,6 +47,10 @@ class IsFemale(Rule):
     name        = _('Females')
     category    = _('General filters')
     description = _('Matches all females')
+    allow_raw   = True
 
     def apply(self,db,person):
         return person.gender == Person.FEMALE
+
+    def apply_raw(self, db, access, data):
+        return access.gender(data) == Person.FEMALE
@@ -85,6 +85,9 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
             if m_id:
                 self.init_ancestor_list(m_id, gen+1)
 
+    def candidates(self,db):
+        return set(self.map)
+
     def apply_real(self,db,person):
         return person.handle in self.map
 
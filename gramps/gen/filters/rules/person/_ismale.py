@@ -47,6 +47,10 @@ class IsMale(Rule):
     name        = _('Males')
     category    = _('General filters')
     description = _('Matches all males')
+    allow_raw   = True
 
     def apply(self,db,person):
         return person.gender == Person.MALE
+
+    def apply_raw(self, db, access, data):
+        return access.gender(data) == Person.MALE
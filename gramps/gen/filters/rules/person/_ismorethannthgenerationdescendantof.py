@@ -63,6 +63,9 @@ class IsMoreThanNthGenerationDescendantOf(Rule):
     def reset(self):
         self.map.clear()
 
+    def candidates(self,db):
+        return set(self.map)
+
     def apply(self,db,person):
         return person.handle in self.map
 
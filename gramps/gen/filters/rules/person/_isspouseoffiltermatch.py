@@ -49,6 +49,7 @@ class IsSpouseOfFilterMatch(Rule):
     name        = _('Spouses of <filter> match')
     description = _("Matches people married to anybody matching a filter")
     category    = _('Family filters')
+    cost        = 10
 
     def prepare(self,db):
         self.filt = MatchesFilter (self.list)
@@ -34,6 +34,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....lib import rawaccess
 
 #-------------------------------------------------------------------------
 # "People without a birth date"
@@ -44,12 +45,22 @@ class NoBirthdate(Rule):
     name        = _('People without a known birth date')
     description = _("Matches people without a known birthdate")
     category    = _('General filters')
+    allow_raw   = True
 
     def apply(self,db,person):
         birth_ref = person.get_birth_ref()
         if not birth_ref:
             return True
-        birth = db.get_event_from_handle(birth_ref.ref)
+        return self.no_date(db, birth_ref.ref)
+
+    def apply_raw(self, db, access, data):
+        ref = rawaccess.birth_ref(data)
+        if not ref:
+            return True
+        return self.no_date(db, rawaccess.EVENT_REF.ref(ref))
+
+    def no_date(self, db, event_handle):
+        birth = db.get_event_from_handle(event_handle)
         if birth:
             birth_obj = birth.get_date_object()
             if not birth_obj:
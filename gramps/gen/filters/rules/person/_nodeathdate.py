@@ -34,6 +34,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....lib import rawaccess
 
 #-------------------------------------------------------------------------
 # "People without a death date"
@@ -44,12 +45,22 @@ class NoDeathdate(Rule):
     name        = _('People without a known death date')
     description = _("Matches people without a known deathdate")
     category    = _('General filters')
+    allow_raw   = True
 
     def apply(self,db,person):
         death_ref = person.get_death_ref()
         if not death_ref:
             return True
-        death = db.get_event_from_handle(death_ref.ref)
+        return self.no_date(db, death_ref.ref)
+
+    def apply_raw(self, db, access, data):
+        ref = rawaccess.death_ref(data)
+        if not ref:
+            return True
+        return self.no_date(db, rawaccess.EVENT_REF.ref(ref))
+
+    def no_date(self, db, event_handle):
+        death = db.get_event_from_handle(event_handle)
         if death:
             death_obj = death.get_date_object()
             if not death_obj:
@@ -44,6 +44,7 @@ class PersonWithIncompleteEvent(Rule):
     name        = _('People with incomplete events')
     description = _("Matches people with missing date or place in an event")
     category    = _('Event filters')
+    cost        = 10
 
     def apply(self,db,person):
         for event_ref in person.get_event_ref_list():
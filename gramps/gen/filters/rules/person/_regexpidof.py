@@ -48,3 +48,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('People with Id containing <text>')
     description = _("Matches people whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Person'
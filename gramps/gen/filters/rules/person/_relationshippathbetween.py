@@ -89,6 +89,9 @@ class RelationshipPathBetween(Rule):
             self.apply_filter(rank+1, family.get_father_handle(), plist, pmap)
             self.apply_filter(rank+1, family.get_mother_handle(), plist, pmap)
 
+    def candidates(self, db):
+        return set(self.map)
+
     def apply(self, db, person):
         return person.handle in self.map
 
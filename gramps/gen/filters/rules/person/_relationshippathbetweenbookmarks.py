@@ -161,6 +161,9 @@ class RelationshipPathBetweenBookmarks(Rule):
                 except:
                     pass
 
+    def candidates(self,db):
+        return set(self.map)
+
     def apply(self,db,person):
         return person.handle in self.map
 
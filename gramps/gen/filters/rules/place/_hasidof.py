@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Place with <Id>')
     description = _("Matches a place with a specified Gramps ID")
+    table       = 'Place'
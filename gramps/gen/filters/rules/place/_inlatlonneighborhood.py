@@ -37,6 +37,7 @@ _ = glocale.translation.gettext
 #-------------------------------------------------------------------------
 from .. import Rule
 from ....utils.place import conv_lat_lon
+from ....constfunc import handle2internal
 
 #-------------------------------------------------------------------------
 #
@@ -56,6 +57,7 @@ class InLatLonNeighborhood(Rule):
                     "with middlepoint the given latitude and longitude."
                     )
     category    = _('Position filters')
+    allow_raw   = True
 
     def prepare(self,db):
         if self.list[0] :
@@ -119,47 +121,43 @@ class InLatLonNeighborhood(Rule):
                     self.W2 = self.W + 360.
                     self.E2 = 180.
                     self.W  = -180
-                
-            
-    def apply(self,db,place):
-        if self.halfheight == -1 and self.halfwidth ==-1 :
-            return False
-        
+
+        # let the place coordinate index of the database find the places
+        # in the squares
+        self.handles = None
+        if self.halfheight == -1 and self.halfwidth == -1:
+            return
         # when given, must be valid
-        if self.lat is None or self.lon is None :
-            return False
-        
+        if self.lat is None or self.lon is None:
+            return
         # if height/width given, they must be valid
-        if self.halfheight is None or self.halfwidth is None :
+        if self.halfheight is None or self.halfwidth is None:
+            return
+
+        if self.halfheight == -1:
+            lat_min, lat_max = -90., 90.
+        else:
+            lat_min, lat_max = self.N, self.S
+        if self.halfwidth == -1:
+            squares = [(-180., 180.)]
+        elif self.doublesquares:
+            squares = [(self.W, self.E), (self.W2, self.E2)]
+        else:
+            squares = [(self.W, self.E)]
+        self.handles = set()
+        for (west, east) in squares:
+            self.handles.update(handle2internal(handle) for handle in
+                db.find_places_in_bbox(lat_min, west, lat_max, east))
+
+    def reset(self):
+        self.handles = None
+
+    def apply(self,db,place):
+        if self.handles is None:
             return False
-        
-        #now we know at least one is given in the filter and is valid
-        
-        # the place we look at must have lat AND lon entered
-        if not ( place.get_latitude().strip and place.get_longitude().strip() ):
+        return place.handle in self.handles
+
+    def apply_raw(self, db, access, data):
+        if self.handles is None:
             return False
-        
-        latpl, lonpl = conv_lat_lon(place.get_latitude(),
-                                    place.get_longitude(), "D.D8")
-        if latpl and lonpl :
-            latpl = float(latpl)
-            lonpl = float(lonpl)
-            if self.halfheight != -1 :
-                # check lat
-                if latpl < self.N or latpl > self.S :
-                    return False
-            
-            if self.halfwidth != -1 :
-                #check lon: more difficult, we may cross the 180/-180 boundary
-                # and must keep counting
-                if self.doublesquares :
-                    #two squares to look in : 
-                    if (lonpl <self.W or lonpl > self.E) and \
-                        (lonpl <self.W2 or lonpl > self.E2) :
-                        return False
-                elif (lonpl <self.W or lonpl > self.E) :
-                    return False
-                    
-            return True
-            
-        return False
+        return access.handle(data) in self.handles
@@ -55,6 +55,7 @@ class MatchesEventFilter(MatchesFilterBase):
     category    = _('General filters')
     # we want to have this filter show event filters
     namespace   = 'Event'
+    cost        = 10
 
 
     def apply(self,db,event):
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Places with Id containing <text>')
     description = _("Matches places whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Place'
@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Repository with <Id>')
     description = _("Matches a repository with a specified Gramps ID")
+    table       = 'Repository'
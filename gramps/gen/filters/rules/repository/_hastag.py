@@ -49,3 +49,4 @@ class HasTag(HasTagBase):
     labels      = [ _('Tag:') ]
     name        = _('Repositories with the <tag>')
     description = _("Matches repositories with the particular tag")
+    table       = 'Repository'
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Repositories with Id containing <text>')
     description = _("Matches repositories whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Repository'
@@ -45,3 +45,4 @@ class HasIdOf(HasGrampsId):
 
     name        = _('Source with <Id>')
     description = _("Matches a source with a specified Gramps ID")
+    table       = 'Source'
@@ -49,3 +49,4 @@ class RegExpIdOf(RegExpIdBase):
     name        = _('Sources with Id containing <text>')
     description = _("Matches sources whose Gramps ID matches "
                     "the regular expression")
+    table       = 'Source'
@@ -0,0 +1,93 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+""" unittest for the planning of GenericFilter """
+
+import unittest
+
+from ...db.test.grampsdbtestbase import GrampsDbBaseTest
+from .. import _genericfilter
+from .._genericfilter import GenericFilter
+from ..rules.person import HasIdOf
+
+class CountedHasIdOf(HasIdOf):
+    """HasIdOf counting the calls of its candidates method."""
+
+    calls = 0
+
+    def candidates(self, db):
+        CountedHasIdOf.calls += 1
+        return HasIdOf.candidates(self, db)
+
+class GenericFilterTest(GrampsDbBaseTest):
+    """Test the use of the candidates of the rules by GenericFilter."""
+
+    def _apply_both_ways(self, rules, logical_op='and'):
+        """
+        Return the results of the filter with the candidates fetched one by
+        one, and with a cursor over all the people.
+        """
+        person_filter = GenericFilter()
+        person_filter.set_logical_op(logical_op)
+        for rule in rules:
+            person_filter.add_rule(rule)
+        fetched = person_filter.apply(self._db)
+        fraction = _genericfilter.CANDIDATES_FRACTION
+        _genericfilter.CANDIDATES_FRACTION = 0
+        try:
+            scanned = person_filter.apply(self._db)
+        finally:
+            _genericfilter.CANDIDATES_FRACTION = fraction
+        return fetched, scanned
+
+    def test_candidates(self):
+        """check that fetching the candidates gives the same handles as the
+        cursor."""
+
+        citation = self._add_source()
+        people = [self._add_person_with_sources([citation])
+                  for index in range(10)]
+        gramps_id = people[3].get_gramps_id()
+
+        fetched, scanned = self._apply_both_ways([HasIdOf([gramps_id])])
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(fetched, scanned)
+        fetched, scanned = self._apply_both_ways(
+            [HasIdOf([gramps_id]), HasIdOf([people[5].get_gramps_id()])],
+            'or')
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(sorted(fetched), sorted(scanned))
+
+    def test_match(self):
+        """check that matching one object does not look for candidates."""
+
+        citation = self._add_source()
+        person = self._add_person_with_sources([citation])
+        person_filter = GenericFilter()
+        person_filter.add_rule(CountedHasIdOf([person.get_gramps_id()]))
+        CountedHasIdOf.calls = 0
+
+        self.assertTrue(person_filter.match(person.get_handle(), self._db))
+        self.assertEqual(CountedHasIdOf.calls, 0)
+        person_filter.apply(self._db)
+        self.assertEqual(CountedHasIdOf.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
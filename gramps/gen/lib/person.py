@@ -228,8 +228,8 @@ class Person(CitationBase, NoteBase, AttributeBase, MediaBase,
          self.death_ref_index,    #  5
          self.birth_ref_index,    #  6
          event_ref_list,          #  7
-         self.family_list,        #  8
-         self.parent_family_list, #  9
+         family_list,             #  8
+         parent_family_list,      #  9
          media_list,              # 10
          address_list,            # 11
          attribute_list,          # 12
@@ -243,6 +243,8 @@ class Person(CitationBase, NoteBase, AttributeBase, MediaBase,
          person_ref_list,         # 20
          ) = data
 
+        self.family_list = list(family_list)
+        self.parent_family_list = list(parent_family_list)
         self.primary_name = Name()
         self.primary_name.unserialize(primary_name)
         self.alternate_names = [Name().unserialize(name)
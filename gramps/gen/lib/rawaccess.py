@@ -0,0 +1,227 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Field accessors for serialized (raw) objects.
+
+Code that walks the database with cursors gets the tuples created by the
+serialize methods. Building an object from every tuple only to read one or
+two of its fields is costly, so this module provides getters that read the
+fields straight from the tuples, by name instead of by index:
+
+    >>> PERSON.gender(data)
+    >>> PERSON.getter('primary_name.first_name')(data)
+
+The getters are generated from the field tables below, which must follow
+the order of the serialize methods.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from operator import itemgetter
+
+#-------------------------------------------------------------------------
+#
+# Field tables
+#
+#-------------------------------------------------------------------------
+# Fields holding a serialized secondary object are given as (name, class
+# name), so that paths can continue into them.
+FIELDS = {
+    'Person': ('handle', 'gramps_id', 'gender', ('primary_name', 'Name'),
+               'alternate_names', 'death_ref_index', 'birth_ref_index',
+               'event_ref_list', 'family_list', 'parent_family_list',
+               'media_list', 'address_list', 'attribute_list', 'urls',
+               'lds_ord_list', 'citation_list', 'note_list', 'change',
+               'tag_list', 'private', 'person_ref_list'),
+    'Family': ('handle', 'gramps_id', 'father_handle', 'mother_handle',
+               'child_ref_list', ('type', 'GrampsType'), 'event_ref_list',
+               'media_list', 'attribute_list', 'lds_ord_list',
+               'citation_list', 'note_list', 'change', 'tag_list',
+               'private'),
+    'Event': ('handle', 'gramps_id', ('type', 'GrampsType'),
+              ('date', 'Date'), 'description', 'place', 'citation_list',
+              'note_list', 'media_list', 'attribute_list', 'change',
+              'tag_list', 'private'),
+    'Place': ('handle', 'gramps_id', 'title', 'long', 'lat', 'main_loc',
+              'alt_loc', 'urls', 'media_list', 'citation_list', 'note_list',
+              'change', 'tag_list', 'private'),
+    'Source': ('handle', 'gramps_id', 'title', 'author', 'pubinfo',
+               'note_list', 'media_list', 'abbrev', 'change',
+               'attribute_list', 'reporef_list', 'tag_list', 'private'),
+    'Citation': ('handle', 'gramps_id', ('date', 'Date'), 'page',
+                 'confidence', 'source_handle', 'note_list', 'media_list',
+                 'attribute_list', 'change', 'tag_list', 'private'),
+    'MediaObject': ('handle', 'gramps_id', 'path', 'mime', 'desc',
+                    'checksum', 'attribute_list', 'citation_list',
+                    'note_list', 'change', ('date', 'Date'), 'tag_list',
+                    'private'),
+    'Repository': ('handle', 'gramps_id', ('type', 'GrampsType'), 'name',
+                   'note_list', 'address_list', 'urls', 'change',
+                   'tag_list', 'private'),
+    'Note': ('handle', 'gramps_id', 'text', 'format', ('type', 'GrampsType'),
+             'change', 'tag_list', 'private'),
+    'Tag': ('handle', 'name', 'color', 'priority', 'change'),
+
+    'Name': ('private', 'citation_list', 'note_list', ('date', 'Date'),
+             'first_name', 'surname_list', 'suffix', 'title',
+             ('type', 'GrampsType'), 'group_as', 'sort_as', 'display_as',
+             'call', 'nick', 'famnick'),
+    'Surname': ('surname', 'prefix', 'primary', ('origintype', 'GrampsType'),
+                'connector'),
+    'EventRef': ('private', 'note_list', 'attribute_list', 'ref',
+                 ('role', 'GrampsType')),
+    'ChildRef': ('private', 'citation_list', 'note_list', 'ref',
+                 ('frel', 'GrampsType'), ('mrel', 'GrampsType')),
+    'Date': ('calendar', 'modifier', 'quality', 'dateval', 'text', 'sortval',
+             'newyear'),
+    'GrampsType': ('value', 'string'),
+    }
+
+def _field_table(class_name):
+    """
+    Return a dictionary mapping the field names of class_name to their
+    index and the class name of their value, if any.
+    """
+    table = {}
+    for index, field in enumerate(FIELDS[class_name]):
+        if isinstance(field, tuple):
+            table[field[0]] = (index, field[1])
+        else:
+            table[field] = (index, None)
+    return table
+
+_FIELD_TABLES = dict((class_name, _field_table(class_name))
+                     for class_name in FIELDS)
+
+def field_indexes(class_name, path):
+    """
+    Return the list of indexes leading to the field at path, a dotted
+    list of field names, in the serialized data of class_name.
+    """
+    indexes = []
+    for name in path.split('.'):
+        if class_name is None:
+            raise KeyError(path)
+        index, class_name = _FIELD_TABLES[class_name][name]
+        indexes.append(index)
+    return indexes
+
+def make_getter(class_name, path):
+    """
+    Return a function returning the field at path from the serialized data
+    of class_name.
+    """
+    indexes = field_indexes(class_name, path)
+    if len(indexes) == 1:
+        return itemgetter(indexes[0])
+    def getter(data):
+        for index in indexes:
+            data = data[index]
+        return data
+    return getter
+
+#-------------------------------------------------------------------------
+#
+# RawAccess
+#
+#-------------------------------------------------------------------------
+class RawAccess(object):
+    """
+    The getters of the serialized data of a class. Every field of the
+    class is available as an attribute with the name of the field.
+    """
+
+    def __init__(self, class_name):
+        self.class_name = class_name
+        self.__getters = {}
+        for name in _FIELD_TABLES[class_name]:
+            setattr(self, name, make_getter(class_name, name))
+
+    def getter(self, path):
+        """
+        Return a function returning the field at path, a dotted list of
+        field names, from the serialized data.
+        """
+        try:
+            return self.__getters[path]
+        except KeyError:
+            getter = self.__getters[path] = make_getter(self.class_name, path)
+            return getter
+
+PERSON = RawAccess('Person')
+FAMILY = RawAccess('Family')
+EVENT = RawAccess('Event')
+PLACE = RawAccess('Place')
+SOURCE = RawAccess('Source')
+CITATION = RawAccess('Citation')
+MEDIA = RawAccess('MediaObject')
+REPOSITORY = RawAccess('Repository')
+NOTE = RawAccess('Note')
+TAG = RawAccess('Tag')
+
+EVENT_REF = RawAccess('EventRef')
+CHILD_REF = RawAccess('ChildRef')
+NAME = RawAccess('Name')
+SURNAME = RawAccess('Surname')
+DATE = RawAccess('Date')
+
+# The getters of the primary objects, by class name
+RAW_ACCESS = dict((access.class_name, access) for access in
+                  (PERSON, FAMILY, EVENT, PLACE, SOURCE, CITATION, MEDIA,
+                   REPOSITORY, NOTE, TAG))
+
+#-------------------------------------------------------------------------
+#
+# Helper functions
+#
+#-------------------------------------------------------------------------
+_NAME_SURNAME_LIST = PERSON.getter('primary_name.surname_list')
+
+def primary_surnames(data):
+    """
+    Return the surnames of the primary name of the serialized person data.
+    """
+    return [SURNAME.surname(surname) for surname in _NAME_SURNAME_LIST(data)]
+
+def birth_ref(data):
+    """
+    Return the serialized birth event reference of the serialized person
+    data, or None.
+    """
+    index = PERSON.birth_ref_index(data)
+    event_ref_list = PERSON.event_ref_list(data)
+    if 0 <= index < len(event_ref_list):
+        return event_ref_list[index]
+    return None
+
+def death_ref(data):
+    """
+    Return the serialized death event reference of the serialized person
+    data, or None.
+    """
+    index = PERSON.death_ref_index(data)
+    event_ref_list = PERSON.event_ref_list(data)
+    if 0 <= index < len(event_ref_list):
+        return event_ref_list[index]
+    return None
@@ -104,7 +104,8 @@ class StyledTextTag(object):
         :type data: tuple
         
         """
-        (the_name, self.value, self.ranges) = data
+        (the_name, self.value, ranges) = data
+        self.ranges = list(ranges)
         
         self.name = StyledTextTagType()
         self.name.unserialize(the_name)
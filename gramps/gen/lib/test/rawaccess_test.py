@@ -0,0 +1,101 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+""" unittest for the raw data accessors """
+
+import unittest
+
+from .. import (Person, Family, Event, Place, Source, Citation, MediaObject,
+                Repository, Note, Tag, Name, Surname, EventRef, EventType,
+                Date)
+from ..rawaccess import (FIELDS, RAW_ACCESS, PERSON, EVENT, primary_surnames,
+                         birth_ref, death_ref)
+
+class RawAccessTest(unittest.TestCase):
+
+    def test_field_count(self):
+        """check that the field tables have a field for every item of the
+        serialized data."""
+        for cls in (Person, Family, Event, Place, Source, Citation,
+                    MediaObject, Repository, Note, Tag, Name, Surname,
+                    EventRef, Date):
+            self.assertEqual(len(FIELDS[cls.__name__]),
+                             len(cls().serialize()), cls.__name__)
+        self.assertEqual(sorted(RAW_ACCESS),
+                         sorted(cls.__name__ for cls in
+                                (Person, Family, Event, Place, Source,
+                                 Citation, MediaObject, Repository, Note,
+                                 Tag)))
+
+    def test_common_fields(self):
+        """check the fields shared by the primary objects."""
+        for cls in (Person, Family, Event, Place, Source, Citation,
+                    MediaObject, Repository, Note):
+            obj = cls()
+            obj.set_handle("H1")
+            obj.set_gramps_id("X0001")
+            obj.set_privacy(True)
+            obj.add_tag("T1")
+            obj.change = 1234
+            access = RAW_ACCESS[cls.__name__]
+            data = obj.serialize()
+            self.assertEqual(access.handle(data), "H1")
+            self.assertEqual(access.gramps_id(data), "X0001")
+            self.assertEqual(access.private(data), True)
+            self.assertEqual(access.tag_list(data), ["T1"])
+            self.assertEqual(access.change(data), 1234)
+
+    def test_person(self):
+        """check the person fields and helpers."""
+        person = Person()
+        person.set_gender(Person.FEMALE)
+        name = Name()
+        name.set_first_name("Ann")
+        surname = Surname()
+        surname.set_surname("Smith")
+        name.set_surname_list([surname])
+        person.set_primary_name(name)
+        event_ref = EventRef()
+        event_ref.set_reference_handle("E1")
+        person.add_event_ref(event_ref)
+        person.set_birth_ref(event_ref)
+        data = person.serialize()
+
+        self.assertEqual(PERSON.gender(data), Person.FEMALE)
+        self.assertEqual(PERSON.getter('primary_name.first_name')(data),
+                         "Ann")
+        self.assertEqual(primary_surnames(data), ["Smith"])
+        self.assertEqual(birth_ref(data), event_ref.serialize())
+        self.assertIsNone(death_ref(data))
+
+    def test_event(self):
+        """check the paths into secondary objects."""
+        event = Event()
+        event.set_type(EventType.BIRTH)
+        event.set_date_object(Date(1900, 5, 1))
+        data = event.serialize()
+
+        self.assertEqual(EVENT.getter('type.value')(data), EventType.BIRTH)
+        self.assertEqual(EVENT.getter('date.sortval')(data),
+                         event.get_date_object().sortval)
+        self.assertRaises(KeyError, EVENT.getter, 'description.value')
+
+if __name__ == "__main__":
+    unittest.main()
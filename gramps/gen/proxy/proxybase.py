@@ -99,6 +99,11 @@ class ProxyDbBase(DbReadBase):
         self.db = self.basedb = db
         while isinstance(self.basedb, ProxyDbBase):
             self.basedb = self.basedb.db
+        # Count the use of the proxy with the statistics of the database
+        statistics = getattr(self.basedb, 'statistics', None)
+        if statistics is not None:
+            statistics.instrument(self, self.__class__.__name__ + '.',
+                                  removable=False)
         self.name_formats = db.name_formats
         self.bookmarks = db.bookmarks
         self.family_bookmarks = db.family_bookmarks
@@ -163,43 +168,43 @@ class ProxyDbBase(DbReadBase):
     include_tag = \
         None
         
-    def get_person_cursor(self):
+    def get_person_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_person_data, 
                            self.get_person_handles)
 
-    def get_family_cursor(self):
+    def get_family_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_family_data,
                            self.get_family_handles)
 
-    def get_event_cursor(self):
+    def get_event_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_event_data,
                            self.get_event_handles)
 
-    def get_source_cursor(self):
+    def get_source_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_source_data,
                            self.get_source_handles)
 
-    def get_citation_cursor(self):
+    def get_citation_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_citation_data,
                            self.get_citation_handles)
 
-    def get_place_cursor(self):
+    def get_place_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_place_data,
                            self.get_place_handles)
 
-    def get_media_cursor(self):
+    def get_media_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_object_data,
                            self.get_media_object_handles)
 
-    def get_repository_cursor(self):
+    def get_repository_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_repository_data,
                            self.get_repository_handles)
 
-    def get_note_cursor(self):
+    def get_note_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_note_data,
                            self.get_note_handles)
 
-    def get_tag_cursor(self):
+    def get_tag_cursor(self, *args, **kwargs):
         return ProxyCursor(self.get_raw_tag_data,
                            self.get_tag_handles)
 
@@ -353,6 +358,15 @@ class ProxyDbBase(DbReadBase):
         """
         return filter(self.include_place, self.db.iter_place_handles())
      
+    def find_places_in_bbox(self, lat_min, lon_min, lat_max, lon_max):
+        """
+        Return an iterator over handles for Places whose coordinates lie in
+        the box between the given latitudes and longitudes, in degrees.
+        """
+        return filter(self.include_place,
+                      self.db.find_places_in_bbox(lat_min, lon_min,
+                                                  lat_max, lon_max))
+
     def iter_media_object_handles(self):
         """
         Return an iterator over database handles, one handle for each Media
@@ -381,6 +395,26 @@ class ProxyDbBase(DbReadBase):
         """
         return filter(self.include_tag, self.db.iter_tag_handles())
 
+    def iter_changed_since(self, table, timestamp):
+        """
+        Return an iterator over handles for the objects of the table, a
+        table name such as 'Person' or 'Media', that were last changed at or
+        after timestamp, in order of change time.
+        """
+        include = {
+            'Person': self.include_person,
+            'Family': self.include_family,
+            'Source': self.include_source,
+            'Citation': self.include_citation,
+            'Event': self.include_event,
+            'Media': self.include_media_object,
+            'Place': self.include_place,
+            'Repository': self.include_repository,
+            'Note': self.include_note,
+            'Tag': self.include_tag,
+            }[table]
+        return filter(include, self.db.iter_changed_since(table, timestamp))
+
     @staticmethod
     def __iter_object(selector, method):
         """ Helper function to return an iterator over an object class """
@@ -561,7 +595,103 @@ class ProxyDbBase(DbReadBase):
         """
         return self.gfilter(self.include_tag,
                             self.db.get_tag_from_handle(handle))
-        
+
+    def __get_objects(self, handles, batch_name, single_name, selector):
+        """
+        Helper function for the get_<objects>_from_handles methods.
+
+        If the proxy only filters objects through its include_<object>
+        predicate, the batch call is passed through to the underlying
+        database. Proxies that change the objects themselves (by overriding
+        get_<object>_from_handle) get them one by one.
+        """
+        if getattr(type(self), single_name) == \
+                getattr(ProxyDbBase, single_name):
+            return [self.gfilter(selector, obj)
+                    for obj in getattr(self.db, batch_name)(handles)]
+        get_object = getattr(self, single_name)
+        return [get_object(handle) for handle in handles]
+
+    def get_people_from_handles(self, handles):
+        """
+        Finds the Person objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_people_from_handles',
+                                  'get_person_from_handle',
+                                  self.include_person)
+
+    def get_families_from_handles(self, handles):
+        """
+        Finds the Family objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_families_from_handles',
+                                  'get_family_from_handle',
+                                  self.include_family)
+
+    def get_events_from_handles(self, handles):
+        """
+        Finds the Event objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_events_from_handles',
+                                  'get_event_from_handle',
+                                  self.include_event)
+
+    def get_sources_from_handles(self, handles):
+        """
+        Finds the Source objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_sources_from_handles',
+                                  'get_source_from_handle',
+                                  self.include_source)
+
+    def get_citations_from_handles(self, handles):
+        """
+        Finds the Citation objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_citations_from_handles',
+                                  'get_citation_from_handle',
+                                  self.include_citation)
+
+    def get_places_from_handles(self, handles):
+        """
+        Finds the Place objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_places_from_handles',
+                                  'get_place_from_handle',
+                                  self.include_place)
+
+    def get_media_objects_from_handles(self, handles):
+        """
+        Finds the MediaObject objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_media_objects_from_handles',
+                                  'get_object_from_handle',
+                                  self.include_media_object)
+
+    def get_repositories_from_handles(self, handles):
+        """
+        Finds the Repository objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_repositories_from_handles',
+                                  'get_repository_from_handle',
+                                  self.include_repository)
+
+    def get_notes_from_handles(self, handles):
+        """
+        Finds the Note objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_notes_from_handles',
+                                  'get_note_from_handle',
+                                  self.include_note)
+
+    def get_tags_from_handles(self, handles):
+        """
+        Finds the Tag objects for the passed list of handles.
+        """
+        return self.__get_objects(handles, 'get_tags_from_handles',
+                                  'get_tag_from_handle',
+                                  self.include_tag)
+
     def get_person_from_gramps_id(self, val):
         """
         Finds a Person in the database from the passed GRAMPS ID.
@@ -903,6 +1033,14 @@ class ProxyDbBase(DbReadBase):
         """returns the default media path of the database"""
         return self.db.get_mediapath()
 
+    def get_check_time(self):
+        """returns the time of the last check that found no problem"""
+        return self.db.get_check_time()
+
+    def get_commit_time(self):
+        """returns the time of the last committed transaction"""
+        return self.db.get_commit_time()
+
     def get_gramps_ids(self, obj_key):
         return self.db.get_gramps_ids(obj_key)
 
@@ -951,6 +1089,13 @@ class ProxyDbBase(DbReadBase):
         """
         self.basedb.close()
 
+    def get_reference_count(self, handle):
+        """
+        Return the number of references to the object with the given handle
+        that are visible through the proxy.
+        """
+        return sum(1 for dummy in self.find_backlink_handles(handle))
+
     def find_initial_person(self):
         """
         Find an initial person, given that they might not be
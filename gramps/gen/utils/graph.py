@@ -0,0 +1,459 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+The parent, child and spouse links of the people of a database.
+
+Walking a family tree through the database reads and unserializes a family
+and a person for every link followed. A KinshipGraph reads the person and
+family tables once, in one pass over their raw data, and keeps the links in
+arrays of integer ids, so that the ancestors or descendants of a person are
+found without reading the database again. The graph of a database sending
+signals is kept up to date from them.
+
+Use get_kinship(db) to get the links of a database: the shared graph of a
+database sending signals, or a KinshipLookup reading the objects from the
+database, for the proxies and other short-lived databases where building a
+graph would cost more than it saves.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from array import array
+from collections import deque
+import weakref
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..lib.rawaccess import PERSON, FAMILY, CHILD_REF
+from .callback import Callback
+
+# Id of a missing person or family
+_NONE = -1
+
+_CHILD_FREL = CHILD_REF.getter('frel.value')
+_CHILD_MREL = CHILD_REF.getter('mrel.value')
+
+_GRAPHS = weakref.WeakKeyDictionary()
+
+def get_kinship(db):
+    """
+    Return the kinship links of the database db: a KinshipGraph shared by
+    the users of db, if db sends signals to keep it up to date, or else a
+    KinshipLookup.
+    """
+    if not isinstance(db, Callback):
+        return KinshipLookup(db)
+    graph = _GRAPHS.get(db)
+    if graph is None or not graph.is_current():
+        graph = _GRAPHS[db] = KinshipGraph(db)
+    return graph
+
+def _handle(handle):
+    """
+    Return the handle as text.
+    """
+    if isinstance(handle, bytes) and not isinstance(handle, str):
+        return handle.decode('utf-8')
+    return handle
+
+#-------------------------------------------------------------------------
+#
+# KinshipLookup
+#
+#-------------------------------------------------------------------------
+class KinshipLookup(object):
+    """
+    The kinship links of a database, read from the person and family
+    objects of the database for every query.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def has_person(self, person_handle):
+        """
+        Return True if the person is in the database.
+        """
+        return self.db.has_person_handle(person_handle)
+
+    def get_parent_family_handles(self, person_handle):
+        """
+        Return the handles of the families the person is a child of, the
+        main one first.
+        """
+        person = self.db.get_person_from_handle(person_handle)
+        if person is None:
+            return []
+        return person.get_parent_family_handle_list()
+
+    def get_family_handles(self, person_handle):
+        """
+        Return the handles of the families the person is a parent of.
+        """
+        person = self.db.get_person_from_handle(person_handle)
+        if person is None:
+            return []
+        return person.get_family_handle_list()
+
+    def get_parent_handles(self, family_handle):
+        """
+        Return the handles of the father and the mother of the family, None
+        if unknown.
+        """
+        family = self.db.get_family_from_handle(family_handle)
+        if family is None:
+            return (None, None)
+        return (family.get_father_handle() or None,
+                family.get_mother_handle() or None)
+
+    def get_child_links(self, family_handle):
+        """
+        Return the (handle, father relation, mother relation) of the
+        children of the family, the relations being ChildRefType values.
+        """
+        family = self.db.get_family_from_handle(family_handle)
+        if family is None:
+            return []
+        return [(ref.ref, int(ref.get_father_relation()),
+                 int(ref.get_mother_relation()))
+                for ref in family.get_child_ref_list()]
+
+    def get_ancestors(self, person_handle, main_family=False):
+        """
+        Return the set of the handles of the ancestors of the person. If
+        main_family is True, only the main family of parents of each person
+        is followed.
+        """
+        ancestors = set()
+        todo = deque([_handle(person_handle)])
+        while todo:
+            family_handles = self.get_parent_family_handles(todo.popleft())
+            if main_family:
+                family_handles = family_handles[:1]
+            for family_handle in family_handles:
+                for parent in self.get_parent_handles(family_handle):
+                    if parent and parent not in ancestors:
+                        ancestors.add(parent)
+                        todo.append(parent)
+        return ancestors
+
+    def get_spouse_handles(self, person_handle):
+        """
+        Return the handles of the spouses of the person, the other parents
+        of the families of the person.
+        """
+        person_handle = _handle(person_handle)
+        spouses = []
+        for family_handle in self.get_family_handles(person_handle):
+            for parent in self.get_parent_handles(family_handle):
+                if parent and parent != person_handle:
+                    spouses.append(parent)
+        return spouses
+
+    def get_descendants(self, person_handle):
+        """
+        Return the set of the handles of the descendants of the person.
+        """
+        descendants = set()
+        todo = deque([_handle(person_handle)])
+        while todo:
+            for family_handle in self.get_family_handles(todo.popleft()):
+                for link in self.get_child_links(family_handle):
+                    if link[0] not in descendants:
+                        descendants.add(link[0])
+                        todo.append(link[0])
+        return descendants
+
+#-------------------------------------------------------------------------
+#
+# KinshipGraph
+#
+#-------------------------------------------------------------------------
+class KinshipGraph(KinshipLookup):
+    """
+    The kinship links of a database, held in arrays indexed by dense
+    integer ids of the people and families.
+
+    The graph is read from the database the first time it is queried, and
+    then kept up to date from the person and family signals of the
+    database: the records changed are read again before the next query.
+    """
+
+    def __init__(self, db):
+        # the graph is kept by _GRAPHS as long as db lives: it must not
+        # keep db alive itself
+        KinshipLookup.__init__(self, weakref.proxy(db))
+        self.__db_ref = weakref.ref(db)
+        self.path = db.get_save_path()
+        self.__stale = True
+        self.__changed_people = set()
+        self.__changed_families = set()
+        self.__clear()
+        self.__signal_keys = []
+        for (signal, method) in (
+                ('person-add', self.__people_changed),
+                ('person-update', self.__people_changed),
+                ('person-delete', self.__people_changed),
+                ('person-rebuild', self.__rebuilt),
+                ('family-add', self.__families_changed),
+                ('family-update', self.__families_changed),
+                ('family-delete', self.__families_changed),
+                ('family-rebuild', self.__rebuilt)):
+            self.__signal_keys.append(db.connect(signal, method))
+
+    def __clear(self):
+        """
+        Forget all the people and families.
+        """
+        self.person_ids = {}
+        self.person_handles = []
+        # family ids of the families of parents of each person, main first
+        self.parent_families = []
+        # family ids of the families of each person as a parent
+        self.families = []
+        # 1 for the people in the database, 0 for those only referred to
+        self.people = array('b')
+        self.family_ids = {}
+        self.family_handles = []
+        # person ids of the father and mother of each family
+        self.fathers = array('l')
+        self.mothers = array('l')
+        # person ids of the children of each family, and their relations
+        # to the father and the mother
+        self.children = []
+        self.child_frels = []
+        self.child_mrels = []
+
+    def is_current(self):
+        """
+        Return True if the graph still follows the database: the database
+        has not been closed or loaded with another family tree since.
+        """
+        return self.db.is_open() and self.db.get_save_path() == self.path
+
+    def disconnect(self):
+        """
+        Stop following the changes of the database.
+        """
+        for key in self.__signal_keys:
+            self.db.disconnect(key)
+        self.__signal_keys = []
+        db = self.__db_ref()
+        if db is not None and _GRAPHS.get(db) is self:
+            del _GRAPHS[db]
+
+    def __people_changed(self, handles):
+        self.__changed_people.update(handles)
+
+    def __families_changed(self, handles):
+        self.__changed_families.update(handles)
+
+    def __rebuilt(self, *args):
+        self.__stale = True
+
+    def __person_id(self, handle):
+        """
+        Return the id of the person handle, giving it one if it has none.
+        """
+        person_id = self.person_ids.get(handle)
+        if person_id is None:
+            person_id = self.person_ids[handle] = len(self.person_handles)
+            self.person_handles.append(handle)
+            self.parent_families.append(array('l'))
+            self.families.append(array('l'))
+            self.people.append(0)
+        return person_id
+
+    def __family_id(self, handle):
+        """
+        Return the id of the family handle, giving it one if it has none.
+        """
+        family_id = self.family_ids.get(handle)
+        if family_id is None:
+            family_id = self.family_ids[handle] = len(self.family_handles)
+            self.family_handles.append(handle)
+            self.fathers.append(_NONE)
+            self.mothers.append(_NONE)
+            self.children.append(array('l'))
+            self.child_frels.append(array('l'))
+            self.child_mrels.append(array('l'))
+        return family_id
+
+    def __set_person(self, handle, data):
+        """
+        Set the families of the person handle from its raw data, None if
+        the person was removed.
+        """
+        person_id = self.__person_id(handle)
+        if data is None:
+            self.parent_families[person_id] = array('l')
+            self.families[person_id] = array('l')
+            self.people[person_id] = 0
+            return
+        self.people[person_id] = 1
+        self.parent_families[person_id] = array('l',
+            [self.__family_id(family_handle)
+             for family_handle in PERSON.parent_family_list(data)])
+        self.families[person_id] = array('l',
+            [self.__family_id(family_handle)
+             for family_handle in PERSON.family_list(data)])
+
+    def __set_family(self, handle, data):
+        """
+        Set the parents and children of the family handle from its raw
+        data, None if the family was removed.
+        """
+        family_id = self.__family_id(handle)
+        children = array('l')
+        frels = array('l')
+        mrels = array('l')
+        if data is None:
+            self.fathers[family_id] = self.mothers[family_id] = _NONE
+        else:
+            father_handle = FAMILY.father_handle(data)
+            mother_handle = FAMILY.mother_handle(data)
+            self.fathers[family_id] = (self.__person_id(father_handle)
+                                       if father_handle else _NONE)
+            self.mothers[family_id] = (self.__person_id(mother_handle)
+                                       if mother_handle else _NONE)
+            for child_ref in FAMILY.child_ref_list(data):
+                children.append(self.__person_id(CHILD_REF.ref(child_ref)))
+                frels.append(_CHILD_FREL(child_ref))
+                mrels.append(_CHILD_MREL(child_ref))
+        self.children[family_id] = children
+        self.child_frels[family_id] = frels
+        self.child_mrels[family_id] = mrels
+
+    def __build(self):
+        """
+        Read all the people and families of the database.
+        """
+        self.__clear()
+        self.__changed_people.clear()
+        self.__changed_families.clear()
+        self.__stale = False
+        with self.db.get_family_cursor(buffered=True) as cursor:
+            for (handle, data) in cursor:
+                self.__set_family(_handle(handle), data)
+        with self.db.get_person_cursor(buffered=True) as cursor:
+            for (handle, data) in cursor:
+                self.__set_person(_handle(handle), data)
+
+    def __update(self):
+        """
+        Bring the graph up to date with the database.
+        """
+        if self.__stale:
+            self.__build()
+            return
+        while self.__changed_families:
+            handle = self.__changed_families.pop()
+            self.__set_family(handle, self.db.get_raw_family_data(handle))
+        while self.__changed_people:
+            handle = self.__changed_people.pop()
+            self.__set_person(handle, self.db.get_raw_person_data(handle))
+
+    def has_person(self, person_handle):
+        self.__update()
+        person_id = self.person_ids.get(_handle(person_handle))
+        return person_id is not None and self.people[person_id] == 1
+
+    def get_parent_family_handles(self, person_handle):
+        self.__update()
+        person_id = self.person_ids.get(_handle(person_handle))
+        if person_id is None:
+            return []
+        return [self.family_handles[family_id]
+                for family_id in self.parent_families[person_id]]
+
+    def get_family_handles(self, person_handle):
+        self.__update()
+        person_id = self.person_ids.get(_handle(person_handle))
+        if person_id is None:
+            return []
+        return [self.family_handles[family_id]
+                for family_id in self.families[person_id]]
+
+    def get_parent_handles(self, family_handle):
+        self.__update()
+        family_id = self.family_ids.get(_handle(family_handle))
+        if family_id is None:
+            return (None, None)
+        return (self.__person_handle(self.fathers[family_id]),
+                self.__person_handle(self.mothers[family_id]))
+
+    def __person_handle(self, person_id):
+        """
+        Return the handle of the person id, None for _NONE.
+        """
+        if person_id == _NONE:
+            return None
+        return self.person_handles[person_id]
+
+    def get_child_links(self, family_handle):
+        self.__update()
+        family_id = self.family_ids.get(_handle(family_handle))
+        if family_id is None:
+            return []
+        return [(self.person_handles[child_id], frel, mrel)
+                for (child_id, frel, mrel) in zip(self.children[family_id],
+                                                  self.child_frels[family_id],
+                                                  self.child_mrels[family_id])]
+
+    def get_ancestors(self, person_handle, main_family=False):
+        self.__update()
+        person_id = self.person_ids.get(_handle(person_handle))
+        if person_id is None:
+            return set()
+        seen = set()
+        todo = deque([person_id])
+        while todo:
+            family_ids = self.parent_families[todo.popleft()]
+            if main_family:
+                family_ids = family_ids[:1]
+            for family_id in family_ids:
+                for parent_id in (self.fathers[family_id],
+                                  self.mothers[family_id]):
+                    if parent_id != _NONE and parent_id not in seen:
+                        seen.add(parent_id)
+                        todo.append(parent_id)
+        return set(self.person_handles[parent_id] for parent_id in seen)
+
+    def get_descendants(self, person_handle):
+        self.__update()
+        person_id = self.person_ids.get(_handle(person_handle))
+        if person_id is None:
+            return set()
+        seen = set()
+        todo = deque([person_id])
+        while todo:
+            for family_id in self.families[todo.popleft()]:
+                for child_id in self.children[family_id]:
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        todo.append(child_id)
+        return set(self.person_handles[child_id] for child_id in seen)
@@ -76,6 +76,9 @@ if 'N' == South or 'S' == North or 'E' == West or 'W' == East:
     translate_en_loc['W'] = 'W'
 # end localisation part
 
+# mean radius of the earth in km, used for distances between positions
+EARTH_RADIUS = 6371.0
+
 
 #------------------
 #
@@ -557,7 +560,28 @@ def conv_lat_lon(latitude, longitude, format="D.D4"):
                           ("%03d%02d%06.3f" % (deg_lon, min_lon+1, 0.))
         return str_lat + str_lon
 
-
+def conv_lat_lon_float(latitude, longitude):
+    """
+    Convert given string latitude and longitude to a tuple of 2 floats in
+    degree notation, as used for the spatial place index and queries.
+    If a coordinate is missing or conversion fails: returns (None, None)
+    """
+    if not (latitude.strip() and longitude.strip()):
+        return (None, None)
+    lat, lon = conv_lat_lon(latitude, longitude, "D.D8")
+    if lat is None or lon is None:
+        return (None, None)
+    return (float(lat), float(lon))
+
+def lat_lon_distance(lat1, lon1, lat2, lon2):
+    """
+    Return the great circle distance in kilometres between two positions
+    given in degrees.
+    """
+    lat1, lon1, lat2, lon2 = [math.radians(x) for x in (lat1, lon1, lat2, lon2)]
+    hav = (math.sin((lat2 - lat1) / 2.) ** 2 +
+           math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2.) ** 2)
+    return 2. * EARTH_RADIUS * math.asin(min(1., math.sqrt(hav)))
 
 def atanh(x):
     """arctangent hyperbolicus"""
@@ -0,0 +1,91 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+import unittest
+
+from ...db import DbTxn
+from ...db.test.grampsdbtestbase import GrampsDbBaseTest
+from ...lib import Person, Family, ChildRef
+from ..graph import get_kinship, KinshipGraph, KinshipLookup
+
+class KinshipGraphTest(GrampsDbBaseTest):
+    """Test the kinship links of a database."""
+
+    def _add_family(self, father, mother, children):
+        family = Family()
+        family.set_father_handle(father.get_handle())
+        family.set_mother_handle(mother.get_handle())
+        for child in children:
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(child.get_handle())
+            family.add_child_ref(child_ref)
+        with DbTxn("Add Family", self._db) as trans:
+            self._db.add_family(family, trans)
+            for parent in (father, mother):
+                parent.add_family_handle(family.get_handle())
+                self._db.commit_person(parent, trans)
+            for child in children:
+                child.add_parent_family_handle(family.get_handle())
+                self._db.commit_person(child, trans)
+        return family
+
+    def _add_people(self, count):
+        people = []
+        with DbTxn("Add People", self._db) as trans:
+            for index in range(count):
+                person = Person()
+                self._db.add_person(person, trans)
+                people.append(person)
+        return people
+
+    def test_ancestors_and_descendants(self):
+        """check that the graph and the lookup find the same relatives,
+        and that the graph follows the changes of the database."""
+
+        (father, mother, child, spouse, grandchild) = self._add_people(5)
+        self._add_family(father, mother, [child])
+
+        graph = get_kinship(self._db)
+        self.assertIsInstance(graph, KinshipGraph)
+        self.assertEqual(graph.get_ancestors(child.get_handle()),
+                         set([father.get_handle(), mother.get_handle()]))
+        self.assertEqual(graph.get_descendants(father.get_handle()),
+                         set([child.get_handle()]))
+
+        family = self._add_family(child, spouse, [grandchild])
+        lookup = KinshipLookup(self._db)
+        for kinship in (graph, lookup):
+            self.assertEqual(kinship.get_ancestors(grandchild.get_handle()),
+                             set([father.get_handle(), mother.get_handle(),
+                                  child.get_handle(), spouse.get_handle()]))
+            self.assertEqual(kinship.get_descendants(mother.get_handle()),
+                             set([child.get_handle(),
+                                  grandchild.get_handle()]))
+            self.assertEqual(kinship.get_spouse_handles(child.get_handle()),
+                             [spouse.get_handle()])
+            self.assertEqual(kinship.get_parent_handles(family.get_handle()),
+                             (child.get_handle(), spouse.get_handle()))
+        self.assertIs(get_kinship(self._db), graph)
+
+def testSuite():
+    return unittest.makeSuite(KinshipGraphTest, 'test')
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(testSuite())
@@ -77,7 +77,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from .user import User
 from .dialog import ErrorDialog, QuestionDialog, QuestionDialog2
-from gramps.gen.db import DbBsddb
+from gramps.gen.db import get_backend, make_database, create_database
 from .pluginmanager import GuiPluginManager
 from gramps.cli.clidbman import CLIDbManager, NAME_FILE, time_val
 from .ddtargets import DdTargets
@@ -530,8 +530,7 @@ class DbManager(CLIDbManager):
         new_path, newname = self._create_new_db("%s : %s" % (parent_name, name))
         
         self.__start_cursor(_("Extracting archive..."))
-        dbclass = DbBsddb
-        dbase = dbclass()
+        dbase = make_database(new_path)
         dbase.load(new_path, None)
         
         self.__start_cursor(_("Importing archive..."))
@@ -683,11 +682,9 @@ class DbManager(CLIDbManager):
                 fname = os.path.join(dirname, filename)
                 os.unlink(fname)
 
-        newdb = DbBsddb()
-        newdb.write_version(dirname)
+        create_database(dirname, get_backend(dirname))
 
-        dbclass = DbBsddb
-        dbase = dbclass()
+        dbase = make_database(dirname)
         dbase.set_save_path(dirname)
         dbase.load(dirname, None)
 
@@ -1153,6 +1153,9 @@ class ViewManager(CLIManager):
         self.undoactions.set_visible(True)
         self.redoactions.set_visible(True)
         self.undohistoryactions.set_visible(True)
+        # Some backends keep no undo history
+        self.undohistoryactions.set_sensitive(
+            not self.dbstate.db.get_feature("skip-undo-history"))
 
         self.recent_manager.build()
 
@@ -591,7 +591,7 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel):
         This list is sorted ascending, via localized string sort. 
         """
         # use cursor as a context manager
-        with self.gen_cursor() as cursor:   
+        with self.gen_cursor(buffered=True) as cursor:
             #loop over database and store the sort field, and the handle
             return sorted((self.sort_func(data), key) for key, data in cursor)
 
@@ -0,0 +1,154 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""
+Show the statistics of the accesses to the database.
+"""
+
+#------------------------------------------------------------------------
+#
+# GNOME/GTK modules
+#
+#------------------------------------------------------------------------
+from gi.repository import Gtk
+
+#------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#------------------------------------------------------------------------
+from gramps.gen.const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+from gramps.gen.plug import Gramplet
+
+#-------------------------------------------------------------------------
+#
+# DbStatisticsGramplet
+#
+#-------------------------------------------------------------------------
+class DbStatisticsGramplet(Gramplet):
+    """
+    Shows the calls, bytes and time of the database access methods, and the
+    modules calling them.
+    """
+    def init(self):
+        self.gui.WIDGET = self.build_gui()
+        self.gui.get_container_widget().remove(self.gui.textview)
+        self.gui.get_container_widget().add_with_viewport(self.gui.WIDGET)
+
+    def build_gui(self):
+        """
+        Build the GUI interface.
+        """
+        self.top = Gtk.VBox()
+        self.top.set_border_width(6)
+
+        self.label = Gtk.Label()
+        self.label.set_alignment(0, 0.5)
+        self.top.pack_start(self.label, False, False, 6)
+
+        self.methods = Gtk.ListStore(str, str, int, int, int, float)
+        self.top.pack_start(self.__build_list(self.methods,
+                            [_('Method'), _('Table'), _('Calls'), _('Read'),
+                             _('Written'), _('Seconds')]), True, True, 6)
+        self.callers = Gtk.ListStore(str, str, int)
+        self.top.pack_start(self.__build_list(self.callers,
+                            [_('Caller'), _('Method'), _('Calls')]),
+                            True, True, 6)
+
+        bbox = Gtk.HButtonBox()
+        self.enable_button = Gtk.Button(_("Enable"))
+        self.enable_button.connect('clicked', self.enable_clicked)
+        bbox.pack_start(self.enable_button, False, False, 6)
+        button = Gtk.Button(_("Refresh"))
+        button.connect('clicked', self.refresh_clicked)
+        bbox.pack_start(button, False, False, 6)
+        button = Gtk.Button(_("Clear"))
+        button.connect('clicked', self.clear_clicked)
+        bbox.pack_start(button, False, False, 6)
+        self.top.pack_start(bbox, False, False, 6)
+
+        self.top.show_all()
+
+        return self.top
+
+    def __build_list(self, model, titles):
+        """
+        Return a scrolled list showing the model, with a sortable column for
+        each title.
+        """
+        scroll = Gtk.ScrolledWindow()
+        view = Gtk.TreeView()
+        view.set_headers_visible(True)
+        view.set_model(model)
+        renderer = Gtk.CellRendererText()
+        for (index, title) in enumerate(titles):
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_resizable(True)
+            column.set_sort_column_id(index)
+            view.append_column(column)
+        scroll.add_with_viewport(view)
+        return scroll
+
+    def db_changed(self):
+        self.update()
+
+    def main(self):
+        self.display()
+
+    def __get_statistics(self):
+        """
+        Return the statistics of the database, or None if they are not
+        enabled.
+        """
+        if hasattr(self.dbstate.db, 'get_statistics'):
+            return self.dbstate.db.get_statistics()
+        return None
+
+    def display(self):
+        self.methods.clear()
+        self.callers.clear()
+        statistics = self.__get_statistics()
+        self.enable_button.set_sensitive(
+            statistics is None and self.dbstate.db.is_open() and
+            hasattr(self.dbstate.db, 'enable_statistics'))
+        if statistics is None:
+            self.label.set_text(_('Database statistics are not enabled.'))
+            return
+        for row in statistics.get_method_rows():
+            self.methods.append(row)
+        for row in statistics.get_caller_rows():
+            self.callers.append(row)
+        self.label.set_text(_('Database methods called: %d') %
+                            len(statistics.methods))
+
+    def enable_clicked(self, obj):
+        if self.__get_statistics() is None:
+            self.dbstate.db.enable_statistics()
+        self.display()
+
+    def refresh_clicked(self, obj):
+        self.display()
+
+    def clear_clicked(self, obj):
+        statistics = self.__get_statistics()
+        if statistics is not None:
+            statistics.clear()
+        self.display()
@@ -1211,6 +1211,19 @@ register(GRAMPLET,
          gramplet_title=_("Uncollected Objects"),
          )
 
+register(GRAMPLET, 
+         id="Database Statistics", 
+         name=_("Database Statistics"), 
+         description = _("Gramplet showing the accesses to the database"),
+         version="1.0.0",
+         gramps_target_version="4.1",
+         status = STABLE,
+         fname="dbstatistics.py",
+         height=300,
+         gramplet = 'DbStatisticsGramplet',
+         gramplet_title=_("Database Statistics"),
+         )
+
 register(GRAMPLET, 
          id="SoundEx Generator", 
          name=_("SoundEx Generator"), 
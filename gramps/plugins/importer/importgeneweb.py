@@ -123,7 +123,8 @@ class GeneWebParser(object):
         return line
         
     def parse_geneweb_file(self):
-        with DbTxn(_("GeneWeb import"), self.db, batch=True) as self.trans:
+        with DbTxn(_("GeneWeb import"), self.db, batch=True,
+                   bulk_load=True) as self.trans:
             self.db.disable_signals()
             t = time.time()
             self.lineno = 0
@@ -520,7 +520,8 @@ class ProgenParser(object):
         self.pers = _read_recs(self.def_['Table_1'], self.bname)
         self.rels = _read_recs(self.def_['Table_2'], self.bname)
 
-        with DbTxn(_("Pro-Gen import"), self.db, batch=True) as self.trans:
+        with DbTxn(_("Pro-Gen import"), self.db, batch=True,
+                   bulk_load=True) as self.trans:
             self.db.disable_signals()
 
             self.create_persons()
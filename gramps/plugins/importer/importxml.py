@@ -928,7 +928,7 @@ class GrampsParser(UpdateCallback):
         else:
             no_magic = False
         with DbTxn(_("Gramps XML import"), self.db, batch=True,
-                   no_magic=no_magic) as self.trans:
+                   no_magic=no_magic, bulk_load=not no_magic) as self.trans:
             self.set_total(linecount)
 
             self.db.disable_signals()
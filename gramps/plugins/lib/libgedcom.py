@@ -2655,7 +2655,7 @@ class GedcomParser(UpdateCallback):
         """
         no_magic = self.maxpeople < 1000
         with DbTxn(_("GEDCOM import"), self.dbase, not use_trans,
-                   no_magic=no_magic) as self.trans:
+                   no_magic=no_magic, bulk_load=not no_magic) as self.trans:
 
             self.dbase.disable_signals()
             self.__parse_header_head()
@@ -85,6 +85,30 @@ ngettext = glocale.translation.ngettext
 # All except 09, 0A, 0D are replaced with space.
 strip_dict = dict.fromkeys(list(range(9))+list(range(11,13))+list(range(14, 32)),  " ")
 
+# The primary tables: the class name of their objects in references, and the
+# names of the database methods counting their objects and testing a handle.
+_TABLES = (
+    ('Person', 'Person', 'get_number_of_people', 'has_person_handle'),
+    ('Family', 'Family', 'get_number_of_families', 'has_family_handle'),
+    ('Event', 'Event', 'get_number_of_events', 'has_event_handle'),
+    ('Place', 'Place', 'get_number_of_places', 'has_place_handle'),
+    ('Source', 'Source', 'get_number_of_sources', 'has_source_handle'),
+    ('Citation', 'Citation', 'get_number_of_citations',
+     'has_citation_handle'),
+    ('Media', 'MediaObject', 'get_number_of_media_objects',
+     'has_object_handle'),
+    ('Repository', 'Repository', 'get_number_of_repositories',
+     'has_repository_handle'),
+    ('Note', 'Note', 'get_number_of_notes', 'has_note_handle'),
+    ('Tag', 'Tag', 'get_number_of_tags', 'has_tag_handle'),
+    )
+_REF_TABLES = dict((class_name, table)
+                   for (table, class_name, count, has) in _TABLES)
+_COUNT_FUNCS = dict((table, count)
+                    for (table, class_name, count, has) in _TABLES)
+_HAS_FUNCS = dict((class_name, has)
+                  for (table, class_name, count, has) in _TABLES)
+
 class ProgressMeter(object):
     def __init__(self, *args): pass
     def set_pass(self, *args): pass
@@ -166,48 +190,45 @@ class Check(tool.BatchTool):
                     "Repair tool should be run anew on this new Family Tree."), 
                        cli)
                 return
+        # An incremental check only looks at the objects changed since the
+        # last check that found no problem, and at their related objects.
+        since = None
+        if self.options.handler.options_dict['incremental']:
+            since = self.db.get_check_time()
+        start = int(time.time())
         with DbTxn(_("Check Integrity"), self.db, batch=True) as trans:
             self.db.disable_signals()
-            checker = CheckIntegrity(dbstate, uistate, trans)
+            checker = CheckIntegrity(dbstate, uistate, trans, since)
             # start with empty objects, broken links can be corrected below
             # then. This is done before fixing encoding and missing photos,
             # since otherwise we will be trying to fix empty records which are
-            # then going to be deleted.
+            # then going to be deleted. The same sweep fixes the encoding of
+            # the media and the control characters of the notes it keeps.
             checker.cleanup_empty_objects()
-            checker.fix_encoding()
-            checker.fix_ctrlchars_in_notes()
             checker.cleanup_missing_photos(cli)
             checker.cleanup_deleted_name_formats()
-            
+
             prev_total = -1
             total = 0
-        
+
+            # the references are only checked once the family links are
+            # repaired, since the repairs remove links and families
             while prev_total != total:
                 prev_total = total
-                
-                checker.check_for_broken_family_links()
-                checker.check_parent_relationships()
-                checker.cleanup_empty_families(cli)
-                checker.cleanup_duplicate_spouses()
-    
+
+                checker.check_family_links()
+
                 total = checker.family_errors()
 
-            checker.check_events()
-            checker.check_person_references()
-            checker.check_family_references()
-            checker.check_place_references()
-            checker.check_source_references()
-            checker.check_citation_references()
-            checker.check_media_references()
-            checker.check_repo_references()
-            checker.check_note_references()
-            checker.check_tag_references()
+            checker.check_references()
         self.db.enable_signals()
         self.db.request_rebuild()
 
         errs = checker.build_report(uistate)
         if errs:
             Report(uistate, checker.text.getvalue(), cli)
+        else:
+            self.db.set_check_time(start)
 
 #-------------------------------------------------------------------------
 #
@@ -216,7 +237,7 @@ class Check(tool.BatchTool):
 #-------------------------------------------------------------------------
 class CheckIntegrity(object):
     
-    def __init__(self, dbstate, uistate, trans):
+    def __init__(self, dbstate, uistate, trans, since=None):
         self.db = dbstate.db
         self.trans = trans
         self.bad_photo = []
@@ -241,7 +262,13 @@ class CheckIntegrity(object):
         self.invalid_tag_references = set()
         self.invalid_dates = []
         self.removed_name_format = []
+        self.encoding_errors = 0
+        self.ctrlchar_errors = 0
         self.empty_objects = defaultdict(list)
+        self.known_handles = defaultdict(dict)
+        self.missing_handles = defaultdict(set)
+        self.event_types = {}
+        self.fixed_events = []
         self.last_img_dir = config.get('behavior.addmedia-image-dir')
         self.progress = ProgressMeter(_('Checking Database'),'')
         self.explanation = Note(_('Objects referenced by this note '
@@ -249,6 +276,83 @@ class CheckIntegrity(object):
             'when you ran Check and Repair on %s.') %
             time.strftime('%x %X', time.localtime()))
         self.explanation.set_handle(create_id())
+        self.scope = None
+        if since is not None:
+            self.scope = self.find_scope(since)
+
+    def find_scope(self, since):
+        """
+        Return the handles, by table, of the objects changed at or after the
+        time since, and of the objects they refer to or that refer to them:
+        the objects an incremental check looks at.
+
+        The objects are found with the change time indices and the reference
+        map, so an incremental check relies on the reference map being up to
+        date.
+        """
+        self.progress.set_pass(_('Looking for changed objects'), len(_TABLES))
+        logging.info('Looking for objects changed since %s' %
+                     time.strftime('%x %X', time.localtime(since)))
+        scope = dict((table, set()) for table in _REF_TABLES.values())
+        for (table, class_name, count, has) in _TABLES:
+            get_func = self.db.get_table_metadata(table)["handle_func"]
+            for bhandle in list(self.db.iter_changed_since(table, since)):
+                handle = handle2internal(bhandle)
+                scope[table].add(handle)
+                obj = get_func(handle)
+                for (ref_class, ref) in \
+                        obj.get_referenced_handles_recursively():
+                    if ref and ref_class in _REF_TABLES:
+                        scope[_REF_TABLES[ref_class]].add(ref)
+                for (ref_class, ref) in self.db.find_backlink_handles(handle):
+                    scope[_REF_TABLES[ref_class]].add(handle2internal(ref))
+            self.progress.step()
+
+        # drop the missing objects: the references to them are checked from
+        # the objects that refer to them
+        for (table, class_name, count, has) in _TABLES:
+            has_handle = getattr(self.db, has)
+            scope[table] = set(handle for handle in scope[table]
+                               if has_handle(handle))
+        logging.info('    %d objects to check' %
+                     sum(len(handles) for handles in scope.values()))
+        return scope
+
+    def _count(self, table):
+        """
+        Return the number of objects of the table to check.
+        """
+        if self.scope is None:
+            return getattr(self.db, _COUNT_FUNCS[table])()
+        return len(self.scope[table])
+
+    def _handles(self, table):
+        """
+        Return the handles of the objects of the table to check: all of
+        them, or those in the scope of an incremental check.
+        """
+        if self.scope is None:
+            return self.db.get_table_metadata(table)["handles_func"]()
+        return sorted(self.scope[table])
+
+    def _records(self, table):
+        """
+        Iterate over the handles and the serialized data of the objects of
+        the table to check, with a cursor over the table or, in an
+        incremental check, only over the objects in scope.
+
+        The table must not be changed before the end of the iteration.
+        """
+        if self.scope is None:
+            with self.db.get_table_metadata(table)["cursor_func"]() as cursor:
+                for bhandle, data in cursor:
+                    yield handle2internal(bhandle), data
+        else:
+            handles = sorted(self.scope[table])
+            for handle, data in zip(handles,
+                                    self.db.get_raw_data_many(table, handles)):
+                if data is not None:
+                    yield handle, data
 
     def family_errors(self):
         return (len(self.broken_parent_links) +
@@ -273,8 +377,13 @@ class CheckIntegrity(object):
         deleted_name_formats = [number for (number, name, fmt_str,act)
                                 in self.db.name_formats if not act]
         
-        # remove the invalid references from all Name objects
-        for person_handle in self.db.get_person_handles():
+        # remove the invalid references from all Name objects, also in an
+        # incremental check since deleting a format changes no person
+        if not deleted_name_formats:
+            person_handles = []
+        else:
+            person_handles = self.db.get_person_handles()
+        for person_handle in person_handles:
             person = self.db.get_person_from_handle(person_handle)
 
             p_changed = False
@@ -316,299 +425,307 @@ class CheckIntegrity(object):
         if len(self.removed_name_format) == 0:
             logging.info('    OK: no invalid name formats found found')
 
-    def cleanup_duplicate_spouses(self):
-
-        self.progress.set_pass(_('Looking for duplicate spouses'),
-                               self.db.get_number_of_people())
-        logging.info('Looking for duplicate spouses')
-        previous_errors = len(self.duplicate_links)
-
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            value = self.db.person_map[bhandle]
-            p = Person(value)
-            splist = p.get_family_handle_list()
-            if len(splist) != len(set(splist)):
-                new_list = []
-                for value in splist:
-                    if value not in new_list:
-                        new_list.append(value)
-                        self.duplicate_links.append((handle, value))
-                p.set_family_handle_list(new_list)
-                self.db.commit_person(p, self.trans)
-            self.progress.step()
-
-        if previous_errors == len(self.duplicate_links):
-            logging.info('    OK: no duplicate spouses found')
-
-    def fix_encoding(self):
-        self.progress.set_pass(_('Looking for character encoding errors'),
-                               self.db.get_number_of_media_objects())
-        logging.info('Looking for character encoding errors')
-        error_count = 0
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            data = self.db.media_map[bhandle]
-            if not isinstance(data[2], UNITYPE) or not isinstance(data[4], UNITYPE):
-                obj = self.db.get_object_from_handle(handle)
-                obj.path = fix_encoding( obj.path, errors='ignore')
-                obj.desc = fix_encoding( obj.desc, errors='ignore')
-                self.db.commit_media_object(obj, self.trans)
-                if not isinstance(data[2], UNITYPE):
-                    logging.warning('    FAIL: encoding error on media object '
-                                    '"%(gid)s" path "%(path)s"' %
-                                    {'gid' : obj.gramps_id, 'path' : obj.path})
-                if not isinstance(data[4], UNITYPE):
-                    logging.warning('    FAIL: encoding error on media object ' 
-                                    '"%(gid)s" description "%(desc)s"' %
-                                    {'gid' : obj.gramps_id, 'desc' : obj.desc})
-                error_count += 1
-            # Once we are here, fix the mime string if not str
-            if not isinstance(data[3], str):
-                obj = self.db.get_object_from_handle(handle)
-                try:
-                    if data[3] == str(data[3]):
-                        obj.mime = str(data[3])
-                    else:
-                        obj.mime = ""
-                except:
-                    obj.mime = ""
-                self.db.commit_media_object(obj, self.trans)
+    def _check_duplicate_spouses(self, person_handle, person):
+        """
+        Remove the families listed more than once as families of the person.
+        Return True if the person was changed.
+        """
+        splist = person.get_family_handle_list()
+        if len(splist) == len(set(splist)):
+            return False
+        new_list = []
+        for value in splist:
+            if value not in new_list:
+                new_list.append(value)
+                self.duplicate_links.append((person_handle, value))
+        person.set_family_handle_list(new_list)
+        return True
+
+    def _fix_encoding(self, data):
+        """
+        Return the media object of the serialized data with its path,
+        description and mime type fixed, or None if they need no fixing.
+        """
+        obj = None
+        if not isinstance(data[2], UNITYPE) or not isinstance(data[4], UNITYPE):
+            obj = MediaObject.create(data)
+            obj.path = fix_encoding( obj.path, errors='ignore')
+            obj.desc = fix_encoding( obj.desc, errors='ignore')
+            if not isinstance(data[2], UNITYPE):
                 logging.warning('    FAIL: encoding error on media object '
-                                '"%(desc)s" mime "%(mime)s"' % 
-                                {'desc' : obj.desc, 'mime' : obj.mime})
-                error_count += 1
-            self.progress.step()
-        if error_count == 0:
-            logging.info('    OK: no encoding errors found')
-
-    def fix_ctrlchars_in_notes(self):
-        self.progress.set_pass(_('Looking for ctrl characters in notes'),
-                               self.db.get_number_of_notes())
-        logging.info('Looking for ctrl characters in notes')
-        error_count = 0
-        for bhandle in self.db.note_map.keys():
-            handle = handle2internal(bhandle)
-            note = self.db.get_note_from_handle(handle)
-            stext = note.get_styledtext()
-            old_text = cuni(stext)
-            new_text = old_text.translate(strip_dict)
-            if old_text != new_text:
-                logging.warning('    FAIL: control characters found in note "%s"' %
-                    self.db.note_map[bhandle][1])
-                error_count += 1
-                # Commit only if ctrl char found.
-                note.set_styledtext(StyledText(text=new_text, 
-                                               tags=stext.get_tags()))
-                self.db.commit_note(note, self.trans)
-            self.progress.step()
-        if error_count == 0:
-            logging.info('    OK: no ctrl characters in notes found')
-
-    def check_for_broken_family_links(self):
-        # Check persons referenced by the family objects
+                                '"%(gid)s" path "%(path)s"' %
+                                {'gid' : obj.gramps_id, 'path' : obj.path})
+            if not isinstance(data[4], UNITYPE):
+                logging.warning('    FAIL: encoding error on media object ' 
+                                '"%(gid)s" description "%(desc)s"' %
+                                {'gid' : obj.gramps_id, 'desc' : obj.desc})
+            self.encoding_errors += 1
+        # Once we are here, fix the mime string if not str
+        if not isinstance(data[3], str):
+            if obj is None:
+                obj = MediaObject.create(data)
+            try:
+                if data[3] == str(data[3]):
+                    obj.mime = str(data[3])
+                else:
+                    obj.mime = ""
+            except:
+                obj.mime = ""
+            logging.warning('    FAIL: encoding error on media object '
+                            '"%(desc)s" mime "%(mime)s"' % 
+                            {'desc' : obj.desc, 'mime' : obj.mime})
+            self.encoding_errors += 1
+        return obj
+
+    def _fix_ctrlchars(self, data):
+        """
+        Return the note of the serialized data with the control characters
+        of its text replaced, or None if it has none.
+        """
+        note = Note.create(data)
+        stext = note.get_styledtext()
+        old_text = cuni(stext)
+        new_text = old_text.translate(strip_dict)
+        if old_text == new_text:
+            return None
+        logging.warning('    FAIL: control characters found in note "%s"' %
+            note.get_gramps_id())
+        self.ctrlchar_errors += 1
+        note.set_styledtext(StyledText(text=new_text, 
+                                       tags=stext.get_tags()))
+        return note
 
-        fhandle_list = self.db.get_family_handles()
+    def check_family_links(self):
+        """
+        Repair the links between the families and their members, swap the
+        parents of the wrong gender, remove the empty families and the
+        duplicate spouses, in one sweep over the families followed by one
+        over the people.
+        """
+        fhandle_list = self._handles('Family')
         self.progress.set_pass(_('Looking for broken family links'),
-                               len(fhandle_list) +
-                               self.db.get_number_of_people())
+                               len(fhandle_list) + self._count('Person'))
         logging.info('Looking for broken family links')
-        previous_errors = len(self.broken_parent_links + self.broken_links)
-        
+        previous_links = len(self.broken_parent_links + self.broken_links)
+        previous_rels = len(self.fam_rel)
+        previous_empty = len(self.empty_family)
+        previous_spouses = len(self.duplicate_links)
+
         for bfamily_handle in fhandle_list:
             family_handle = handle2internal(bfamily_handle)
             family = self.db.get_family_from_handle(family_handle)
-            father_handle = family.get_father_handle()
-            mother_handle = family.get_mother_handle()
-            if father_handle:
-                father = self.db.get_person_from_handle(father_handle)
-                if not father:
-                    # The person referenced by the father handle does not exist
-                    # in the database
-                    # This is tested by TestcaseGenerator where the mother is
-                    # "Broken6"
-                    family.set_father_handle(None)
-                    self.db.commit_family(family, self.trans)
-                    self.broken_parent_links.append((father_handle, family_handle))
-                    logging.warning("    FAIL: family '%(fam_gid)s' "
-                                    "father handle '%(hand)s' does not exist" % 
-                                    {'fam_gid' : family.gramps_id, 
-                                     'hand' : father_handle})
-                    father_handle = None
-            if mother_handle:
-                mother = self.db.get_person_from_handle(mother_handle)
-                if not mother:
-                    # The person referenced by the mother handle does not exist
-                    # in the database
-                    # This is tested by TestcaseGenerator where the mother is
-                    # "Broken7"
-                    family.set_mother_handle(None)
-                    self.db.commit_family(family, self.trans)
-                    self.broken_parent_links.append((mother_handle, family_handle))
-                    logging.warning("    FAIL: family '%(fam_gid)s' "
-                                    "mother handle '%(hand)s' does not exist" % 
-                                    {'fam_gid' : family.gramps_id, 
-                                     'hand' : mother_handle})
-                    mother_handle = None
-
-            if father_handle and father and \
-                    family_handle not in father.get_family_handle_list():
-                # The referenced father has no reference back to the family
-                # This is tested by TestcaseGenerator where the father is
-                # "Broken1"
+            self._check_family_members(family_handle, family)
+            self._check_parent_relationships(family_handle, family)
+            self._check_empty_family(family_handle, family)
+            self.progress.step()
+
+        for bperson_handle in self._handles('Person'):
+            person_handle = handle2internal(bperson_handle)
+            person = self.db.get_person_from_handle(person_handle)
+            if self._check_duplicate_spouses(person_handle, person):
+                self.db.commit_person(person, self.trans)
+            self._check_person_families(person_handle, person)
+            self.progress.step()
+
+        if previous_links == len(self.broken_parent_links + self.broken_links):
+            logging.info('    OK: no broken family links found')
+        if previous_rels == len(self.fam_rel):
+            logging.info('    OK: no broken parent relationships found')
+        if previous_empty == len(self.empty_family):
+            logging.info('    OK: no empty families found')
+        if previous_spouses == len(self.duplicate_links):
+            logging.info('    OK: no duplicate spouses found')
+
+    def _check_family_members(self, family_handle, family):
+        """
+        Repair the links of the family to missing people, and to people who
+        do not link back to it, and remove the duplicate children.
+        """
+        father_handle = family.get_father_handle()
+        mother_handle = family.get_mother_handle()
+        if father_handle:
+            father = self.db.get_person_from_handle(father_handle)
+            if not father:
+                # The person referenced by the father handle does not exist
+                # in the database
+                # This is tested by TestcaseGenerator where the mother is
+                # "Broken6"
+                family.set_father_handle(None)
+                self.db.commit_family(family, self.trans)
                 self.broken_parent_links.append((father_handle, family_handle))
-                father.add_family_handle(family_handle)
-                self.db.commit_person(father, self.trans)
-                logging.warning("    FAIL: family '%(fam_gid)s' father "
-                                "'%(hand)s' does not refer back to the family" % 
-                                {'fam_gid' : family.gramps_id,
+                logging.warning("    FAIL: family '%(fam_gid)s' "
+                                "father handle '%(hand)s' does not exist" % 
+                                {'fam_gid' : family.gramps_id, 
                                  'hand' : father_handle})
-
-            if mother_handle and mother and \
-                    family_handle not in mother.get_family_handle_list():
-                # The referenced mother has no reference back to the family.
-                # This is tested by TestcaseGenerator where the father is
-                # "Broken4"
+                father_handle = None
+        if mother_handle:
+            mother = self.db.get_person_from_handle(mother_handle)
+            if not mother:
+                # The person referenced by the mother handle does not exist
+                # in the database
+                # This is tested by TestcaseGenerator where the mother is
+                # "Broken7"
+                family.set_mother_handle(None)
+                self.db.commit_family(family, self.trans)
                 self.broken_parent_links.append((mother_handle, family_handle))
-                mother.add_family_handle(family_handle)
-                self.db.commit_person(mother, self.trans)
-                logging.warning("    FAIL: family '%(fam_gid)s' mother "
-                                "'%(hand)s' does not refer back to the family" % 
-                                {'fam_gid' : family.gramps_id,
+                logging.warning("    FAIL: family '%(fam_gid)s' "
+                                "mother handle '%(hand)s' does not exist" % 
+                                {'fam_gid' : family.gramps_id, 
                                  'hand' : mother_handle})
-            
-            for child_ref in family.get_child_ref_list():
-                child_handle = child_ref.ref
-                child = self.db.get_person_from_handle(child_handle)
-                if child:
-                    if child_handle in [father_handle, mother_handle]:
-                        # The child is one of the parents: impossible Remove
-                        # such child from the family
-                        # This is tested by TestcaseGenerator where the father
-                        # is "Broken19"
-                        logging.warning("    FAIL: family '%(fam_gid)s' "
-                                        "child '%(child_gid)s' is one of the "
-                                        "parents" % 
-                                        {'fam_gid' : family.gramps_id,
-                                         'child_gid' : child.gramps_id})
-                        family.remove_child_ref(child_ref)
-                        self.db.commit_family(family, self.trans)
-                        self.broken_links.append((child_handle, family_handle))
-                        continue
-                    if family_handle == child.get_main_parents_family_handle():
-                        continue
-                    if family_handle not in \
-                           child.get_parent_family_handle_list():
-                        # The referenced child has no reference to the family
-                        # This is tested by TestcaseGenerator where the father
-                        # is "Broken8"
-                        logging.warning("    FAIL: family '%(fam_gid)s' "
-                                        "child '%(child_gid)s' has no reference"
-                                        " to the family. Reference added" % 
-                                        {'fam_gid' : family.gramps_id,
-                                         'child_gid' : child.gramps_id})
-                        child.add_parent_family_handle(family_handle)
-                        self.db.commit_person(child, self.trans)
-                else:
-                    # The person referenced by the child handle
-                    # does not exist in the database
+                mother_handle = None
+
+        if father_handle and father and \
+                family_handle not in father.get_family_handle_list():
+            # The referenced father has no reference back to the family
+            # This is tested by TestcaseGenerator where the father is
+            # "Broken1"
+            self.broken_parent_links.append((father_handle, family_handle))
+            father.add_family_handle(family_handle)
+            self.db.commit_person(father, self.trans)
+            logging.warning("    FAIL: family '%(fam_gid)s' father "
+                            "'%(hand)s' does not refer back to the family" % 
+                            {'fam_gid' : family.gramps_id,
+                             'hand' : father_handle})
+
+        if mother_handle and mother and \
+                family_handle not in mother.get_family_handle_list():
+            # The referenced mother has no reference back to the family.
+            # This is tested by TestcaseGenerator where the father is
+            # "Broken4"
+            self.broken_parent_links.append((mother_handle, family_handle))
+            mother.add_family_handle(family_handle)
+            self.db.commit_person(mother, self.trans)
+            logging.warning("    FAIL: family '%(fam_gid)s' mother "
+                            "'%(hand)s' does not refer back to the family" % 
+                            {'fam_gid' : family.gramps_id,
+                             'hand' : mother_handle})
+        
+        for child_ref in family.get_child_ref_list():
+            child_handle = child_ref.ref
+            child = self.db.get_person_from_handle(child_handle)
+            if child:
+                if child_handle in [father_handle, mother_handle]:
+                    # The child is one of the parents: impossible Remove
+                    # such child from the family
                     # This is tested by TestcaseGenerator where the father
-                    # is "Broken20"
-                    logging.warning("    FAIL: family '%(fam_gid)s' child "
-                                    "'%(hand)s' does not exist in the database" % 
+                    # is "Broken19"
+                    logging.warning("    FAIL: family '%(fam_gid)s' "
+                                    "child '%(child_gid)s' is one of the "
+                                    "parents" % 
                                     {'fam_gid' : family.gramps_id,
-                                     'hand' : child_handle})
+                                     'child_gid' : child.gramps_id})
                     family.remove_child_ref(child_ref)
                     self.db.commit_family(family, self.trans)
                     self.broken_links.append((child_handle, family_handle))
-
-            new_ref_list = []
-            new_ref_handles = []
-            replace = False
-            for child_ref in family.get_child_ref_list():
-                child_handle = child_ref.ref
-                if child_handle in new_ref_handles:
-                    replace = True
-                else:
-                    new_ref_list.append(child_ref)
-                    new_ref_handles.append(child_handle)
-
-            if replace:
-                family.set_child_ref_list(new_ref_list)
+                    continue
+                if family_handle == child.get_main_parents_family_handle():
+                    continue
+                if family_handle not in \
+                       child.get_parent_family_handle_list():
+                    # The referenced child has no reference to the family
+                    # This is tested by TestcaseGenerator where the father
+                    # is "Broken8"
+                    logging.warning("    FAIL: family '%(fam_gid)s' "
+                                    "child '%(child_gid)s' has no reference"
+                                    " to the family. Reference added" % 
+                                    {'fam_gid' : family.gramps_id,
+                                     'child_gid' : child.gramps_id})
+                    child.add_parent_family_handle(family_handle)
+                    self.db.commit_person(child, self.trans)
+            else:
+                # The person referenced by the child handle
+                # does not exist in the database
+                # This is tested by TestcaseGenerator where the father
+                # is "Broken20"
+                logging.warning("    FAIL: family '%(fam_gid)s' child "
+                                "'%(hand)s' does not exist in the database" % 
+                                {'fam_gid' : family.gramps_id,
+                                 'hand' : child_handle})
+                family.remove_child_ref(child_ref)
                 self.db.commit_family(family, self.trans)
+                self.broken_links.append((child_handle, family_handle))
+
+        new_ref_list = []
+        new_ref_handles = []
+        replace = False
+        for child_ref in family.get_child_ref_list():
+            child_handle = child_ref.ref
+            if child_handle in new_ref_handles:
+                replace = True
+            else:
+                new_ref_list.append(child_ref)
+                new_ref_handles.append(child_handle)
 
-            self.progress.step()
-            
-        # Check persons membership in referenced families
-        for bperson_handle in self.db.get_person_handles():
-            person_handle = handle2internal(bperson_handle)
-            person = self.db.get_person_from_handle(person_handle)
+        if replace:
+            family.set_child_ref_list(new_ref_list)
+            self.db.commit_family(family, self.trans)
 
-            phandle_list = person.get_parent_family_handle_list()
-            new_list = list(set(phandle_list))
-            if len(phandle_list) != len(new_list):
-                person.set_parent_family_handle_list(new_list)
+    def _check_person_families(self, person_handle, person):
+        """
+        Repair the links of the person to missing families, and to families
+        that do not have the person as a member.
+        """
+        phandle_list = person.get_parent_family_handle_list()
+        new_list = list(set(phandle_list))
+        if len(phandle_list) != len(new_list):
+            person.set_parent_family_handle_list(new_list)
+            self.db.commit_person(person, self.trans)
+
+        for par_family_handle in person.get_parent_family_handle_list():
+            family = self.db.get_family_from_handle(par_family_handle)
+            if not family:
+                person.remove_parent_family_handle(par_family_handle)
                 self.db.commit_person(person, self.trans)
-
-            for par_family_handle in person.get_parent_family_handle_list():
-                family = self.db.get_family_from_handle(par_family_handle)
-                if not family:
-                    person.remove_parent_family_handle(par_family_handle)
-                    self.db.commit_person(person, self.trans)
-                    continue
-                for child_handle in [child_ref.ref for child_ref
-                                     in family.get_child_ref_list()]:
-                    if child_handle == person_handle:
-                        break
-                else:
-                    # Person is not a child in the referenced parent family
-                    # This is tested by TestcaseGenerator where the father
-                    # is "Broken9"
-                    logging.warning("    FAIL: family '%(fam_gid)s' person "
-                                    "'%(pers_gid)s' is not a child in the "
-                                    "referenced parent family" % 
-                                    {'fam_gid' : family.gramps_id,
-                                     'pers_gid' :person.gramps_id})
-                    person.remove_parent_family_handle(par_family_handle)
-                    self.db.commit_person(person, self.trans)
-                    self.broken_links.append((person_handle, family_handle))
-            for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
-                if not family:
-                    # The referenced family does not exist in database
-                    # This is tested by TestcaseGenerator where the father
-                    # is "Broken20"
-                    logging.warning("    FAIL: person '%(pers_gid)s' refers to "
-                                    "family '%(hand)s' which is not in the "
-                                    "database" % 
-                                    {'pers_gid' : person.gramps_id,
-                                     'hand' : family_handle})
-                    person.remove_family_handle(family_handle)
-                    self.db.commit_person(person, self.trans)
-                    self.broken_links.append((person_handle, family_handle))
-                    continue
-                if family.get_father_handle() == person_handle:
-                    continue
-                if family.get_mother_handle() == person_handle:
-                    continue
-                # The person is not a member of the referenced family
-                # This is tested by TestcaseGenerator where the father is
-                # "Broken2" and the family misses the link to the father, and
-                # where the mother is "Broken3" and the family misses the link
-                # to the mother
+                continue
+            for child_handle in [child_ref.ref for child_ref
+                                 in family.get_child_ref_list()]:
+                if child_handle == person_handle:
+                    break
+            else:
+                # Person is not a child in the referenced parent family
+                # This is tested by TestcaseGenerator where the father
+                # is "Broken9"
                 logging.warning("    FAIL: family '%(fam_gid)s' person "
-                                "'%(pers_gid)s' is not member of the referenced"
-                                " family" % 
+                                "'%(pers_gid)s' is not a child in the "
+                                "referenced parent family" % 
                                 {'fam_gid' : family.gramps_id,
-                                 'pers_gid' : person.gramps_id})
+                                 'pers_gid' :person.gramps_id})
+                person.remove_parent_family_handle(par_family_handle)
+                self.db.commit_person(person, self.trans)
+                self.broken_links.append((person_handle, par_family_handle))
+        for family_handle in person.get_family_handle_list():
+            family = self.db.get_family_from_handle(family_handle)
+            if not family:
+                # The referenced family does not exist in database
+                # This is tested by TestcaseGenerator where the father
+                # is "Broken20"
+                logging.warning("    FAIL: person '%(pers_gid)s' refers to "
+                                "family '%(hand)s' which is not in the "
+                                "database" % 
+                                {'pers_gid' : person.gramps_id,
+                                 'hand' : family_handle})
                 person.remove_family_handle(family_handle)
                 self.db.commit_person(person, self.trans)
                 self.broken_links.append((person_handle, family_handle))
-            self.progress.step()
+                continue
+            if family.get_father_handle() == person_handle:
+                continue
+            if family.get_mother_handle() == person_handle:
+                continue
+            # The person is not a member of the referenced family
+            # This is tested by TestcaseGenerator where the father is
+            # "Broken2" and the family misses the link to the father, and
+            # where the mother is "Broken3" and the family misses the link
+            # to the mother
+            logging.warning("    FAIL: family '%(fam_gid)s' person "
+                            "'%(pers_gid)s' is not member of the referenced"
+                            " family" % 
+                            {'fam_gid' : family.gramps_id,
+                             'pers_gid' : person.gramps_id})
+            person.remove_family_handle(family_handle)
+            self.db.commit_person(person, self.trans)
+            self.broken_links.append((person_handle, family_handle))
 
-        if previous_errors == len(self.broken_parent_links + self.broken_links):
-            logging.info('    OK: no broken family links found')
-    
     def cleanup_missing_photos(self, cl=0):
 
         self.progress.set_pass(_('Looking for unused objects'),
@@ -658,6 +775,8 @@ class CheckIntegrity(object):
 
             self.removed_photo.append(ObjectId)
             self.db.remove_object(ObjectId,self.trans) 
+            if self.scope is not None:
+                self.scope['Media'].discard(ObjectId)
             logging.warning('        FAIL: media object and all references to '
                             'it removed')
    
@@ -785,7 +904,7 @@ class CheckIntegrity(object):
             # a tuple containing:
             #    0. Type of object being cleaned up
             #    1. function to read the object from the database
-            #    2. function returning cursor over the object type
+            #    2. name of the table of the object type
             #    3. function returning number of objects of this type
             #    4. text identifying the object being cleaned up
             #    5. function to check if the data is empty
@@ -793,7 +912,7 @@ class CheckIntegrity(object):
                 
             ('persons',
                 _db.get_person_from_handle,
-                _db.get_person_cursor,
+                'Person',
                 _db.get_number_of_people,
                 _('Looking for empty people records'),
                 _empty(empty_person_data, CHANGE_PERSON),
@@ -801,7 +920,7 @@ class CheckIntegrity(object):
                 ),
             ('families',
                 _db.get_family_from_handle,
-                _db.get_family_cursor,
+                'Family',
                 _db.get_number_of_families,
                 _('Looking for empty family records'),
                 _empty(empty_family_data, CHANGE_FAMILY),
@@ -809,7 +928,7 @@ class CheckIntegrity(object):
                 ),
             ('events',
                 _db.get_event_from_handle,
-                _db.get_event_cursor,
+                'Event',
                 _db.get_number_of_events,
                 _('Looking for empty event records'),
                 _empty(empty_event_data, CHANGE_EVENT),
@@ -817,7 +936,7 @@ class CheckIntegrity(object):
                 ),
             ('sources',
                 _db.get_source_from_handle,
-                _db.get_source_cursor,
+                'Source',
                 _db.get_number_of_sources,
                 _('Looking for empty source records'),
                 _empty(empty_source_data, CHANGE_SOURCE),
@@ -825,7 +944,7 @@ class CheckIntegrity(object):
                 ),
             ('citations',
                 _db.get_citation_from_handle,
-                _db.get_citation_cursor,
+                'Citation',
                 _db.get_number_of_citations,
                 _('Looking for empty citation records'),
                 _empty(empty_citation_data, CHANGE_CITATION),
@@ -833,7 +952,7 @@ class CheckIntegrity(object):
                 ),
             ('places',
                 _db.get_place_from_handle,
-                _db.get_place_cursor,
+                'Place',
                 _db.get_number_of_places,
                 _('Looking for empty place records'),
                 _empty(empty_place_data, CHANGE_PLACE),
@@ -841,7 +960,7 @@ class CheckIntegrity(object):
                 ),
             ('media',
                 _db.get_object_from_handle,
-                _db.get_media_cursor,
+                'Media',
                 _db.get_number_of_media_objects,
                 _('Looking for empty media records'),
                 _empty(empty_media_data, CHANGE_MEDIA),
@@ -849,7 +968,7 @@ class CheckIntegrity(object):
                 ),
             ('repos',
                 _db.get_repository_from_handle,
-                _db.get_repository_cursor,
+                'Repository',
                 _db.get_number_of_repositories,
                 _('Looking for empty repository records'),
                 _empty(empty_repos_data, CHANGE_REPOS),
@@ -857,7 +976,7 @@ class CheckIntegrity(object):
                 ),
             ('notes',
                 _db.get_note_from_handle,
-                _db.get_note_cursor,
+                'Note',
                 _db.get_number_of_notes,
                 _('Looking for empty note records'),
                 _empty(empty_note_data, CHANGE_NOTE),
@@ -865,31 +984,55 @@ class CheckIntegrity(object):
                 ),
             )
 
+        # The records that are kept are fixed in the same sweep: the
+        # encoding of the media and the control characters of the notes.
+        fixes = {
+            'Media' : (self._fix_encoding, _db.commit_media_object),
+            'Note' : (self._fix_ctrlchars, _db.commit_note),
+            }
+
         # Now, iterate over the table, dispatching the functions
 
-        for (the_type, get_func, cursor_func, total_func,
+        for (the_type, get_func, table_name, total_func,
              text, check_func, remove_func) in table:
+            (fix_func, commit_func) = fixes.get(table_name, (None, None))
+            fixed_objects = []
 
-            with cursor_func() as cursor:
+            if self.scope is None:
                 total = total_func()
-                self.progress.set_pass(text, total)
-                logging.info(text)
-
-                for handle, data in cursor:
-                    self.progress.step()
-                    if check_func(data):
-                        # we cannot remove here as that would destroy cursor
-                        # so save the handles for later removal               
-                        logging.warning('    FAIL: empty %(type)s record with '
-                                        'handle "%(hand)s" was found' %
-                                        {'type' : the_type, 'hand' : handle})
-                        self.empty_objects[the_type].append(handle)
+            else:
+                total = self._count(table_name)
+            self.progress.set_pass(text, total)
+            logging.info(text)
+
+            for handle, data in self._records(table_name):
+                self.progress.step()
+                if check_func(data):
+                    # we cannot remove here as that would destroy cursor
+                    # so save the handles for later removal               
+                    logging.warning('    FAIL: empty %(type)s record with '
+                                    'handle "%(hand)s" was found' %
+                                    {'type' : the_type, 'hand' : handle})
+                    self.empty_objects[the_type].append(handle)
+                elif fix_func is not None:
+                    obj = fix_func(data)
+                    if obj is not None:
+                        fixed_objects.append(obj)
 
             #now remove
             for handle in self.empty_objects[the_type]:
                 remove_func(handle, self.trans)
+                if self.scope is not None:
+                    self.scope[table_name].discard(handle)
+            for obj in fixed_objects:
+                commit_func(obj, self.trans)
             if len(self.empty_objects[the_type]) == 0:
                 logging.info('    OK: no empty %s found' % the_type)
+
+        if self.encoding_errors == 0:
+            logging.info('    OK: no encoding errors found')
+        if self.ctrlchar_errors == 0:
+            logging.info('    OK: no ctrl characters in notes found')
     
     def _check_empty(self, data, empty_data, changepos):
         """compare the data with the data of an empty object
@@ -901,33 +1044,24 @@ class CheckIntegrity(object):
         else :
             return data[2:] == empty_data[2:]
 
-    def cleanup_empty_families(self, automatic):
-
-        fhandle_list = self.db.get_family_handles()
-
-        self.progress.set_pass(_('Looking for empty families'),
-                               len(fhandle_list))
-        logging.info('Looking for empty families')
-        previous_errors = len(self.empty_family)
-        for bfamily_handle in fhandle_list:
-            family_handle = handle2internal(bfamily_handle)
-            self.progress.step()
-            
-            family = self.db.get_family_from_handle(family_handle)
-            family_id = family.get_gramps_id()
-            father_handle = family.get_father_handle()
-            mother_handle = family.get_mother_handle()
-
-            if not father_handle and not mother_handle and \
-                   len(family.get_child_ref_list()) == 0:
-                self.empty_family.append(family_id)
-                self.delete_empty_family(family_handle)
-
-        if previous_errors == len(self.empty_family):
-            logging.info('    OK: no empty families found')
+    def _check_empty_family(self, family_handle, family):
+        """
+        Remove the family if it has no parents and no children.
+        """
+        if not family.get_father_handle() and \
+                not family.get_mother_handle() and \
+                len(family.get_child_ref_list()) == 0:
+            self.empty_family.append(family.get_gramps_id())
+            self.delete_empty_family(family_handle)
 
     def delete_empty_family(self, family_handle):
-        for key in self.db.get_person_handles(sort_handles=False):
+        if self.scope is None:
+            person_handles = self.db.get_person_handles(sort_handles=False)
+        else:
+            person_handles = [handle for (class_name, handle) in
+                              self.db.find_backlink_handles(family_handle,
+                                                            ['Person'])]
+        for key in person_handles:
             child = self.db.get_person_from_handle(key)
             changed = False
             changed |= child.remove_parent_family_handle(family_handle)
@@ -935,680 +1069,384 @@ class CheckIntegrity(object):
             if changed:
                 self.db.commit_person(child, self.trans)
         self.db.remove_family(family_handle, self.trans)
+        if self.scope is not None:
+            self.scope['Family'].discard(family_handle)
 
-    def check_parent_relationships(self):
+    def _check_parent_relationships(self, family_handle, family):
         """Repair father=female or mother=male in hetero families
         """
+        father_handle = family.get_father_handle()
+        if father_handle:
+            fgender = self.db.get_person_from_handle(father_handle
+                                                     ).get_gender()
+        else:
+            fgender = None
 
-        fhandle_list = self.db.get_family_handles()
-        self.progress.set_pass(_('Looking for broken parent relationships'),
-                               len(fhandle_list))
-        logging.info('Looking for broken parent relationships')
-        previous_errors = len(self.fam_rel)
-
-        for bfamily_handle in fhandle_list:
-            family_handle = handle2internal(bfamily_handle)
-            self.progress.step()
-            family = self.db.get_family_from_handle(family_handle)
-
-            father_handle = family.get_father_handle()
-            if father_handle:
-                fgender = self.db.get_person_from_handle(father_handle
-                                                         ).get_gender()
-            else:
-                fgender = None
-
-            mother_handle = family.get_mother_handle()
-            if mother_handle:
-                mgender = self.db.get_person_from_handle(mother_handle
-                                                         ).get_gender()
-            else:
-                mgender = None
-
-            if (fgender == Person.FEMALE 
-                    or mgender == Person.MALE) and fgender != mgender:
-                # swap. note: (at most) one handle may be None
-                logging.warning('    FAIL: the family "%s" has a father=female or '
-                    ' mother=male in a different sex family' % family.gramps_id)
-                family.set_father_handle(mother_handle)
-                family.set_mother_handle(father_handle)
-                self.db.commit_family(family, self.trans)
-                self.fam_rel.append(family_handle)
-
-        if previous_errors == len(self.fam_rel):
-            logging.info('    OK: no broken parent relationships found')
-
-    def check_events(self):
-        self.progress.set_pass(_('Looking for event problems'),
-                               self.db.get_number_of_people()
-                               +self.db.get_number_of_families())
-        logging.info('Looking for event problems')
-        
-        for bkey in self.db.get_person_handles(sort_handles=False):
-            key = handle2internal(bkey)
-            self.progress.step()
-            
-            person = self.db.get_person_from_handle(key)
-            birth_ref = person.get_birth_ref()
-            none_handle = False
-            if birth_ref:
-                newref = birth_ref
-                if birth_ref.ref is None:
-                    none_handle = True
-                    birth_ref.ref = create_id()
-                birth_handle = birth_ref.ref
-                birth = self.db.get_event_from_handle(birth_handle)
-                if not birth:
-                    # The birth event referenced by the birth handle
+        mother_handle = family.get_mother_handle()
+        if mother_handle:
+            mgender = self.db.get_person_from_handle(mother_handle
+                                                     ).get_gender()
+        else:
+            mgender = None
+
+        if (fgender == Person.FEMALE 
+                or mgender == Person.MALE) and fgender != mgender:
+            # swap. note: (at most) one handle may be None
+            logging.warning('    FAIL: the family "%s" has a father=female or '
+                ' mother=male in a different sex family' % family.gramps_id)
+            family.set_father_handle(mother_handle)
+            family.set_mother_handle(father_handle)
+            self.db.commit_family(family, self.trans)
+            self.fam_rel.append(family_handle)
+
+    def _check_person_events(self, key, person):
+        """
+        Look for the missing birth, death and other events of the person,
+        and for birth and death events of another type. Return True if the
+        person was changed.
+        """
+        fixed = False
+        missing = set()
+        for (event_ref, set_ref, event_type, name, invalid) in (
+                (person.get_birth_ref(), person.set_birth_ref,
+                 EventType.BIRTH, 'birth', self.invalid_birth_events),
+                (person.get_death_ref(), person.set_death_ref,
+                 EventType.DEATH, 'death', self.invalid_death_events)):
+            if not event_ref:
+                continue
+            if event_ref.ref is None:
+                event_ref.ref = create_id()
+                set_ref(event_ref)
+                fixed = True
+            event_handle = event_ref.ref
+            if self._check_missing('Event', event_handle):
+                # The birth or death event referenced by the person
+                # does not exist in the database
+                # This is tested by TestcaseGenerator person "Broken11"
+                # This is tested by TestcaseGenerator person "Broken12"
+                logging.warning('    FAIL: the person "%(gid)s" refers to '
+                                'a %(name)s event "%(hand)s" which does not '
+                                'exist in the database' % 
+                                {'gid' : person.gramps_id, 'name' : name,
+                                 'hand' : event_handle})
+                self.event_types[event_handle] = event_type
+                self.invalid_events.add(key)
+                missing.add(event_handle)
+                continue
+            event = self.db.get_event_from_handle(event_handle)
+            if int(event.get_type()) != event_type:
+                # The birth or death event is of another type
+                # This is tested by TestcaseGenerator person "Broken14"
+                # This is tested by TestcaseGenerator person "Broken15"
+                logging.warning('    FAIL: the person "%(gid)s" refers '
+                                'to a %(name)s event which is of type '
+                                '"%(type)s" instead of %(title)s' % 
+                                {'gid' : person.gramps_id, 'name' : name,
+                                 'type' : int(event.get_type()),
+                                 'title' : name.capitalize()})
+                event.set_type(EventType(event_type))
+                self.fixed_events.append(event)
+                invalid.add(key)
+
+        if person.get_event_ref_list():
+            for event_ref in person.get_event_ref_list():
+                if event_ref.ref is None:
+                    event_ref.ref = create_id()
+                    fixed = True
+                event_handle = event_ref.ref
+                if event_handle not in missing and \
+                        self._check_missing('Event', event_handle):
+                    # The event referenced by the person
                     # does not exist in the database
-                    # This is tested by TestcaseGenerator person "Broken11"
-                    make_unknown(birth_handle, self.explanation.handle,
-                            self.class_event, self.commit_event, self.trans,
-                            type=EventType.BIRTH)
-                    logging.warning('    FAIL: the person "%(gid)s" refers to '
-                                    'a birth event "%(hand)s" which does not '
+                    # This is tested by TestcaseGenerator person "Broken13"
+                    logging.warning('    FAIL: the person "%(gid)s" refers '
+                                    'to an event "%(hand)s" which does not '
                                     'exist in the database' % 
-                                    {'gid' : person.gramps_id,
-                                     'hand' : birth_handle})
+                                    { 'gid' : person.gramps_id,
+                                     'hand' : event_handle})
                     self.invalid_events.add(key)
-                else:
-                    if int(birth.get_type()) != EventType.BIRTH:
-                        # Birth event was not of the type "Birth"
-                        # This is tested by TestcaseGenerator person "Broken14"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to a birth event which is of type '
-                                        '"%(type)s" instead of Birth' % 
-                                        {'gid' : person.gramps_id,
-                                         'type' : int(birth.get_type())})
-                        birth.set_type(EventType(EventType.BIRTH))
-                        self.db.commit_event(birth, self.trans)
-                        self.invalid_birth_events.add(key)
-            if none_handle:
-                person.set_birth_ref(newref)
-                self.db.commit_person(person, self.trans)
-
-            none_handle = False
-            death_ref = person.get_death_ref()
-            if death_ref:
-                newref = death_ref
-                if death_ref.ref is None:
-                    none_handle = True
-                    death_ref.ref = create_id()
-                death_handle = death_ref.ref
-                death = self.db.get_event_from_handle(death_handle)
-                if not death:
-                    # The death event referenced by the death handle
+        elif not isinstance(person.get_event_ref_list(), list):
+            # event_list is None or other garbage
+            logging.warning('    FAIL: the person "%s" has an event ref list'
+                ' which is invalid' % (person.gramps_id))
+            person.set_event_ref_list([])
+            self.invalid_events.add(key)
+            fixed = True
+        return fixed
+
+    def _check_family_events(self, key, family):
+        """
+        Look for the missing events of the family. Return True if the
+        family was changed.
+        """
+        fixed = False
+        if family.get_event_ref_list():
+            for event_ref in family.get_event_ref_list():
+                if event_ref.ref is None:
+                    event_ref.ref = create_id()
+                    fixed = True
+                event_handle = event_ref.ref
+                if self._check_missing('Event', event_handle):
+                    # The event referenced by the family
                     # does not exist in the database
-                    # This is tested by TestcaseGenerator person "Broken12"
-                    logging.warning('    FAIL: the person "%(gid)s" refers to '
-                                    'a death event "%(hand)s" which does not '
+                    logging.warning('    FAIL: the family "%(gid)s" refers '
+                                    'to an event "%(hand)s" which does not '
                                     'exist in the database' % 
-                                    {'gid' : person.gramps_id,
-                                     'hand' : death_handle})
-                    make_unknown(death_handle, self.explanation.handle,
-                            self.class_event, self.commit_event, self.trans,
-                            type=EventType.DEATH)
+                                    {'gid' : family.gramps_id,
+                                     'hand' : event_handle})
                     self.invalid_events.add(key)
-                else:
-                    if int(death.get_type()) != EventType.DEATH:
-                        # Death event was not of the type "Death"
-                        # This is tested by TestcaseGenerator person "Broken15"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to a death event which is of type '
-                                        '"%(type)s" instead of Death' % 
-                                        {'gid' : person.gramps_id,
-                                         'type' : int(death.get_type())})
-                        death.set_type(EventType(EventType.DEATH))
-                        self.db.commit_event(death, self.trans)
-                        self.invalid_death_events.add(key)
-            if none_handle:
-                person.set_death_ref(newref)
-                self.db.commit_person(person, self.trans)
-
-            none_handle = False
-            newlist = []
-            if person.get_event_ref_list():
-                for event_ref in person.get_event_ref_list():
-                    newlist.append(event_ref)
-                    if event_ref.ref is None:
-                        none_handle = True
-                        event_ref.ref = create_id()
-                    event_handle = event_ref.ref
-                    event = self.db.get_event_from_handle(event_handle)
-                    if not event:
-                        # The event referenced by the person
-                        # does not exist in the database
-                        #TODO: There is no better way?
-                        # This is tested by TestcaseGenerator person "Broken11"
-                        # This is tested by TestcaseGenerator person "Broken12"
-                        # This is tested by TestcaseGenerator person "Broken13"
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to an event "%(hand)s" which does not '
-                                        'exist in the database' % 
-                                        { 'gid' : person.gramps_id,
-                                         'hand' : event_handle})
-                        make_unknown(event_handle,
-                                self.explanation.handle, self.class_event,
-                                self.commit_event, self.trans)
-                        self.invalid_events.add(key)
-                if none_handle:
-                    person.set_event_ref_list(newlist)
-                    self.db.commit_person(person, self.trans)
-            elif not isinstance(person.get_event_ref_list(), list):
-                # event_list is None or other garbage
-                logging.warning('    FAIL: the person "%s" has an event ref list'
-                    ' which is invalid' % (person.gramps_id))
-                person.set_event_ref_list([])
-                self.db.commit_person(person, self.trans)
-                self.invalid_events.add(key)
-
-        for bkey in self.db.get_family_handles():
-            key = handle2internal(bkey)
-            self.progress.step()
-            family = self.db.get_family_from_handle(key)
-            if family.get_event_ref_list():
-                none_handle = False
-                newlist = []
-                for event_ref in family.get_event_ref_list():
-                    newlist.append(event_ref)
-                    if event_ref.ref is None:
-                        none_handle = True
-                        event_ref.ref = create_id()
-                    event_handle = event_ref.ref
-                    event = self.db.get_event_from_handle(event_handle)
-                    if not event:
-                        # The event referenced by the family
-                        # does not exist in the database
-                        logging.warning('    FAIL: the family "%(gid)s" refers '
-                                        'to an event "%(hand)s" which does not '
-                                        'exist in the database' % 
-                                        {'gid' : family.gramps_id,
-                                         'hand' : event_handle})
-                        make_unknown(event_handle, self.explanation,
-                                self.class_event, self.commit_event, self.trans)
-                        self.invalid_events.add(key)
-                if none_handle:
-                    family.set_event_ref_list(newlist)
-                    self.db.commit_family(family, self.trans)
-            elif not isinstance(family.get_event_ref_list(), list):
-                # event_list is None or other garbage
-                logging.warning('    FAIL: the family "%s" has an event ref list'
-                    ' which is invalid' % (family.gramps_id))
-                family.set_event_ref_list([])
-                self.db.commit_family(family, self.trans)
-                self.invalid_events.add(key)
+        elif not isinstance(family.get_event_ref_list(), list):
+            # event_list is None or other garbage
+            logging.warning('    FAIL: the family "%s" has an event ref list'
+                ' which is invalid' % (family.gramps_id))
+            family.set_event_ref_list([])
+            self.invalid_events.add(key)
+            fixed = True
+        return fixed
+
+    def check_references(self):
+        """
+        Look for references to missing objects, for references without
+        handle and for events of the wrong type, in a single sweep over each
+        table, and create the missing objects.
 
-        if len (self.invalid_birth_events) + len(self.invalid_death_events) +\
+        The tables are read with a cursor, so the repaired objects are only
+        committed once the sweep of their table is over, and the missing
+        objects are created once all the tables have been looked at.
+        """
+        # objects with references to check, and the classes of the
+        # references checked by get_referenced_handles_recursively
+        sweeps = (
+            ('Person', Person, self.db.commit_person,
+             ('Citation', 'MediaObject', 'Note', 'Tag'),
+             self._check_person_refs),
+            ('Family', Family, self.db.commit_family,
+             ('Citation', 'MediaObject', 'Note', 'Tag'),
+             self._check_family_refs),
+            ('Event', Event, self.db.commit_event,
+             ('Citation', 'MediaObject', 'Note'),
+             self._check_event_refs),
+            ('Place', Place, self.db.commit_place,
+             ('Citation', 'MediaObject', 'Note'),
+             None),
+            ('Source', Source, self.db.commit_source,
+             ('MediaObject', 'Note'),
+             self._check_source_refs),
+            ('Citation', Citation, self.db.commit_citation,
+             ('Citation', 'MediaObject', 'Note'),
+             self._check_citation_refs),
+            ('Media', MediaObject, self.db.commit_media_object,
+             ('Citation', 'Note', 'Tag'),
+             None),
+            ('Repository', Repository, self.db.commit_repository,
+             ('Citation', 'Note'),
+             None),
+            ('Note', Note, self.db.commit_note,
+             ('Tag', ),
+             None),
+            )
+        invalid_references = {
+            'Citation' : (self.invalid_citation_references,
+                          'replace_citation_references'),
+            'MediaObject' : (self.invalid_media_references,
+                             'replace_media_references'),
+            'Note' : (self.invalid_note_references,
+                      'replace_note_references'),
+            'Tag' : (self.invalid_tag_references,
+                     'replace_tag_references'),
+            }
+        # the explanation note is added when missing objects are created
+        self.known_handles['Note'][self.explanation.handle] = True
+
+        self.progress.set_pass(_('Looking for reference problems'),
+                               sum(self._count(sweep[0]) for sweep in sweeps))
+        logging.info('Looking for reference problems')
+
+        for (table, obj_class, commit_func, ref_classes,
+             check_func) in sweeps:
+            fixed_objects = []
+            for handle, data in self._records(table):
+                self.progress.step()
+                obj = obj_class()
+                obj.unserialize(data)
+                replaced = set()
+                for (class_name, ref) in \
+                        obj.get_referenced_handles_recursively():
+                    if class_name not in ref_classes:
+                        continue
+                    (invalid, replace) = invalid_references[class_name]
+                    if ref is None:
+                        # all the references without handle of the class
+                        # are given the same new handle
+                        if class_name not in replaced:
+                            new_handle = create_id()
+                            getattr(obj, replace)(None, new_handle)
+                            invalid.add(new_handle)
+                            replaced.add(class_name)
+                    elif not self._has_handle(class_name, ref):
+                        invalid.add(ref)
+                fixed = bool(replaced)
+                if check_func is not None and check_func(handle, obj):
+                    fixed = True
+                if fixed:
+                    fixed_objects.append(obj)
+            # we cannot commit under the cursor
+            for obj in fixed_objects:
+                commit_func(obj, self.trans)
+            for event in self.fixed_events:
+                self.db.commit_event(event, self.trans)
+            del self.fixed_events[:]
+
+        self.create_missing_objects()
+
+        if len(self.invalid_birth_events) + len(self.invalid_death_events) +\
                 len(self.invalid_events) == 0:
             logging.info('    OK: no event problems found')
+        for (invalid, text) in (
+                (self.invalid_person_references, 'person'),
+                (self.invalid_family_references, 'family'),
+                (self.invalid_place_references, 'place'),
+                (self.invalid_source_references, 'source'),
+                (self.invalid_citation_references, 'citation'),
+                (self.invalid_repo_references, 'repository'),
+                (self.invalid_media_references, 'media'),
+                (self.invalid_note_references, 'note'),
+                (self.invalid_tag_references, 'tag')):
+            if len(invalid) == 0:
+                logging.info('    OK: no %s reference problems found' % text)
+
+    def _has_handle(self, class_name, handle):
+        """
+        Return True if the object of the class, as named in references, with
+        the handle is in the database. Each handle is looked up once.
+        """
+        known = self.known_handles[class_name]
+        if handle not in known:
+            known[handle] = getattr(self.db, _HAS_FUNCS[class_name])(handle)
+        return known[handle]
 
-    def check_person_references(self):
-        plist = self.db.get_person_handles()
-        
-        self.progress.set_pass(_('Looking for person reference problems'),
-                               len(plist))
-        logging.info('Looking for person reference problems')
-        
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            none_handle = False
-            newlist = []
-            person = self.db.get_person_from_handle(key)
-            for pref in person.get_person_ref_list():
-                newlist.append(pref)
-                if pref.ref is None:
-                    none_handle = True
-                    pref.ref = create_id()
-                p = self.db.get_person_from_handle( pref.ref)
-                if not p:
-                    # The referenced person does not exist in the database
-                    make_unknown(pref.ref, self.explanation.handle,
-                            self.class_person, self.commit_person, self.trans)
-                    self.invalid_person_references.add(key)
-            if none_handle:
-                person.set_person_ref_list(newlist)
-                self.db.commit_person(person, self.trans)
-
-        if len (self.invalid_person_references) == 0:
-            logging.info('    OK: no event problems found')
-
-    def check_family_references(self):
-        plist = self.db.get_person_handles()
-
-        self.progress.set_pass(_('Looking for family reference problems'),
-                               len(plist))
-        logging.info('Looking for family reference problems')
-
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            person = self.db.get_person_from_handle(key)
-            for ordinance in person.get_lds_ord_list():
-                family_handle = ordinance.get_family_handle()
-                if family_handle:
-                    family = self.db.get_family_from_handle(family_handle)
-                    if not family:
-                        # The referenced family does not exist in the database
-                        make_unknown(family_handle,
-                                self.explanation.handle, self.class_family,
-                                self.commit_family, self.trans, db=self.db)
-                        self.invalid_family_references.add(key)
-
-        if len (self.invalid_family_references) == 0:
-            logging.info('    OK: no event problems found')
-
-    def check_repo_references(self):
-        slist = self.db.get_source_handles()
-        
-        self.progress.set_pass(_('Looking for repository reference problems'),
-                               len(slist))
-        logging.info('Looking for repository reference problems')
-        
-        for bkey in slist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            none_handle = False
-            newlist = []
-            source = self.db.get_source_from_handle(key)
-            for reporef in source.get_reporef_list():
-                newlist.append(reporef)
-                if reporef.ref is None:
-                    none_handle = True
-                    reporef.ref = create_id()
-                r = self.db.get_repository_from_handle(reporef.ref)
-                if not r:
-                    # The referenced repository does not exist in the database
-                    make_unknown(reporef.ref, self.explanation.handle,
-                            self.class_repo, self.commit_repo, self.trans)
-                    self.invalid_repo_references.add(key)
-            if none_handle:
-                source.set_reporef_list(newlist);
-                self.db.commit_source(source, self.trans)
-
-        if len (self.invalid_repo_references) == 0:
-            logging.info('    OK: no repository reference problems found')
-
-    def check_place_references(self):
-        plist = self.db.get_person_handles()
-        flist = self.db.get_family_handles()
-        elist = self.db.get_event_handles()
-        self.progress.set_pass(_('Looking for place reference problems'),
-                               len(elist)+len(plist)+len(flist))
-        logging.info('Looking for place reference problems')
-        
-        # check persons -> the LdsOrd references a place
-        for bkey in plist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            person = self.db.get_person_from_handle(key)
-            for ordinance in person.lds_ord_list:
-                place_handle = ordinance.get_place_handle()
-                if place_handle:
-                    place = self.db.get_place_from_handle(place_handle)
-                    if not place:
-                        # The referenced place does not exist in the database
-                        # This is tested by TestcaseGenerator person "Broken17"
-                        # This is tested by TestcaseGenerator person "Broken18"
-                        make_unknown(place_handle,
-                                self.explanation.handle, self.class_place,
-                                self.commit_place, self.trans)
-                        logging.warning('    FAIL: the person "%(gid)s" refers '
-                                        'to an LdsOrd place "%(hand)s" which '
-                                        'does not exist in the database' % 
-                                        {'gid' : person.gramps_id,
-                                         'hand' : place_handle})
-                        self.invalid_place_references.add(key)
-        # check families -> the LdsOrd references a place
-        for bkey in flist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            family = self.db.get_family_from_handle(key)
-            for ordinance in family.lds_ord_list:
-                place_handle = ordinance.get_place_handle()
-                if place_handle:
-                    place = self.db.get_place_from_handle(place_handle)
-                    if not place:
-                        # The referenced place does not exist in the database
-                        make_unknown(place_handle,
-                                self.explanation.handle, self.class_place,
-                                self.commit_place, self.trans)
-                        logging.warning('    FAIL: the family "%(gid)s" refers '
-                                        'to an LdsOrd place "%(hand)s" which '
-                                        'does not exist in the database' % 
-                                        {'gid' : family.gramps_id,
-                                         'hand' : place_handle})
-                        self.invalid_place_references.add(key)
-        # check events
-        for bkey in elist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            event = self.db.get_event_from_handle(key)
-            place_handle = event.get_place_handle()
-            if place_handle:
-                place = self.db.get_place_from_handle(place_handle)
-                if not place:
-                    # The referenced place does not exist in the database
-                    make_unknown(place_handle,
-                            self.explanation.handle, self.class_place,
-                            self.commit_place, self.trans)
-                    logging.warning('    FAIL: the event "%(gid)s" refers '
-                                    'to an LdsOrd place "%(hand)s" which '
-                                    'does not exist in the database' % 
-                                    {'gid' : event.gramps_id,
-                                     'hand' : place_handle})
-                    self.invalid_place_references.add(key)
-
-        if len (self.invalid_place_references) == 0:
-            logging.info('    OK: no place reference problems found')
-
-    def check_citation_references(self):
-        known_handles = [handle2internal(key) for key in 
-                                self.db.get_citation_handles()]
-
-        total = (
-                self.db.get_number_of_people() +
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() +
-                self.db.get_number_of_places() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_repositories()
-                )
-
-        self.progress.set_pass(_('Looking for citation reference problems'),
-                               total)
-        logging.info('Looking for citation reference problems')
-
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_citation_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_citation_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_citation_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_citation_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.repository_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.repository_map[bhandle]
-            repository = Repository()
-            repository.unserialize(info)
-            handle_list = repository.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        repository.replace_citation_references(None, new_handle)
-                        self.db.commit_repository(repository, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_citation_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
-
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Citation':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_citation_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_citation_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_citation_references.add(item[1])
+    def _check_missing(self, class_name, handle):
+        """
+        Return True, and remember the handle for create_missing_objects,
+        when the handle refers to a missing object of the class.
+        """
+        if self._has_handle(class_name, handle):
+            return False
+        self.missing_handles[class_name].add(handle)
+        return True
+
+    def _check_lds_places(self, key, obj, obj_type):
+        for ordinance in obj.get_lds_ord_list():
+            place_handle = ordinance.get_place_handle()
+            if place_handle and self._check_missing('Place', place_handle):
+                # This is tested by TestcaseGenerator person "Broken17"
+                # This is tested by TestcaseGenerator person "Broken18"
+                logging.warning('    FAIL: the %(type)s "%(gid)s" refers '
+                                'to an LdsOrd place "%(hand)s" which '
+                                'does not exist in the database' % 
+                                {'type' : obj_type, 'gid' : obj.gramps_id,
+                                 'hand' : place_handle})
+                self.invalid_place_references.add(key)
+
+    def _check_person_refs(self, key, person):
+        fixed = self._check_person_events(key, person)
+        for pref in person.get_person_ref_list():
+            if pref.ref is None:
+                pref.ref = create_id()
+                fixed = True
+            if self._check_missing('Person', pref.ref):
+                # The referenced person does not exist in the database
+                self.invalid_person_references.add(key)
+        for ordinance in person.get_lds_ord_list():
+            family_handle = ordinance.get_family_handle()
+            if family_handle and self._check_missing('Family', family_handle):
+                # The referenced family does not exist in the database
+                self.invalid_family_references.add(key)
+        self._check_lds_places(key, person, 'person')
+        return fixed
+
+    def _check_family_refs(self, key, family):
+        self._check_lds_places(key, family, 'family')
+        return self._check_family_events(key, family)
+
+    def _check_event_refs(self, key, event):
+        place_handle = event.get_place_handle()
+        if place_handle and self._check_missing('Place', place_handle):
+            # The referenced place does not exist in the database
+            logging.warning('    FAIL: the event "%(gid)s" refers '
+                            'to a place "%(hand)s" which '
+                            'does not exist in the database' % 
+                            {'gid' : event.gramps_id,
+                             'hand' : place_handle})
+            self.invalid_place_references.add(key)
+        return False
+
+    def _check_source_refs(self, key, source):
+        fixed = False
+        for reporef in source.get_reporef_list():
+            if reporef.ref is None:
+                reporef.ref = create_id()
+                fixed = True
+            if self._check_missing('Repository', reporef.ref):
+                # The referenced repository does not exist in the database
+                self.invalid_repo_references.add(key)
+        return fixed
+
+    def _check_citation_refs(self, key, citation):
+        fixed = False
+        source_handle = citation.get_reference_handle()
+        if source_handle is None:
+            source_handle = create_id()
+            citation.set_reference_handle(source_handle)
+            fixed = True
+        if source_handle and self._check_missing('Source', source_handle):
+            # The referenced source does not exist in the database
+            logging.warning('    FAIL: the citation "%(gid)s" refers '
+                            'to source "%(hand)s" which does not exist '
+                            'in the database' %
+                            {'gid' : citation.gramps_id,
+                             'hand' : source_handle})
+            self.invalid_source_references.add(key)
+        return fixed
+
+    def create_missing_objects(self):
+        """
+        Create the objects found missing by check_references, with the
+        explanation note when some are.
+        """
+        explanation = self.explanation.handle
+        for (class_name, class_func, commit_func) in (
+                ('Person', self.class_person, self.commit_person),
+                ('Place', self.class_place, self.commit_place),
+                ('Source', self.class_source, self.commit_source),
+                ('Repository', self.class_repo, self.commit_repo)):
+            for bad_handle in self.missing_handles[class_name]:
+                make_unknown(bad_handle, explanation, class_func,
+                             commit_func, self.trans)
+        for bad_handle in self.missing_handles['Family']:
+            make_unknown(bad_handle, explanation, self.class_family,
+                         self.commit_family, self.trans, db=self.db)
+        for bad_handle in self.missing_handles['Event']:
+            if bad_handle in self.event_types:
+                make_unknown(bad_handle, explanation, self.class_event,
+                             self.commit_event, self.trans,
+                             type=self.event_types[bad_handle])
+            else:
+                make_unknown(bad_handle, explanation, self.class_event,
+                             self.commit_event, self.trans)
 
         for bad_handle in self.invalid_citation_references:
-            created = make_unknown(bad_handle, self.explanation.handle,
+            created = make_unknown(bad_handle, explanation,
                         self.class_citation, self.commit_citation, self.trans,
                         source_class_func=self.class_source,
                         source_commit_func=self.commit_source,
                         source_class_arg=create_id())
             self.invalid_source_references.add(created[0].handle)
 
-        if len(self.invalid_citation_references) == 0:
-            logging.info('   OK: no citation reference problems found')
-
-    def check_source_references(self):
-        clist = self.db.get_citation_handles()
-        self.progress.set_pass(_('Looking for source reference problems'),
-                               len(clist))
-        logging.info('Looking for source reference problems')
-
-        for bkey in clist:
-            key = handle2internal(bkey)
-            self.progress.step()
-            citation = self.db.get_citation_from_handle(key)
-            source_handle = citation.get_reference_handle()
-            if source_handle is None:
-                source_handle = create_id()
-                citation.set_reference_handle(source_handle)
-                self.db.commit_citation(citation, self.trans)
-            if source_handle:
-                source = self.db.get_source_from_handle(source_handle)
-                if not source:
-                    # The referenced source does not exist in the database
-                    make_unknown(source_handle, self.explanation.handle,
-                            self.class_source, self.commit_source, self.trans)
-                    logging.warning('    FAIL: the citation "%(gid)s" refers '
-                                    'to source "%(hand)s" which does not exist '
-                                    'in the database' %
-                                    {'gid' : citation.gramps_id,
-                                     'hand' : source_handle})
-                    self.invalid_source_references.add(key)
-        if len(self.invalid_source_references) == 0:
-            logging.info('   OK: no source reference problems found')
-
-    def check_media_references(self):
-        known_handles = [handle2internal(key) for key in 
-                            self.db.get_media_object_handles(False)]
-
-        total = (
-                self.db.get_number_of_people() + 
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() + 
-                self.db.get_number_of_places() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources()
-                )
-
-        self.progress.set_pass(_('Looking for media object reference problems'),
-                               total)
-        logging.info('Looking for media object reference problems')
-        
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_media_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_media_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_media_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-        
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_media_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-        
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_media_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
-        for bhandle in self.db.source_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.source_map[bhandle]
-            source = Source()
-            source.unserialize(info)
-            handle_list = source.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'MediaObject':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        source.replace_media_references(None, new_handle)
-                        self.db.commit_source(source, self.trans)
-                        self.invalid_media_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_media_references.add(item[1])
-
         for bad_handle in self.invalid_media_references:
-            make_unknown(bad_handle, self.explanation.handle,
+            make_unknown(bad_handle, explanation,
                                self.class_object, self.commit_object, self.trans)
 
-        if len (self.invalid_media_references) == 0:
-            logging.info('    OK: no media reference problems found')
-
-    def check_note_references(self):
-        # Here I assume check note_references runs after all the next checks.
         missing_references = (len(self.invalid_person_references) +
                 len(self.invalid_family_references) +
                 len(self.invalid_birth_events) +
@@ -1618,265 +1456,19 @@ class CheckIntegrity(object):
                 len(self.invalid_citation_references) +
                 len(self.invalid_source_references) +
                 len(self.invalid_repo_references) +
-                len(self.invalid_media_references))
+                len(self.invalid_media_references) +
+                len(self.invalid_note_references))
         if missing_references:
             self.db.add_note(self.explanation, self.trans, set_gid=True)
 
-        known_handles = [handle2internal(key) for key in 
-                                    self.db.get_note_handles()]
-        bad_handles = []
-
-        total = (
-                self.db.get_number_of_people() + 
-                self.db.get_number_of_families() +
-                self.db.get_number_of_events() + 
-                self.db.get_number_of_places() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_citations() +
-                self.db.get_number_of_sources() +
-                self.db.get_number_of_repositories()
-                )
-
-        self.progress.set_pass(_('Looking for note reference problems'),
-                               total)
-        logging.info('Looking for note reference problems')
-        
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_note_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_note_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.place_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.place_map[bhandle]
-            place = Place()
-            place.unserialize(info)
-            handle_list = place.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        place.replace_note_references(None, new_handle)
-                        self.db.commit_place(place, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.citation_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.citation_map[bhandle]
-            citation = Citation()
-            citation.unserialize(info)
-            handle_list = citation.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        citation.replace_note_references(None, new_handle)
-                        self.db.commit_citation(citation, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.source_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.source_map[bhandle]
-            source = Source()
-            source.unserialize(info)
-            handle_list = source.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        source.replace_note_references(None, new_handle)
-                        self.db.commit_source(source, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_note_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.event_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.event_map[bhandle]
-            event = Event()
-            event.unserialize(info)
-            handle_list = event.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        event.replace_note_references(None, new_handle)
-                        self.db.commit_event(event, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
-        for bhandle in self.db.repository_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.repository_map[bhandle]
-            repo = Repository()
-            repo.unserialize(info)
-            handle_list = repo.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Note':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        repo.replace_note_references(None, new_handle)
-                        self.db.commit_repository(repo, self.trans)
-                        self.invalid_note_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_note_references.add(item[1])
-
         for bad_handle in self.invalid_note_references:
-            make_unknown(bad_handle, self.explanation.handle,
+            make_unknown(bad_handle, explanation,
                                self.class_note, self.commit_note, self.trans)
 
-        if len (self.invalid_note_references) == 0:
-            logging.info('    OK: no note reference problems found')
-        else:
-            if not missing_references:
-                self.db.add_note(self.explanation, self.trans, set_gid=True)
-
-    def check_tag_references(self):
-        known_handles = [handle2internal(key) for key in 
-                                    self.db.get_tag_handles()]
-
-        total = (
-                self.db.get_number_of_people() +
-                self.db.get_number_of_families() +
-                self.db.get_number_of_media_objects() +
-                self.db.get_number_of_notes()
-                )
-
-        self.progress.set_pass(_('Looking for tag reference problems'),
-                               total)
-        logging.info('Looking for tag reference problems')
-
-        for bhandle in self.db.person_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.person_map[bhandle]
-            person = Person()
-            person.unserialize(info)
-            handle_list = person.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        person.replace_tag_references(None, new_handle)
-                        self.db.commit_person(person, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
-        for bhandle in self.db.family_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.family_map[bhandle]
-            family = Family()
-            family.unserialize(info)
-            handle_list = family.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        family.replace_tag_references(None, new_handle)
-                        self.db.commit_family(family, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
-        for bhandle in self.db.media_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.media_map[bhandle]
-            obj = MediaObject()
-            obj.unserialize(info)
-            handle_list = obj.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        obj.replace_tag_references(None, new_handle)
-                        self.db.commit_media_object(obj, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
-        for bhandle in self.db.note_map.keys():
-            handle = handle2internal(bhandle)
-            self.progress.step()
-            info = self.db.note_map[bhandle]
-            note = Note()
-            note.unserialize(info)
-            handle_list = note.get_referenced_handles_recursively()
-            for item in handle_list:
-                if item[0] == 'Tag':
-                    if item[1] is None:
-                        new_handle = create_id()
-                        note.replace_tag_references(None, new_handle)
-                        self.db.commit_note(note, self.trans)
-                        self.invalid_tag_references.add(new_handle)
-                    elif item[1] not in known_handles:
-                        self.invalid_tag_references.add(item[1])
-
         for bad_handle in self.invalid_tag_references:
             make_unknown(bad_handle, None, self.class_tag,
                                self.commit_tag, self.trans)
 
-        if len(self.invalid_tag_references) == 0:
-            logging.info('   OK: no tag reference problems found')
-
     def class_person(self, handle):
         person = Person()
         person.set_handle(handle)
@@ -2283,3 +1875,15 @@ class CheckOptions(tool.ToolOptions):
 
     def __init__(self, name, person_id=None):
         tool.ToolOptions.__init__(self, name, person_id)
+
+        # Options specific for this tool
+        self.options_dict = {
+            'incremental' : 0,
+        }
+        self.options_help = {
+            'incremental' : ("=0/1",
+                             "Whether to only check the objects changed "
+                             "since the last check that found no problem",
+                             ["Check all objects", "Check changed objects"],
+                             True),
+        }
@@ -0,0 +1,137 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+# $Id$
+
+"""Tools/Family Tree Repair/Compact Family Tree"""
+
+#-------------------------------------------------------------------------
+#
+# python modules
+#
+#-------------------------------------------------------------------------
+from __future__ import print_function
+
+from gramps.gen.const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+
+#------------------------------------------------------------------------
+#
+# Set up logging
+#
+#------------------------------------------------------------------------
+import logging
+log = logging.getLogger(".Compact")
+
+#-------------------------------------------------------------------------
+#
+# GRAMPS modules
+#
+#-------------------------------------------------------------------------
+from gramps.gui.plug import tool
+from gramps.gui.dialog import InfoDialog
+from gramps.gen.updatecallback import UpdateCallback
+from gramps.gen.db.write import DbBsddb, tuned_cache_size
+
+#-------------------------------------------------------------------------
+#
+# Report helpers
+#
+#-------------------------------------------------------------------------
+def _format_size(size):
+    return _("%.1f MB") % (size / 1048576.0)
+
+def _format_fill(fill):
+    if fill is None:
+        return "-"
+    return "%d%%" % round(100 * fill)
+
+def format_report(results, cache_size=None):
+    """
+    Return the text reporting the page fill and the size of the database
+    files, as returned by the compact method of the database, and the
+    reclaimed space.
+    """
+    lines = ["%-24s %7s %7s %10s %10s" % (_("File"), _("Fill"), _("after"),
+                                          _("Size"), _("after"))]
+    for (name, fill, new_fill, size, new_size) in results:
+        lines.append("%-24s %7s %7s %10s %10s" % (name, _format_fill(fill),
+                     _format_fill(new_fill), _format_size(size),
+                     _format_size(new_size)))
+    reclaimed = sum(size - new_size for (name, fill, new_fill, size,
+                                         new_size) in results)
+    lines.append("")
+    lines.append(_("Reclaimed space: %s") % _format_size(reclaimed))
+    if cache_size is not None:
+        lines.append(_("Database cache from the next load: %s") %
+                     _format_size(cache_size))
+    return "\n".join(lines)
+
+#-------------------------------------------------------------------------
+#
+# runTool
+#
+#-------------------------------------------------------------------------
+class Compact(tool.Tool, UpdateCallback):
+
+    def __init__(self, dbstate, user, options_class, name, callback=None):
+        uistate = user.uistate
+
+        tool.Tool.__init__(self, dbstate, options_class, name)
+
+        if self.db.readonly:
+            return
+
+        if uistate:
+            self.callback = uistate.pulse_progressbar
+            uistate.set_busy_cursor(True)
+            uistate.progress.show()
+            uistate.push_message(dbstate, _("Compacting the family tree..."))
+
+            UpdateCallback.__init__(self, self.callback)
+            self.set_total(100)
+            results = self.db.compact(self.update)
+            self.reset()
+
+            uistate.set_busy_cursor(False)
+            uistate.progress.hide()
+            InfoDialog(_("Family tree compacted"), self.__report(results),
+                       parent=uistate.window, monospaced=True)
+        else:
+            print("Compacting the family tree...")
+            results = self.db.compact()
+            print(self.__report(results))
+
+    def __report(self, results):
+        cache_size = None
+        if isinstance(self.db, DbBsddb):
+            cache_size = tuned_cache_size(self.db.get_save_path())
+        return format_report(results, cache_size)
+
+#------------------------------------------------------------------------
+#
+#
+#
+#------------------------------------------------------------------------
+class CompactOptions(tool.ToolOptions):
+    """
+    Defines options and provides handling interface.
+    """
+
+    def __init__(self, name, person_id=None):
+        tool.ToolOptions.__init__(self, name, person_id)
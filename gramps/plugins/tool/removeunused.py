@@ -276,9 +276,9 @@ class RemoveUnused(tool.Tool, ManagedWindow, UpdateCallback):
 
             with cursor_func() as cursor:
                 self.set_total(total_func())
-                fbh = db.find_backlink_handles
+                ref_count = db.get_reference_count
                 for handle, data in cursor:
-                    if not any(h for h in fbh(handle)):
+                    if not ref_count(handle):
                         self.add_results((the_type, handle2internal(handle), 
                                           data))
                     self.update()
@@ -296,6 +296,29 @@ optionclass = 'RebuildOptions',
 tool_modes = [TOOL_MODE_GUI, TOOL_MODE_CLI]
   )
 
+#------------------------------------------------------------------------
+#
+# Compact Family Tree
+#
+#------------------------------------------------------------------------
+
+register(TOOL, 
+id    = 'compact',
+name  = _("Compact Family Tree"),
+description =  _("Gives the free space of the family tree files back to "
+                 "the file system and reports the fill of their pages"),
+version = '1.0',
+gramps_target_version = '4.1',
+status = STABLE,
+fname = 'compact.py',
+authors = ["The Gramps project"],
+authors_email = ["http://gramps-project.org"],
+category = TOOL_DBFIX,
+toolclass = 'Compact',
+optionclass = 'CompactOptions',
+tool_modes = [TOOL_MODE_GUI, TOOL_MODE_CLI]
+  )
+
 #------------------------------------------------------------------------
 #
 # Rebuild Reference Maps
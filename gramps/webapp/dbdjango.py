@@ -586,6 +586,12 @@ class DbDjango(DbWriteBase, DbReadBase):
     def get_mediapath(self):
         return None
 
+    def get_check_time(self):
+        return None
+
+    def get_commit_time(self):
+        return None
+
     def get_name_group_keys(self):
         return []
 
@@ -938,34 +944,34 @@ class DbDjango(DbWriteBase, DbReadBase):
     def get_number_of_repositories(self):
         return self.dji.Repository.count()
 
-    def get_place_cursor(self):
+    def get_place_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Place, self.get_raw_place_data).iter()
 
-    def get_person_cursor(self):
+    def get_person_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Person, self.get_raw_person_data).iter()
 
-    def get_family_cursor(self):
+    def get_family_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Family, self.get_raw_family_data).iter()
 
-    def get_event_cursor(self):
+    def get_event_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Event, self.get_raw_event_data).iter()
 
-    def get_citation_cursor(self):
+    def get_citation_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Citation, self.get_raw_citation_data).iter()
 
-    def get_source_cursor(self):
+    def get_source_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Source, self.get_raw_source_data).iter()
 
-    def get_note_cursor(self):
+    def get_note_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Note, self.get_raw_note_data).iter()
 
-    def get_tag_cursor(self):
+    def get_tag_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Tag, self.get_raw_tag_data).iter()
 
-    def get_repository_cursor(self):
+    def get_repository_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Repository, self.get_raw_repository_data).iter()
 
-    def get_media_cursor(self):
+    def get_media_cursor(self, *args, **kwargs):
         return Cursor(self.dji.Media, self.get_raw_object_data).iter()
 
     def has_gramps_id(self, obj_key, gramps_id):
@@ -1047,6 +1053,9 @@ class DbDjango(DbWriteBase, DbReadBase):
     def set_mediapath(self, mediapath):
         pass
 
+    def set_check_time(self, timestamp):
+        pass
+
     def get_raw_person_data(self, handle):
         try:
             return self.dji.get_person(self.dji.Person.get(handle=handle))